@@ -7,6 +7,8 @@ import tempfile
 import traceback
 import zipfile
 import io
+import json
+from contextlib import nullcontext
 
 # Adicionar o diretório src ao path para imports
 current_dir = Path(__file__).parent
@@ -35,11 +37,14 @@ except ImportError:
 # Importar NF-e Validator (novo módulo)
 try:
     from nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
-    from nfe_validator.domain.services.federal_validators import (
-        NCMValidator, PISCOFINSValidator, CFOPValidator, TotalsValidator
-    )
-    from nfe_validator.domain.services.state_validators import SPValidator, PEValidator
+    from nfe_validator.domain.services.aggregation import ValidationAggregate
     from nfe_validator.infrastructure.validators.report_generator import ReportGenerator
+    from nfe_validator.infrastructure.validators.report_writer import open_report_writer
+    from nfe_validator.infrastructure.validators.parallel_engine import ParallelValidationEngine
+    from nfe_validator.infrastructure.persistence.result_store import ValidationResultStore
+    from nfe_validator.infrastructure.persistence.upload_cache import NormalizedUploadCache
+    from nfe_validator.infrastructure.validators.incremental import IncrementalValidator
+    from nfe_validator.profiling import RunProfiler
     from repositories.fiscal_repository import FiscalRepository
     NFE_VALIDATOR_AVAILABLE = True
 except ImportError:
@@ -355,155 +360,61 @@ def preprocess_csv_data(uploaded_file):
         st.error(f"❌ Erro no pré-processamento: {str(e)}")
         return None, None, None
 
-def extract_csv_files_from_zip(zip_file):
-    """Extrair e listar arquivos CSV de um ZIP"""
-    try:
-        with zipfile.ZipFile(io.BytesIO(zip_file.getvalue()), 'r') as zip_ref:
-            # Listar todos os arquivos no ZIP
-            all_files = zip_ref.namelist()
-
-            # Filtrar arquivos CSV com lógica robusta
-            csv_files = []
-            for file_path in all_files:
-                # Verificações específicas
-                is_csv = file_path.lower().endswith('.csv')
-                is_not_directory = not file_path.endswith('/')
-                is_not_hidden = not any(part.startswith('.') for part in file_path.split('/'))
-                is_not_macos = not file_path.startswith('__MACOSX/')
-                has_content = True
-
-                try:
-                    # Verificar se o arquivo tem conteúdo
-                    file_info = zip_ref.getinfo(file_path)
-                    has_content = file_info.file_size > 0
-                except:
-                    has_content = False
-
-                if is_csv and is_not_directory and is_not_hidden and is_not_macos and has_content:
-                    csv_files.append(file_path)
-
-            if not csv_files:
-                return None, "❌ Nenhum arquivo CSV válido encontrado no ZIP"
-
-            # Extrair informações dos arquivos CSV
-            csv_info = []
-            for csv_file in csv_files:
-                try:
-                    file_info = zip_ref.getinfo(csv_file)
-                    file_content = zip_ref.read(csv_file)
-
-                    csv_info.append({
-                        'name': csv_file.split('/')[-1],  # Apenas o nome do arquivo, sem caminho
-                        'full_path': csv_file,  # Caminho completo para referência
-                        'size': round(file_info.file_size / 1024, 2),  # KB
-                        'content': file_content
-                    })
-
-                except Exception as e:
-                    continue
-
-            return csv_info, f"✅ {len(csv_info)} arquivo(s) CSV processado(s) com sucesso"
-
-    except Exception as e:
-        return None, f"❌ Erro ao processar ZIP: {str(e)}"
+def load_zip_dataset(zip_file):
+    """
+    Unir todos os CSVs de um ZIP em um único dataset (EDA)
 
-def load_csv_from_zip_content(csv_content, filename, agent):
-    """Carregar CSV específico do conteúdo extraído do ZIP"""
-    try:
-        # Criar arquivo temporário com o conteúdo CSV
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp_file:
-            tmp_file.write(csv_content)
-            tmp_file_path = tmp_file.name
+    Os CSVs são lidos direto do ZIP e decodificados em paralelo
+    (BatchIngestor); a coluna '_source_file' identifica a origem de cada linha.
 
-        try:
-            # Usar pandas para ler diretamente
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            separators = [',', ';', '\t']
+    Args:
+        zip_file: Upload do ZIP
 
-            data = None
-            for encoding in encodings:
-                for sep in separators:
-                    try:
-                        data = pd.read_csv(tmp_file_path, encoding=encoding, sep=sep, low_memory=False)
-                        if data.shape[1] > 1:  # Valid if has more than 1 column
-                            break
-                    except:
-                        continue
-                if data is not None and data.shape[1] > 1:
-                    break
+    Returns:
+        Tupla (DataFrame unificado ou None, mensagem, quantidade de CSVs)
+    """
+    from nfe_validator.infrastructure.parsers.batch_ingestion import BatchIngestor
 
-            return data
-        finally:
-            # Limpar arquivo temporário
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
 
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar {filename}: {str(e)}")
-        return None
+    def _on_progress(done, total):
+        status_text.text(f"📄 Decodificando CSVs do ZIP: {done}/{total}")
+        progress_bar.progress(done / total if total else 1.0)
 
-def merge_multiple_csvs(csv_files_info):
-    """Unir múltiplos CSVs em um único dataset"""
+    ingestor = BatchIngestor()
     try:
-        all_dataframes = []
-        file_info = []
-
-        st.info("🔄 Processando e unindo todos os arquivos CSV...")
-
-        for csv_info in csv_files_info:
-            st.write(f"📄 Processando: {csv_info['name']}")
-
-            # Carregar CSV individual
-            df = load_csv_from_zip_content(csv_info['content'], csv_info['name'], None)
-
-            if df is not None:
-                # Adicionar coluna identificadora do arquivo de origem
-                df['_source_file'] = csv_info['name']
-                all_dataframes.append(df)
-                file_info.append(f"{csv_info['name']} ({len(df)} linhas)")
-                st.success(f"✅ {csv_info['name']}: {len(df)} linhas, {len(df.columns)} colunas")
-            else:
-                st.warning(f"⚠️ Falha ao processar {csv_info['name']}")
-
-        if not all_dataframes:
-            return None, "❌ Nenhum arquivo CSV pôde ser processado"
-
-        # Verificar se todos têm estruturas compatíveis
-        st.write("🔍 Verificando compatibilidade de estruturas...")
-
-        first_cols = set(all_dataframes[0].columns) - {'_source_file'}
-        compatible = True
-
-        for i, df in enumerate(all_dataframes[1:], 1):
-            df_cols = set(df.columns) - {'_source_file'}
-            if df_cols != first_cols:
-                st.warning(f"⚠️ {csv_files_info[i]['name']} tem estrutura diferente")
-                compatible = False
-
-        if compatible:
-            # União simples (mesmas colunas)
-            st.write("✅ Estruturas compatíveis - fazendo união simples")
-            merged_df = pd.concat(all_dataframes, ignore_index=True)
-            method = "União (concat)"
-        else:
-            # União com todas as colunas (outer join)
-            st.write("🔄 Estruturas diferentes - fazendo união completa (outer join)")
-            merged_df = pd.concat(all_dataframes, ignore_index=True, sort=False)
-            method = "União completa (outer join)"
-
-        # Informações finais
-        total_rows = len(merged_df)
-        total_cols = len(merged_df.columns)
-        sources = merged_df['_source_file'].value_counts()
-
-        info_message = f"""
+        members = list(ingestor.iter_frames([zip_file], mapped=False, progress_callback=_on_progress))
+    except (zipfile.BadZipFile, OSError) as e:
+        return None, f"❌ Erro ao processar ZIP: {str(e)}", 0
+    finally:
+        progress_bar.empty()
+        status_text.empty()
+
+    if not members:
+        return None, "❌ Nenhum arquivo CSV válido encontrado no ZIP", 0
+
+    frames = [member.frame for member in members if member.error is None]
+    for member in members:
+        if member.error:
+            st.warning(f"⚠️ Falha ao processar {member.name}: {member.error}")
+    if not frames:
+        return None, "❌ Nenhum arquivo CSV pôde ser processado", len(members)
+
+    # Colunas diferentes entre arquivos: união completa (colunas ausentes ficam vazias)
+    columns = {tuple(frame.columns) for frame in frames}
+    method = "União (concat)" if len(columns) == 1 else "União completa (outer join)"
+    merged_df = pd.concat(frames, ignore_index=True, sort=False)
+    sources = merged_df['_source_file'].value_counts(sort=False)
+
+    info_message = f"""
 ✅ **Dataset unificado criado com sucesso!**
 
 📊 **Estatísticas:**
-- **Total de linhas:** {total_rows:,}
-- **Total de colunas:** {total_cols}
+- **Total de linhas:** {len(merged_df):,}
+- **Total de colunas:** {len(merged_df.columns)}
 - **Método:** {method}
-- **Arquivos processados:** {len(all_dataframes)}
+- **Arquivos processados:** {len(frames)}
 
 📁 **Origem dos dados:**
 {chr(10).join([f"- {file}: {count:,} linhas" for file, count in sources.items()])}
@@ -511,10 +422,7 @@ def merge_multiple_csvs(csv_files_info):
 💡 **Nota:** Coluna '_source_file' adicionada para identificar origem dos dados
         """
 
-        return merged_df, info_message
-
-    except Exception as e:
-        return None, f"❌ Erro ao unir arquivos CSV: {str(e)}"
+    return merged_df, info_message, len(members)
 
 def load_and_analyze_data(uploaded_file, agent):
     """Carregar e preparar dados para análise usando pipeline automático"""
@@ -618,191 +526,325 @@ def load_and_analyze_data(uploaded_file, agent):
                 pass
         return None
 
-def _generate_consolidated_markdown_report(nfes_com_problemas, total_critical, total_errors, total_warnings, total_impact):
-    """Gera relatório consolidado em Markdown de todas as NF-es com problemas"""
+def _streamed_report_bytes(format, nfes, generator, compression=None, **kwargs):
+    """
+    Relatório de todas as NF-es gravado NF-e a NF-e (ReportStreamWriter)
+
+    Args:
+        format: 'jsonl', 'json', 'markdown' ou 'csv'
+        nfes: NF-es validadas
+        generator: ReportGenerator
+        compression: None, 'gzip' ou 'zstd'
+
+    Returns:
+        Bytes do arquivo gravado
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        with open_report_writer(format, Path(tmp) / "relatorio", generator, compression, **kwargs) as writer:
+            writer.write_all(nfes)
+        return writer.path.read_bytes()
+
+
+def _set_nfe_results(nfes):
+    """
+    Gravar NF-es validadas em session_state
+
+    Cada resultado recebe uma nova geração (nfe_results_generation): os
+    caches derivados do resultado (agregação, relatórios) usam a geração
+    como chave.
+
+    Args:
+        nfes: NF-es validadas
+    """
+    st.session_state.nfe_results = nfes
+    st.session_state.nfe_results_generation = st.session_state.get('nfe_results_generation', 0) + 1
+
+
+def _consolidated_aggregate(nfes):
+    """
+    Agregação do relatório consolidado (uma vez por resultado de validação)
+
+    Args:
+        nfes: NF-es validadas (st.session_state.nfe_results)
+
+    Returns:
+        ValidationAggregate com as faixas de severidade
+    """
+    key = st.session_state.get('nfe_results_generation')
+    if st.session_state.get('consolidated_aggregate_key') != key:
+        st.session_state.consolidated_aggregate = ValidationAggregate.from_nfes(nfes)
+        st.session_state.consolidated_aggregate_key = key
+    return st.session_state.consolidated_aggregate
+
+
+def _generate_consolidated_markdown_report(aggregate, citation_resolver=None):
+    """Gera relatório consolidado em Markdown (bytes UTF-8) de todas as NF-es com problemas"""
+    buffer = io.BytesIO()
+    out = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    _write_consolidated_markdown_report(out, aggregate, citation_resolver)
+    out.flush()
+    return buffer.getvalue()
+
+
+def _write_consolidated_markdown_report(out, aggregate, citation_resolver=None):
+    """
+    Grava o relatório consolidado em Markdown linha a linha no stream
+
+    Args:
+        out: Stream de texto (arquivo, gzip, StringIO)
+        aggregate: ValidationAggregate do lote (faixas por severidade)
+        citation_resolver: Função código -> citação legal
+    """
     from datetime import datetime
     from nfe_validator.domain.entities.nfe_entity import Severity
 
-    md = []
-    md.append("# 📊 RELATÓRIO CONSOLIDADO - NF-E VALIDATOR")
-    md.append("")
-    md.append(f"**Data de Geração:** {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    md.append(f"**Total de NF-es Analisadas:** {len(nfes_com_problemas)}")
-    md.append("")
-    md.append("---")
-    md.append("")
+    def emit(line):
+        out.write(line)
+        out.write("\n")
+
+    emit("# 📊 RELATÓRIO CONSOLIDADO - NF-E VALIDATOR")
+    emit("")
+    emit(f"**Data de Geração:** {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    emit(f"**Total de NF-es Analisadas:** {aggregate.nfes_with_errors}")
+    emit("")
+    emit("---")
+    emit("")
 
     # Resumo Executivo
-    md.append("## 📈 RESUMO EXECUTIVO")
-    md.append("")
-    md.append(f"- 🔴 **Erros Críticos:** {total_critical}")
-    md.append(f"- 🟠 **Erros:** {total_errors}")
-    md.append(f"- 🟡 **Avisos:** {total_warnings}")
-    md.append(f"- 💰 **Impacto Financeiro Total:** R$ {total_impact:,.2f}")
-    md.append("")
-    md.append("---")
-    md.append("")
-
-    # Organizar por severidade
-    nfes_criticas = [nfe for nfe in nfes_com_problemas if any(e.severity == Severity.CRITICAL for e in nfe.validation_errors)]
-    nfes_erro = [nfe for nfe in nfes_com_problemas if any(e.severity == Severity.ERROR for e in nfe.validation_errors) and nfe not in nfes_criticas]
-    nfes_aviso = [nfe for nfe in nfes_com_problemas if nfe not in nfes_criticas and nfe not in nfes_erro]
+    emit("## 📈 RESUMO EXECUTIVO")
+    emit("")
+    emit(f"- 🔴 **Erros Críticos:** {aggregate.severity_count(Severity.CRITICAL)}")
+    emit(f"- 🟠 **Erros:** {aggregate.severity_count(Severity.ERROR)}")
+    emit(f"- 🟡 **Avisos:** {aggregate.severity_count(Severity.WARNING)}")
+    emit(f"- 💰 **Impacto Financeiro Total:** R$ {aggregate.financial_impact:,.2f}")
+    emit("")
+    emit("---")
+    emit("")
 
     # Seção de Críticos
-    if nfes_criticas:
-        md.append(f"## 🔴 ERROS CRÍTICOS ({len(nfes_criticas)} NF-e(s))")
-        md.append("")
-        md.append("**⚠️ AÇÃO IMEDIATA NECESSÁRIA**")
-        md.append("")
-
-        for nfe in nfes_criticas:
-            md.append(f"### NF-e {nfe.numero}")
-            md.append("")
-            md.append(f"- **Emitente:** {nfe.emitente.razao_social}")
-            md.append(f"- **CNPJ:** {nfe.emitente.cnpj}")
-            md.append(f"- **Chave de Acesso:** `{nfe.chave_acesso}`")
-            md.append(f"- **Impacto Financeiro:** R$ {nfe.get_total_financial_impact():,.2f}")
-            md.append("")
-
-            critical_errors = [e for e in nfe.validation_errors if e.severity == Severity.CRITICAL]
-            md.append(f"**Problemas Detectados:** {len(critical_errors)}")
-            md.append("")
+    if aggregate.critical:
+        emit(f"## 🔴 ERROS CRÍTICOS ({len(aggregate.critical)} NF-e(s))")
+        emit("")
+        emit("**⚠️ AÇÃO IMEDIATA NECESSÁRIA**")
+        emit("")
+
+        for summary in aggregate.critical:
+            nfe = summary.nfe
+            emit(f"### NF-e {nfe.numero}")
+            emit("")
+            emit(f"- **Emitente:** {nfe.emitente.razao_social}")
+            emit(f"- **CNPJ:** {nfe.emitente.cnpj}")
+            emit(f"- **Chave de Acesso:** `{nfe.chave_acesso}`")
+            emit(f"- **Impacto Financeiro:** R$ {summary.financial_impact:,.2f}")
+            emit("")
+
+            critical_errors = summary.errors_of(Severity.CRITICAL)
+            emit(f"**Problemas Detectados:** {len(critical_errors)}")
+            emit("")
 
             for i, error in enumerate(critical_errors, 1):
-                md.append(f"#### {i}. {error.message}")
-                md.append(f"- **Campo:** {error.field}")
-                md.append(f"- **Valor Atual:** {error.actual_value or 'N/A'}")
-                md.append(f"- **Valor Esperado:** {error.expected_value or 'N/A'}")
-                md.append(f"- **Base Legal:** {error.legal_reference or 'N/A'}")
+                emit(f"#### {i}. {error.message}")
+                emit(f"- **Campo:** {error.field}")
+                emit(f"- **Valor Atual:** {error.actual_value or 'N/A'}")
+                emit(f"- **Valor Esperado:** {error.expected_value or 'N/A'}")
+                emit(f"- **Base Legal:** {error.resolve_legal_reference(citation_resolver) or 'N/A'}")
                 if error.financial_impact:
-                    md.append(f"- **Impacto Financeiro:** R$ {error.financial_impact:,.2f}")
-                md.append("")
+                    emit(f"- **Impacto Financeiro:** R$ {error.financial_impact:,.2f}")
+                emit("")
 
-            md.append("---")
-            md.append("")
+            emit("---")
+            emit("")
 
     # Seção de Erros
-    if nfes_erro:
-        md.append(f"## 🟠 ERROS ({len(nfes_erro)} NF-e(s))")
-        md.append("")
-        md.append("**⚠️ CORREÇÃO NECESSÁRIA**")
-        md.append("")
-
-        for nfe in nfes_erro:
-            md.append(f"### NF-e {nfe.numero}")
-            md.append("")
-            md.append(f"- **Emitente:** {nfe.emitente.razao_social}")
-            md.append(f"- **CNPJ:** {nfe.emitente.cnpj}")
-            md.append(f"- **Chave de Acesso:** `{nfe.chave_acesso}`")
-            md.append(f"- **Impacto Financeiro:** R$ {nfe.get_total_financial_impact():,.2f}")
-            md.append("")
-
-            error_list = [e for e in nfe.validation_errors if e.severity == Severity.ERROR]
-            md.append(f"**Problemas Detectados:** {len(error_list)}")
-            md.append("")
+    if aggregate.error:
+        emit(f"## 🟠 ERROS ({len(aggregate.error)} NF-e(s))")
+        emit("")
+        emit("**⚠️ CORREÇÃO NECESSÁRIA**")
+        emit("")
+
+        for summary in aggregate.error:
+            nfe = summary.nfe
+            emit(f"### NF-e {nfe.numero}")
+            emit("")
+            emit(f"- **Emitente:** {nfe.emitente.razao_social}")
+            emit(f"- **CNPJ:** {nfe.emitente.cnpj}")
+            emit(f"- **Chave de Acesso:** `{nfe.chave_acesso}`")
+            emit(f"- **Impacto Financeiro:** R$ {summary.financial_impact:,.2f}")
+            emit("")
+
+            error_list = summary.errors_of(Severity.ERROR)
+            emit(f"**Problemas Detectados:** {len(error_list)}")
+            emit("")
 
             for i, error in enumerate(error_list, 1):
-                md.append(f"#### {i}. {error.message}")
-                md.append(f"- **Campo:** {error.field}")
-                md.append(f"- **Valor Atual:** {error.actual_value or 'N/A'}")
-                md.append(f"- **Valor Esperado:** {error.expected_value or 'N/A'}")
+                emit(f"#### {i}. {error.message}")
+                emit(f"- **Campo:** {error.field}")
+                emit(f"- **Valor Atual:** {error.actual_value or 'N/A'}")
+                emit(f"- **Valor Esperado:** {error.expected_value or 'N/A'}")
                 if error.financial_impact:
-                    md.append(f"- **Impacto Financeiro:** R$ {error.financial_impact:,.2f}")
-                md.append("")
+                    emit(f"- **Impacto Financeiro:** R$ {error.financial_impact:,.2f}")
+                emit("")
 
-            md.append("---")
-            md.append("")
+            emit("---")
+            emit("")
 
     # Seção de Avisos
-    if nfes_aviso:
-        md.append(f"## 🟡 AVISOS ({len(nfes_aviso)} NF-e(s))")
-        md.append("")
-        md.append("**ℹ️ REVISÃO RECOMENDADA**")
-        md.append("")
-
-        for nfe in nfes_aviso:
-            md.append(f"### NF-e {nfe.numero}")
-            md.append("")
-            md.append(f"- **Emitente:** {nfe.emitente.razao_social}")
-            md.append(f"- **CNPJ:** {nfe.emitente.cnpj}")
-            md.append(f"- **Chave de Acesso:** `{nfe.chave_acesso}`")
-            md.append("")
-
-            warning_list = [e for e in nfe.validation_errors if e.severity == Severity.WARNING]
-            md.append(f"**Observações:** {len(warning_list)}")
-            md.append("")
+    if aggregate.warning:
+        emit(f"## 🟡 AVISOS ({len(aggregate.warning)} NF-e(s))")
+        emit("")
+        emit("**ℹ️ REVISÃO RECOMENDADA**")
+        emit("")
+
+        for summary in aggregate.warning:
+            nfe = summary.nfe
+            emit(f"### NF-e {nfe.numero}")
+            emit("")
+            emit(f"- **Emitente:** {nfe.emitente.razao_social}")
+            emit(f"- **CNPJ:** {nfe.emitente.cnpj}")
+            emit(f"- **Chave de Acesso:** `{nfe.chave_acesso}`")
+            emit("")
+
+            warning_list = summary.errors_of(Severity.WARNING)
+            emit(f"**Observações:** {len(warning_list)}")
+            emit("")
 
             for i, warning in enumerate(warning_list, 1):
-                md.append(f"#### {i}. {warning.message}")
-                md.append(f"- **Campo:** {warning.field}")
-                md.append(f"- **Valor Atual:** {warning.actual_value or 'N/A'}")
-                md.append("")
+                emit(f"#### {i}. {warning.message}")
+                emit(f"- **Campo:** {warning.field}")
+                emit(f"- **Valor Atual:** {warning.actual_value or 'N/A'}")
+                emit("")
 
-            md.append("---")
-            md.append("")
+            emit("---")
+            emit("")
 
     # Rodapé
-    md.append("---")
-    md.append("")
-    md.append("**Relatório gerado por:** NF-e Validator MVP - Setor Sucroalcooleiro")
-    md.append("")
-    md.append("🤖 *Powered by Claude Code*")
+    emit("---")
+    emit("")
+    emit("**Relatório gerado por:** NF-e Validator MVP - Setor Sucroalcooleiro")
+    emit("")
+    emit("🤖 *Powered by Claude Code*")
+
+
+def _validation_profiler(enabled: bool, run_name: str):
+    """
+    RunProfiler da validação (resumo enviado ao log estruturado)
+
+    Returns:
+        RunProfiler se habilitado, senão contexto vazio
+    """
+    if not enabled:
+        return nullcontext()
+    from utils.logger import app_logger
+    return RunProfiler(run_name, logger=app_logger)
+
+
+def _upload_cache():
+    """
+    Cache Parquet dos uploads normalizados (revalidar o mesmo arquivo
+    dispensa a normalização)
+
+    Returns:
+        NormalizedUploadCache, ou None sem pyarrow instalado
+    """
+    try:
+        return NormalizedUploadCache()
+    except ImportError:
+        return None
 
-    return "\n".join(md)
 
+def _render_profile_summary(summary):
+    """Tempos por etapa da última validação"""
+    with st.expander(f"⏱️ Desempenho por etapa ({summary['wall_time_s']:.2f}s)", expanded=False):
+        stages = pd.DataFrame([
+            {'Etapa': name, 'Chamadas': stats['calls'], 'Total (s)': stats['total_s'],
+             'Média (ms)': stats['mean_ms'], 'p95 (ms)': stats['p95_ms']}
+            for name, stats in summary['stages'].items()
+        ])
+        if not stages.empty:
+            st.dataframe(stages, use_container_width=True, hide_index=True)
+        if summary['counters']:
+            st.markdown("**Contadores:** " + ", ".join(
+                f"`{name}` = {value:,}" for name, value in summary['counters'].items()
+            ))
+        st.download_button(
+            label="📥 Baixar resumo da execução (JSON)",
+            data=json.dumps(summary, indent=2, ensure_ascii=False),
+            file_name=f"perfil_{summary['run']}.json",
+            mime="application/json"
+        )
+
+
+def get_column_mapping_cache():
+    """
+    Cache em disco dos mapeamentos de colunas (layouts de cabeçalho já vistos)
 
-def validate_nfe_with_pipeline(nfe, repo, use_ai_agent=False, api_key=None):
+    Returns:
+        ColumnMappingCache da sessão
     """
-    Execute full NF-e validation pipeline
+    from nfe_validator.infrastructure.persistence.column_mapping_cache import ColumnMappingCache
+
+    if 'column_mapping_cache' not in st.session_state:
+        st.session_state.column_mapping_cache = ColumnMappingCache()
+    return st.session_state.column_mapping_cache
 
-    IMPORTANTE: LLM NÃO é executado automaticamente aqui.
-    Validação rápida usa apenas CSV Local + SQLite.
+
+def get_ncm_classification_service(repo, api_key):
+    """
+    Serviço de classificação NCM da sessão (um agente por repositório/chave)
 
     Args:
-        nfe: NFeEntity to validate
         repo: FiscalRepository
-        use_ai_agent: Enable AI agent for NCM classification (IGNORADO na validação inicial)
-        api_key: Google API key for agent
+        api_key: Google API key
 
     Returns:
-        nfe with validation errors populated
+        NCMClassificationService
     """
-    from nfe_validator.domain.entities.nfe_entity import Severity
+    from agents.ncm_classification_service import NCMClassificationService
 
-    # Federal Validators (usam CSV Local → SQLite, SEM LLM)
-    item_validators = [
-        NCMValidator(repo),
-        PISCOFINSValidator(repo),
-        CFOPValidator(repo)
-    ]
+    owner = (id(repo), api_key)
+    service = st.session_state.get('ncm_classification_service')
+    if service is None or st.session_state.get('ncm_classification_owner') != owner:
+        service = NCMClassificationService.for_repository(repo, api_key)
+        st.session_state.ncm_classification_service = service
+        st.session_state.ncm_classification_owner = owner
+    return service
 
-    for validator in item_validators:
-        for item in nfe.items:
-            errors = validator.validate(item, nfe)
-            nfe.validation_errors.extend(errors)
 
-    # Totals Validator
-    totals_validator = TotalsValidator(repo)
-    totals_errors = totals_validator.validate(nfe)
-    nfe.validation_errors.extend(totals_errors)
+def validate_nfe_items_with_ai(nfe, item_numeros, repo, api_key, progress_callback=None):
+    """
+    Validar itens da NF-e usando Agente IA (sob demanda, em lote)
 
-    # State Validators
-    if nfe.emitente.uf == 'SP' or nfe.destinatario.uf == 'SP':
-        sp_validator = SPValidator(repo)
-        for item in nfe.items:
-            errors = sp_validator.validate(item, nfe)
-            nfe.validation_errors.extend(errors)
+    Descrições repetidas são classificadas uma vez; resultados anteriores
+    vêm do cache em disco.
 
-    if nfe.emitente.uf == 'PE' or nfe.destinatario.uf == 'PE':
-        pe_validator = PEValidator(repo)
-        for item in nfe.items:
-            errors = pe_validator.validate(item, nfe)
-            nfe.validation_errors.extend(errors)
+    Args:
+        nfe: NFeEntity
+        item_numeros: Números dos itens a validar
+        repo: FiscalRepository
+        api_key: Google API key
+        progress_callback: (concluídas, total) por descrição distinta
+
+    Returns:
+        Dict numero_item -> sugestão do agente IA
+    """
+    wanted = set(item_numeros)
+    items = [i for i in nfe.items if i.numero_item in wanted]
+    results = {numero: {'error': 'Item não encontrado'} for numero in item_numeros}
 
-    # AI Agent NÃO é executado aqui automaticamente
-    # Será chamado apenas sob demanda em função separada
+    try:
+        service = get_ncm_classification_service(repo, api_key)
+        results.update(service.classify_items(items, progress_callback))
+
+    except Exception as e:
+        for item in items:
+            results[item.numero_item] = {
+                'error': str(e),
+                'suggested_ncm': None,
+                'confidence': 0,
+                'reasoning': f"Erro ao consultar IA: {str(e)}"
+            }
 
-    return nfe
+    return results
 
 
 def validate_nfe_item_with_ai(nfe, item_numero, repo, api_key):
@@ -818,29 +860,77 @@ def validate_nfe_item_with_ai(nfe, item_numero, repo, api_key):
     Returns:
         Dict com sugestão do agente IA
     """
-    try:
-        from agents.ncm_agent import create_ncm_agent
+    return validate_nfe_items_with_ai(nfe, [item_numero], repo, api_key)[item_numero]
 
-        # Find item
-        item = next((i for i in nfe.items if i.numero_item == item_numero), None)
-        if not item:
-            return {'error': 'Item não encontrado'}
 
-        # Create agent
-        agent = create_ncm_agent(repo, api_key)
+def validate_uploaded_batch(uploaded_files, repo, profile_run=False):
+    """
+    Validar lote de uploads (ZIPs e/ou CSVs) sem unir os arquivos em memória
 
-        # Classify NCM
-        result = agent.classify_ncm(item.descricao, item.ncm)
+    Os CSVs são lidos direto dos ZIPs, decodificados, mapeados e
+    normalizados em paralelo (BatchIngestor) e seguem para a validação
+    paralela à medida que ficam prontos. Cada NF-e guarda o CSV de origem
+    em csv_source['file'].
+
+    Args:
+        uploaded_files: Uploads (.zip ou .csv)
+        repo: FiscalRepository
+        profile_run: Medir desempenho por etapa
 
-        return result
+    Returns:
+        Lista de NF-es validadas (também gravadas em session_state)
+    """
+    from nfe_validator.infrastructure.parsers.batch_ingestion import BatchIngestor
+    from nfe_validator.infrastructure.parsers.column_mapper import ColumnMapper
 
-    except Exception as e:
-        return {
-            'error': str(e),
-            'suggested_ncm': None,
-            'confidence': 0,
-            'reasoning': f"Erro ao consultar IA: {str(e)}"
-        }
+    ingestor = BatchIngestor(mapping_cache=get_column_mapping_cache())
+    mappings = []
+    validated_nfes = []
+
+    files_progress = st.progress(0.0)
+    status_text = st.empty()
+
+    def _on_files(done, total):
+        files_progress.progress(done / total if total else 1.0)
+
+    def _members():
+        for member in ingestor.iter_members(uploaded_files, progress_callback=_on_files):
+            if member.error:
+                st.warning(f"⚠️ {member.name}: {member.error}")
+            else:
+                mappings.append(member.mapping)
+            yield from member.nfes
+
+    def _on_validation_error(nfe, message):
+        st.warning(f"⚠️ Erro ao validar NF-e {nfe.numero}: {message}")
+
+    repo.refresh_if_changed()
+    with _validation_profiler(profile_run, "lote") as run_profiler, \
+            ParallelValidationEngine.from_repository(repo) as engine, \
+            ValidationResultStore() as result_store:
+        for nfe in engine.iter_validate(_members(), on_error=_on_validation_error):
+            validated_nfes.append(nfe)
+            result_store.add(nfe)
+            if len(validated_nfes) % 100 == 0:
+                status_text.text(f"⚡ {len(validated_nfes)} NF-e(s) validada(s) (análise rápida - local)...")
+
+    files_progress.empty()
+    status_text.empty()
+
+    # Capacidades: colunas presentes em todos os arquivos lidos
+    common = set.intersection(*(set(m.mapping) for m in mappings)) if mappings else set()
+    missing = sorted({col for m in mappings for col in m.missing})
+    st.session_state.nfe_batch_files = ingestor.files
+    _set_nfe_results(validated_nfes)
+    st.session_state.nfe_validated = True
+    st.session_state.nfe_mapping = mappings[0].mapping if mappings else {}
+    st.session_state.nfe_capabilities = ColumnMapper.get_validation_capabilities(dict.fromkeys(common))
+    st.session_state.nfe_has_minimum_data = bool(mappings) and all(
+        ColumnMapper.is_nfe_complete(m.mapping) for m in mappings
+    )
+    st.session_state.nfe_missing_columns = missing
+    st.session_state.nfe_profile = run_profiler.summary() if run_profiler else None
+    return validated_nfes
 
 
 def render_nfe_validator_tab():
@@ -856,6 +946,32 @@ def render_nfe_validator_tab():
         st.error("❌ Base fiscal não carregada! Configure na barra lateral.")
         return
 
+    # Lote: ZIPs e/ou vários CSVs validados diretamente (sem passar pelo EDA)
+    with st.expander("📦 Validar lote de arquivos (ZIP ou vários CSVs)", expanded=False):
+        batch_files = st.file_uploader(
+            "Arquivos do lote:",
+            type=['csv', 'zip'],
+            accept_multiple_files=True,
+            key="nfe_batch_upload",
+            help="Os CSVs são lidos direto dos ZIPs e validados à medida que são decodificados"
+        )
+        batch_profile = st.checkbox("⏱️ Medir desempenho por etapa", value=False, key="nfe_batch_profile")
+        if batch_files and st.button("🔍 Validar lote", key="nfe_batch_validate"):
+            try:
+                with st.spinner("Validando lote..."):
+                    validated = validate_uploaded_batch(batch_files, repo, batch_profile)
+                if not validated:
+                    st.error("❌ Nenhuma NF-e encontrada nos arquivos do lote")
+                else:
+                    st.rerun()
+            except Exception as e:
+                st.error(f"❌ Erro ao processar lote: {str(e)}")
+                with st.expander("🔍 Detalhes do erro"):
+                    st.code(traceback.format_exc())
+
+        if st.session_state.get('nfe_batch_files'):
+            st.dataframe(pd.DataFrame(st.session_state.nfe_batch_files), use_container_width=True)
+
     # Check if data is loaded from EDA
     if st.session_state.get('current_data') is None:
         st.warning("⚠️ Nenhum dado carregado no EDA")
@@ -868,6 +984,8 @@ def render_nfe_validator_tab():
 
         O sistema irá analisar os dados já carregados e identificar inconsistências fiscais.
         """)
+        # Resultados de um lote validado acima
+        render_nfe_validation_results(repo)
         return
 
     # Data is loaded - show info and validate
@@ -882,20 +1000,40 @@ def render_nfe_validator_tab():
         st.metric("📄 Linhas", f"{len(data):,}")
         st.metric("📋 Colunas", len(data.columns))
 
+        incremental = st.checkbox(
+            "♻️ Revalidar apenas NF-es novas ou alteradas",
+            value=False,
+            help="NF-es com conteúdo e regras iguais aos da última validação gravada "
+                 "reutilizam o resultado anterior"
+        )
+
+        profile_run = st.checkbox(
+            "⏱️ Medir desempenho por etapa",
+            value=False,
+            help="Tempos de mapeamento, parsing, validadores e consultas de regras "
+                 "(chamadas, total, média, p95) e acertos de cache"
+        )
+
         # Validate button
         if st.button("🔍 Validar NF-es dos Dados", type="primary"):
-            with st.spinner("Analisando estrutura dos dados..."):
+            with st.spinner("Analisando estrutura dos dados..."), \
+                    _validation_profiler(profile_run, Path(filename).stem) as run_profiler:
                 try:
                     # Importar mapeador de colunas
                     from nfe_validator.infrastructure.parsers.column_mapper import ColumnMapper
 
-                    # Mapear colunas automaticamente
-                    mapping, missing = ColumnMapper.map_columns(data)
+                    # Mapear colunas automaticamente (layouts já vistos vêm do cache)
+                    mapping_result = ColumnMapper.map_columns_detailed(data, cache=get_column_mapping_cache())
+                    mapping, missing = mapping_result.mapping, mapping_result.missing
 
                     # Mostrar relatório de mapeamento
                     with st.expander("📋 Mapeamento de Colunas", expanded=True):
-                        report = ColumnMapper.get_mapping_report(mapping, missing)
+                        report = ColumnMapper.get_mapping_report(
+                            mapping, missing, mapping_result.confidence, mapping_result.ambiguous
+                        )
                         st.markdown(report)
+                        if mapping_result.low_confidence() or mapping_result.ambiguous:
+                            st.warning("⚠️ Há colunas mapeadas com baixa confiança ou ambíguas - confira o mapeamento acima")
 
                         # Verificar se há ALGUMA validação fiscal possível
                         capabilities = ColumnMapper.get_validation_capabilities(mapping)
@@ -982,85 +1120,84 @@ def render_nfe_validator_tab():
                         data_mapped = ColumnMapper.apply_mapping(data, mapping)
 
                         # Adicionar colunas faltantes com valores padrão
-                        for col in missing:
-                            if col not in data_mapped.columns:
-                                # Valores padrão conforme o tipo de coluna
-                                if 'valor' in col or 'aliquota' in col:
-                                    data_mapped[col] = 0.0
-                                elif 'cst' in col:
-                                    data_mapped[col] = ''
-                                elif 'numero_item' in col:
-                                    data_mapped[col] = 1
-                                else:
-                                    data_mapped[col] = ''
-
-                        # Save mapped dataframe to temp CSV
-                        temp_dir = tempfile.gettempdir()
-                        temp_path = Path(temp_dir) / f"nfe_validation_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                        data_mapped.to_csv(temp_path, index=False, encoding='utf-8')
-
-                    # Parse CSV (full file, no limits)
-                    with st.spinner("Processando NF-es..."):
-                        parser = NFeCSVParser()
-                        nfes = parser.parse_csv(str(temp_path))
-
-                        if not nfes:
-                            st.error("❌ Não foi possível processar as NF-es")
-                            return
-
-                        st.info(f"📋 {len(nfes)} NF-e(s) encontrada(s) nos dados")
-
-                    # Validate all NF-es (RÁPIDO - apenas CSV + SQLite, SEM LLM)
+                        ColumnMapper.fill_missing_columns(data_mapped, missing)
+
+                    # Recarregar regras em memória se o rules.db foi repopulado
+                    repo.refresh_if_changed()
+
+                    # Parse direto do DataFrame mapeado + validação paralela
+                    # (RÁPIDO - apenas SQLite, SEM LLM e sem CSV temporário)
+                    parser = NFeCSVParser(cache=_upload_cache())
                     validated_nfes = []
-                    validation_errors_count = 0
 
                     # Progress bar for validation
                     progress_bar = st.progress(0)
                     status_text = st.empty()
 
-                    for i, nfe in enumerate(nfes):
-                        status_text.text(f"⚡ Validando NF-e {i+1}/{len(nfes)} (análise rápida - local)...")
-
-                        try:
-                            validated_nfe = validate_nfe_with_pipeline(nfe, repo, use_ai_agent=False, api_key=None)
-                            validated_nfes.append(validated_nfe)
-                        except Exception as e:
-                            # Registrar erro mas continuar validação
-                            validation_errors_count += 1
-                            st.warning(f"⚠️ Erro ao validar NF-e {nfe.numero}: {str(e)}")
-
-                            # Adicionar erro ao objeto NF-e
-                            from nfe_validator.domain.entities.nfe_entity import ValidationError, Severity
-                            nfe.validation_errors.append(ValidationError(
-                                code='SYSTEM_ERROR',
-                                field='nfe',
-                                message=f'Erro inesperado na validação: {str(e)}',
-                                severity=Severity.CRITICAL,
-                                actual_value=str(e),
-                                legal_reference='Sistema de Validação'
-                            ))
-                            validated_nfes.append(nfe)
-
-                        progress_bar.progress((i + 1) / len(nfes))
+                    def _on_progress(done, total):
+                        status_text.text(f"⚡ Validando NF-e {done}/{total or '?'} (análise rápida - local)...")
+                        if total:
+                            progress_bar.progress(min(done / total, 1.0))
+
+                    def _on_validation_error(nfe, message):
+                        # Registrar erro mas continuar validação
+                        st.warning(f"⚠️ Erro ao validar NF-e {nfe.numero}: {message}")
+
+                    # Resultados persistidos em validation_log (consulta sem revalidar)
+                    with ParallelValidationEngine.from_repository(repo) as engine, \
+                            ValidationResultStore() as result_store:
+                        if incremental:
+                            incremental_result = IncrementalValidator(
+                                repo, result_store, parser=parser,
+                                validate_stream=lambda nfes: engine.iter_validate(
+                                    nfes,
+                                    progress_callback=_on_progress,
+                                    on_error=_on_validation_error
+                                )
+                            ).validate_frame(data_mapped)
+                            validated_nfes = incremental_result.nfes
+                            stats = incremental_result.stats
+                            st.info(
+                                f"♻️ {stats.skipped} NF-e(s) sem alteração (resultado reutilizado), "
+                                f"{stats.revalidated} revalidada(s), {stats.new} nova(s)"
+                                + (f", {stats.unknown} sem impressão digital gravada" if stats.unknown else "")
+                            )
+                        else:
+                            cache_key = (
+                                NormalizedUploadCache.frame_key(data_mapped)
+                                if parser.cache is not None else None
+                            )
+                            for validated_nfe in engine.iter_validate(
+                                parser.parse_dataframe(data_mapped, cache_key=cache_key),
+                                progress_callback=_on_progress,
+                                on_error=_on_validation_error
+                            ):
+                                validated_nfes.append(validated_nfe)
+                                result_store.add(validated_nfe)
+                        validation_errors_count = engine.system_error_count
 
                     progress_bar.empty()
                     status_text.empty()
 
+                    if not validated_nfes:
+                        st.error("❌ Não foi possível processar as NF-es")
+                        return
+
+                    st.info(f"📋 {len(validated_nfes)} NF-e(s) encontrada(s) nos dados")
+
                     # Mostrar resumo de erros de sistema
                     if validation_errors_count > 0:
                         st.warning(f"⚠️ {validation_errors_count} NF-e(s) apresentaram erro de sistema durante validação")
 
                     # Store in session state
-                    st.session_state.nfe_results = validated_nfes
+                    st.session_state.nfe_batch_files = None
+                    _set_nfe_results(validated_nfes)
                     st.session_state.nfe_validated = True
                     st.session_state.nfe_mapping = mapping
                     st.session_state.nfe_capabilities = capabilities
                     st.session_state.nfe_has_minimum_data = has_minimum_data
                     st.session_state.nfe_missing_columns = missing
-
-                    # Clean up temp file
-                    if temp_path.exists():
-                        temp_path.unlink()
+                    st.session_state.nfe_profile = run_profiler.summary() if run_profiler else None
 
                     if has_minimum_data:
                         st.success(f"✅ {len(validated_nfes)} NF-e(s) validada(s) com dados completos!")
@@ -1103,10 +1240,18 @@ def render_nfe_validator_tab():
         """, unsafe_allow_html=True)
 
     # Results section
+    render_nfe_validation_results(repo)
+
+
+def render_nfe_validation_results(repo):
+    """Resultados da última validação (dados do EDA ou lote de arquivos)"""
     if st.session_state.get('nfe_validated') and st.session_state.get('nfe_results'):
         st.markdown("---")
         st.header("📈 Resultados da Validação")
 
+        if st.session_state.get('nfe_profile'):
+            _render_profile_summary(st.session_state.nfe_profile)
+
         # Check if there are ANY fiscal validations possible
         capabilities = st.session_state.get('nfe_capabilities', {})
         has_any_fiscal = any([
@@ -1176,6 +1321,9 @@ def render_nfe_validator_tab():
         # Summary metrics
         from nfe_validator.domain.entities.nfe_entity import Severity
 
+        # Citações legais resolvidas apenas na renderização (cache no repositório)
+        citation_resolver = repo.format_legal_citation
+
         # Calcular métricas de cobertura
         total_items = len(nfe.items)
 
@@ -1186,21 +1334,22 @@ def render_nfe_validator_tab():
         cfop_validated = sum(1 for item in nfe.items if item.cfop)
 
         # Contar validações PIS/COFINS (se não tem erro 999, foi validado)
+        code_counts = nfe.get_error_counts_by_code()
+        unvalidated = {
+            (e.item_numero, e.code) for e in nfe.validation_errors
+            if e.code in ('PIS_999', 'COFINS_999')
+        } if code_counts.get('PIS_999') or code_counts.get('COFINS_999') else set()
         for item in nfe.items:
-            item_errors = [e for e in nfe.validation_errors if e.item_numero == item.numero_item]
-            has_pis_999 = any(e.code == 'PIS_999' for e in item_errors)
-            has_cofins_999 = any(e.code == 'COFINS_999' for e in item_errors)
-
-            if not has_pis_999 and item.impostos.pis_cst:
+            if (item.numero_item, 'PIS_999') not in unvalidated and item.impostos.pis_cst:
                 pis_validated += 1
-            if not has_cofins_999 and item.impostos.cofins_cst:
+            if (item.numero_item, 'COFINS_999') not in unvalidated and item.impostos.cofins_cst:
                 cofins_validated += 1
 
         col1, col2, col3, col4 = st.columns(4)
 
-        critical = sum(1 for e in nfe.validation_errors if e.severity == Severity.CRITICAL)
-        error = sum(1 for e in nfe.validation_errors if e.severity == Severity.ERROR)
-        warning = sum(1 for e in nfe.validation_errors if e.severity == Severity.WARNING)
+        critical = nfe.count_errors(Severity.CRITICAL)
+        error = nfe.count_errors(Severity.ERROR)
+        warning = nfe.count_errors(Severity.WARNING)
 
         with col1:
             st.metric("🔴 Crítico", critical)
@@ -1259,52 +1408,56 @@ def render_nfe_validator_tab():
 
         with tab_report:
             # Generate Markdown report
-            generator = ReportGenerator()
+            generator = ReportGenerator(citation_resolver=citation_resolver)
             md_report = generator.generate_markdown_report(nfe)
             st.markdown(md_report, unsafe_allow_html=True)
 
         with tab_consolidated:
             st.subheader("📊 Relatório Consolidado - Todas as NF-es com Problemas")
 
-            # Filtrar apenas NF-es com problemas
-            nfes_com_problemas = [nfe for nfe in nfes if len(nfe.validation_errors) > 0]
+            # Uma passada pelo lote: faixas por severidade, contagens e impacto
+            aggregate = _consolidated_aggregate(nfes)
 
-            if not nfes_com_problemas:
+            if not aggregate.nfes_with_errors:
                 st.success("✅ **Excelente!** Todas as NF-es estão conformes. Nenhum problema detectado.")
             else:
-                st.warning(f"⚠️ **{len(nfes_com_problemas)} de {len(nfes)} NF-e(s) apresentaram problemas**")
+                st.warning(f"⚠️ **{aggregate.nfes_with_errors} de {len(nfes)} NF-e(s) apresentaram problemas**")
 
                 # Métricas consolidadas
-                total_critical = sum(sum(1 for e in nfe.validation_errors if e.severity == Severity.CRITICAL) for nfe in nfes_com_problemas)
-                total_errors = sum(sum(1 for e in nfe.validation_errors if e.severity == Severity.ERROR) for nfe in nfes_com_problemas)
-                total_warnings = sum(sum(1 for e in nfe.validation_errors if e.severity == Severity.WARNING) for nfe in nfes_com_problemas)
-                total_impact = sum(nfe.get_total_financial_impact() for nfe in nfes_com_problemas)
-
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("🔴 Total Críticos", total_critical)
+                    st.metric("🔴 Total Críticos", aggregate.severity_count(Severity.CRITICAL))
                 with col2:
-                    st.metric("🟠 Total Erros", total_errors)
+                    st.metric("🟠 Total Erros", aggregate.severity_count(Severity.ERROR))
                 with col3:
-                    st.metric("🟡 Total Avisos", total_warnings)
+                    st.metric("🟡 Total Avisos", aggregate.severity_count(Severity.WARNING))
                 with col4:
-                    st.metric("💰 Impacto Total", f"R$ {total_impact:,.2f}")
+                    st.metric("💰 Impacto Total", f"R$ {aggregate.financial_impact:,.2f}")
+
+                with st.expander("📊 Erros por código, UF e NCM", expanded=False):
+                    col_code, col_uf, col_ncm = st.columns(3)
+                    for column, title, counts in (
+                        (col_code, "Código", aggregate.by_code),
+                        (col_uf, "UF emitente", aggregate.by_uf),
+                        (col_ncm, "NCM", aggregate.by_ncm),
+                    ):
+                        with column:
+                            st.dataframe(
+                                pd.DataFrame(counts.most_common(20), columns=[title, "Erros"]),
+                                use_container_width=True, hide_index=True
+                            )
 
                 st.markdown("---")
 
-                # Organizar por severidade
-                nfes_criticas = [nfe for nfe in nfes_com_problemas if any(e.severity == Severity.CRITICAL for e in nfe.validation_errors)]
-                nfes_erro = [nfe for nfe in nfes_com_problemas if any(e.severity == Severity.ERROR for e in nfe.validation_errors) and nfe not in nfes_criticas]
-                nfes_aviso = [nfe for nfe in nfes_com_problemas if nfe not in nfes_criticas and nfe not in nfes_erro]
-
                 # Seção de Críticos
-                if nfes_criticas:
-                    with st.expander(f"🔴 **CRÍTICOS** ({len(nfes_criticas)} NF-e(s)) - Ação Imediata Necessária", expanded=True):
-                        for nfe in nfes_criticas:
+                if aggregate.critical:
+                    with st.expander(f"🔴 **CRÍTICOS** ({len(aggregate.critical)} NF-e(s)) - Ação Imediata Necessária", expanded=True):
+                        for summary in aggregate.critical:
+                            nfe = summary.nfe
                             st.markdown(f"### NF-e {nfe.numero} - {nfe.emitente.razao_social}")
                             st.markdown(f"**Chave:** `{nfe.chave_acesso}`")
 
-                            critical_errors = [e for e in nfe.validation_errors if e.severity == Severity.CRITICAL]
+                            critical_errors = summary.errors_of(Severity.CRITICAL)
                             st.error(f"**{len(critical_errors)} erro(s) crítico(s) detectado(s)**")
 
                             for error in critical_errors:
@@ -1313,7 +1466,7 @@ def render_nfe_validator_tab():
                                 - **Problema:** {error.message}
                                 - **Valor atual:** {error.actual_value or 'N/A'}
                                 - **Esperado:** {error.expected_value or 'N/A'}
-                                - **Base legal:** {error.legal_reference or 'N/A'}
+                                - **Base legal:** {error.resolve_legal_reference(citation_resolver) or 'N/A'}
                                 """)
 
                                 if error.financial_impact:
@@ -1322,13 +1475,14 @@ def render_nfe_validator_tab():
                             st.markdown("---")
 
                 # Seção de Erros
-                if nfes_erro:
-                    with st.expander(f"🟠 **ERROS** ({len(nfes_erro)} NF-e(s)) - Correção Necessária", expanded=False):
-                        for nfe in nfes_erro:
+                if aggregate.error:
+                    with st.expander(f"🟠 **ERROS** ({len(aggregate.error)} NF-e(s)) - Correção Necessária", expanded=False):
+                        for summary in aggregate.error:
+                            nfe = summary.nfe
                             st.markdown(f"### NF-e {nfe.numero} - {nfe.emitente.razao_social}")
                             st.markdown(f"**Chave:** `{nfe.chave_acesso}`")
 
-                            error_list = [e for e in nfe.validation_errors if e.severity == Severity.ERROR]
+                            error_list = summary.errors_of(Severity.ERROR)
                             st.warning(f"**{len(error_list)} erro(s) detectado(s)**")
 
                             for error in error_list:
@@ -1345,13 +1499,14 @@ def render_nfe_validator_tab():
                             st.markdown("---")
 
                 # Seção de Avisos
-                if nfes_aviso:
-                    with st.expander(f"🟡 **AVISOS** ({len(nfes_aviso)} NF-e(s)) - Revisão Recomendada", expanded=False):
-                        for nfe in nfes_aviso:
+                if aggregate.warning:
+                    with st.expander(f"🟡 **AVISOS** ({len(aggregate.warning)} NF-e(s)) - Revisão Recomendada", expanded=False):
+                        for summary in aggregate.warning:
+                            nfe = summary.nfe
                             st.markdown(f"### NF-e {nfe.numero} - {nfe.emitente.razao_social}")
                             st.markdown(f"**Chave:** `{nfe.chave_acesso}`")
 
-                            warning_list = [e for e in nfe.validation_errors if e.severity == Severity.WARNING]
+                            warning_list = summary.errors_of(Severity.WARNING)
                             st.info(f"**{len(warning_list)} aviso(s) detectado(s)**")
 
                             for warning in warning_list:
@@ -1366,17 +1521,36 @@ def render_nfe_validator_tab():
                 # Botão de exportação do relatório consolidado
                 st.markdown("### 💾 Exportar Relatório Consolidado")
 
-                # Gerar relatório consolidado em Markdown
-                consolidated_md = _generate_consolidated_markdown_report(nfes_com_problemas, total_critical, total_errors, total_warnings, total_impact)
+                # Relatório consolidado em Markdown (gerado em memória uma vez por resultado)
+                consolidated_key = st.session_state.get('nfe_results_generation')
+                if st.session_state.get('consolidated_md_key') != consolidated_key:
+                    st.session_state.consolidated_md = _generate_consolidated_markdown_report(
+                        aggregate, citation_resolver=citation_resolver
+                    )
+                    st.session_state.consolidated_md_key = consolidated_key
 
                 col_exp1, col_exp2 = st.columns(2)
                 with col_exp1:
                     st.download_button(
                         label="📥 Baixar Relatório Consolidado (Markdown)",
-                        data=consolidated_md,
-                        file_name=f"relatorio_consolidado_{len(nfes_com_problemas)}_nfes.md",
+                        data=st.session_state.consolidated_md,
+                        file_name=f"relatorio_consolidado_{aggregate.nfes_with_errors}_nfes.md",
                         mime="text/markdown"
                     )
+                with col_exp2:
+                    # Todas as NF-es em JSON Lines comprimido (gerado uma vez por resultado)
+                    jsonl_key = st.session_state.get('nfe_results_generation')
+                    if st.session_state.get('jsonl_report_key') != jsonl_key:
+                        st.session_state.jsonl_report = _streamed_report_bytes(
+                            'jsonl', nfes, generator, compression='gzip'
+                        )
+                        st.session_state.jsonl_report_key = jsonl_key
+                    st.download_button(
+                        label="📥 Baixar Todas as NF-es (JSON Lines .gz)",
+                        data=st.session_state.jsonl_report,
+                        file_name=f"relatorio_{len(nfes)}_nfes.jsonl.gz",
+                        mime="application/gzip"
+                    )
 
         with tab_json:
             # Generate JSON report
@@ -1450,11 +1624,14 @@ def render_nfe_validator_tab():
                             progress_bar = st.progress(0)
                             status_text = st.empty()
 
-                            for i, item_num in enumerate(selected_items):
-                                status_text.text(f"🤖 Consultando Gemini 2.5 para Item #{item_num} ({i+1}/{len(selected_items)})...")
-                                result = validate_nfe_item_with_ai(nfe, item_num, repo, api_key)
-                                st.session_state.ai_ncm_suggestions[item_num] = result
-                                progress_bar.progress((i + 1) / len(selected_items))
+                            def show_progress(done, total):
+                                status_text.text(f"🤖 Consultando Gemini 2.5: {done}/{total} descrições distintas...")
+                                progress_bar.progress(done / total)
+
+                            status_text.text(f"🤖 Consultando Gemini 2.5 para {len(selected_items)} itens...")
+                            st.session_state.ai_ncm_suggestions.update(
+                                validate_nfe_items_with_ai(nfe, selected_items, repo, api_key, show_progress)
+                            )
 
                             progress_bar.empty()
                             status_text.empty()
@@ -1470,11 +1647,13 @@ def render_nfe_validator_tab():
                             progress = st.progress(0)
                             status = st.empty()
 
-                            for i, item in enumerate(nfe.items):
-                                status.text(f"Validando item {i+1}/{len(nfe.items)} com IA...")
-                                result = validate_nfe_item_with_ai(nfe, item.numero_item, repo, api_key)
-                                st.session_state.ai_ncm_suggestions[item.numero_item] = result
-                                progress.progress((i + 1) / len(nfe.items))
+                            def show_progress(done, total):
+                                status.text(f"Validando {done}/{total} descrições distintas com IA...")
+                                progress.progress(done / total)
+
+                            st.session_state.ai_ncm_suggestions = validate_nfe_items_with_ai(
+                                nfe, [item.numero_item for item in nfe.items], repo, api_key, show_progress
+                            )
 
                             progress.empty()
                             status.empty()
@@ -1905,33 +2084,26 @@ def main():
                 elif file_extension == 'zip':
                     # Processamento de ZIP - UNIR todos os arquivos em um dataset
                     if st.button("📊 Carregar e UNIR TODOS os CSVs do ZIP"):
-                        with st.spinner("Extraindo arquivos CSV do ZIP..."):
-                            csv_files, message = extract_csv_files_from_zip(uploaded_file)
-
-                        st.info(message)
-
-                        if csv_files:
-                            # Unir TODOS os arquivos CSV em um único dataset
-                            with st.spinner("Unindo todos os arquivos CSV..."):
-                                merged_data, merge_info = merge_multiple_csvs(csv_files)
-
-                            if merged_data is not None:
-                                # Carregar dataset unificado no agente
-                                st.session_state.eda_agent.data = merged_data
-                                st.session_state.eda_agent.filename = f"ZIP_Unified_{len(csv_files)}_files"
-                                st.session_state.current_data = merged_data
-                                st.session_state.current_filename = f"Dataset Unificado ({len(csv_files)} arquivos)"
-
-                                # Limpar múltiplos datasets se existir
-                                if 'multiple_datasets' in st.session_state:
-                                    del st.session_state.multiple_datasets
-
-                                # Mostrar informações detalhadas
-                                st.success("🎉 Dataset unificado criado com sucesso!")
-                                st.markdown(merge_info)
-                                st.rerun()
-                            else:
-                                st.error(f"❌ Falha ao unir arquivos: {merge_info}")
+                        # Ler, decodificar e unir os CSVs (em paralelo, sem extrair o ZIP)
+                        merged_data, merge_info, n_files = load_zip_dataset(uploaded_file)
+
+                        if merged_data is not None:
+                            # Carregar dataset unificado no agente
+                            st.session_state.eda_agent.data = merged_data
+                            st.session_state.eda_agent.filename = f"ZIP_Unified_{n_files}_files"
+                            st.session_state.current_data = merged_data
+                            st.session_state.current_filename = f"Dataset Unificado ({n_files} arquivos)"
+
+                            # Limpar múltiplos datasets se existir
+                            if 'multiple_datasets' in st.session_state:
+                                del st.session_state.multiple_datasets
+
+                            # Mostrar informações detalhadas
+                            st.success("🎉 Dataset unificado criado com sucesso!")
+                            st.markdown(merge_info)
+                            st.rerun()
+                        else:
+                            st.error(merge_info)
 
     # Tab NF-e Validator (if available)
     if tab_nfe is not None:
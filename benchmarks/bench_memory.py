@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memória por item: dataclasses com __dict__, com __slots__ e
+armazenamento colunar compacto (CompactItemBatch)
+
+Uso:
+    python benchmarks/bench_memory.py --rows 200000
+"""
+
+import argparse
+import dataclasses
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import generate_csv
+from src.nfe_validator.domain.entities.nfe_entity import NFeItem, ImpostoItem
+from src.nfe_validator.domain.entities.compact_items import CompactItemBatch
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.parsers.columnar import NFeBulkBuilder
+
+
+def without_slots(cls):
+    """Recriar a dataclass sem __slots__ (layout anterior, com __dict__)"""
+    return dataclasses.make_dataclass(
+        cls.__name__,
+        [(f.name, f.type, f) for f in dataclasses.fields(cls)]
+    )
+
+
+def measure(build) -> int:
+    """Bytes alocados (e mantidos) pela estrutura criada por build()"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def build_objects(columns, item_cls, imposto_cls):
+    imposto_fields = [f.name for f in dataclasses.fields(ImpostoItem)]
+    item_fields = [
+        f.name for f in dataclasses.fields(NFeItem)
+        if f.name in columns and f.name != 'numero_item'
+    ]
+    rows = len(columns['numero_item'])
+    return [
+        item_cls(
+            numero_item=columns['numero_item'][i],
+            impostos=imposto_cls(**{name: columns[name][i] for name in imposto_fields}),
+            **{name: columns[name][i] for name in item_fields}
+        )
+        for i in range(rows)
+    ]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=100_000)
+    arg_parser.add_argument('--items-per-nfe', type=int, default=4)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'bench_nfe.csv'
+        generate_csv(csv_path, args.rows, args.items_per_nfe)
+
+        parser = NFeCSVParser()
+        df = pd.read_csv(csv_path, dtype=parser.CSV_DTYPE_SPEC, keep_default_na=False, na_values=[''])
+        builder = NFeBulkBuilder(parser)
+        columns = builder.item_columns(parser._normalize_dataframe(df))
+
+        def distinct():
+            # Decimal próprio por linha (como no caminho linha a linha)
+            return {
+                name: [type(v)(str(v)) if v is not None else None for v in values]
+                for name, values in columns.items()
+            }
+
+        item_dict, imposto_dict = without_slots(NFeItem), without_slots(ImpostoItem)
+        results = [
+            ('dataclass (__dict__)', lambda: build_objects(distinct(), item_dict, imposto_dict)),
+            ('dataclass (__slots__)', lambda: build_objects(distinct(), NFeItem, ImpostoItem)),
+            ('__slots__ + Decimal compartilhado', lambda: build_objects(columns, NFeItem, ImpostoItem)),
+            ('CompactItemBatch', lambda: CompactItemBatch.from_columns(columns)),
+        ]
+
+        print(f"{'Representação':<36} {'bytes/item':>12}")
+        for label, build in results:
+            size = measure(build)
+            print(f"{label:<36} {size / args.rows:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark da validação paralela: throughput por número de workers
+
+Uso:
+    python benchmarks/bench_parallel_validation.py --rows 100000 --workers 1 2 4 8 16
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_parser import generate_csv
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.validators.parallel_engine import ParallelValidationEngine
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=50_000)
+    arg_parser.add_argument('--items-per-nfe', type=int, default=4)
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'bench_nfe.csv'
+        generate_csv(csv_path, args.rows, args.items_per_nfe)
+
+        baseline = None
+        for workers in args.workers:
+            nfes = NFeCSVParser().parse_csv(str(csv_path))
+            with ParallelValidationEngine(max_workers=workers, inline_threshold=0) as engine:
+                start = time.perf_counter()
+                engine.validate_batch(nfes)
+                elapsed = time.perf_counter() - start
+
+            baseline = baseline or elapsed
+            print(f"{workers:3d} worker(s): {elapsed:8.2f}s  "
+                  f"({len(nfes) / elapsed:,.0f} NF-e/s, speedup {baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
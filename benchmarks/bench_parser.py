@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do parser de NF-e: caminho colunar x caminho linha a linha
+
+Uso:
+    python benchmarks/bench_parser.py --rows 200000 --items-per-nfe 4
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+
+
+HEADER = [
+    'chave_acesso', 'numero_nfe', 'serie', 'data_emissao',
+    'cnpj_emitente', 'razao_social_emitente', 'uf_emitente',
+    'cnpj_destinatario', 'razao_social_destinatario', 'uf_destinatario',
+    'numero_item', 'codigo_produto', 'descricao', 'ncm', 'cfop', 'unidade',
+    'quantidade', 'valor_unitario', 'valor_total',
+    'pis_cst', 'pis_aliquota', 'pis_valor',
+    'cofins_cst', 'cofins_aliquota', 'cofins_valor',
+]
+
+NCMS = ['17011400', '1701.99.00', '17019100', '2207', '22071000']
+CFOPS = ['5101', '6.101', '7101', '5102']
+CSTS = ['1', '01', '06', '50', '04']
+
+
+def generate_csv(path: Path, rows: int, items_per_nfe: int, seed: int = 42):
+    """Gerar CSV sintético com formatos variados (pontuação, vírgula decimal)"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(','.join(HEADER) + '\n')
+        for i in range(rows):
+            nfe = i // items_per_nfe
+            quantidade = rng.randint(1, 5000)
+            unitario = rng.randint(100, 900) / 100
+            cst = rng.choice(CSTS)
+            f.write(','.join([
+                f'3523010000000100000055001{nfe:019d}',
+                str(nfe + 1), '1', '2023-01-15',
+                '12.345.678/0001-90', 'Usina Exemplo', 'SP',
+                '98765432000110', 'Cliente Exemplo', 'PE',
+                str(i % items_per_nfe + 1), f'P{i % 50}', 'Acucar cristal',
+                rng.choice(NCMS), rng.choice(CFOPS), 'KG',
+                str(quantidade), f'{unitario:.2f}', f'{quantidade * unitario:.2f}',
+                cst, '1.65', '0.00', cst, '7.60', '0.00',
+            ]) + '\n')
+
+
+def run(csv_path: Path, vectorized: bool) -> float:
+    """Parsear arquivo e retornar tempo (segundos)"""
+    parser = NFeCSVParser(vectorized=vectorized)
+    start = time.perf_counter()
+    nfes = parser.parse_csv(str(csv_path))
+    elapsed = time.perf_counter() - start
+    assert nfes, "Nenhuma NF-e parseada"
+    return elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=100_000)
+    arg_parser.add_argument('--items-per-nfe', type=int, default=4)
+    arg_parser.add_argument('--skip-rowwise', action='store_true',
+                            help='Medir apenas o caminho colunar')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'bench_nfe.csv'
+        generate_csv(csv_path, args.rows, args.items_per_nfe)
+
+        columnar = run(csv_path, vectorized=True)
+        print(f"Colunar:        {columnar:8.2f}s  ({args.rows / columnar:,.0f} linhas/s)")
+
+        if not args.skip_rowwise:
+            rowwise = run(csv_path, vectorized=False)
+            print(f"Linha a linha:  {rowwise:8.2f}s  ({args.rows / rowwise:,.0f} linhas/s)")
+            print(f"Speedup:        {rowwise / columnar:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
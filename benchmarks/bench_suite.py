@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Suíte de benchmarks do caminho crítico da validação de NF-e
+
+Mede separadamente, para cada tamanho de lote:
+- NFeCSVParser.parse_csv e _normalize_dataframe
+- Cada validador federal (NCM, PIS/COFINS, CFOP, totais) e estadual (SP, PE)
+- ReportGenerator.generate_json_report / generate_markdown_report
+
+Para cada etapa: tempo, throughput (itens/s), pico de RSS do processo e
+blocos de memória alocados (líquidos, via sys.getallocatedblocks; com
+--trace-allocations também o pico de bytes rastreados pelo tracemalloc).
+
+Uso:
+    python benchmarks/bench_suite.py --items 1k 100k 1M --output results.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --fail-on-regression
+    python benchmarks/bench_suite.py --items 1k 100k --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from nfe_generator import generate_nfe_csv
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.validators.report_generator import ReportGenerator
+from src.nfe_validator.domain.services.federal_validators import (
+    NCMValidator, PISCOFINSValidator, CFOPValidator, TotalsValidator
+)
+from src.nfe_validator.domain.services.state_validators import SPValidator, PEValidator
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from src.repositories.fiscal_repository import FiscalRepository
+
+
+# Queda de throughput tolerada antes de acusar regressão
+DEFAULT_TOLERANCE = 0.25
+
+# Etapas mais rápidas que isso (na baseline) são ruído de medição
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def parse_size(text: str) -> int:
+    """'1k' -> 1000, '1M' -> 1000000"""
+    multipliers = {'k': 1_000, 'K': 1_000, 'm': 1_000_000, 'M': 1_000_000}
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo (MB)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB; macOS: bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(fn: Callable[[], Any], items: int, trace: bool = False):
+    """
+    Executar etapa medindo tempo e memória
+
+    Returns:
+        (resultado, métricas)
+    """
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    metrics = {
+        'seconds': round(elapsed, 4),
+        'items_per_s': round(items / elapsed, 1) if elapsed > 0 else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'net_allocated_blocks': sys.getallocatedblocks() - blocks,
+    }
+    if trace:
+        metrics['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    return result, metrics
+
+
+# =====================================================
+# Etapas
+# =====================================================
+
+def item_stage(validator, nfes, applies=lambda nfe: True) -> Callable[[], int]:
+    def run():
+        evaluated = 0
+        for nfe in nfes:
+            if applies(nfe):
+                for item in nfe.items:
+                    validator.validate(item, nfe)
+                evaluated += len(nfe.items)
+        return evaluated
+    return run
+
+
+def run_size(csv_path: Path, items: int, repo: FiscalRepository, trace: bool) -> Dict[str, Dict]:
+    """Executar todas as etapas para um arquivo"""
+    stages: Dict[str, Dict] = {}
+    parser = NFeCSVParser()
+
+    nfes, stages['parse_csv'] = measure(lambda: parser.parse_csv(str(csv_path)), items, trace)
+
+    raw = pd.read_csv(csv_path, dtype=parser.CSV_DTYPE_SPEC, keep_default_na=False, na_values=[''])
+    _, stages['normalize_dataframe'] = measure(lambda: parser._normalize_dataframe(raw), items, trace)
+    del raw
+
+    is_sp = lambda nfe: nfe.emitente.uf == 'SP' or nfe.destinatario.uf == 'SP'
+    is_pe = lambda nfe: nfe.emitente.uf == 'PE' or nfe.destinatario.uf == 'PE'
+    validators = [
+        ('ncm_validator', NCMValidator(repo), None),
+        ('pis_cofins_validator', PISCOFINSValidator(repo), None),
+        ('cfop_validator', CFOPValidator(repo), None),
+        ('sp_validator', SPValidator(repo), is_sp),
+        ('pe_validator', PEValidator(repo), is_pe),
+    ]
+    for name, validator, applies in validators:
+        stage = item_stage(validator, nfes, applies or (lambda nfe: True))
+        evaluated, metrics = measure(stage, items, trace)
+        # Throughput sobre os itens efetivamente avaliados
+        if metrics['seconds'] > 0:
+            metrics['items_per_s'] = round(evaluated / metrics['seconds'], 1)
+        metrics['items'] = evaluated
+        stages[name] = metrics
+
+    totals = TotalsValidator(repo)
+    _, stages['totals_validator'] = measure(lambda: [totals.validate(nfe) for nfe in nfes], items, trace)
+
+    pipeline = ValidationPipeline(repo)
+    _, stages['validation_pipeline'] = measure(lambda: [pipeline.validate(nfe) for nfe in nfes], items, trace)
+
+    reports = ReportGenerator(citation_resolver=repo.format_legal_citation)
+    _, stages['json_report'] = measure(
+        lambda: [reports.generate_json_report(nfe) for nfe in nfes], items, trace
+    )
+    _, stages['markdown_report'] = measure(
+        lambda: [reports.generate_markdown_report(nfe) for nfe in nfes], items, trace
+    )
+    return stages
+
+
+# =====================================================
+# Baseline
+# =====================================================
+
+def compare(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Comparar throughput com a baseline
+
+    Args:
+        results: Saída desta execução
+        baseline: Saída de referência (mesmo formato)
+        tolerance: Queda relativa tolerada (0.25 = 25%)
+
+    Returns:
+        Lista de regressões (texto), vazia se nenhuma
+    """
+    regressions = []
+    for size, stages in results['results'].items():
+        reference = baseline.get('results', {}).get(size, {})
+        for stage, metrics in stages.items():
+            expected = reference.get(stage, {}).get('items_per_s')
+            found = metrics.get('items_per_s')
+            if not expected or not found:
+                continue
+            if reference[stage].get('seconds', 0) < MIN_COMPARABLE_SECONDS:
+                continue
+            if found < expected * (1 - tolerance):
+                regressions.append(
+                    f"{size} itens / {stage}: {found:,.0f} itens/s "
+                    f"(baseline {expected:,.0f}, {found / expected - 1:+.0%})"
+                )
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--items', nargs='+', default=['1k', '100k'],
+                            help='Tamanhos de lote (ex.: 1k 100k 1M)')
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--output', help='Gravar resultados em JSON')
+    arg_parser.add_argument('--baseline', help='Comparar com resultados de referência')
+    arg_parser.add_argument('--save-baseline', help='Gravar resultados como nova baseline')
+    arg_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    arg_parser.add_argument('--trace-allocations', action='store_true',
+                            help='Medir pico de bytes com tracemalloc (mais lento)')
+    arg_parser.add_argument('--fail-on-regression', action='store_true')
+    args = arg_parser.parse_args()
+
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+
+    repo = FiscalRepository()
+    with tempfile.TemporaryDirectory() as tmp:
+        for text in args.items:
+            items = parse_size(text)
+            csv_path = Path(tmp) / f'bench_{items}.csv'
+            nfes = generate_nfe_csv(csv_path, items, seed=args.seed)
+            print(f"\n== {items:,} itens ({nfes:,} NF-es)")
+
+            stages = run_size(csv_path, items, repo, args.trace_allocations)
+            results['results'][str(items)] = stages
+            for stage, metrics in stages.items():
+                print(f"  {stage:<22} {metrics['seconds']:9.3f}s  "
+                      f"{metrics['items_per_s'] or 0:14,.0f} itens/s  "
+                      f"RSS {metrics['peak_rss_mb'] or 0:8.1f} MB")
+            csv_path.unlink()
+    repo.close()
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressões:")
+            for line in regressions:
+                print(f"  {line}")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print("\nSem regressões em relação à baseline")
+
+
+if __name__ == '__main__':
+    main()
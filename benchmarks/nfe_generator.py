@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Gerador de NF-es sintéticas para benchmarks
+
+Mistura realista do setor sucroalcooleiro:
+- NCMs de açúcar (bruto, VHP, cristal, refinado) e etanol, com parte em
+  formato pontuado e alguns códigos inválidos/inexistentes
+- Operações internas e interestaduais SP/PE (CFOP 5xxx/6xxx) e exportação
+- CSTs PIS/COFINS tributados (alíquota padrão), monofásicos, isentos e
+  divergentes, com uma fração de alíquotas e valores errados
+- Descrições compatíveis com o NCM e algumas incompatíveis
+
+Uso:
+    from nfe_generator import generate_nfe_csv
+    generate_nfe_csv(path, items=100_000)
+"""
+
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+
+HEADER = [
+    'chave_acesso', 'numero_nfe', 'serie', 'data_emissao',
+    'cnpj_emitente', 'razao_social_emitente', 'uf_emitente',
+    'cnpj_destinatario', 'razao_social_destinatario', 'uf_destinatario',
+    'numero_item', 'codigo_produto', 'descricao', 'ncm', 'cfop', 'unidade',
+    'quantidade', 'valor_unitario', 'valor_total',
+    'pis_cst', 'pis_aliquota', 'pis_valor',
+    'cofins_cst', 'cofins_aliquota', 'cofins_valor',
+]
+
+# (peso, ncm, descrições)
+PRODUCTS: List[Tuple[int, str, Tuple[str, ...]]] = [
+    (30, '17019900', ('Açúcar cristal tipo 1', 'Açúcar refinado amorfo', 'Acucar cristal')),
+    (25, '17011400', ('Açúcar VHP', 'Açúcar bruto de cana VHP')),
+    (10, '1701.99.00', ('Açúcar cristal ensacado 50kg',)),
+    (10, '17011100', ('Açúcar de cana em bruto',)),
+    (8, '17019100', ('Açúcar com aromatizante',)),
+    (10, '22071000', ('Etanol hidratado', 'Álcool etílico')),
+    (4, '17019900', ('Parafuso sextavado', 'Embalagem plástica')),
+    (2, '99999999', ('Açúcar demerara',)),
+    (1, '1701', ('Açúcar',)),
+]
+
+# (peso, uf_emitente, uf_destinatario, cfops)
+OPERATIONS: List[Tuple[int, str, str, Tuple[str, ...]]] = [
+    (35, 'SP', 'SP', ('5101', '5102', '5.101')),
+    (20, 'SP', 'PE', ('6101', '6102', '6.101')),
+    (20, 'PE', 'PE', ('5101', '5102')),
+    (10, 'PE', 'SP', ('6101', '6102')),
+    (8, 'SP', 'MG', ('6101', '5101')),
+    (5, 'SP', 'EX', ('7101',)),
+    (2, 'PE', 'SP', ('5999',)),
+]
+
+# (peso, cst PIS/COFINS, alíquota PIS, alíquota COFINS)
+TAXES: List[Tuple[int, str, str, str]] = [
+    (60, '01', '1.65', '7.60'),
+    (10, '1', '1.65', '7.60'),
+    (10, '06', '0', '0'),
+    (6, '04', '0', '0'),
+    (6, '50', '1.65', '7.60'),
+    (4, '01', '2.50', '9.00'),  # Alíquota errada
+    (2, '99', '0', '0'),
+    (2, 'XX', '1.65', '7.60'),  # CST inválido
+]
+
+
+def _weighted(rng: random.Random, table):
+    return rng.choices(table, weights=[row[0] for row in table])[0]
+
+
+def generate_nfe_csv(path: Path, items: int, max_items_per_nfe: int = 8, seed: int = 42) -> int:
+    """
+    Gerar CSV com aproximadamente `items` itens
+
+    Args:
+        path: Arquivo de saída
+        items: Número de itens (linhas)
+        max_items_per_nfe: Itens por NF-e sorteados entre 1 e este valor
+        seed: Semente (mesmo arquivo para a mesma semente)
+
+    Returns:
+        Número de NF-es geradas
+    """
+    rng = random.Random(seed)
+    written = 0
+    nfe = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(','.join(HEADER) + '\n')
+        while written < items:
+            nfe += 1
+            _, uf_emit, uf_dest, cfops = _weighted(rng, OPERATIONS)
+            cfop = rng.choice(cfops)
+            chave = f'{35 if uf_emit == "SP" else 26}2301{nfe:014d}55001{nfe:019d}'[:44]
+            header = [
+                chave, str(nfe), '1', f'2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+                f'{rng.randint(1, 999):03d}45678000190', f'Usina {uf_emit}', uf_emit,
+                f'{rng.randint(1, 999):03d}65432000110', f'Cliente {uf_dest}', uf_dest,
+            ]
+
+            count = min(rng.randint(1, max_items_per_nfe), items - written)
+            for item in range(1, count + 1):
+                _, ncm, descriptions = _weighted(rng, PRODUCTS)
+                _, cst, pis_aliq, cofins_aliq = _weighted(rng, TAXES)
+
+                quantidade = rng.randint(1, 5000)
+                unitario = rng.randint(150, 450) / 100
+                total = quantidade * unitario
+                if rng.random() < 0.02:
+                    total += 0.37  # Divergência de cálculo
+
+                pis_valor = total * float(pis_aliq) / 100
+                cofins_valor = total * float(cofins_aliq) / 100
+                if rng.random() < 0.05:
+                    pis_valor *= 1.1
+
+                f.write(','.join(header + [
+                    str(item), f'P{rng.randint(1, 200)}', rng.choice(descriptions),
+                    ncm, cfop, 'KG',
+                    str(quantidade), f'{unitario:.2f}', f'{total:.2f}',
+                    cst, pis_aliq, f'{pis_valor:.2f}',
+                    cst, cofins_aliq, f'{cofins_valor:.2f}',
+                ]) + '\n')
+            written += count
+    return nfe
@@ -3,8 +3,63 @@
 Sistema EDA - Análise Exploratória de Dados com IA
 
 Pacote principal do sistema de análise exploratória de dados.
+
+nfe_validator e repositories importam um ao outro pelo nome absoluto (src/
+no sys.path). Importados como "src.nfe_validator..." ou
+"src.repositories...", resolvem para os mesmos módulos: o estado de cada
+módulo (registros, ContextVar, caches) existe uma única vez no processo.
 """
 
+import importlib
+import importlib.abc
+import importlib.util
+import sys
+from pathlib import Path
+
 __version__ = "1.0.0"
 __author__ = "Sistema EDA"
-__description__ = "Sistema de Análise Exploratória de Dados com Inteligência Artificial"
\ No newline at end of file
+__description__ = "Sistema de Análise Exploratória de Dados com Inteligência Artificial"
+
+
+# =====================================================
+# Nome canônico de nfe_validator e repositories
+# =====================================================
+
+_SRC_DIR = str(Path(__file__).parent)
+_CANONICAL_PACKAGES = ('nfe_validator', 'repositories')
+
+
+class _CanonicalLoader(importlib.abc.Loader):
+    """Devolve o módulo já importado pelo nome canônico"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.spec = None
+
+    def create_module(self, spec):
+        module = importlib.import_module(self.name)
+        self.spec = module.__spec__
+        return module
+
+    def exec_module(self, module):
+        # O import system grava o spec do alias no módulo: restaurar o original
+        module.__spec__ = self.spec
+
+
+class _CanonicalFinder(importlib.abc.MetaPathFinder):
+    """src.<pacote>[.submódulo] -> <pacote>[.submódulo]"""
+
+    def find_spec(self, fullname, path=None, target=None):
+        prefix = __name__ + '.'
+        if not fullname.startswith(prefix):
+            return None
+        name = fullname[len(prefix):]
+        if name.split('.')[0] not in _CANONICAL_PACKAGES:
+            return None
+        return importlib.util.spec_from_loader(fullname, _CanonicalLoader(name))
+
+
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+if not any(isinstance(finder, _CanonicalFinder) for finder in sys.meta_path):
+    sys.meta_path.insert(0, _CanonicalFinder())
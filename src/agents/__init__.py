@@ -3,9 +3,25 @@
 Módulo de Agentes IA
 
 Este módulo contém os agentes de inteligência artificial para análise de dados.
+
+Os agentes LangChain são importados sob demanda: o serviço de classificação
+(ncm_classification_service) pode ser usado com outro classificador (ex.:
+stub local em testes) sem o LangChain instalado.
 """
 
-from .eda_agent import EDAAgent
-from .ncm_agent import NCMReActAgent, create_ncm_agent
+import importlib
+
+_EXPORTS = {
+    'EDAAgent': '.eda_agent',
+    'NCMReActAgent': '.ncm_agent',
+    'create_ncm_agent': '.ncm_agent',
+    'NCMClassificationService': '.ncm_classification_service',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ['EDAAgent', 'NCMReActAgent', 'create_ncm_agent']
\ No newline at end of file
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
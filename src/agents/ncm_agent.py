@@ -39,29 +39,39 @@ class NCMReActAgent:
     - Explicar raciocínio (reasoning trace)
     """
 
-    def __init__(self, repository: FiscalRepository, api_key: str = None):
+    DEFAULT_MODEL = "gemini-2.5-pro"  # Gemini 2.5
+
+    def __init__(self, repository: FiscalRepository, api_key: str = None,
+                 model: str = DEFAULT_MODEL, llm=None, verbose: bool = True):
         """
         Inicializar agente NCM
 
         Args:
             repository: FiscalRepository para consultas
             api_key: Google AI API key (ou usar GOOGLE_API_KEY env var)
+            model: Modelo Gemini
+            llm: Modelo LangChain já construído (ex.: LLM local/stub em
+                testes); dispensa api_key
+            verbose: Exibir o trace ReAct no console
         """
         self.repo = repository
+        self.model = model
 
-        # Initialize Gemini model
-        if api_key is None:
-            api_key = os.getenv('GOOGLE_API_KEY')
+        if llm is None:
+            # Initialize Gemini model
+            if api_key is None:
+                api_key = os.getenv('GOOGLE_API_KEY')
 
-        if not api_key:
-            raise ValueError("Google API key required (set GOOGLE_API_KEY env var or pass api_key)")
+            if not api_key:
+                raise ValueError("Google API key required (set GOOGLE_API_KEY env var or pass api_key)")
 
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-pro",  # Gemini 2.5
-            google_api_key=api_key,
-            temperature=0.1,  # Low temperature for consistency
-            max_output_tokens=2000
-        )
+            llm = ChatGoogleGenerativeAI(
+                model=model,
+                google_api_key=api_key,
+                temperature=0.1,  # Low temperature for consistency
+                max_output_tokens=2000
+            )
+        self.llm = llm
 
         # Define tools
         self.tools = self._create_tools()
@@ -73,7 +83,7 @@ class NCMReActAgent:
         self.executor = AgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            verbose=True,
+            verbose=verbose,
             max_iterations=5,
             handle_parsing_errors=True
         )
@@ -88,22 +98,12 @@ class NCMReActAgent:
 
         def search_ncm_by_keywords(query: str) -> str:
             """Buscar NCMs que contenham palavras-chave na descrição ou keywords"""
-            query_lower = query.lower()
+            # Índice de keywords do snapshot (sem consulta por NCM)
+            index = self.repo.keyword_index
 
             # Get all sugar NCMs
-            ncms = self.repo.get_all_sugar_ncms()
-
-            results = []
-            for ncm_data in ncms:
-                # Check description
-                if query_lower in ncm_data['description'].lower():
-                    results.append(ncm_data)
-                    continue
-
-                # Check keywords
-                keywords = self.repo.get_ncm_keywords(ncm_data['ncm'])
-                if any(query_lower in kw.lower() for kw in keywords):
-                    results.append(ncm_data)
+            ncms = {ncm_data['ncm']: ncm_data for ncm_data in self.repo.get_all_sugar_ncms()}
+            results = [ncms[ncm] for ncm in index.search(query, ncms=ncms)]
 
             if not results:
                 return f"Nenhum NCM encontrado para: {query}"
@@ -115,8 +115,22 @@ class NCMReActAgent:
                 output += f"  Descrição: {ncm_data['description']}\n"
                 output += f"  Tipo: {ncm_data.get('product_type', 'N/A')}\n"
 
-                keywords = self.repo.get_ncm_keywords(ncm_data['ncm'])
-                output += f"  Keywords: {', '.join(keywords)}\n\n"
+                output += f"  Keywords: {', '.join(index.keywords(ncm_data['ncm']))}\n\n"
+
+            return output
+
+        def suggest_ncm_from_description(description: str) -> str:
+            """Sugerir NCMs pelas keywords encontradas na descrição do produto"""
+            suggestions = self.repo.suggest_ncm(description)
+
+            if not suggestions:
+                return f"Nenhuma keyword de NCM encontrada em: {description}"
+
+            output = f"NCMs sugeridos ({len(suggestions)}):\n\n"
+            for suggestion in suggestions:
+                output += f"- NCM: {suggestion['ncm']} (score {suggestion['score']})\n"
+                output += f"  Descrição: {suggestion['description']}\n"
+                output += f"  Keywords encontradas: {', '.join(suggestion['matched'])}\n\n"
 
             return output
 
@@ -172,6 +186,15 @@ class NCMReActAgent:
                     "Input: palavra-chave ou frase (ex: 'refinado', 'cristal', 'bruto')"
                 )
             ),
+            Tool(
+                name="suggest_ncm_from_description",
+                func=suggest_ncm_from_description,
+                description=(
+                    "Sugerir NCMs a partir da descrição completa do produto, pelas keywords encontradas. "
+                    "Use como primeiro passo para ter candidatos ordenados por relevância. "
+                    "Input: descrição do produto (ex: 'Açúcar cristal tipo 1 50kg')"
+                )
+            ),
             Tool(
                 name="get_ncm_details",
                 func=get_ncm_details,
@@ -259,46 +282,75 @@ Thought: {agent_scratchpad}"""
             - reasoning: Raciocínio do agente
             - is_correct: Se NCM atual está correto (se fornecido)
         """
-
-        # Build query
-        query = f"Qual o NCM correto para o produto: '{product_description}'"
-
-        if current_ncm:
-            query += f"\nNCM atual na nota: {current_ncm}"
-            query += "\nO NCM atual está correto? Se não, qual deveria ser?"
+        query = self._build_query(product_description, current_ncm)
 
         try:
             # Run agent
             result = self.executor.invoke({"input": query})
+            return self._parse_result(result, query, current_ncm)
 
-            # Parse result
-            answer = result.get('output', '')
+        except Exception as e:
+            return self._error_result(e, query)
 
-            # Extract suggested NCM (simple parsing)
-            suggested_ncm = self._extract_ncm_from_answer(answer)
+    async def aclassify_ncm(self, product_description: str, current_ncm: str = None) -> Dict[str, Any]:
+        """
+        Classificar NCM sem bloquear o event loop (mesmo retorno de classify_ncm)
 
-            # Determine if current NCM is correct
-            is_correct = None
-            if current_ncm:
-                is_correct = (current_ncm == suggested_ncm)
+        Várias classificações podem rodar ao mesmo tempo no mesmo agente
+        (usado por NCMClassificationService).
+        """
+        query = self._build_query(product_description, current_ncm)
 
-            return {
-                'suggested_ncm': suggested_ncm,
-                'confidence': self._extract_confidence(answer),
-                'reasoning': answer,
-                'is_correct': is_correct,
-                'query': query
-            }
+        try:
+            result = await self.executor.ainvoke({"input": query})
+            return self._parse_result(result, query, current_ncm)
 
         except Exception as e:
-            return {
-                'suggested_ncm': None,
-                'confidence': 0,
-                'reasoning': f"Erro ao processar: {str(e)}",
-                'is_correct': None,
-                'query': query,
-                'error': str(e)
-            }
+            return self._error_result(e, query)
+
+    @staticmethod
+    def _build_query(product_description: str, current_ncm: str = None) -> str:
+        """Pergunta enviada ao agente"""
+        query = f"Qual o NCM correto para o produto: '{product_description}'"
+
+        if current_ncm:
+            query += f"\nNCM atual na nota: {current_ncm}"
+            query += "\nO NCM atual está correto? Se não, qual deveria ser?"
+
+        return query
+
+    def _parse_result(self, result: Dict[str, Any], query: str, current_ncm: str = None) -> Dict[str, Any]:
+        """Converter saída do AgentExecutor no dict de classificação"""
+        # Parse result
+        answer = result.get('output', '')
+
+        # Extract suggested NCM (simple parsing)
+        suggested_ncm = self._extract_ncm_from_answer(answer)
+
+        # Determine if current NCM is correct
+        is_correct = None
+        if current_ncm:
+            is_correct = (current_ncm == suggested_ncm)
+
+        return {
+            'suggested_ncm': suggested_ncm,
+            'confidence': self._extract_confidence(answer),
+            'reasoning': answer,
+            'is_correct': is_correct,
+            'query': query
+        }
+
+    @staticmethod
+    def _error_result(error: Exception, query: str) -> Dict[str, Any]:
+        """Dict de classificação para falha do agente"""
+        return {
+            'suggested_ncm': None,
+            'confidence': 0,
+            'reasoning': f"Erro ao processar: {str(error)}",
+            'is_correct': None,
+            'query': query,
+            'error': str(error)
+        }
 
     def _extract_ncm_from_answer(self, answer: str) -> Optional[str]:
         """
@@ -360,15 +412,18 @@ Thought: {agent_scratchpad}"""
 # Factory Functions
 # =====================================================
 
-def create_ncm_agent(repository: FiscalRepository, api_key: str = None) -> NCMReActAgent:
+def create_ncm_agent(repository: FiscalRepository, api_key: str = None,
+                     model: str = NCMReActAgent.DEFAULT_MODEL, **kwargs) -> NCMReActAgent:
     """
     Factory para criar agente NCM
 
     Args:
         repository: FiscalRepository
         api_key: Google AI API key (opcional)
+        model: Modelo Gemini
+        **kwargs: llm, verbose (ver NCMReActAgent)
 
     Returns:
         NCMReActAgent instanciado
     """
-    return NCMReActAgent(repository, api_key)
+    return NCMReActAgent(repository, api_key, model=model, **kwargs)
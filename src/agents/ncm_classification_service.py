@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+NCM Classification Service - Classificação de NCM por IA em lote
+
+A validação sob demanda criava um NCMReActAgent por item e classificava os
+itens um após o outro. O serviço:
+
+- Reutiliza um único agente por provedor/modelo (criado na primeira
+  classificação que não está em cache)
+- Deduplica descrições iguais após normalização (mesmo NCM atual): uma
+  consulta ao LLM por descrição distinta do lote
+- Roda as classificações com asyncio, com concorrência limitada
+  (max_concurrency) e limite de requisições por segundo (rate_limit)
+- Persiste os resultados em NCMClassificationCache, com chave
+  (hash da descrição, NCM atual, modelo)
+
+O classificador é qualquer objeto com classify_ncm(descricao, ncm_atual)
+(e, opcionalmente, aclassify_ncm assíncrono), o que permite usar um LLM
+local/stub em testes.
+
+Uso:
+    service = NCMClassificationService.for_repository(repo, api_key)
+    results = service.classify_items(nfe.items)   # {numero_item: resultado}
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Import persistence - absolute import
+import sys
+from pathlib import Path
+if True:
+    project_root = Path(__file__).parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from nfe_validator.infrastructure.persistence.classification_cache import (
+    ClassificationKey, NCMClassificationCache, classification_key
+)
+from nfe_validator.profiling import count
+
+
+DEFAULT_MODEL = "gemini-2.5-pro"
+
+# Pedido de classificação: (descrição do produto, NCM atual na NF-e)
+ClassificationRequest = Tuple[str, Optional[str]]
+
+# Callback de progresso: (descrições distintas concluídas, total distinto)
+ProgressCallback = Callable[[int, int], None]
+
+
+class RateLimiter:
+    """
+    Limite de requisições por segundo (espaçamento mínimo entre inícios)
+
+    A reserva do horário é síncrona (sem await entre ler e gravar o próximo
+    horário livre), então o limitador serve a qualquer event loop, inclusive
+    entre chamadas sucessivas de asyncio.run.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        """
+        Args:
+            rate: Requisições por segundo (None ou 0 = sem limite)
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reservar o próximo horário livre; retorna os segundos de espera"""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return slot - now
+
+    async def wait(self):
+        """Aguardar o horário reservado"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class NCMClassificationService:
+    """Classificação de NCM por IA: agente único, deduplicação, concorrência e cache"""
+
+    DEFAULT_MAX_CONCURRENCY = 4
+    DEFAULT_RATE_LIMIT = 2.0  # requisições/s ao provedor
+
+    def __init__(self, classifier: Any = None, *,
+                 classifier_factory: Callable[[], Any] = None,
+                 model: str = DEFAULT_MODEL,
+                 cache: Optional[NCMClassificationCache] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 rate_limit: Optional[float] = DEFAULT_RATE_LIMIT):
+        """
+        Inicializar serviço
+
+        Args:
+            classifier: Classificador pronto (classify_ncm / aclassify_ncm)
+            classifier_factory: Cria o classificador na primeira consulta
+                (alternativa a classifier; evita criar o agente se tudo
+                estiver em cache)
+            model: Modelo do LLM (parte da chave do cache)
+            cache: Cache persistente (None = sem cache em disco)
+            max_concurrency: Classificações simultâneas
+            rate_limit: Requisições por segundo (None = sem limite)
+        """
+        if classifier is None and classifier_factory is None:
+            raise ValueError("Informe classifier ou classifier_factory")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency deve ser >= 1")
+
+        self._classifier = classifier
+        self._classifier_factory = classifier_factory
+        self._classifier_lock = threading.Lock()
+        self.model = model
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(rate_limit)
+
+    @classmethod
+    def for_repository(cls, repository, api_key: str = None, model: str = DEFAULT_MODEL,
+                       cache: Optional[NCMClassificationCache] = None,
+                       **kwargs) -> 'NCMClassificationService':
+        """
+        Serviço com o NCMReActAgent (Gemini) sobre o repositório
+
+        Args:
+            repository: FiscalRepository
+            api_key: Google AI API key (ou GOOGLE_API_KEY)
+            model: Modelo Gemini
+            cache: Cache persistente (default: NCMClassificationCache())
+            **kwargs: max_concurrency, rate_limit
+
+        Returns:
+            NCMClassificationService
+        """
+        def factory():
+            from .ncm_agent import create_ncm_agent
+            return create_ncm_agent(repository, api_key, model=model, verbose=False)
+
+        if cache is None:
+            cache = NCMClassificationCache()
+        return cls(classifier_factory=factory, model=model, cache=cache, **kwargs)
+
+    @property
+    def classifier(self) -> Any:
+        """Classificador (criado uma única vez)"""
+        if self._classifier is None:
+            with self._classifier_lock:
+                if self._classifier is None:
+                    self._classifier = self._classifier_factory()
+                    count('ncm_ai.agent_created')
+        return self._classifier
+
+    # =====================================================
+    # Classificação
+    # =====================================================
+
+    def cache_key(self, description: str, current_ncm: Optional[str] = None) -> ClassificationKey:
+        """Chave de deduplicação e de cache da descrição"""
+        return classification_key(description, current_ncm, self.model)
+
+    async def classify(self, description: str, current_ncm: Optional[str] = None) -> Dict[str, Any]:
+        """Classificar uma descrição (mesmo retorno de NCMReActAgent.classify_ncm)"""
+        return (await self.classify_many([(description, current_ncm)]))[0]
+
+    async def classify_many(self, requests: Iterable[ClassificationRequest],
+                            progress_callback: Optional[ProgressCallback] = None) -> List[Dict[str, Any]]:
+        """
+        Classificar várias descrições
+
+        Args:
+            requests: Pares (descrição, NCM atual)
+            progress_callback: Chamado a cada descrição distinta concluída
+
+        Returns:
+            Resultados na ordem de requests; cada um com 'cached' (True se
+            veio do cache em disco)
+        """
+        requests = list(requests)
+        keys = [self.cache_key(description, ncm) for description, ncm in requests]
+
+        # Primeira ocorrência de cada chave (deduplicação)
+        unique: Dict[ClassificationKey, ClassificationRequest] = {}
+        for key, request in zip(keys, requests):
+            unique.setdefault(key, request)
+        count('ncm_ai.deduplicated', len(keys) - len(unique))
+
+        results: Dict[ClassificationKey, Dict[str, Any]] = {}
+        if self.cache is not None:
+            for key, result in self.cache.get_many(unique).items():
+                results[key] = {**result, 'cached': True}
+            count('ncm_ai.cache_hit', len(results))
+
+        total = len(unique)
+        done = len(results)
+        if progress_callback and done:
+            progress_callback(done, total)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(key: ClassificationKey, description: str, current_ncm: Optional[str]):
+            nonlocal done
+            async with semaphore:
+                await self.rate_limiter.wait()
+                result = await self._call(description, current_ncm)
+            if self.cache is not None:
+                self.cache.put(key, result)
+            results[key] = {**result, 'cached': False}
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+
+        pending = [(key, *request) for key, request in unique.items() if key not in results]
+        count('ncm_ai.llm_call', len(pending))
+        await asyncio.gather(*(run(*args) for args in pending))
+
+        return [dict(results[key]) for key in keys]
+
+    async def _call(self, description: str, current_ncm: Optional[str]) -> Dict[str, Any]:
+        """Uma consulta ao classificador (erros viram resultado com 'error')"""
+        try:
+            classifier = self.classifier
+            aclassify: Optional[Callable[..., Awaitable[Dict]]] = getattr(classifier, 'aclassify_ncm', None)
+            if aclassify is not None:
+                return await aclassify(description, current_ncm)
+            # Classificador síncrono: executa em thread para não bloquear o loop
+            return await asyncio.to_thread(classifier.classify_ncm, description, current_ncm)
+        except Exception as e:
+            return {
+                'suggested_ncm': None,
+                'confidence': 0,
+                'reasoning': f"Erro ao consultar IA: {str(e)}",
+                'is_correct': None,
+                'error': str(e)
+            }
+
+    # =====================================================
+    # API síncrona (Streamlit)
+    # =====================================================
+
+    def classify_requests(self, requests: Sequence[ClassificationRequest],
+                          progress_callback: Optional[ProgressCallback] = None) -> List[Dict[str, Any]]:
+        """
+        classify_many em um event loop próprio (chamadores síncronos)
+
+        Não pode ser chamado de dentro de um event loop em execução (use
+        classify_many com await).
+        """
+        return asyncio.run(self.classify_many(requests, progress_callback))
+
+    def classify_items(self, items: Iterable[Any],
+                       progress_callback: Optional[ProgressCallback] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Classificar itens de NF-e (descricao, ncm)
+
+        Args:
+            items: NFeItem
+            progress_callback: Progresso por descrição distinta
+
+        Returns:
+            Dict numero_item -> resultado
+        """
+        items = list(items)
+        results = self.classify_requests(
+            [(item.descricao, item.ncm) for item in items], progress_callback
+        )
+        return {item.numero_item: result for item, result in zip(items, results)}
@@ -253,11 +253,15 @@ CREATE TABLE IF NOT EXISTS validation_log (
     -- Dados JSON
     errors_json TEXT, -- JSON com lista de erros
 
+    -- Revalidação incremental: hash das linhas da NF-e + versão das regras
+    fingerprint VARCHAR(64),
+
     notes TEXT
 );
 
 CREATE INDEX IF NOT EXISTS idx_validation_log_chave ON validation_log(nfe_chave);
 CREATE INDEX IF NOT EXISTS idx_validation_log_timestamp ON validation_log(validation_timestamp);
+CREATE INDEX IF NOT EXISTS idx_validation_log_status ON validation_log(status);
 
 -- =====================================================
 -- Views úteis
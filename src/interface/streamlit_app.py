@@ -36,7 +36,7 @@ from nfe_validator.domain.services.state_validators import (
 )
 from nfe_validator.infrastructure.validators.report_generator import ReportGenerator
 from repositories.fiscal_repository import FiscalRepository
-from agents.ncm_agent import create_ncm_agent
+from agents.ncm_classification_service import NCMClassificationService
 
 
 # =====================================================
@@ -89,53 +89,47 @@ def validate_nfe(nfe, repo, use_ai_agent=False, api_key=None):
     for validator in item_validators:
         for item in nfe.items:
             errors = validator.validate(item, nfe)
-            nfe.validation_errors.extend(errors)
+            nfe.extend_errors(errors)
 
     # Totals Validator
     totals_validator = TotalsValidator(repo)
     totals_errors = totals_validator.validate(nfe)
-    nfe.validation_errors.extend(totals_errors)
+    nfe.extend_errors(totals_errors)
 
     # State Validators
     if nfe.emitente.uf == 'SP' or nfe.destinatario.uf == 'SP':
         sp_validator = SPValidator(repo)
         for item in nfe.items:
             errors = sp_validator.validate(item, nfe)
-            nfe.validation_errors.extend(errors)
+            nfe.extend_errors(errors)
 
     if nfe.emitente.uf == 'PE' or nfe.destinatario.uf == 'PE':
         pe_validator = PEValidator(repo)
         for item in nfe.items:
             errors = pe_validator.validate(item, nfe)
-            nfe.validation_errors.extend(errors)
+            nfe.extend_errors(errors)
+
+    nfe.finish_validation()
 
     # AI Agent (optional)
     if use_ai_agent and api_key:
         try:
-            with st.spinner("Inicializando Agente IA..."):
-                agent = create_ncm_agent(repo, api_key)
+            # Um agente por sessão; descrições repetidas consultadas uma vez
+            if 'ncm_classification_service' not in st.session_state:
+                st.session_state.ncm_classification_service = NCMClassificationService.for_repository(
+                    repo, api_key
+                )
+            service = st.session_state.ncm_classification_service
 
             # Initialize suggestions dict
             if 'ai_suggestions' not in st.session_state:
                 st.session_state.ai_suggestions = {}
 
             with st.spinner("Classificando NCMs com IA..."):
-                for item in nfe.items:
-                    try:
-                        result = agent.classify_ncm(item.descricao, item.ncm)
-
-                        if result.get('suggested_ncm'):
-                            st.session_state.ai_suggestions[item.numero_item] = result
-
-                    except Exception as item_error:
-                        # Log error but continue with other items
-                        st.session_state.ai_suggestions[item.numero_item] = {
-                            'suggested_ncm': None,
-                            'confidence': 0,
-                            'reasoning': f"Erro ao processar: {str(item_error)}",
-                            'is_correct': None,
-                            'error': str(item_error)
-                        }
+                for numero_item, result in service.classify_items(nfe.items).items():
+                    # Erros são mantidos; sem sugestão, o item é omitido
+                    if result.get('suggested_ncm') or result.get('error'):
+                        st.session_state.ai_suggestions[numero_item] = result
 
         except Exception as e:
             st.warning(f"⚠️ Agente IA não disponível: {str(e)}")
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Execução como módulo: python -m nfe_validator validate <arquivos>
+"""
+
+from .cli import run
+
+run()
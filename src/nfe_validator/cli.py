@@ -0,0 +1,725 @@
+# -*- coding: utf-8 -*-
+"""
+Validação de NF-es em Lote pela Linha de Comando
+
+Executa mapeamento de colunas, parsing e validação sem Streamlit, para
+jobs agendados (ex.: validação noturna do mês inteiro):
+
+    fiscolayer validate dados/2023-01/*.csv --output-dir resultados/
+    python -m nfe_validator validate notas.csv --format json parquet --workers 4
+    fiscolayer validate dados/ --format jsonl csv --compress gzip
+    fiscolayer validate exportacao_erp.parquet --cache-dir cache/uploads
+    fiscolayer validate notas_2023-01.zip --format json csv
+
+Entradas: CSV, Parquet (colunas decimal128 usadas sem normalização) ou ZIP
+de CSVs (lidos direto do ZIP e decodificados em paralelo, BatchIngestor;
+a coluna 'arquivo' da tabela de erros traz o CSV de origem).
+Com --cache-dir, cada CSV normalizado é gravado em Parquet (chave: hash do
+arquivo) e reexecuções sobre o mesmo arquivo leem o Parquet; o mapeamento
+de colunas de cada layout de cabeçalho também fica gravado
+(column_mappings.db).
+
+Para cada arquivo de entrada são gravados em --output-dir:
+- <arquivo>.json      Relatório JSON de cada NF-e (ReportGenerator)
+- <arquivo>.jsonl     Idem, uma NF-e por linha (JSON Lines)
+- <arquivo>.md        Relatório Markdown das NF-es com erros
+- <arquivo>.csv       Tabela de erros (uma linha por erro)
+- <arquivo>.parquet   Tabela de erros (uma linha por erro)
+e, ao final, summary.json com os totais por arquivo.
+
+Os relatórios são gravados à medida que as NF-es são validadas (sem manter
+o lote em memória). Com --compress gzip/zstd, json, jsonl, md e csv são
+gravados comprimidos (.gz / .zst).
+
+Com --compact-items, os itens de cada lote ficam em armazenamento colunar
+(CompactItemBatch): menos memória em lotes grandes, mesmas NF-es e erros.
+
+Códigos de saída:
+    0  Nenhuma NF-e com erro na severidade de --fail-on (ou mais grave)
+    1  Há NF-es com erro na severidade de --fail-on (ou mais grave)
+    2  Erro de uso, leitura ou parsing dos arquivos
+"""
+
+import argparse
+import glob
+import importlib.util
+import json
+import sqlite3
+import sys
+import time
+import zipfile
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import pandas as pd
+
+from . import __version__
+from .domain.entities.nfe_entity import NFeEntity, Severity
+from .domain.services.aggregation import ValidationAggregate
+from .infrastructure.parsers.arrow_io import arrow_to_frame
+from .infrastructure.parsers.batch_ingestion import BatchIngestor
+from .infrastructure.parsers.column_mapper import ColumnMapper
+from .infrastructure.parsers.csv_parser import NFeCSVParser, CSVParserException
+from .infrastructure.persistence.column_mapping_cache import ColumnMappingCache
+from .infrastructure.persistence.result_store import ValidationResultStore
+from .infrastructure.persistence.upload_cache import NormalizedUploadCache
+from .infrastructure.validators.incremental import IncrementalValidator
+from .infrastructure.validators.parallel_engine import ParallelValidationEngine
+from .infrastructure.validators.report_generator import ReportGenerator
+from .infrastructure.validators.report_writer import (
+    ERROR_COLUMNS, COMPRESSION_SUFFIXES, ReportStreamWriter, error_rows, open_report_writer
+)
+from .profiling import RunProfiler
+
+# Import FiscalRepository - absolute import
+if True:  # Always add to path
+    project_root = Path(__file__).parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from repositories.fiscal_repository import FiscalRepository
+
+
+EXIT_OK = 0
+EXIT_FISCAL_ERRORS = 1
+EXIT_USAGE = 2
+
+OUTPUT_FORMATS = ('json', 'jsonl', 'markdown', 'csv', 'parquet')
+
+# Formatos gravados em streaming (ReportStreamWriter) e extensão
+STREAM_SUFFIXES = {'json': '.json', 'jsonl': '.jsonl', 'markdown': '.md', 'csv': '.csv'}
+
+# Extensões aceitas como entrada (diretórios são expandidos para estas)
+INPUT_SUFFIXES = ('.csv', '.parquet', '.zip')
+
+# Severidades que reprovam o lote, por valor de --fail-on
+FAIL_ON: Dict[str, Set[Severity]] = {
+    'critical': {Severity.CRITICAL},
+    'error': {Severity.CRITICAL, Severity.ERROR},
+    'warning': {Severity.CRITICAL, Severity.ERROR, Severity.WARNING},
+    'never': set(),
+}
+
+# Códigos de erro mais frequentes listados por arquivo em summary.json
+TOP_ERROR_CODES = 10
+
+# Erros de sistema exibidos por arquivo (os demais são apenas contados)
+MAX_SYSTEM_ERROR_MESSAGES = 10
+
+
+
+class CLIError(Exception):
+    """Erro de uso (entradas inexistentes, opções incompatíveis)"""
+    pass
+
+
+# =====================================================
+# Entradas
+# =====================================================
+
+def expand_inputs(patterns: Sequence[str]) -> List[Path]:
+    """
+    Expandir arquivos, diretórios (*.csv, *.parquet) e globs (inclusive **)
+
+    Args:
+        patterns: Caminhos ou padrões da linha de comando
+
+    Returns:
+        Arquivos de entrada, sem repetição, na ordem informada
+
+    Raises:
+        CLIError: Se algum padrão não corresponder a nenhum arquivo
+    """
+    files: List[Path] = []
+    seen = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in INPUT_SUFFIXES)
+        elif glob.has_magic(pattern):
+            matches = [Path(p) for p in sorted(glob.glob(pattern, recursive=True)) if Path(p).is_file()]
+        else:
+            matches = [path] if path.is_file() else []
+
+        if not matches:
+            raise CLIError(f"Nenhum arquivo encontrado para: {pattern}")
+        for match in matches:
+            key = match.resolve()
+            if key not in seen:
+                seen.add(key)
+                files.append(match)
+    return files
+
+
+def is_parquet(path: Path) -> bool:
+    """Entrada em Parquet (pela extensão)"""
+    return path.suffix.lower() == '.parquet'
+
+
+def is_zip(path: Path) -> bool:
+    """Entrada em ZIP de CSVs (pela extensão)"""
+    return path.suffix.lower() == '.zip'
+
+
+def prepare_input(path: Path, parser: NFeCSVParser,
+                  mapping_cache: Optional[ColumnMappingCache] = None) -> Dict[str, Any]:
+    """
+    Mapear colunas do arquivo para o layout padrão
+
+    CSVs já no layout padrão são lidos diretamente (parsing em streaming).
+    Os demais são carregados, mapeados (ColumnMapper) e completados com
+    valores padrão em memória. Arquivos Parquet são lidos como tabela
+    Arrow, com as colunas renomeadas conforme o mapeamento.
+
+    Args:
+        path: CSV ou Parquet de entrada
+        parser: NFeCSVParser (detecção de encoding)
+        mapping_cache: Cache em disco dos mapeamentos por cabeçalho
+
+    Returns:
+        Dict com mapping, missing, complete e csv_path (layout padrão),
+        frame (DataFrame mapeado, para NFeCSVParser.parse_dataframe) ou
+        table (pyarrow.Table, para NFeCSVParser.parse_arrow)
+    """
+    if is_parquet(path):
+        return _prepare_parquet(path, mapping_cache)
+
+    encoding = parser._detect_encoding(str(path))
+    header = pd.read_csv(path, nrows=0, encoding=encoding)
+    mapping, missing = ColumnMapper.map_columns(header, cache=mapping_cache)
+
+    prepared = {
+        'csv_path': path,
+        'mapping': mapping,
+        'missing': missing,
+        'complete': ColumnMapper.is_nfe_complete(mapping),
+    }
+    if all(target == source for target, source in mapping.items()):
+        return prepared
+
+    data = pd.read_csv(path, dtype=str, encoding=encoding, keep_default_na=False, na_values=[''])
+    prepared['csv_path'] = None
+    prepared['frame'] = ColumnMapper.fill_missing_columns(ColumnMapper.apply_mapping(data, mapping), missing)
+    return prepared
+
+
+def _prepare_parquet(path: Path, mapping_cache: Optional[ColumnMappingCache] = None) -> Dict[str, Any]:
+    """Ler Parquet e renomear colunas para o layout padrão (ver prepare_input)"""
+    import pyarrow.parquet as pq
+
+    try:
+        table = pq.read_table(path)
+    except Exception as e:
+        raise CSVParserException(f"Erro ao ler Parquet: {e}")
+
+    mapping, missing = ColumnMapper.map_columns(pd.DataFrame(columns=table.column_names), cache=mapping_cache)
+    identity = all(target == source for target, source in mapping.items())
+    if not identity:
+        reverse_mapping = {source: target for target, source in mapping.items()}
+        table = table.rename_columns([reverse_mapping.get(name, name) for name in table.column_names])
+    return {
+        'csv_path': None,
+        'table': table,
+        'mapping': mapping,
+        'missing': missing,
+        # Como nos CSVs: colunas ausentes só são preenchidas quando há mapeamento
+        'fill_missing': [] if identity else missing,
+        'complete': ColumnMapper.is_nfe_complete(mapping),
+    }
+
+
+# =====================================================
+# Saídas
+# =====================================================
+
+def _output_stem(path: Path, used: Set[str]) -> str:
+    """Nome base dos arquivos de saída (sufixo numérico se repetido)"""
+    stem = path.stem
+    candidate, n = stem, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}_{n}"
+    used.add(candidate)
+    return candidate
+
+
+def write_json(nfes: Iterable[NFeEntity], path: Path, generator: ReportGenerator):
+    """Gravar relatórios JSON (lista, uma NF-e por vez)"""
+    with open_report_writer('json', path, generator) as writer:
+        writer.write_all(nfes)
+
+
+def write_markdown(nfes: Iterable[NFeEntity], path: Path, generator: ReportGenerator, source: Path):
+    """Gravar relatório Markdown das NF-es com erros + resumo"""
+    with open_report_writer('markdown', path, generator, title=f"Validação de NF-es - {source.name}") as writer:
+        writer.write_all(nfes)
+
+
+def errors_frame(nfes: Iterable[NFeEntity], source: Path, citation_resolver=None) -> pd.DataFrame:
+    """
+    Tabela de erros (uma linha por erro de validação)
+
+    Args:
+        nfes: NF-es validadas
+        source: Arquivo de origem
+        citation_resolver: Função código -> citação legal
+
+    Returns:
+        DataFrame com ERROR_COLUMNS
+    """
+    rows = [row for nfe in nfes for row in error_rows(nfe, source.name, citation_resolver)]
+    return _errors_frame(rows)
+
+
+def _errors_frame(rows: List[tuple]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=ERROR_COLUMNS)
+    return df.astype({'item_numero': 'Int64', 'financial_impact': 'float64'})
+
+
+class FileOutputs:
+    """
+    Saídas de um arquivo, alimentadas NF-e a NF-e durante a validação
+
+    Formatos de relatório são gravados em streaming; para Parquet só as
+    linhas de erro ficam em memória. Os totais do arquivo são acumulados
+    sem guardar as NF-es.
+    """
+
+    def __init__(self, output_dir: Path, stem: str, source: Path, formats: Sequence[str],
+                 generator: ReportGenerator, fail_on: Set[Severity], compression: Optional[str] = None):
+        self.output_dir = output_dir
+        self.stem = stem
+        self.source = source
+        # ZIP: origem de cada NF-e (csv_source) na tabela de erros
+        self.source_name = None if is_zip(source) else source.name
+        self.generator = generator
+        self.writers: List[ReportStreamWriter] = []
+        self.parquet_rows: Optional[List[tuple]] = [] if 'parquet' in formats else None
+
+        self.aggregate = ValidationAggregate(fail_on=fail_on, keep_nfes=False)
+
+        try:
+            for fmt in formats:
+                if fmt not in STREAM_SUFFIXES:
+                    continue
+                options = {}
+                if fmt == 'markdown':
+                    options['title'] = f"Validação de NF-es - {source.name}"
+                elif fmt == 'csv':
+                    options['source'] = self.source_name
+                self.writers.append(open_report_writer(
+                    fmt, output_dir / f"{stem}{STREAM_SUFFIXES[fmt]}", generator, compression, **options
+                ))
+        except BaseException:
+            self.discard()
+            raise
+
+    def add(self, nfe: NFeEntity):
+        """Registrar uma NF-e validada em todas as saídas"""
+        if self.aggregate.add(nfe) is not None and self.parquet_rows is not None:
+            self.parquet_rows.extend(
+                error_rows(nfe, self.source_name, self.generator.citation_resolver)
+            )
+        for writer in self.writers:
+            writer.write(nfe)
+
+    def stats(self) -> Dict[str, Any]:
+        """Totais do arquivo (summary.json)"""
+        aggregate = self.aggregate
+        return {
+            'nfes': aggregate.nfes,
+            'items': aggregate.items,
+            'nfes_with_errors': aggregate.nfes_with_errors,
+            'nfes_failed': aggregate.nfes_failed,
+            'failed': aggregate.nfes_failed > 0,
+            'by_severity': {s.value: aggregate.severity_count(s) for s in Severity},
+            'financial_impact': float(aggregate.financial_impact),
+            'top_error_codes': dict(aggregate.by_code.most_common(TOP_ERROR_CODES)),
+        }
+
+    def close(self) -> List[str]:
+        """Finalizar as saídas; retorna os nomes dos arquivos gravados"""
+        outputs = []
+        for writer in self.writers:
+            writer.close()
+            outputs.append(writer.path.name)
+        if self.parquet_rows is not None:
+            path = self.output_dir / f"{self.stem}.parquet"
+            _errors_frame(self.parquet_rows).to_parquet(path, index=False)
+            outputs.append(path.name)
+        return outputs
+
+    def discard(self):
+        """Fechar e remover saídas parciais (arquivo não processado)"""
+        for writer in self.writers:
+            try:
+                writer.close()
+            finally:
+                writer.path.unlink(missing_ok=True)
+        self.writers = []
+
+
+def parquet_available() -> bool:
+    """pyarrow ou fastparquet instalado"""
+    return any(importlib.util.find_spec(name) for name in ('pyarrow', 'fastparquet'))
+
+
+# =====================================================
+# Execução
+# =====================================================
+
+class BatchRunner:
+    """Valida uma lista de arquivos com um único repositório e pool de processos"""
+
+    def __init__(self, args: argparse.Namespace, out=sys.stdout, err=sys.stderr):
+        """
+        Args:
+            args: Opções de validate (ver build_parser)
+            out: Saída de progresso
+            err: Saída de avisos e erros
+        """
+        self.args = args
+        self.out = out
+        self.err = err
+        self.fail_on = FAIL_ON[args.fail_on]
+        self.output_dir = Path(args.output_dir)
+        self.cache = NormalizedUploadCache(args.cache_dir) if args.cache_dir else None
+        self.mapping_cache: Optional[ColumnMappingCache] = None
+
+    def _log(self, message: str):
+        if not self.args.quiet:
+            print(message, file=self.out)
+
+    def _warn(self, message: str):
+        print(message, file=self.err)
+
+    def _new_parser(self, **kwargs) -> NFeCSVParser:
+        """NFeCSVParser com as opções da linha de comando (--compact-items)"""
+        return NFeCSVParser(compact_items=self.args.compact_items, **kwargs)
+
+    def run(self, files: List[Path]) -> Dict[str, Any]:
+        """
+        Validar arquivos e gravar resultados
+
+        Returns:
+            Resumo da execução (também gravado em summary.json)
+        """
+        args = self.args
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        summary: Dict[str, Any] = {
+            'validator_version': __version__,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'fail_on': args.fail_on,
+            'files': [],
+        }
+
+        used_stems: Set[str] = set()
+        with FiscalRepository(args.db, use_local_csv=not args.no_local_csv) as repo, \
+                ParallelValidationEngine.from_repository(
+                    repo, max_workers=args.workers, shard_size=args.shard_size
+                ) as engine, \
+                (nullcontext() if args.no_store else ValidationResultStore(args.results_db)) as store, \
+                (ColumnMappingCache(Path(args.cache_dir) / 'column_mappings.db')
+                 if args.cache_dir else nullcontext()) as self.mapping_cache, \
+                (RunProfiler("cli_validate") if args.profile else nullcontext()) as profiler:
+            repo.snapshot  # Carregar regras antes do primeiro arquivo (falha cedo se rules.db inválido)
+            for index, path in enumerate(files, 1):
+                self._log(f"[{index}/{len(files)}] {path}")
+                summary['files'].append(self.validate_file(
+                    path, repo, engine, store, _output_stem(path, used_stems)
+                ))
+
+        summary['totals'] = self._totals(summary['files'])
+        summary['elapsed_s'] = round(time.perf_counter() - started, 3)
+        failed = any(f.get('failed') for f in summary['files'])
+        unreadable = any('error' in f for f in summary['files'])
+        summary['exit_code'] = EXIT_USAGE if unreadable else (EXIT_FISCAL_ERRORS if failed else EXIT_OK)
+
+        if profiler is not None:
+            profiler.write_json(self.output_dir / 'profile.json')
+            summary['profile'] = 'profile.json'
+
+        (self.output_dir / 'summary.json').write_text(
+            json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8'
+        )
+        return summary
+
+    def validate_file(self, path: Path, repo: FiscalRepository,
+                      engine: ParallelValidationEngine, store: Optional[ValidationResultStore],
+                      stem: str) -> Dict[str, Any]:
+        """
+        Mapear, validar e gravar resultados de um arquivo
+
+        Returns:
+            Resumo do arquivo (com 'error' se não pôde ser processado)
+        """
+        args = self.args
+        started = time.perf_counter()
+        result: Dict[str, Any] = {'input': str(path)}
+        parser = self._new_parser(cache=self.cache)
+        system_errors = engine.system_error_count
+
+        def on_error(nfe, message):
+            if engine.system_error_count - system_errors <= MAX_SYSTEM_ERROR_MESSAGES:
+                self._warn(f"  ⚠️ Erro ao validar NF-e {nfe.numero}: {message}")
+
+        outputs = FileOutputs(
+            self.output_dir, stem, path, args.format,
+            ReportGenerator(version=__version__, citation_resolver=repo.format_legal_citation),
+            self.fail_on, compression=args.compress
+        )
+        parse_errors = parser.parse_errors
+        try:
+            if is_zip(path):
+                parse_errors = self._validate_zip(path, repo, engine, store, outputs, on_error, result)
+            else:
+                prepared = prepare_input(path, parser, self.mapping_cache)
+                frame, csv_path = prepared.get('frame'), prepared['csv_path']
+                if not prepared['complete']:
+                    self._warn(f"  ⚠️ Colunas ausentes (validação parcial): {', '.join(prepared['missing'])}")
+
+                if args.incremental:
+                    validator = IncrementalValidator(
+                        repo, store, parser=parser,
+                        validate_stream=lambda nfes: engine.iter_validate(nfes, on_error=on_error)
+                    )
+                    if 'table' in prepared:
+                        frame = self._arrow_frame(prepared, parser)
+                    incremental = (
+                        validator.validate_frame(frame) if frame is not None
+                        else validator.validate_csv(str(csv_path))
+                    )
+                    for nfe in incremental.nfes:
+                        outputs.add(nfe)
+                    result['incremental'] = incremental.stats.to_dict()
+                else:
+                    # Cada NF-e vai para as saídas assim que validada (sem lista do lote)
+                    parsed = self._parse(path, prepared, parser)
+                    for nfe in engine.iter_validate(parsed, on_error=on_error):
+                        outputs.add(nfe)
+                        if store is not None:
+                            store.add(nfe)
+                    if store is not None:
+                        store.flush()
+        except (CSVParserException, OSError, ValueError, pd.errors.ParserError, zipfile.BadZipFile) as e:
+            outputs.discard()
+            self._warn(f"  ❌ {path}: {e}")
+            result['error'] = str(e)
+            return result
+        except BaseException:
+            outputs.discard()
+            raise
+
+        for message in parse_errors:
+            self._warn(f"  ⚠️ {message}")
+
+        result.update(outputs.stats())
+        result['parse_errors'] = len(parse_errors)
+        result['system_errors'] = engine.system_error_count - system_errors
+        if result['system_errors'] > MAX_SYSTEM_ERROR_MESSAGES:
+            self._warn(f"  ⚠️ {result['system_errors']} NF-e(s) com erro de sistema durante a validação")
+        result['outputs'] = outputs.close()
+        result['elapsed_s'] = round(time.perf_counter() - started, 3)
+
+        self._log(
+            f"  {result['nfes']} NF-e(s), {result['nfes_with_errors']} com problemas, "
+            f"{result['nfes_failed']} reprovada(s) ({result['elapsed_s']:.1f}s)"
+        )
+        return result
+
+    def _validate_zip(self, path: Path, repo: FiscalRepository, engine: ParallelValidationEngine,
+                      store: Optional[ValidationResultStore], outputs: 'FileOutputs',
+                      on_error, result: Dict[str, Any]) -> List[str]:
+        """
+        Validar os CSVs de um ZIP (lidos e normalizados em paralelo, validados à medida que chegam)
+
+        Preenche result['members'] (resumo por CSV) e, com --incremental,
+        result['incremental'].
+
+        Returns:
+            Mensagens de parsing
+        """
+        parse_errors: List[str] = []
+
+        def checked(members):
+            for member in members:
+                if member.error:
+                    self._warn(f"  ❌ {member.name}: {member.error}")
+                elif not ColumnMapper.is_nfe_complete(member.mapping.mapping):
+                    self._warn(f"  ⚠️ {member.name}: colunas ausentes (validação parcial): "
+                               f"{', '.join(member.mapping.missing)}")
+                parse_errors.extend(member.parse_errors)
+                yield member
+
+        if self.args.incremental:
+            # Impressão digital sobre as colunas do CSV (sem a coluna de origem)
+            ingestor = BatchIngestor(mapping_cache=self.mapping_cache, tag_column=None)
+            parser = self._new_parser()
+            validator = IncrementalValidator(
+                repo, store, parser=parser,
+                validate_stream=lambda nfes: engine.iter_validate(nfes, on_error=on_error)
+            )
+            totals = Counter()
+            for member in checked(ingestor.iter_frames([path])):
+                if member.error:
+                    continue
+                incremental = validator.validate_frame(member.frame)
+                parse_errors.extend(parser.parse_errors)
+                for nfe in incremental.nfes:
+                    nfe.csv_source = {**(nfe.csv_source or {}), 'file': member.name}
+                    outputs.add(nfe)
+                totals.update(incremental.stats.to_dict())
+            result['incremental'] = {key: totals[key] for key in ('skipped', 'revalidated', 'new', 'unknown')}
+        else:
+            # Validação começa no primeiro CSV, enquanto os seguintes são decodificados
+            ingestor = BatchIngestor(mapping_cache=self.mapping_cache, parser_factory=self._new_parser)
+            nfes = (nfe for member in checked(ingestor.iter_members([path])) for nfe in member.nfes)
+            for nfe in engine.iter_validate(nfes, on_error=on_error):
+                outputs.add(nfe)
+                if store is not None:
+                    store.add(nfe)
+            if store is not None:
+                store.flush()
+
+        result['members'] = ingestor.files
+        return parse_errors
+
+    @staticmethod
+    def _parse(path: Path, prepared: Dict[str, Any], parser: NFeCSVParser):
+        """NF-es do arquivo preparado (lista ou iterador em streaming)"""
+        # NF-es sempre na ordem do arquivo (a de iter_nfes), com ou sem cache
+        if 'table' in prepared:
+            return parser.parse_arrow(prepared['table'], missing=prepared['fill_missing'], sort=False)
+        if prepared.get('frame') is not None:
+            cache_key = None
+            if parser.cache is not None:
+                cache_key = parser.cache.file_key(path, json.dumps(prepared['mapping'], sort_keys=True))
+            return parser.parse_dataframe(prepared['frame'], cache_key=cache_key, sort=False)
+        if parser.cache is not None:
+            return parser.parse_csv(str(prepared['csv_path']), sort=False)
+        return parser.iter_nfes(str(prepared['csv_path']))
+
+    @staticmethod
+    def _arrow_frame(prepared: Dict[str, Any], parser: NFeCSVParser) -> pd.DataFrame:
+        """DataFrame (não normalizado) da tabela Arrow, para validação incremental"""
+        frame, _ = arrow_to_frame(prepared['table'], parser.CSV_DTYPE_SPEC, parser.DECIMAL_COLUMNS,
+                                  parser.COLUMN_ALIASES)
+        return ColumnMapper.fill_missing_columns(frame, prepared['fill_missing'])
+
+    @staticmethod
+    def _totals(files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        processed = [f for f in files if 'error' not in f]
+        by_severity = Counter()
+        for f in processed:
+            by_severity.update(f['by_severity'])
+        return {
+            'files': len(files),
+            'files_unreadable': len(files) - len(processed),
+            'nfes': sum(f['nfes'] for f in processed),
+            'items': sum(f['items'] for f in processed),
+            'nfes_with_errors': sum(f['nfes_with_errors'] for f in processed),
+            'nfes_failed': sum(f['nfes_failed'] for f in processed),
+            'by_severity': dict(by_severity),
+            'financial_impact': round(sum(f['financial_impact'] for f in processed), 2),
+        }
+
+
+# =====================================================
+# Linha de comando
+# =====================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser de argumentos (subcomando validate)"""
+    parser = argparse.ArgumentParser(
+        prog='fiscolayer',
+        description='Validação de NF-es em lote (sem Streamlit)'
+    )
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    validate = commands.add_parser(
+        'validate', help='Validar arquivos CSV ou Parquet de NF-es',
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    validate.add_argument('inputs', nargs='+', help='Arquivos (CSV/Parquet), diretórios ou globs (ex.: "dados/**/*.csv")')
+    validate.add_argument('-o', '--output-dir', default='resultados_validacao',
+                          help='Diretório de saída (default: resultados_validacao)')
+    validate.add_argument('-f', '--format', nargs='+', choices=OUTPUT_FORMATS, default=['json', 'markdown'],
+                          help='Formatos gravados por arquivo (default: json markdown)')
+    validate.add_argument('--compress', choices=list(COMPRESSION_SUFFIXES), default=None,
+                          help='Comprimir json, jsonl, markdown e csv (.gz / .zst)')
+    validate.add_argument('-w', '--workers', type=int, default=None,
+                          help='Processos de validação (default: número de CPUs)')
+    validate.add_argument('--shard-size', type=int, default=ParallelValidationEngine.DEFAULT_SHARD_SIZE,
+                          help='NF-es por bloco enviado a cada processo')
+    validate.add_argument('--fail-on', choices=list(FAIL_ON), default='error',
+                          help='Severidade mínima que gera código de saída 1 (default: error)')
+    validate.add_argument('--db', default=None, help='Caminho do rules.db (default: src/database/rules.db)')
+    validate.add_argument('--no-local-csv', action='store_true', help='Ignorar base_validacao.csv')
+    validate.add_argument('--incremental', action='store_true',
+                          help='Revalidar apenas NF-es novas ou alteradas (validation_log)')
+    validate.add_argument('--results-db', default=None,
+                          help='Database de resultados (validation_log) '
+                               '(default: cache/validation_results.db)')
+    validate.add_argument('--no-store', action='store_true',
+                          help='Não gravar resultados em validation_log')
+    validate.add_argument('--cache-dir', default=None,
+                          help='Cache Parquet dos CSVs normalizados (reexecuções leem o Parquet) '
+                               'e dos mapeamentos de colunas por cabeçalho')
+    validate.add_argument('--compact-items', action='store_true',
+                          help='Itens em armazenamento colunar (menos memória em lotes grandes)')
+    validate.add_argument('--profile', action='store_true',
+                          help='Gravar tempos por etapa em profile.json')
+    validate.add_argument('-q', '--quiet', action='store_true', help='Exibir apenas avisos e erros')
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Ponto de entrada da linha de comando
+
+    Args:
+        argv: Argumentos (default: sys.argv[1:])
+
+    Returns:
+        Código de saída (EXIT_OK, EXIT_FISCAL_ERRORS ou EXIT_USAGE)
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        if args.incremental and args.no_store:
+            raise CLIError("--incremental requer validation_log (remova --no-store)")
+        if 'parquet' in args.format and not parquet_available():
+            raise CLIError("Formato parquet requer pyarrow ou fastparquet instalado")
+        if args.compress == 'zstd' and importlib.util.find_spec('zstandard') is None:
+            raise CLIError("--compress zstd requer o pacote zstandard instalado")
+        if args.db and not Path(args.db).is_file():
+            raise CLIError(f"rules.db não encontrado: {args.db}")
+        files = expand_inputs(args.inputs)
+        if (args.cache_dir or any(is_parquet(f) for f in files)) and importlib.util.find_spec('pyarrow') is None:
+            raise CLIError("Entradas Parquet e --cache-dir requerem pyarrow instalado")
+    except CLIError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        summary = BatchRunner(args).run(files)
+    except sqlite3.Error as e:
+        print(f"❌ Erro ao carregar regras fiscais ({args.db or 'rules.db padrão'}): {e}", file=sys.stderr)
+        return EXIT_USAGE
+    totals = summary['totals']
+    if not args.quiet:
+        print(
+            f"\n{totals['files']} arquivo(s), {totals['nfes']} NF-e(s), "
+            f"{totals['nfes_failed']} reprovada(s) em --fail-on={args.fail_on} "
+            f"({summary['elapsed_s']:.1f}s) -> {Path(args.output_dir) / 'summary.json'}"
+        )
+    return summary['exit_code']
+
+
+def run():
+    """Entry point do console script"""
+    sys.exit(main())
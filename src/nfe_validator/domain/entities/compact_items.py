@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento compacto (struct-of-arrays) de itens de NF-e
+
+Em lotes com milhões de itens, cada NFeItem/ImpostoItem carrega ~20
+campos Decimal e strings próprias. CompactItemBatch guarda o lote por
+coluna:
+- Valores monetários como int64 escalado em centavos (demais decimais
+  com escala própria: quantidade, valor unitário, alíquotas)
+- Expoente original de cada valor (int8), para que a visão Decimal seja
+  idêntica ao valor parseado (Decimal('7.6') != repr de Decimal('7.60'))
+- Strings como códigos int32 sobre a lista de valores distintos
+
+CompactItem é uma visão (2 slots) com a mesma API de atributos de
+NFeItem; os atributos decimais são reconstruídos sob demanda. Valores que
+não cabem na escala (mais casas decimais, fora do int64, NaN) ficam
+guardados como Decimal em um dicionário de exceções: a visão é sempre exata.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .nfe_entity import NFeItem, ImpostoItem
+
+
+# =====================================================
+# Layout das colunas
+# =====================================================
+
+# Casas decimais de cada campo (2 = centavos)
+ITEM_DECIMAL_SCALES = {
+    'quantidade': 4,
+    'valor_unitario': 10,
+    'valor_total': 2,
+    'valor_desconto': 2,
+    'valor_frete': 2,
+}
+
+IMPOSTO_DECIMAL_SCALES = {
+    f'{tax}_{name}': scale
+    for tax in ('icms', 'ipi', 'pis', 'cofins')
+    for name, scale in (('base', 2), ('aliquota', 4), ('valor', 2))
+}
+
+ITEM_STR_FIELDS = ('codigo_produto', 'descricao', 'ncm', 'cfop', 'unidade')
+ITEM_OPTIONAL_FIELDS = ('cest', 'tipo_acucar', 'icumsa')
+IMPOSTO_STR_FIELDS = ('icms_cst', 'ipi_cst', 'pis_cst', 'cofins_cst')
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+class DecimalColumn:
+    """Coluna decimal: inteiro escalado (int64) + expoente original (int8)"""
+
+    def __init__(self, scale: int, size: int):
+        self.scale = scale
+        self.scaled = np.zeros(size, dtype=np.int64)
+        self.exponent = np.full(size, -scale, dtype=np.int8)
+        self.overflow: Dict[int, Decimal] = {}
+
+    @classmethod
+    def from_values(cls, values: Sequence[Decimal], scale: int) -> 'DecimalColumn':
+        """
+        Codificar sequência de Decimal
+
+        A codificação é feita uma vez por instância: o construtor em lote
+        reaproveita o mesmo objeto Decimal para valores iguais.
+        """
+        column = cls(scale, len(values))
+        scaled = column.scaled
+        exponent = column.exponent
+        encoded: Dict[int, tuple] = {}
+        for row, value in enumerate(values):
+            key = id(value)
+            pair = encoded.get(key)
+            if pair is None:
+                pair = column._encode(value)
+                encoded[key] = pair
+            if pair[1] is None:
+                column.overflow[row] = value
+                scaled[row] = pair[0]
+            else:
+                scaled[row], exponent[row] = pair
+        return column
+
+    def _encode(self, value: Decimal):
+        """(inteiro escalado, expoente) ou (aproximação, None) se não representável"""
+        exp = value.as_tuple().exponent
+        if not isinstance(exp, int):
+            return 0, None  # NaN / Infinity
+        scaled = value.scaleb(self.scale)
+        integral = scaled.to_integral_value(rounding=ROUND_HALF_UP)
+        if abs(integral) > _INT64_MAX:
+            return 0, None
+        exact = (
+            scaled == integral and -self.scale <= exp <= 127
+            and not (value.is_zero() and value.is_signed())
+        )
+        return int(integral), (exp if exact else None)
+
+    def __len__(self) -> int:
+        return len(self.scaled)
+
+    def get(self, row: int) -> Decimal:
+        """Valor exato como Decimal (mesmo expoente do valor original)"""
+        value = self.overflow.get(row)
+        if value is not None:
+            return value
+        exp = int(self.exponent[row])
+        scaled = int(self.scaled[row])
+        if exp == -self.scale:
+            return Decimal(scaled).scaleb(exp)
+        mantissa = abs(scaled) // 10 ** (exp + self.scale)
+        return Decimal(mantissa if scaled >= 0 else -mantissa).scaleb(exp)
+
+    def set(self, row: int, value: Decimal):
+        """Atualizar valor de uma linha"""
+        scaled, exp = self._encode(value)
+        self.scaled[row] = scaled
+        if exp is None:
+            self.overflow[row] = value
+        else:
+            self.exponent[row] = exp
+            self.overflow.pop(row, None)
+
+    @property
+    def nbytes(self) -> int:
+        return self.scaled.nbytes + self.exponent.nbytes
+
+
+class StrColumn:
+    """Coluna de strings como códigos int32 sobre valores distintos"""
+
+    def __init__(self, values: Sequence[Optional[str]]):
+        index: Dict[Any, int] = {}
+        self.uniques: List[Optional[str]] = []
+        codes = np.empty(len(values), dtype=np.int32)
+        for row, value in enumerate(values):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(self.uniques)
+                self.uniques.append(value)
+            codes[row] = code
+        self.codes = codes
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def get(self, row: int) -> Optional[str]:
+        return self.uniques[self.codes[row]]
+
+    def set(self, row: int, value: Optional[str]):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.uniques)
+            self.uniques.append(value)
+        self.codes[row] = code
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+
+# =====================================================
+# Visões com a API de NFeItem / ImpostoItem
+# =====================================================
+
+class _Attribute:
+    """Descritor: lê/escreve o campo da linha da visão na coluna do lote"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return view._batch.columns[self.name].get(view._row)
+
+    def __set__(self, view, value):
+        view._batch.columns[self.name].set(view._row, value)
+
+
+def _restore_item(item: NFeItem) -> NFeItem:
+    return item
+
+
+class CompactImpostos:
+    """Visão de ImpostoItem de uma linha do lote"""
+
+    __slots__ = ('_batch', '_row')
+
+    def __init__(self, batch: 'CompactItemBatch', row: int):
+        self._batch = batch
+        self._row = row
+
+    def to_imposto(self) -> ImpostoItem:
+        """Materializar ImpostoItem"""
+        columns = self._batch.columns
+        return ImpostoItem(**{
+            name: columns[name].get(self._row) for name in CompactItemBatch.IMPOSTO_FIELDS
+        })
+
+    def __reduce__(self):
+        # Serializar (ex.: ProcessPoolExecutor) como objeto comum, sem o lote
+        return _restore_item, (self.to_imposto(),)
+
+    def __repr__(self) -> str:
+        return repr(self.to_imposto())
+
+
+class CompactItem:
+    """Visão de NFeItem de uma linha do lote"""
+
+    __slots__ = ('_batch', '_row')
+
+    def __init__(self, batch: 'CompactItemBatch', row: int):
+        self._batch = batch
+        self._row = row
+
+    @property
+    def numero_item(self) -> int:
+        return int(self._batch.numero_item[self._row])
+
+    @numero_item.setter
+    def numero_item(self, value: int):
+        self._batch.numero_item[self._row] = value
+
+    @property
+    def impostos(self) -> CompactImpostos:
+        return CompactImpostos(self._batch, self._row)
+
+    @property
+    def validation_errors(self) -> list:
+        return self._batch.item_errors.setdefault(self._row, [])
+
+    def to_item(self) -> NFeItem:
+        """Materializar NFeItem equivalente"""
+        columns = self._batch.columns
+        values = {name: columns[name].get(self._row) for name in CompactItemBatch.ITEM_FIELDS}
+        return NFeItem(
+            numero_item=self.numero_item,
+            impostos=self.impostos.to_imposto(),
+            validation_errors=list(self._batch.item_errors.get(self._row, [])),
+            **values
+        )
+
+    def __reduce__(self):
+        return _restore_item, (self.to_item(),)
+
+    def __eq__(self, other):
+        if isinstance(other, CompactItem):
+            other = other.to_item()
+        return self.to_item() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(self.to_item())
+
+
+for _name in (*ITEM_STR_FIELDS, *ITEM_OPTIONAL_FIELDS, *ITEM_DECIMAL_SCALES):
+    setattr(CompactItem, _name, _Attribute(_name))
+for _name in (*IMPOSTO_STR_FIELDS, *IMPOSTO_DECIMAL_SCALES):
+    setattr(CompactImpostos, _name, _Attribute(_name))
+
+
+# =====================================================
+# Lote
+# =====================================================
+
+class CompactItemBatch:
+    """
+    Lote de itens de NF-e armazenado por coluna
+
+    Uso:
+        batch = CompactItemBatch.from_items(items)
+        batch[0].impostos.pis_valor      # Decimal exato
+        batch.cents('valor_total')       # np.ndarray int64 (centavos)
+    """
+
+    ITEM_FIELDS = (*ITEM_STR_FIELDS, *ITEM_OPTIONAL_FIELDS, *ITEM_DECIMAL_SCALES)
+    IMPOSTO_FIELDS = (*IMPOSTO_STR_FIELDS, *IMPOSTO_DECIMAL_SCALES)
+    DECIMAL_SCALES = {**ITEM_DECIMAL_SCALES, **IMPOSTO_DECIMAL_SCALES}
+
+    def __init__(self, numero_item: np.ndarray, columns: Dict[str, Any]):
+        """
+        Args:
+            numero_item: Números dos itens (int64)
+            columns: Nome do campo -> DecimalColumn / StrColumn
+        """
+        self.numero_item = numero_item
+        self.columns = columns
+        self.item_errors: Dict[int, list] = {}
+
+    @classmethod
+    def from_columns(cls, values: Dict[str, Sequence[Any]]) -> 'CompactItemBatch':
+        """
+        Criar lote a partir de listas de valores por campo
+
+        Args:
+            values: Campo -> valores (str, Decimal ou int conforme NFeItem);
+                campos ausentes assumem o padrão de NFeItem/ImpostoItem
+
+        Returns:
+            CompactItemBatch
+        """
+        size = len(values['numero_item'])
+        columns: Dict[str, Any] = {}
+        for name in (*ITEM_STR_FIELDS, *IMPOSTO_STR_FIELDS):
+            columns[name] = StrColumn(values[name] if name in values else [''] * size)
+        for name in ITEM_OPTIONAL_FIELDS:
+            columns[name] = StrColumn(values[name] if name in values else [None] * size)
+        for name, scale in cls.DECIMAL_SCALES.items():
+            if name in values:
+                columns[name] = DecimalColumn.from_values(values[name], scale)
+            else:
+                columns[name] = DecimalColumn.from_values([Decimal('0')] * size, scale)
+        return cls(np.asarray(values['numero_item'], dtype=np.int64), columns)
+
+    @classmethod
+    def from_items(cls, items: Sequence[NFeItem]) -> 'CompactItemBatch':
+        """Criar lote a partir de NFeItem já construídos"""
+        values: Dict[str, List[Any]] = {
+            'numero_item': [item.numero_item for item in items]
+        }
+        for name in cls.ITEM_FIELDS:
+            values[name] = [getattr(item, name) for item in items]
+        for name in cls.IMPOSTO_FIELDS:
+            values[name] = [getattr(item.impostos, name) for item in items]
+        batch = cls.from_columns(values)
+        for row, item in enumerate(items):
+            if item.validation_errors:
+                batch.item_errors[row] = list(item.validation_errors)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.numero_item)
+
+    def __getitem__(self, row: int) -> CompactItem:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return CompactItem(self, row)
+
+    def __iter__(self) -> Iterator[CompactItem]:
+        return (CompactItem(self, row) for row in range(len(self)))
+
+    def cents(self, name: str) -> np.ndarray:
+        """
+        Coluna decimal como inteiros escalados (centavos nos campos monetários)
+
+        Linhas fora da escala trazem o valor arredondado (ROUND_HALF_UP);
+        use decimal() para o valor exato.
+        """
+        return self.columns[name].scaled
+
+    def decimal(self, name: str, row: int) -> Decimal:
+        """Valor exato de um campo decimal"""
+        return self.columns[name].get(row)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória dos arrays do lote (sem strings distintas e exceções)"""
+        return self.numero_item.nbytes + sum(col.nbytes for col in self.columns.values())
@@ -5,13 +5,19 @@ Entidade NF-e para MVP Sucroalcooleiro
 Foco: Açúcar (cristal/refinado) - SP + PE
 """
 
+import sys
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Iterable
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 
 
+# Entidades de alto volume (milhões de itens por lote) usam __slots__:
+# sem __dict__ por objeto. Disponível em dataclasses a partir do Python 3.10.
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
 class TipoOperacao(Enum):
     """Tipo de operação da NF-e"""
     ENTRADA = "ENTRADA"
@@ -36,7 +42,7 @@ class Severity(Enum):
     CRITICAL = "CRITICAL"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Empresa:
     """Dados de empresa (emitente/destinatário)"""
     cnpj: str
@@ -50,7 +56,7 @@ class Empresa:
     crt: Optional[str] = None  # Código Regime Tributário
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ImpostoItem:
     """Impostos de um item da NF-e"""
 
@@ -79,7 +85,7 @@ class ImpostoItem:
     cofins_valor: Decimal = Decimal('0')
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NFeItem:
     """Item de uma NF-e"""
 
@@ -112,7 +118,7 @@ class NFeItem:
     icumsa: Optional[str] = None  # índice de cor do açúcar
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TotaisNFe:
     """Totais da NF-e"""
 
@@ -135,7 +141,7 @@ class TotaisNFe:
     valor_total_nota: Decimal = Decimal('0')
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ValidationError:
     """Erro de validação fiscal"""
 
@@ -153,6 +159,7 @@ class ValidationError:
     # Base legal
     legal_reference: str = ""
     legal_article: Optional[str] = None
+    legal_reference_code: Optional[str] = None  # Código em legal_refs (citação resolvida no relatório)
 
     # Impacto financeiro
     financial_impact: Optional[Decimal] = None
@@ -164,8 +171,59 @@ class ValidationError:
     can_auto_correct: bool = False
     corrected_value: Optional[str] = None
 
+    def resolve_legal_reference(self, resolver: Optional[Callable[[str], str]] = None) -> str:
+        """
+        Obter citação legal para exibição
 
-@dataclass
+        Args:
+            resolver: Função código -> citação (ex.: FiscalRepository.format_legal_citation)
+
+        Returns:
+            legal_reference se preenchida; senão a citação do código
+            (ou o próprio código, sem resolver)
+        """
+        if self.legal_reference:
+            return self.legal_reference
+        if self.legal_reference_code:
+            return resolver(self.legal_reference_code) if resolver else self.legal_reference_code
+        return ""
+
+
+class ErrorCounters:
+    """
+    Contadores dos erros de uma NF-e (por severidade, por código e impacto)
+
+    Mantidos por NFeEntity.add_validation_error / extend_errors: resumos em
+    O(1), sem percorrer validation_errors. Valem para a lista (e o tamanho)
+    em que foram montados; se validation_errors for substituída ou alterada
+    diretamente, são recalculados na próxima consulta.
+    """
+
+    __slots__ = ('by_severity', 'by_code', 'financial_impact', 'count', '_errors')
+
+    def __init__(self, errors: List[ValidationError]):
+        self.by_severity: Dict[Severity, int] = {}
+        self.by_code: Dict[str, int] = {}
+        self.financial_impact = Decimal('0')
+        self.count = 0
+        self._errors = errors
+        for error in errors:
+            self.add(error)
+
+    def add(self, error: ValidationError):
+        """Contar erro (já incluído na lista)"""
+        self.count += 1
+        self.by_severity[error.severity] = self.by_severity.get(error.severity, 0) + 1
+        self.by_code[error.code] = self.by_code.get(error.code, 0) + 1
+        if error.financial_impact:
+            self.financial_impact += error.financial_impact
+
+    def is_current(self, errors: List[ValidationError]) -> bool:
+        """Contadores correspondem à lista atual de erros"""
+        return errors is self._errors and len(errors) == self.count
+
+
+@dataclass(**_SLOTS)
 class NFeEntity:
     """
     Entidade NF-e para MVP Sucroalcooleiro
@@ -209,25 +267,79 @@ class NFeEntity:
     # Original
     csv_source: Optional[Dict[str, Any]] = None
 
+    # Contadores dos erros (ver ErrorCounters; fora de __init__, repr e ==)
+    _error_counters: Optional[ErrorCounters] = field(default=None, init=False, repr=False, compare=False)
+
     def add_validation_error(self, error: ValidationError):
         """Adicionar erro de validação"""
+        counters = self.error_counters
         self.validation_errors.append(error)
+        counters.add(error)
 
         # Atualizar status baseado na severidade
         if error.severity == Severity.CRITICAL:
             self.validation_status = ValidationStatus.INVALID
 
+    def extend_errors(self, errors: Iterable[ValidationError]):
+        """
+        Adicionar erros de validação em lote (validadores, pipeline)
+
+        Args:
+            errors: Erros gerados (lista vazia é o caso comum)
+        """
+        if not errors:
+            return
+        counters = self.error_counters
+        start = len(self.validation_errors)
+        self.validation_errors.extend(errors)
+        for error in self.validation_errors[start:]:
+            counters.add(error)
+
+        if counters.by_severity.get(Severity.CRITICAL):
+            self.validation_status = ValidationStatus.INVALID
+
+    def finish_validation(self):
+        """
+        Definir status final após a validação completa
+
+        ERROR se a validação falhou (SYSTEM_ERROR), INVALID se há erro
+        CRITICAL ou ERROR, VALID caso contrário (apenas avisos/informações).
+        """
+        counters = self.error_counters
+        if counters.by_code.get('SYSTEM_ERROR'):
+            self.validation_status = ValidationStatus.ERROR
+        elif counters.by_severity.get(Severity.CRITICAL) or counters.by_severity.get(Severity.ERROR):
+            self.validation_status = ValidationStatus.INVALID
+        else:
+            self.validation_status = ValidationStatus.VALID
+
+    @property
+    def error_counters(self) -> ErrorCounters:
+        """Contadores dos erros (recalculados se validation_errors mudou por fora)"""
+        counters = self._error_counters
+        if counters is None or not counters.is_current(self.validation_errors):
+            counters = self._error_counters = ErrorCounters(self.validation_errors)
+        return counters
+
     def get_errors_by_severity(self, severity: Severity) -> List[ValidationError]:
         """Obter erros por severidade"""
+        if not self.error_counters.by_severity.get(severity):
+            return []
         return [e for e in self.validation_errors if e.severity == severity]
 
+    def count_errors(self, severity: Optional[Severity] = None) -> int:
+        """Quantidade de erros (da severidade, ou todos) em O(1)"""
+        if severity is None:
+            return len(self.validation_errors)
+        return self.error_counters.by_severity.get(severity, 0)
+
+    def get_error_counts_by_code(self) -> Dict[str, int]:
+        """Quantidade de erros por código"""
+        return dict(self.error_counters.by_code)
+
     def get_total_financial_impact(self) -> Decimal:
         """Calcular impacto financeiro total dos erros"""
-        return sum(
-            (e.financial_impact or Decimal('0'))
-            for e in self.validation_errors
-            if e.financial_impact
-        )
+        return self.error_counters.financial_impact
 
     def is_sugar_product(self, item: NFeItem) -> bool:
         """Verificar se item é açúcar"""
@@ -247,9 +359,9 @@ class NFeEntity:
         return {
             'status': self.validation_status.value,
             'total_errors': len(self.validation_errors),
-            'critical_errors': len(self.get_errors_by_severity(Severity.CRITICAL)),
-            'errors': len(self.get_errors_by_severity(Severity.ERROR)),
-            'warnings': len(self.get_errors_by_severity(Severity.WARNING)),
+            'critical_errors': self.count_errors(Severity.CRITICAL),
+            'errors': self.count_errors(Severity.ERROR),
+            'warnings': self.count_errors(Severity.WARNING),
             'financial_impact': float(self.get_total_financial_impact()),
             'validated_at': self.validation_timestamp.isoformat() if self.validation_timestamp else None
         }
@@ -285,11 +397,11 @@ class AuditReport:
 
     def generate_summary(self):
         """Gerar resumo do relatório"""
-        self.total_errors = len(self.nfe.validation_errors)
-        self.critical_count = len(self.nfe.get_errors_by_severity(Severity.CRITICAL))
-        self.error_count = len(self.nfe.get_errors_by_severity(Severity.ERROR))
-        self.warning_count = len(self.nfe.get_errors_by_severity(Severity.WARNING))
-        self.info_count = len(self.nfe.get_errors_by_severity(Severity.INFO))
+        self.total_errors = self.nfe.count_errors()
+        self.critical_count = self.nfe.count_errors(Severity.CRITICAL)
+        self.error_count = self.nfe.count_errors(Severity.ERROR)
+        self.warning_count = self.nfe.count_errors(Severity.WARNING)
+        self.info_count = self.nfe.count_errors(Severity.INFO)
         self.total_financial_impact = self.nfe.get_total_financial_impact()
 
         # Agrupar erros
@@ -300,18 +412,15 @@ class AuditReport:
 
     def _group_errors(self):
         """Agrupar erros por tipo e item"""
+        by_type = self.errors_by_type
+        by_item = self.errors_by_item
         for error in self.nfe.validation_errors:
             # Por tipo
-            error_type = error.code.split('_')[0]
-            if error_type not in self.errors_by_type:
-                self.errors_by_type[error_type] = []
-            self.errors_by_type[error_type].append(error)
+            by_type.setdefault(error.code.split('_')[0], []).append(error)
 
             # Por item
             if error.item_numero:
-                if error.item_numero not in self.errors_by_item:
-                    self.errors_by_item[error.item_numero] = []
-                self.errors_by_item[error.item_numero].append(error)
+                by_item.setdefault(error.item_numero, []).append(error)
 
     def _generate_recommendations(self):
         """Gerar recomendações baseadas nos erros"""
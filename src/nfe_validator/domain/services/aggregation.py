@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Agregação de Resultados de Validação - Uma passada pelo lote
+
+O relatório consolidado (aba do Streamlit e Markdown exportado) separava
+as NF-es por severidade com list comprehensions que percorriam
+validation_errors várias vezes e testavam "nfe not in lista" (quadrático
+no número de NF-es com problemas), e somava os totais com sum aninhados.
+
+ValidationAggregate percorre cada erro uma única vez e produz:
+- Faixas por severidade mais grave da NF-e (crítica, erro, aviso)
+- Erros por severidade, por código, por UF do emitente e por NCM do item
+- Impacto financeiro total (Decimal)
+- NF-es reprovadas segundo um conjunto de severidades (fail_on)
+
+Com keep_nfes=False só os contadores ficam em memória (lotes em streaming).
+
+Uso:
+    aggregate = ValidationAggregate.from_nfes(nfes)
+    for summary in aggregate.critical:
+        summary.nfe, summary.errors_of(Severity.CRITICAL), summary.financial_impact
+"""
+
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Collection, Dict, Iterable, List, Optional
+
+from ..entities.nfe_entity import NFeEntity, ValidationError, Severity
+
+
+# Ordem de gravidade (a faixa da NF-e é a da severidade mais grave)
+SEVERITY_RANK = {
+    Severity.INFO: 0,
+    Severity.WARNING: 1,
+    Severity.ERROR: 2,
+    Severity.CRITICAL: 3,
+}
+
+
+class NFeErrorSummary:
+    """Erros de uma NF-e agrupados por severidade, com o impacto somado"""
+
+    __slots__ = ('nfe', 'by_severity', 'financial_impact', 'worst')
+
+    def __init__(self, nfe: NFeEntity):
+        self.nfe = nfe
+        self.by_severity: Dict[Severity, List[ValidationError]] = {}
+        self.financial_impact = Decimal('0')
+        self.worst: Optional[Severity] = None
+
+    def errors_of(self, severity: Severity) -> List[ValidationError]:
+        """Erros da severidade (lista vazia se nenhum)"""
+        return self.by_severity.get(severity, [])
+
+    def count(self, severity: Severity) -> int:
+        return len(self.by_severity.get(severity, ()))
+
+
+class ValidationAggregate:
+    """Totais e faixas de severidade de um lote de NF-es validadas"""
+
+    def __init__(self, fail_on: Collection[Severity] = (Severity.CRITICAL, Severity.ERROR),
+                 keep_nfes: bool = True):
+        """
+        Args:
+            fail_on: Severidades que reprovam a NF-e (nfes_failed)
+            keep_nfes: Guardar as NF-es com problemas nas faixas (False =
+                apenas contadores)
+        """
+        self.fail_on = frozenset(fail_on)
+        self.keep_nfes = keep_nfes
+
+        self.nfes = 0
+        self.items = 0
+        self.nfes_with_errors = 0
+        self.nfes_failed = 0
+        self.total_errors = 0
+        self.financial_impact = Decimal('0')
+
+        self.by_severity: Counter = Counter()   # Severity -> erros
+        self.by_code: Counter = Counter()       # código -> erros
+        self.by_uf: Counter = Counter()         # UF do emitente -> erros
+        self.by_ncm: Counter = Counter()        # NCM do item -> erros
+        self.nfes_by_worst: Counter = Counter()  # Severity mais grave -> NF-es
+
+        # Faixas do relatório consolidado (keep_nfes=True)
+        self.critical: List[NFeErrorSummary] = []
+        self.error: List[NFeErrorSummary] = []
+        self.warning: List[NFeErrorSummary] = []   # Avisos e informativos
+
+    @classmethod
+    def from_nfes(cls, nfes: Iterable[NFeEntity], **kwargs) -> 'ValidationAggregate':
+        """Agregar NF-es validadas (aceita iteradores)"""
+        aggregate = cls(**kwargs)
+        for nfe in nfes:
+            aggregate.add(nfe)
+        return aggregate
+
+    def add(self, nfe: NFeEntity) -> Optional[NFeErrorSummary]:
+        """
+        Incluir uma NF-e validada
+
+        Returns:
+            Resumo dos erros da NF-e (None se não há erros)
+        """
+        self.nfes += 1
+        self.items += len(nfe.items)
+        if not nfe.validation_errors:
+            return None
+
+        summary = NFeErrorSummary(nfe)
+        ncm_by_item = None
+        worst_rank = -1
+        failed = False
+
+        for error in nfe.validation_errors:
+            severity = error.severity
+            summary.by_severity.setdefault(severity, []).append(error)
+            if error.financial_impact:
+                summary.financial_impact += error.financial_impact
+            rank = SEVERITY_RANK.get(severity, 0)
+            if rank > worst_rank:
+                worst_rank, summary.worst = rank, severity
+            if severity in self.fail_on:
+                failed = True
+
+            self.by_code[error.code] += 1
+            if error.item_numero:
+                if ncm_by_item is None:
+                    ncm_by_item = {item.numero_item: item.ncm for item in nfe.items}
+                ncm = ncm_by_item.get(error.item_numero)
+                if ncm:
+                    self.by_ncm[ncm] += 1
+
+        count = len(nfe.validation_errors)
+        self.total_errors += count
+        self.nfes_with_errors += 1
+        self.nfes_failed += failed
+        self.financial_impact += summary.financial_impact
+        self.by_uf[nfe.emitente.uf] += count
+        self.nfes_by_worst[summary.worst] += 1
+        for severity, errors in summary.by_severity.items():
+            self.by_severity[severity] += len(errors)
+
+        if self.keep_nfes:
+            if summary.worst == Severity.CRITICAL:
+                self.critical.append(summary)
+            elif summary.worst == Severity.ERROR:
+                self.error.append(summary)
+            else:
+                self.warning.append(summary)
+        return summary
+
+    @property
+    def with_errors(self) -> List[NFeErrorSummary]:
+        """NF-es com problemas (críticas, erros, avisos)"""
+        return self.critical + self.error + self.warning
+
+    def severity_count(self, severity: Severity) -> int:
+        return self.by_severity.get(severity, 0)
+
+    def to_dict(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Totais serializáveis (JSON)
+
+        Args:
+            top: Limitar por_código/UF/NCM aos N mais frequentes
+        """
+        return {
+            'nfes': self.nfes,
+            'items': self.items,
+            'nfes_with_errors': self.nfes_with_errors,
+            'nfes_failed': self.nfes_failed,
+            'total_errors': self.total_errors,
+            'by_severity': {s.value: self.by_severity.get(s, 0) for s in Severity},
+            'by_code': dict(self.by_code.most_common(top)),
+            'by_uf': dict(self.by_uf.most_common(top)),
+            'by_ncm': dict(self.by_ncm.most_common(top)),
+            'financial_impact': float(self.financial_impact),
+        }
@@ -12,10 +12,10 @@ Mudança: Todas as regras vêm do FiscalRepository (rules.db)
 """
 
 from decimal import Decimal
-from typing import List, Optional, Dict
-import json
+from typing import Any, Callable, List, Optional, Dict, Tuple
 
 from ..entities.nfe_entity import NFeEntity, NFeItem, ValidationError, Severity
+from ...profiling import timed
 
 # Import FiscalRepository - absolute import
 import sys
@@ -26,6 +26,7 @@ if True:  # Always add to path
         sys.path.insert(0, str(project_root))
 
 from repositories.fiscal_repository import FiscalRepository
+from repositories.keyword_index import parse_keywords
 
 
 class NCMValidator:
@@ -44,13 +45,33 @@ class NCMValidator:
         """
         self.repo = repository
 
-    def validate(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
+    def resolve(self, item: NFeItem, nfe: NFeEntity) -> Dict[str, Any]:
+        """
+        Consultar regras do NCM do item vigentes na data de emissão
+
+        Args:
+            item: Item da NF-e
+            nfe: NF-e completa (contexto)
+
+        Returns:
+            Dict com ncm_rule e keywords (verificador de descrição compilado)
+        """
+        if not self._is_valid_format(item.ncm):
+            return {'ncm_rule': None, 'keywords': None}
+
+        ncm_rule = self.repo.get_ncm_rule(item.ncm, as_of=nfe.data_emissao)
+        return {'ncm_rule': ncm_rule, 'keywords': self._keyword_matcher(ncm_rule)}
+
+    @timed
+    def validate(self, item: NFeItem, nfe: NFeEntity,
+                 rules: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
         """
         Validar NCM do item
 
         Args:
             item: Item da NF-e
             nfe: NF-e completa (contexto)
+            rules: Resultado de resolve() (opcional; consultado se ausente)
 
         Returns:
             Lista de erros de validação
@@ -59,7 +80,6 @@ class NCMValidator:
 
         # 1. Validar formato do NCM
         if not self._is_valid_format(item.ncm):
-            legal_ref = self.repo.format_legal_citation('IN_2121')
             errors.append(ValidationError(
                 code='NCM_001',
                 field='ncm',
@@ -67,27 +87,28 @@ class NCMValidator:
                 severity=Severity.CRITICAL,
                 actual_value=item.ncm,
                 expected_value='8 dígitos numéricos',
-                legal_reference=legal_ref,
+                legal_reference_code='IN_2121',
                 item_numero=item.numero_item,
                 financial_impact=Decimal('0')
             ))
             return errors
 
         # 2. Buscar NCM no database
-        ncm_rule = self.repo.get_ncm_rule(item.ncm)
+        if rules is None:
+            rules = self.resolve(item, nfe)
+        ncm_rule = rules['ncm_rule']
 
         if not ncm_rule:
             # NCM não reconhecido no MVP
             if item.ncm.startswith('1701'):
                 # É açúcar mas não está na base MVP
-                tipi_ref = self.repo.format_legal_citation('TIPI_17')
                 errors.append(ValidationError(
                     code='NCM_004',
                     field='ncm',
                     message=f'NCM {item.ncm} de açúcar não reconhecido na base MVP',
                     severity=Severity.INFO,
                     actual_value=item.ncm,
-                    legal_reference=tipi_ref,
+                    legal_reference_code='TIPI_17',
                     item_numero=item.numero_item,
                     suggestion='Validar com Tabela NCM completa ou consultar despachante aduaneiro'
                 ))
@@ -107,37 +128,36 @@ class NCMValidator:
             return errors
 
         # 3. Validar descrição contra keywords do NCM
-        desc_error = self._validate_description(item, ncm_rule)
+        desc_error = self._validate_description(item, ncm_rule, rules['keywords'])
         if desc_error:
             errors.append(desc_error)
 
         return errors
 
-    def _validate_description(self, item: NFeItem, ncm_rule: Dict) -> Optional[ValidationError]:
+    def _validate_description(self, item: NFeItem, ncm_rule: Dict,
+                              matcher: Optional[Callable[[str], bool]] = None) -> Optional[ValidationError]:
         """
         Validar descrição do produto contra keywords do NCM
 
+        A comparação ignora maiúsculas e acentos ('ACUCAR' corresponde a
+        'açúcar').
+
         Args:
             item: Item da NF-e
             ncm_rule: Regra do NCM do database
+            matcher: Verificador de keywords (default: montado de ncm_rule)
 
         Returns:
             ValidationError ou None
         """
-        desc_lower = item.descricao.lower()
-
         # Obter keywords do NCM
-        keywords_json = ncm_rule.get('keywords')
-        if not keywords_json:
+        if matcher is None:
+            matcher = self._keyword_matcher(ncm_rule)
+        if matcher is None:
             return None
 
-        try:
-            keywords = json.loads(keywords_json)
-        except:
-            return None
-
-        # Verificar se alguma keyword aparece na descrição
-        if not any(kw.lower() in desc_lower for kw in keywords):
+        # Verificar se alguma keyword aparece na descrição (uma passada)
+        if not matcher(item.descricao):
             return ValidationError(
                 code='NCM_003',
                 field='descricao',
@@ -152,6 +172,25 @@ class NCMValidator:
 
         return None
 
+    @staticmethod
+    def _parse_keywords(ncm_rule: Optional[Dict]) -> Optional[Tuple[str, ...]]:
+        """Extrair keywords (JSON) da regra do NCM, normalizadas; None se ausentes"""
+        return parse_keywords(ncm_rule.get('keywords') if ncm_rule else None)
+
+    def _keyword_matcher(self, ncm_rule: Optional[Dict]) -> Optional[Callable[[str], bool]]:
+        """
+        Verificador de descrição para as keywords da regra
+
+        Usa o KeywordIndex do snapshot (autômato único para todos os NCMs).
+
+        Returns:
+            Função descrição -> bool, ou None se a regra não tem keywords
+        """
+        keywords = self._parse_keywords(ncm_rule)
+        if keywords is None:
+            return None
+        return self.repo.keyword_index.matcher(keywords)
+
     def _is_valid_format(self, ncm: str) -> bool:
         """Validar formato do NCM (8 dígitos)"""
         if not ncm:
@@ -174,29 +213,75 @@ class PISCOFINSValidator:
         """
         self.repo = repository
 
-    def validate(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
-        """Validar PIS e COFINS do item"""
+    def resolve(self, item: NFeItem, nfe: NFeEntity) -> Dict[str, Any]:
+        """
+        Consultar regras dos CSTs de PIS e COFINS do item
+
+        Args:
+            item: Item da NF-e
+            nfe: NF-e completa (contexto)
+
+        Returns:
+            Dict com as regras resolvidas de 'pis' e 'cofins'
+        """
+        return {
+            'pis': self._resolve_cst(item.impostos.pis_cst, 'pis'),
+            'cofins': self._resolve_cst(item.impostos.cofins_cst, 'cofins')
+        }
+
+    def _resolve_cst(self, cst: str, tax: str) -> Dict[str, Any]:
+        """
+        Consultar validade, regra e alíquota esperada de um CST
+
+        Args:
+            cst: CST do item
+            tax: 'pis' ou 'cofins'
+
+        Returns:
+            Dict com valid, rule e expected_aliquota (None se não tributada)
+        """
+        if not self.repo.is_cst_valid(cst):
+            return {'valid': False, 'rule': None, 'expected_aliquota': None}
+
+        rule = self.repo.get_pis_cofins_rule(cst)
+        expected_aliquota = None
+        if rule and rule['situation_type'] == 'TRIBUTADA':
+            rates = self.repo.get_pis_cofins_rates(cst, regime='STANDARD')
+            expected_aliquota = Decimal(str(rates[tax]))
+
+        return {'valid': True, 'rule': rule, 'expected_aliquota': expected_aliquota}
+
+    @timed
+    def validate(self, item: NFeItem, nfe: NFeEntity,
+                 rules: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
+        """Validar PIS e COFINS do item (rules: resultado de resolve(), opcional)"""
         errors = []
 
+        if rules is None:
+            rules = self.resolve(item, nfe)
+
         # Validar PIS
-        errors.extend(self._validate_pis(item, nfe))
+        errors.extend(self._validate_pis(item, nfe, rules['pis']))
 
         # Validar COFINS
-        errors.extend(self._validate_cofins(item, nfe))
+        errors.extend(self._validate_cofins(item, nfe, rules['cofins']))
 
         # Validar relação PIS/COFINS
         errors.extend(self._validate_pis_cofins_relation(item, nfe))
 
         return errors
 
-    def _validate_pis(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
+    def _validate_pis(self, item: NFeItem, nfe: NFeEntity,
+                       resolved: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
         """Validar PIS"""
         errors = []
         pis = item.impostos
 
+        if resolved is None:
+            resolved = self._resolve_cst(pis.pis_cst, 'pis')
+
         # 1. Validar CST com database
-        if not self.repo.is_cst_valid(pis.pis_cst):
-            lei_ref = self.repo.format_legal_citation('LEI_10637')
+        if not resolved['valid']:
             errors.append(ValidationError(
                 code='PIS_001',
                 field='pis_cst',
@@ -204,13 +289,13 @@ class PISCOFINSValidator:
                 severity=Severity.ERROR,
                 actual_value=pis.pis_cst,
                 expected_value='CST válido conforme base de dados',
-                legal_reference=lei_ref,
+                legal_reference_code='LEI_10637',
                 item_numero=item.numero_item
             ))
             return errors
 
         # Obter regra do CST
-        pis_rule = self.repo.get_pis_cofins_rule(pis.pis_cst)
+        pis_rule = resolved['rule']
         if not pis_rule:
             # WARNING: Sem regra PIS no repositório
             errors.append(ValidationError(
@@ -228,8 +313,7 @@ class PISCOFINSValidator:
 
         # 2. Validar alíquota (se CST for tributado)
         if pis_rule['situation_type'] == 'TRIBUTADA':
-            rates = self.repo.get_pis_cofins_rates(pis.pis_cst, regime='STANDARD')
-            expected_aliquota = Decimal(str(rates['pis']))
+            expected_aliquota = resolved['expected_aliquota']
 
             if pis.pis_aliquota != expected_aliquota:
                 # Calcular impacto financeiro
@@ -273,7 +357,6 @@ class PISCOFINSValidator:
         # 4. Validar exportação
         if self._is_export_operation(nfe):
             if pis_rule['situation_type'] not in ['ALIQUOTA_ZERO', 'NAO_INCIDENCIA']:
-                lei_ref = self.repo.format_legal_citation('LEI_10637')
                 errors.append(ValidationError(
                     code='PIS_004',
                     field='pis_cst',
@@ -281,7 +364,7 @@ class PISCOFINSValidator:
                     severity=Severity.CRITICAL,
                     actual_value=pis.pis_cst,
                     expected_value='06 ou 08',
-                    legal_reference=lei_ref,
+                    legal_reference_code='LEI_10637',
                     legal_article='Art. 5º - Exportações com alíquota zero',
                     item_numero=item.numero_item,
                     financial_impact=pis.pis_valor,
@@ -290,14 +373,17 @@ class PISCOFINSValidator:
 
         return errors
 
-    def _validate_cofins(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
+    def _validate_cofins(self, item: NFeItem, nfe: NFeEntity,
+                       resolved: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
         """Validar COFINS"""
         errors = []
         cofins = item.impostos
 
+        if resolved is None:
+            resolved = self._resolve_cst(cofins.cofins_cst, 'cofins')
+
         # 1. Validar CST
-        if not self.repo.is_cst_valid(cofins.cofins_cst):
-            lei_ref = self.repo.format_legal_citation('LEI_10833')
+        if not resolved['valid']:
             errors.append(ValidationError(
                 code='COFINS_001',
                 field='cofins_cst',
@@ -305,13 +391,13 @@ class PISCOFINSValidator:
                 severity=Severity.ERROR,
                 actual_value=cofins.cofins_cst,
                 expected_value='CST válido conforme base de dados',
-                legal_reference=lei_ref,
+                legal_reference_code='LEI_10833',
                 item_numero=item.numero_item
             ))
             return errors
 
         # Obter regra
-        cofins_rule = self.repo.get_pis_cofins_rule(cofins.cofins_cst)
+        cofins_rule = resolved['rule']
         if not cofins_rule:
             # WARNING: Sem regra COFINS no repositório
             errors.append(ValidationError(
@@ -329,8 +415,7 @@ class PISCOFINSValidator:
 
         # 2. Validar alíquota
         if cofins_rule['situation_type'] == 'TRIBUTADA':
-            rates = self.repo.get_pis_cofins_rates(cofins.cofins_cst, regime='STANDARD')
-            expected_aliquota = Decimal(str(rates['cofins']))
+            expected_aliquota = resolved['expected_aliquota']
 
             if cofins.cofins_aliquota != expected_aliquota:
                 correct_value = (item.valor_total * expected_aliquota / Decimal('100')).quantize(Decimal('0.01'))
@@ -373,7 +458,6 @@ class PISCOFINSValidator:
         # 4. Validar exportação
         if self._is_export_operation(nfe):
             if cofins_rule['situation_type'] not in ['ALIQUOTA_ZERO', 'NAO_INCIDENCIA']:
-                lei_ref = self.repo.format_legal_citation('LEI_10833')
                 errors.append(ValidationError(
                     code='COFINS_004',
                     field='cofins_cst',
@@ -381,7 +465,7 @@ class PISCOFINSValidator:
                     severity=Severity.CRITICAL,
                     actual_value=cofins.cofins_cst,
                     expected_value='06 ou 08',
-                    legal_reference=lei_ref,
+                    legal_reference_code='LEI_10833',
                     legal_article='Art. 6º - Exportações com alíquota zero',
                     item_numero=item.numero_item,
                     financial_impact=cofins.cofins_valor,
@@ -428,13 +512,29 @@ class CFOPValidator:
         """
         self.repo = repository
 
-    def validate(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
-        """Validar CFOP do item"""
+    def resolve(self, item: NFeItem, nfe: NFeEntity) -> Dict[str, Any]:
+        """
+        Consultar regra do CFOP do item (depende apenas de item.cfop)
+
+        Args:
+            item: Item da NF-e
+            nfe: NF-e completa (contexto)
+
+        Returns:
+            Dict com cfop_rule
+        """
+        if not self._is_valid_format(item.cfop):
+            return {'cfop_rule': None}
+        return {'cfop_rule': self.repo.get_cfop_rule(item.cfop)}
+
+    @timed
+    def validate(self, item: NFeItem, nfe: NFeEntity,
+                 rules: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
+        """Validar CFOP do item (rules: resultado de resolve(), opcional)"""
         errors = []
 
         # 1. Validar formato
         if not self._is_valid_format(item.cfop):
-            sinief_ref = self.repo.format_legal_citation('SINIEF_0705')
             errors.append(ValidationError(
                 code='CFOP_001',
                 field='cfop',
@@ -442,13 +542,15 @@ class CFOPValidator:
                 severity=Severity.CRITICAL,
                 actual_value=item.cfop,
                 expected_value='4 dígitos numéricos',
-                legal_reference=sinief_ref,
+                legal_reference_code='SINIEF_0705',
                 item_numero=item.numero_item
             ))
             return errors
 
         # 2. Buscar CFOP no database
-        cfop_rule = self.repo.get_cfop_rule(item.cfop)
+        if rules is None:
+            rules = self.resolve(item, nfe)
+        cfop_rule = rules['cfop_rule']
 
         if not cfop_rule:
             errors.append(ValidationError(
@@ -543,6 +645,7 @@ class TotalsValidator:
         """
         self.repo = repository
 
+    @timed
     def validate(self, nfe: NFeEntity) -> List[ValidationError]:
         """Validar totais da NF-e"""
         errors = []
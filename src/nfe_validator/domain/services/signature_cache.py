@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de Regras por Assinatura de Item
+
+Itens de um lote repetem poucas combinações de (ncm, cfop, pis_cst,
+cofins_cst, pis_aliquota, cofins_aliquota, uf_origem, uf_destino). As
+consultas de regras (NCM, CST, CFOP, regras estaduais) dependem apenas
+dessa assinatura e do período de vigência das regras na data de emissão
+(FiscalRepository.rule_period): são resolvidas uma vez por assinatura
+distinta e reaproveitadas por todos os itens iguais, inclusive de NF-es
+de datas diferentes dentro do mesmo período.
+
+Verificações aritméticas de cada item (PIS_003, COFINS_003, impactos
+financeiros, totais) continuam sendo calculadas individualmente pelos
+validadores a partir das regras resolvidas.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from ..entities.nfe_entity import NFeEntity, NFeItem
+from ...profiling import count
+
+
+# Regras resolvidas de um item: um dict por validador, na ordem dos validadores
+ResolvedRules = Tuple[Dict[str, Any], ...]
+
+
+class SignatureRuleCache:
+    """
+    Resolve regras dos validadores uma vez por assinatura distinta
+
+    Cada validador deve expor resolve(item, nfe) -> dict, dependente apenas
+    dos campos da assinatura, e validate(item, nfe, rules=...).
+    """
+
+    # Limite de assinaturas em memória (cache é esvaziado ao atingir)
+    DEFAULT_MAX_SIGNATURES = 100_000
+
+    def __init__(self, repository, validators: Sequence, max_signatures: int = DEFAULT_MAX_SIGNATURES):
+        """
+        Inicializar cache
+
+        Args:
+            repository: FiscalRepository (snapshot usado para invalidação)
+            validators: Validadores com resolve(item, nfe)
+            max_signatures: Limite de assinaturas em memória
+        """
+        self.repo = repository
+        self.validators = list(validators)
+        self.max_signatures = max_signatures
+
+        self._rules: Dict[Hashable, ResolvedRules] = {}
+        # (snapshot, regras do CSV local) das regras resolvidas em cache
+        self._sources: Optional[Tuple[Any, Any]] = None
+
+        # Estatísticas acumuladas
+        self.items = 0
+        self.evaluations = 0
+
+    @staticmethod
+    def signature(item: NFeItem, nfe: NFeEntity) -> Tuple:
+        """
+        Assinatura do item: campos dos quais as regras dependem
+
+        Inclui também as UFs de emitente/destinatário (validadores estaduais)
+        e o CFOP da nota (operação de exportação).
+
+        Args:
+            item: Item da NF-e
+            nfe: NF-e completa (contexto)
+
+        Returns:
+            Tupla hashable
+        """
+        impostos = item.impostos
+        return (
+            item.ncm,
+            item.cfop,
+            impostos.pis_cst,
+            impostos.cofins_cst,
+            impostos.pis_aliquota,
+            impostos.cofins_aliquota,
+            nfe.uf_origem,
+            nfe.uf_destino,
+            nfe.emitente.uf,
+            nfe.destinatario.uf,
+            nfe.cfop_nota
+        )
+
+    def resolve_items(self, nfe: NFeEntity) -> List[ResolvedRules]:
+        """
+        Resolver regras de todos os itens da NF-e
+
+        Args:
+            nfe: NFeEntity
+
+        Returns:
+            Lista (um por item) de tuplas com as regras de cada validador
+        """
+        self._check_snapshot()
+
+        evaluations = self.evaluations
+        period = (self._rule_period(nfe.data_emissao),)
+        resolved = []
+        for item in nfe.items:
+            key = self.signature(item, nfe) + period
+            rules = self._rules.get(key)
+            if rules is None:
+                if len(self._rules) >= self.max_signatures:
+                    self._rules.clear()
+                rules = tuple(validator.resolve(item, nfe) for validator in self.validators)
+                self._rules[key] = rules
+                self.evaluations += 1
+            resolved.append(rules)
+
+        self.items += len(nfe.items)
+        count('signature_cache.hit', len(nfe.items) - (self.evaluations - evaluations))
+        count('signature_cache.miss', self.evaluations - evaluations)
+        return resolved
+
+    def _rule_period(self, data_emissao) -> Hashable:
+        """Período de vigência das regras na data (None se o repositório não distingue)"""
+        rule_period = getattr(self.repo, 'rule_period', None)
+        return rule_period(data_emissao) if rule_period is not None else None
+
+    def _check_snapshot(self):
+        """Descartar regras resolvidas se o snapshot ou o CSV local foram recarregados"""
+        sources = (
+            self.repo.snapshot if getattr(self.repo, 'use_snapshot', False) else None,
+            getattr(self.repo, 'local_rules', None),
+        )
+        previous = self._sources
+        if previous is None or sources[0] is not previous[0] or sources[1] is not previous[1]:
+            self._rules.clear()
+            self._sources = sources
+
+    def clear(self):
+        """Descartar regras resolvidas"""
+        self._rules.clear()
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Fração dos itens atendida sem nova resolução de regras"""
+        if not self.items:
+            return 0.0
+        return 1 - self.evaluations / self.items
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Estatísticas de deduplicação
+
+        Returns:
+            Dict com items, signatures (resoluções realizadas) e dedup_ratio
+        """
+        return {
+            'items': self.items,
+            'signatures': self.evaluations,
+            'dedup_ratio': self.dedup_ratio
+        }
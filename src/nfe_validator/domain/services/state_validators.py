@@ -10,7 +10,7 @@ Overlay sobre validações federais:
 - PE: ICMS overlay, benefícios fiscais
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from decimal import Decimal
 
 from ..entities.nfe_entity import (
@@ -19,6 +19,7 @@ from ..entities.nfe_entity import (
     ValidationError,
     Severity
 )
+from ...profiling import timed
 
 # Import FiscalRepository - absolute import
 import sys
@@ -51,13 +52,31 @@ class SPValidator:
         self.repo = repository
         self.uf = 'SP'
 
-    def validate(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
+    def resolve(self, item: NFeItem, nfe: NFeEntity) -> Dict[str, Any]:
+        """
+        Consultar regras estaduais de SP para o NCM do item (vigentes na emissão)
+
+        Args:
+            item: Item da NF-e
+            nfe: NF-e completa (contexto)
+
+        Returns:
+            Dict com state_rules (None se a operação não envolve SP)
+        """
+        if not self._is_sp_operation(nfe):
+            return {'state_rules': None}
+        return {'state_rules': self.repo.get_state_rules(self.uf, item.ncm, as_of=nfe.data_emissao)}
+
+    @timed
+    def validate(self, item: NFeItem, nfe: NFeEntity,
+                 rules: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
         """
         Validar item contra regras de SP
 
         Args:
             item: Item da NF-e
             nfe: NF-e completa (contexto)
+            rules: Resultado de resolve() (opcional; consultado se ausente)
 
         Returns:
             Lista de ValidationErrors (severity=WARNING)
@@ -69,7 +88,9 @@ class SPValidator:
             return errors
 
         # Obter regras estaduais para o NCM
-        state_rules = self.repo.get_state_rules(self.uf, item.ncm)
+        if rules is None:
+            rules = self.resolve(item, nfe)
+        state_rules = rules['state_rules']
 
         # Validação 1: ICMS Rate
         icms_errors = self._validate_icms_rate(item, state_rules)
@@ -236,13 +257,31 @@ class PEValidator:
         self.repo = repository
         self.uf = 'PE'
 
-    def validate(self, item: NFeItem, nfe: NFeEntity) -> List[ValidationError]:
+    def resolve(self, item: NFeItem, nfe: NFeEntity) -> Dict[str, Any]:
+        """
+        Consultar regras estaduais de PE para o NCM do item (vigentes na emissão)
+
+        Args:
+            item: Item da NF-e
+            nfe: NF-e completa (contexto)
+
+        Returns:
+            Dict com state_rules (None se a operação não envolve PE)
+        """
+        if not self._is_pe_operation(nfe):
+            return {'state_rules': None}
+        return {'state_rules': self.repo.get_state_rules(self.uf, item.ncm, as_of=nfe.data_emissao)}
+
+    @timed
+    def validate(self, item: NFeItem, nfe: NFeEntity,
+                 rules: Optional[Dict[str, Any]] = None) -> List[ValidationError]:
         """
         Validar item contra regras de PE
 
         Args:
             item: Item da NF-e
             nfe: NF-e completa (contexto)
+            rules: Resultado de resolve() (opcional; consultado se ausente)
 
         Returns:
             Lista de ValidationErrors (severity=WARNING)
@@ -254,7 +293,9 @@ class PEValidator:
             return errors
 
         # Obter regras estaduais para o NCM
-        state_rules = self.repo.get_state_rules(self.uf, item.ncm)
+        if rules is None:
+            rules = self.resolve(item, nfe)
+        state_rules = rules['state_rules']
 
         # Validação 1: ICMS Rate
         icms_errors = self._validate_icms_rate(item, state_rules)
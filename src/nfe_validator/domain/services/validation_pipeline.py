@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline de Validação de NF-e
+
+Executa validadores federais e estaduais sobre NF-es individuais ou sobre
+um fluxo (iterável) de NF-es, como o produzido por NFeCSVParser.iter_nfes.
+
+Com dedup=True (padrão) as regras são resolvidas uma vez por assinatura
+distinta de item (SignatureRuleCache) e reaproveitadas pelos demais itens.
+
+IMPORTANTE: LLM NÃO é executado aqui.
+Validação rápida usa apenas CSV Local + SQLite.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from ..entities.nfe_entity import NFeEntity, ValidationError, Severity
+from .federal_validators import (
+    NCMValidator, PISCOFINSValidator, CFOPValidator, TotalsValidator
+)
+from .state_validators import SPValidator, PEValidator
+from .signature_cache import SignatureRuleCache
+from ...profiling import timed
+
+# Import FiscalRepository - absolute import
+import sys
+from pathlib import Path
+if True:  # Always add to path
+    project_root = Path(__file__).parent.parent.parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from repositories.fiscal_repository import FiscalRepository
+
+
+class ValidationPipeline:
+    """
+    Pipeline completo de validação (federal + estadual)
+
+    Os validadores são criados uma única vez e reutilizados para todas as
+    NF-es, permitindo validar fluxos longos sem custo de inicialização.
+    """
+
+    def __init__(self, repository: FiscalRepository, dedup: bool = True):
+        """
+        Inicializar pipeline com repository
+
+        Args:
+            repository: FiscalRepository para consultas
+            dedup: Resolver regras uma vez por assinatura distinta de item
+        """
+        self.repo = repository
+
+        # Federal Validators (usam CSV Local → SQLite, SEM LLM)
+        self.item_validators = [
+            NCMValidator(repository),
+            PISCOFINSValidator(repository),
+            CFOPValidator(repository)
+        ]
+        self.totals_validator = TotalsValidator(repository)
+
+        # State Validators
+        self.sp_validator = SPValidator(repository)
+        self.pe_validator = PEValidator(repository)
+
+        # Regras por assinatura (ordem: item_validators, SP, PE)
+        self.signature_cache = SignatureRuleCache(
+            repository, self.item_validators + [self.sp_validator, self.pe_validator]
+        ) if dedup else None
+
+        # NF-es que falharam com erro inesperado em validate_stream
+        self.system_error_count = 0
+
+    @timed("pipeline.validate")
+    def validate(self, nfe: NFeEntity) -> NFeEntity:
+        """
+        Executar validação completa de uma NF-e
+
+        Args:
+            nfe: NFeEntity a validar
+
+        Returns:
+            nfe com erros de validação e status final (VALID/INVALID) preenchidos
+        """
+        # Regras de cada item (uma entrada por validador; None = consultar)
+        if self.signature_cache is None:
+            resolved = [(None,) * (len(self.item_validators) + 2)] * len(nfe.items)
+        else:
+            resolved = self.signature_cache.resolve_items(nfe)
+
+        for index, validator in enumerate(self.item_validators):
+            for item, item_rules in zip(nfe.items, resolved):
+                errors = validator.validate(item, nfe, rules=item_rules[index])
+                nfe.extend_errors(errors)
+
+        # Totals Validator
+        totals_errors = self.totals_validator.validate(nfe)
+        nfe.extend_errors(totals_errors)
+
+        # State Validators
+        if nfe.emitente.uf == 'SP' or nfe.destinatario.uf == 'SP':
+            for item, item_rules in zip(nfe.items, resolved):
+                errors = self.sp_validator.validate(item, nfe, rules=item_rules[-2])
+                nfe.extend_errors(errors)
+
+        if nfe.emitente.uf == 'PE' or nfe.destinatario.uf == 'PE':
+            for item, item_rules in zip(nfe.items, resolved):
+                errors = self.pe_validator.validate(item, nfe, rules=item_rules[-1])
+                nfe.extend_errors(errors)
+
+        nfe.finish_validation()
+        return nfe
+
+    def validate_stream(
+        self,
+        nfes: Iterable[NFeEntity],
+        on_error: Optional[Callable[[NFeEntity, Exception], None]] = None
+    ) -> Iterator[NFeEntity]:
+        """
+        Validar NF-es sob demanda, à medida que o iterável as produz
+
+        Erros inesperados de uma NF-e não interrompem o fluxo: a NF-e recebe
+        um erro SYSTEM_ERROR e é entregue normalmente.
+
+        Args:
+            nfes: Iterável de NFeEntity (ex.: NFeCSVParser.iter_nfes)
+            on_error: Callback opcional (nfe, exceção) para erros de sistema
+
+        Yields:
+            NFeEntity validada
+        """
+        for nfe in nfes:
+            try:
+                yield self.validate(nfe)
+            except Exception as e:
+                self.system_error_count += 1
+                if on_error is not None:
+                    on_error(nfe, e)
+                nfe.add_validation_error(self.system_error(e))
+                nfe.finish_validation()
+                yield nfe
+
+    def dedup_stats(self) -> Dict[str, Any]:
+        """
+        Estatísticas de deduplicação por assinatura
+
+        Returns:
+            Dict com items, signatures e dedup_ratio (zerados se dedup=False)
+        """
+        if self.signature_cache is None:
+            return {'items': 0, 'signatures': 0, 'dedup_ratio': 0.0}
+        return self.signature_cache.get_stats()
+
+    @staticmethod
+    def system_error(error: Exception) -> ValidationError:
+        """
+        Criar erro de sistema para falha inesperada na validação
+
+        Args:
+            error: Exceção capturada
+
+        Returns:
+            ValidationError CRITICAL com código SYSTEM_ERROR
+        """
+        return ValidationError(
+            code='SYSTEM_ERROR',
+            field='nfe',
+            message=f'Erro inesperado na validação: {str(error)}',
+            severity=Severity.CRITICAL,
+            actual_value=str(error),
+            legal_reference='Sistema de Validação'
+        )
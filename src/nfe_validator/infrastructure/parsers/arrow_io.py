@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Conversão entre tabelas Arrow (Parquet) e os DataFrames do parser de NF-e
+
+Entrada (exportações do ERP em Parquet):
+- Colunas decimal128 de valores/alíquotas chegam ao NFeBulkBuilder como
+  Decimal, sem passar pela normalização de strings
+- Códigos numéricos (NCM, CFOP, CST) são convertidos para texto no Arrow,
+  como o dtype=str da leitura do CSV; códigos em texto seguem pela
+  normalização usual (zeros à esquerda, pontuação)
+
+Saída (cache de uploads normalizados):
+- DataFrame já normalizado gravado com a marca NORMALIZED_KEY nos
+  metadados; ao ser lido de volta, vai direto para a montagem das NF-es
+- Colunas decimais viram decimal128 quando a conversão é exata (mesma
+  escala em todos os valores); as demais ficam como texto canônico
+
+pyarrow é opcional: as funções levantam ImportError com instrução de
+instalação quando ele não está disponível.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import pandas as pd
+
+
+# Marca (metadados do schema) de tabela com o DataFrame já normalizado
+NORMALIZED_KEY = b'fiscolayer.normalized'
+
+# Versão do formato normalizado (gravada no valor de NORMALIZED_KEY pelo
+# cache de uploads). Incrementar sempre que NFeCSVParser._normalize_dataframe,
+# ColumnarNormalizer ou normalized_to_arrow mudarem: entradas gravadas com
+# outra versão são descartadas, mesmo sem mudança em __version__.
+NORMALIZED_FORMAT_VERSION = 3
+
+# Maior precisão de decimal128
+_MAX_PRECISION = 38
+
+
+def require_pyarrow():
+    """
+    Importar pyarrow (dependência opcional)
+
+    Returns:
+        Módulo pyarrow
+
+    Raises:
+        ImportError: Se pyarrow não estiver instalado
+    """
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError(
+            "pyarrow nao instalado. Execute 'pip install pyarrow' para ler/gravar Parquet."
+        ) from exc
+    return pyarrow
+
+
+def is_normalized(table) -> bool:
+    """Tabela gravada por normalized_to_arrow (dispensa normalização)"""
+    metadata = table.schema.metadata or {}
+    return NORMALIZED_KEY in metadata
+
+
+def arrow_to_frame(table, text_columns: Iterable[str], decimal_columns: Iterable[str],
+                   aliases: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, Set[str]]:
+    """
+    Converter tabela Arrow para o DataFrame de entrada do parser
+
+    Args:
+        table: pyarrow.Table
+        text_columns: Colunas de código lidas como texto (dtype=str do CSV)
+        decimal_columns: Colunas decimais (nomes do layout padrão)
+        aliases: Nomes alternativos -> nome do layout padrão
+
+    Returns:
+        (DataFrame, colunas tipadas): as colunas tipadas (nomes do layout
+        padrão) já contêm Decimal e não precisam de normalização
+    """
+    pa = require_pyarrow()
+    import pyarrow.compute as pc
+
+    aliases = aliases or {}
+    text_columns = set(text_columns)
+    decimal_columns = set(decimal_columns)
+    typed: Set[str] = set()
+
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_dictionary(column.type):
+            column = pc.cast(column, column.type.value_type)
+
+        canonical = aliases.get(name, name)
+        if canonical in decimal_columns and pa.types.is_decimal(column.type):
+            if canonical not in typed:
+                typed.add(canonical)
+                # Nulo equivale a vazio na normalização ('0.00')
+                if column.null_count:
+                    column = pc.fill_null(column, pa.scalar(Decimal(0), column.type))
+        elif name in text_columns and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+            column = pc.cast(column, pa.string())
+        columns.append(column)
+
+    frame = pa.Table.from_arrays(columns, names=table.column_names).to_pandas()
+    return frame, typed
+
+
+def normalized_to_arrow(df: pd.DataFrame, decimal_columns: Iterable[str], version: str):
+    """
+    Converter DataFrame normalizado em tabela Arrow marcada como normalizada
+
+    Colunas decimais com a mesma escala em todos os valores são gravadas
+    como decimal128 (leitura devolve exatamente os mesmos Decimal); com
+    escalas diferentes ('1000.00' e '3.5') ou valores especiais, ficam
+    como texto para preservar a representação.
+
+    Args:
+        df: DataFrame normalizado (saída de NFeCSVParser.normalize)
+        decimal_columns: Colunas decimais do layout padrão
+        version: Versão do validador gravada nos metadados
+
+    Returns:
+        pyarrow.Table
+    """
+    pa = require_pyarrow()
+
+    arrays = []
+    for name in df.columns:
+        series = df[name]
+        array = None
+        if name in decimal_columns and series.dtype == object:
+            array = _decimal_array(series)
+        if array is None:
+            array = pa.array(series, from_pandas=True)
+        arrays.append(array)
+
+    table = pa.Table.from_arrays(arrays, names=[str(name) for name in df.columns])
+    metadata = dict(table.schema.metadata or {})
+    metadata[NORMALIZED_KEY] = version.encode('utf-8')
+    return table.replace_schema_metadata(metadata)
+
+
+def _decimal_array(series: pd.Series):
+    """Coluna de strings decimais canônicas como decimal128 (ou None se inexato)"""
+    pa = require_pyarrow()
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if (codes < 0).any():
+        return None
+
+    values = []
+    exponent = None
+    for text in uniques.tolist():
+        if not isinstance(text, str):
+            return None
+        try:
+            value = Decimal(text)
+        except Exception:
+            return None
+        sign, digits, value_exponent = value.as_tuple()
+        if not value.is_finite() or str(value) != text or len(digits) > _MAX_PRECISION:
+            return None
+        if exponent is None:
+            exponent = value_exponent
+        elif value_exponent != exponent:
+            return None
+        values.append(value)
+
+    if exponent is None or exponent > 0:
+        return None
+    uniques_array = pa.array(values, type=pa.decimal128(_MAX_PRECISION, -exponent))
+    return uniques_array.take(pa.array(codes))
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+Batch Ingestion - Lotes de CSVs de NF-e (ZIPs, diretórios, vários arquivos)
+
+Os ERPs parceiros entregam o mês em um ZIP com dezenas de CSVs (um por
+filial ou por dia). Antes, cada CSV era extraído para um arquivo
+temporário e lido em série, e os DataFrames eram unidos em memória antes
+da validação.
+
+BatchIngestor lê cada CSV direto do ZIP (sem extrair para disco) e, em um
+pool de threads, decodifica (encoding e separador detectados), mapeia as
+colunas (ColumnMapper) e normaliza/monta as NF-es (NFeCSVParser). Os
+resultados saem na ordem dos arquivos, com número limitado de arquivos em
+andamento, e podem seguir direto para ParallelValidationEngine.iter_validate:
+a validação começa no primeiro arquivo, sem esperar o lote inteiro.
+
+Threads (e não processos): a descompressão (zlib) e o parser C do pandas
+liberam o GIL, e os membros são lidos do ZIP já aberto (um upload em
+memória não precisa ser copiado para cada processo).
+
+Origem de cada linha/NF-e:
+- iter_frames: coluna tag_column ('_source_file') com o nome do arquivo
+- iter_nfes: nfe.csv_source['file'] com o nome do arquivo
+
+NF-es são agrupadas por arquivo: a mesma chave em dois arquivos gera duas
+NF-es (como na validação arquivo a arquivo da linha de comando).
+
+Uso:
+    ingestor = BatchIngestor(mapping_cache=ColumnMappingCache())
+    for nfe in engine.iter_validate(ingestor.iter_nfes(["notas_2023-01.zip", "dados/"])):
+        ...
+"""
+
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from ...domain.entities.nfe_entity import NFeEntity
+from ...profiling import RunProfiler, count, current_profiler, timed
+from .column_mapper import ColumnMapper, ColumnMappingResult
+from .csv_parser import NFeCSVParser, CSVParserException
+
+
+# Extensões aceitas em diretórios
+INGEST_SUFFIXES = ('.csv', '.zip')
+
+# Separadores candidatos (o mais frequente no cabeçalho vence)
+SEPARATORS = (',', ';', '\t', '|')
+
+# Coluna com o arquivo de origem de cada linha (iter_frames)
+SOURCE_COLUMN = '_source_file'
+
+# Erros que invalidam um arquivo sem interromper o lote
+MEMBER_ERRORS = (CSVParserException, OSError, ValueError, UnicodeError, zipfile.BadZipFile,
+                 pd.errors.ParserError)
+
+# Callback de progresso: (arquivos concluídos, total de arquivos)
+ProgressCallback = Callable[[int, int], None]
+
+# Entrada do lote: caminho (CSV, ZIP ou diretório) ou upload (objeto com read e name)
+Source = Union[str, Path, BinaryIO]
+
+
+class BatchMember(NamedTuple):
+    """CSV do lote: arquivo avulso ou membro de um ZIP"""
+    name: str                                # Origem exibida ('notas.zip/jan.csv')
+    size: int                                # Bytes (descomprimidos)
+    path: Optional[Path] = None              # CSV ou ZIP em disco
+    member: Optional[str] = None             # Nome dentro do ZIP
+    archive: Optional[zipfile.ZipFile] = None  # ZIP em memória (upload)
+    data: Optional[bytes] = None             # CSV em memória (upload)
+
+
+@dataclass
+class IngestedMember:
+    """Resultado de um arquivo do lote"""
+    name: str
+    rows: int = 0
+    frame: Optional[pd.DataFrame] = None
+    nfes: List[NFeEntity] = field(default_factory=list)
+    mapping: Optional[ColumnMappingResult] = None
+    parse_errors: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumo serializável (sem DataFrame nem NF-es)"""
+        return {
+            'file': self.name,
+            'rows': self.rows,
+            'nfes': len(self.nfes),
+            'missing': list(self.mapping.missing) if self.mapping else [],
+            'parse_errors': len(self.parse_errors),
+            'error': self.error,
+        }
+
+
+# =====================================================
+# Leitura e decodificação
+# =====================================================
+
+def is_csv_member(name: str, size: int) -> bool:
+    """CSV com conteúdo, fora de diretórios ocultos e de __MACOSX"""
+    return (
+        name.lower().endswith('.csv')
+        and not name.endswith('/')
+        and not name.startswith('__MACOSX/')
+        and not any(part.startswith('.') for part in name.split('/'))
+        and size > 0
+    )
+
+
+def detect_separator(raw: bytes) -> str:
+    """Separador mais frequente na primeira linha não vazia (vírgula se nenhum)"""
+    head = raw[:1 << 16].decode('latin-1')
+    line = next((line for line in head.splitlines() if line.strip()), '')
+    counts = [(line.count(sep), sep) for sep in SEPARATORS]
+    best, sep = max(counts, key=lambda item: item[0])
+    return sep if best else ','
+
+
+@timed("batch.decode_csv")
+def decode_csv(raw: bytes, dtype: Any = str) -> pd.DataFrame:
+    """
+    Ler CSV em memória (utf-8, com ou sem BOM; senão latin-1)
+
+    Args:
+        raw: Conteúdo do arquivo
+        dtype: str (valores como texto, para o NFeCSVParser) ou None
+            (tipos inferidos pelo pandas, para análise exploratória)
+
+    Returns:
+        DataFrame com as colunas originais
+    """
+    sep = detect_separator(raw)
+    options = {'sep': sep, 'dtype': dtype, 'low_memory': False}
+    if dtype is str:
+        options.update(keep_default_na=False, na_values=[''])
+    try:
+        return pd.read_csv(io.BytesIO(raw), encoding='utf-8-sig', **options)
+    except UnicodeDecodeError:
+        return pd.read_csv(io.BytesIO(raw), encoding='latin-1', **options)
+
+
+def read_member(member: BatchMember) -> bytes:
+    """Conteúdo do CSV, lido direto do ZIP (sem extrair para disco)"""
+    if member.data is not None:
+        return member.data
+    if member.archive is not None:
+        # ZipFile serializa as leituras do arquivo base; a descompressão é paralela
+        with member.archive.open(member.member) as f:
+            return f.read()
+    if member.member is not None:
+        # ZIP em disco: um handle por leitura
+        with zipfile.ZipFile(member.path) as archive, archive.open(member.member) as f:
+            return f.read()
+    return member.path.read_bytes()
+
+
+# =====================================================
+# Ingestor
+# =====================================================
+
+class BatchIngestor:
+    """
+    Ingestão paralela de lotes de CSVs de NF-e
+
+    Uso:
+        ingestor = BatchIngestor()
+        for member in ingestor.iter_frames([upload], mapped=False):
+            ...                      # DataFrame com coluna _source_file
+        nfes = engine.iter_validate(ingestor.iter_nfes(["lote.zip"]))
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, mapping_cache=None,
+                 parser_factory: Callable[[], NFeCSVParser] = NFeCSVParser,
+                 tag_column: Optional[str] = SOURCE_COLUMN):
+        """
+        Args:
+            max_workers: Threads de decodificação (default: CPUs, até 8)
+            mapping_cache: ColumnMappingCache opcional (layouts já vistos)
+            parser_factory: Cria o NFeCSVParser de cada arquivo (um por
+                thread; o parser guarda parse_errors)
+            tag_column: Coluna com a origem em iter_frames (None = sem coluna)
+        """
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.mapping_cache = mapping_cache
+        self.parser_factory = parser_factory
+        self.tag_column = tag_column
+
+        # Resumo por arquivo da última ingestão (IngestedMember.to_dict)
+        self.files: List[Dict[str, Any]] = []
+
+    # -------------------------------------------------
+    # Arquivos do lote
+    # -------------------------------------------------
+
+    def collect(self, sources: Iterable[Source]) -> Tuple[List[BatchMember], List[zipfile.ZipFile]]:
+        """
+        Listar os CSVs das entradas (ZIPs, diretórios, CSVs ou uploads)
+
+        Args:
+            sources: Caminhos ou objetos de upload (com read e name)
+
+        Returns:
+            (membros na ordem das entradas, ZIPs em memória abertos - fechar
+            após a leitura)
+
+        Raises:
+            FileNotFoundError: Caminho inexistente
+            zipfile.BadZipFile: Arquivo .zip inválido
+        """
+        members: List[BatchMember] = []
+        archives: List[zipfile.ZipFile] = []
+        try:
+            for source in sources:
+                if hasattr(source, 'read'):
+                    self._collect_upload(source, members, archives)
+                else:
+                    self._collect_path(Path(source), members)
+        except BaseException:
+            for archive in archives:
+                archive.close()
+            raise
+        return members, archives
+
+    def _collect_path(self, path: Path, members: List[BatchMember]):
+        if path.is_dir():
+            for child in sorted(p for p in path.rglob('*') if p.is_file()):
+                relative = child.relative_to(path).as_posix()
+                if child.suffix.lower() == '.zip':
+                    self._collect_zip_path(child, members, prefix=f"{path.name}/{relative}")
+                elif is_csv_member(relative, child.stat().st_size):
+                    members.append(BatchMember(f"{path.name}/{relative}", child.stat().st_size, path=child))
+        elif path.suffix.lower() == '.zip':
+            self._collect_zip_path(path, members, prefix=path.name)
+        elif path.is_file():
+            members.append(BatchMember(path.name, path.stat().st_size, path=path))
+        else:
+            raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+
+    @staticmethod
+    def _collect_zip_path(path: Path, members: List[BatchMember], prefix: str):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if is_csv_member(info.filename, info.file_size):
+                    members.append(BatchMember(f"{prefix}/{info.filename}", info.file_size,
+                                               path=path, member=info.filename))
+
+    @staticmethod
+    def _collect_upload(source: BinaryIO, members: List[BatchMember], archives: List[zipfile.ZipFile]):
+        name = Path(getattr(source, 'name', 'upload')).name
+        source.seek(0)
+        if name.lower().endswith('.zip') or zipfile.is_zipfile(source):
+            source.seek(0)
+            archive = zipfile.ZipFile(source)
+            archives.append(archive)
+            for info in archive.infolist():
+                if is_csv_member(info.filename, info.file_size):
+                    members.append(BatchMember(f"{name}/{info.filename}", info.file_size,
+                                               member=info.filename, archive=archive))
+        else:
+            source.seek(0)
+            data = source.read()
+            members.append(BatchMember(name, len(data), data=data))
+
+    # -------------------------------------------------
+    # Processamento de cada arquivo (threads)
+    # -------------------------------------------------
+
+    def _decode(self, member: BatchMember, mapped: bool, tag: bool) -> IngestedMember:
+        """Ler, decodificar e (opcionalmente) mapear colunas de um arquivo"""
+        result = IngestedMember(member.name)
+        frame = decode_csv(read_member(member), dtype=str if mapped else None)
+        result.rows = len(frame)
+        if mapped:
+            result.mapping = ColumnMapper.map_columns_detailed(frame.columns, cache=self.mapping_cache)
+            frame = ColumnMapper.fill_missing_columns(
+                ColumnMapper.apply_mapping(frame, result.mapping.mapping), result.mapping.missing
+            )
+        if tag and self.tag_column:
+            frame[self.tag_column] = member.name
+        result.frame = frame
+        return result
+
+    def _ingest_frame(self, member: BatchMember, mapped: bool) -> IngestedMember:
+        try:
+            return self._decode(member, mapped, tag=True)
+        except MEMBER_ERRORS as e:
+            return IngestedMember(member.name, error=str(e))
+
+    def _ingest_nfes(self, member: BatchMember) -> IngestedMember:
+        try:
+            result = self._decode(member, mapped=True, tag=False)
+            parser = self.parser_factory()
+            result.nfes = parser.parse_dataframe(result.frame)
+        except MEMBER_ERRORS as e:
+            return IngestedMember(member.name, error=str(e))
+
+        result.frame = None
+        result.parse_errors = list(parser.parse_errors)
+        for nfe in result.nfes:
+            if nfe.csv_source is None:
+                nfe.csv_source = {}
+            nfe.csv_source['file'] = member.name
+        return result
+
+    # -------------------------------------------------
+    # Iteração (ordem das entradas)
+    # -------------------------------------------------
+
+    def iter_frames(self, sources: Iterable[Source], mapped: bool = True,
+                    progress_callback: Optional[ProgressCallback] = None) -> Iterator[IngestedMember]:
+        """
+        DataFrame de cada arquivo do lote, na ordem das entradas
+
+        Args:
+            sources: ZIPs, diretórios, CSVs ou uploads
+            mapped: Mapear colunas para o layout padrão (valores como
+                texto). False mantém colunas e tipos inferidos (EDA).
+            progress_callback: Callback (arquivos concluídos, total)
+
+        Yields:
+            IngestedMember com frame (ou error, se o arquivo não pôde ser lido)
+        """
+        return self._iterate(sources, lambda member: self._ingest_frame(member, mapped), progress_callback)
+
+    def iter_members(self, sources: Iterable[Source],
+                     progress_callback: Optional[ProgressCallback] = None) -> Iterator[IngestedMember]:
+        """
+        NF-es de cada arquivo do lote (normalizadas nas threads), na ordem das entradas
+
+        Yields:
+            IngestedMember com nfes (ou error)
+        """
+        return self._iterate(sources, self._ingest_nfes, progress_callback)
+
+    def iter_nfes(self, sources: Iterable[Source],
+                  progress_callback: Optional[ProgressCallback] = None) -> Iterator[NFeEntity]:
+        """
+        NF-es do lote, arquivo a arquivo (para ParallelValidationEngine.iter_validate)
+
+        Arquivos ilegíveis são ignorados (ver files para o motivo).
+
+        Args:
+            sources: ZIPs, diretórios, CSVs ou uploads
+            progress_callback: Callback (arquivos concluídos, total)
+
+        Yields:
+            NFeEntity com csv_source['file'] = arquivo de origem
+        """
+        for result in self.iter_members(sources, progress_callback):
+            yield from result.nfes
+
+    def _iterate(self, sources: Iterable[Source], work: Callable[[BatchMember], IngestedMember],
+                 progress_callback: Optional[ProgressCallback]) -> Iterator[IngestedMember]:
+        members, archives = self.collect(sources)
+        self.files = []
+        total = len(members)
+        profiler = current_profiler()
+
+        def run(member: BatchMember):
+            # Medições de cada thread somadas no consumidor (RunProfiler não é thread-safe)
+            if profiler is None:
+                return work(member), None
+            with RunProfiler("batch_member") as member_profiler:
+                result = work(member)
+            return result, member_profiler.export_state()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-ingest")
+        pending: Dict = {}                  # future -> índice do arquivo
+        completed: Dict[int, IngestedMember] = {}
+        next_submit = 0
+        next_yield = 0
+        try:
+            while next_yield < total:
+                # Limitar arquivos decodificados em memória aguardando consumo
+                while next_submit < total and len(pending) + len(completed) < self.max_workers * 2:
+                    future = executor.submit(copy_context().run, run, members[next_submit])
+                    pending[future] = next_submit
+                    next_submit += 1
+
+                if next_yield not in completed:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index = pending.pop(future)
+                        result, state = future.result()
+                        if state is not None:
+                            profiler.merge(state)
+                        completed[index] = result
+                        if progress_callback:
+                            progress_callback(len(self.files) + len(completed), total)
+                    continue
+
+                result = completed.pop(next_yield)
+                next_yield += 1
+                self.files.append(result.to_dict())
+                count("batch.files")
+                count("batch.rows", result.rows)
+                if result.error:
+                    count("batch.files_failed")
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for archive in archives:
+                archive.close()
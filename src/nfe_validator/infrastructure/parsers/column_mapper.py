@@ -4,12 +4,80 @@ Column Mapper - Mapeamento Inteligente de Colunas para NF-e
 
 Mapeia colunas de diferentes formatos de CSV para o formato esperado pelo NFeCSVParser.
 Suporta variações de nomes, maiúsculas/minúsculas, com/sem acentos.
+
+Os padrões são compilados uma única vez. O resultado de cada cabeçalho é
+guardado pela assinatura (hash da lista ordenada de colunas): layouts
+repetidos (os mesmos ERPs parceiros) são mapeados sem avaliar padrões, em
+memória e, com ColumnMappingCache, também em disco.
+
+Cada coluna mapeada tem uma confiança (0 a 1): padrões menos específicos,
+correspondências parciais e colunas ambíguas (mais de uma coluna de origem
+casa com o mesmo padrão) reduzem a confiança, e as alternativas ficam em
+ColumnMappingResult.ambiguous em vez de a primeira ser escolhida em silêncio.
 """
 
+import hashlib
+import json
 import re
-from typing import Dict, List, Optional, Tuple
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple, Union
 import pandas as pd
 
+from ...profiling import count, timed
+
+
+# Acentos removidos na normalização dos nomes de colunas
+_ACCENTS = str.maketrans('ãáàéêíóôúüç', 'aaaeeioouuc')
+
+# Sequências de caracteres especiais, espaços e underscores
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+@dataclass
+class ColumnMappingResult:
+    """Resultado do mapeamento de um cabeçalho"""
+
+    # {nome_esperado: nome_original}
+    mapping: Dict[str, str]
+    # Colunas esperadas não encontradas
+    missing: List[str]
+    # {nome_esperado: confiança 0..1}
+    confidence: Dict[str, float] = field(default_factory=dict)
+    # {nome_esperado: outras colunas de origem que também casaram}
+    ambiguous: Dict[str, List[str]] = field(default_factory=dict)
+    # Assinatura do cabeçalho e origem do resultado
+    signature: str = ''
+    cached: bool = False
+
+    def low_confidence(self, threshold: Optional[float] = None) -> Dict[str, float]:
+        """Colunas mapeadas com confiança abaixo do limite"""
+        if threshold is None:
+            threshold = ColumnMapper.LOW_CONFIDENCE
+        return {target: score for target, score in self.confidence.items() if score < threshold}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict serializável (JSON), sem assinatura nem origem"""
+        return {
+            'mapping': dict(self.mapping),
+            'missing': list(self.missing),
+            'confidence': dict(self.confidence),
+            'ambiguous': {target: list(cols) for target, cols in self.ambiguous.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], signature: str = '', cached: bool = False) -> 'ColumnMappingResult':
+        """Reconstruir resultado (cópia; alterar não afeta o cache)"""
+        return cls(
+            mapping=dict(data['mapping']),
+            missing=list(data['missing']),
+            confidence=dict(data.get('confidence', {})),
+            ambiguous={target: list(cols) for target, cols in data.get('ambiguous', {}).items()},
+            signature=signature,
+            cached=cached,
+        )
+
 
 class ColumnMapper:
     """Mapeador inteligente de colunas para NF-e"""
@@ -120,63 +188,172 @@ class ColumnMapper:
         ],
     }
 
+    # Confiança: peso do padrão cai a cada padrão menos específico da lista
+    RANK_PENALTY = 0.15
+    MIN_RANK_WEIGHT = 0.5
+    # Multiplicadores quando mais de uma coluna casa com o padrão vencedor
+    AMBIGUOUS_FACTOR = 0.75      # desempate pela cobertura do nome
+    TIED_FACTOR = 0.5            # empate: vence a primeira coluna
+    # Abaixo disso o mapeamento é destacado no relatório
+    LOW_CONFIDENCE = 0.6
+
+    # Cabeçalhos mantidos em memória (por assinatura)
+    MEMORY_CACHE_SIZE = 128
+    _memory_cache: Dict[str, Dict[str, Any]] = {}
+    # Workers do processamento em lote compartilham a memória da classe
+    _memory_cache_lock = threading.Lock()
+
     @staticmethod
+    @lru_cache(maxsize=4096)
     def normalize_column_name(col: str) -> str:
         """Normalizar nome de coluna para comparação"""
-        # Remover acentos, converter para minúsculas, remover espaços extras
-        col = str(col).lower().strip()
-        # Remover acentos comuns
-        col = col.replace('ã', 'a').replace('á', 'a').replace('à', 'a')
-        col = col.replace('é', 'e').replace('ê', 'e')
-        col = col.replace('í', 'i')
-        col = col.replace('ó', 'o').replace('ô', 'o')
-        col = col.replace('ú', 'u').replace('ü', 'u')
-        col = col.replace('ç', 'c')
-        # Substituir espaços e caracteres especiais por underscore
-        col = re.sub(r'[^\w]+', '_', col)
-        # Remover underscores múltiplos
-        col = re.sub(r'_+', '_', col).strip('_')
-        return col
+        # Minúsculas sem acentos; espaços e caracteres especiais viram um único underscore
+        return _SEPARATORS.sub('_', str(col).lower().strip().translate(_ACCENTS)).strip('_')
+
+    @classmethod
+    def _compiled_patterns(cls) -> List[Tuple[str, List[Pattern]]]:
+        """Padrões compilados (uma vez por classe)"""
+        compiled = cls.__dict__.get('_compiled')
+        if compiled is None:
+            compiled = [
+                (target, [re.compile(pattern, re.IGNORECASE) for pattern in patterns])
+                for target, patterns in cls.COLUMN_PATTERNS.items()
+            ]
+            # Versão antes dos padrões: outra thread só vê _compiled com a versão pronta
+            cls._patterns_version = hashlib.sha256(
+                json.dumps(cls.COLUMN_PATTERNS, sort_keys=True).encode('utf-8')
+            ).hexdigest()[:16]
+            cls._compiled = compiled
+        return compiled
+
+    @classmethod
+    def header_signature(cls, columns: Iterable[Any]) -> str:
+        """
+        Assinatura do cabeçalho (chave dos caches de mapeamento)
+
+        Args:
+            columns: Nomes das colunas, na ordem do arquivo
+
+        Returns:
+            SHA-256 da lista ordenada de colunas e da versão dos padrões
+        """
+        cls._compiled_patterns()
+        digest = hashlib.sha256(cls._patterns_version.encode('utf-8'))
+        for col in columns:
+            digest.update(b'\x1f')
+            digest.update(str(col).encode('utf-8'))
+        return digest.hexdigest()
 
     @classmethod
-    def map_columns(cls, df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
+    @timed("column_mapper.map_columns")
+    def map_columns(cls, df: pd.DataFrame, cache=None) -> Tuple[Dict[str, str], List[str]]:
         """
         Mapear colunas do DataFrame para formato esperado
 
         Args:
-            df: DataFrame com dados originais
+            df: DataFrame com dados originais (basta o cabeçalho)
+            cache: ColumnMappingCache (opcional) para layouts já vistos
 
         Returns:
             Tupla com (mapeamento, colunas_faltantes)
             - mapeamento: dict {nome_esperado: nome_original}
             - colunas_faltantes: list de colunas não encontradas
         """
-        mapping = {}
-        missing = []
+        result = cls.map_columns_detailed(df.columns, cache=cache)
+        return result.mapping, result.missing
 
-        # Normalizar nomes das colunas originais
-        original_columns = df.columns.tolist()
-        normalized_cols = {cls.normalize_column_name(col): col for col in original_columns}
+    @classmethod
+    def map_columns_detailed(cls, columns: Union[pd.DataFrame, Iterable[Any]],
+                             cache=None) -> ColumnMappingResult:
+        """
+        Mapear colunas com confiança e ambiguidades
 
-        # Tentar mapear cada coluna esperada
-        for target_col, patterns in cls.COLUMN_PATTERNS.items():
-            found = False
+        Args:
+            columns: DataFrame ou nomes das colunas originais
+            cache: ColumnMappingCache (opcional) para layouts já vistos
 
-            # Tentar cada padrão
-            for pattern in patterns:
-                for norm_col, orig_col in normalized_cols.items():
-                    if re.search(pattern, norm_col, re.IGNORECASE):
-                        mapping[target_col] = orig_col
-                        found = True
-                        break
+        Returns:
+            ColumnMappingResult (cached=True se veio da memória ou do disco)
+        """
+        if isinstance(columns, pd.DataFrame):
+            columns = columns.columns
+        original_columns = list(columns)
+        signature = cls.header_signature(original_columns)
+
+        with cls._memory_cache_lock:
+            data = cls._memory_cache.get(signature)
+        if data is not None:
+            count("column_mapper.cache_hit")
+            return ColumnMappingResult.from_dict(data, signature, cached=True)
+
+        data = cache.get(signature) if cache is not None else None
+        if data is not None:
+            count("column_mapper.disk_hit")
+            cached = True
+        else:
+            data = cls._match_columns(original_columns).to_dict()
+            cached = False
+            if cache is not None:
+                cache.put(signature, data)
+
+        with cls._memory_cache_lock:
+            if signature not in cls._memory_cache and len(cls._memory_cache) >= cls.MEMORY_CACHE_SIZE:
+                cls._memory_cache.pop(next(iter(cls._memory_cache)), None)
+            cls._memory_cache[signature] = data
+        return ColumnMappingResult.from_dict(data, signature, cached=cached)
 
-                if found:
-                    break
+    @classmethod
+    def clear_memory_cache(cls):
+        """Esquecer os cabeçalhos mapeados em memória"""
+        with cls._memory_cache_lock:
+            cls._memory_cache.clear()
 
-            if not found:
-                missing.append(target_col)
+    @classmethod
+    def _match_columns(cls, original_columns: List[Any]) -> ColumnMappingResult:
+        """
+        Avaliar os padrões sobre as colunas (sem cache)
 
-        return mapping, missing
+        Para cada coluna esperada vence o primeiro padrão (mais específico)
+        que casa com alguma coluna. Uma coluna com o próprio nome esperado
+        tem confiança 1. Se mais de uma coluna casa com o padrão, escolhe-se
+        a de maior cobertura (trecho casado / nome normalizado) e a
+        confiança é reduzida; as demais ficam em ambiguous.
+        """
+        result = ColumnMappingResult(mapping={}, missing=[])
+
+        # Normalizar nomes das colunas originais
+        normalized_cols = {cls.normalize_column_name(col): col for col in original_columns}
+
+        for target_col, patterns in cls._compiled_patterns():
+            for rank, pattern in enumerate(patterns):
+                candidates = []
+                for norm_col, orig_col in normalized_cols.items():
+                    match = pattern.search(norm_col)
+                    if match:
+                        coverage = (match.end() - match.start()) / len(norm_col) if norm_col else 1.0
+                        candidates.append((norm_col == target_col, coverage, orig_col))
+                if not candidates:
+                    continue
+
+                # Estável: empates mantêm a ordem das colunas no arquivo
+                candidates.sort(key=lambda candidate: (not candidate[0], -candidate[1]))
+                exact, coverage, chosen = candidates[0]
+                if exact:
+                    confidence = 1.0
+                else:
+                    confidence = max(cls.MIN_RANK_WEIGHT, 1.0 - cls.RANK_PENALTY * rank) * (0.8 + 0.2 * coverage)
+                    if len(candidates) > 1:
+                        tied = candidates[1][1] == coverage
+                        confidence *= cls.TIED_FACTOR if tied else cls.AMBIGUOUS_FACTOR
+                        result.ambiguous[target_col] = [col for _, _, col in candidates[1:]]
+
+                result.mapping[target_col] = chosen
+                result.confidence[target_col] = round(confidence, 2)
+                break
+            else:
+                result.missing.append(target_col)
+
+        return result
 
     @classmethod
     def apply_mapping(cls, df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
@@ -188,35 +365,73 @@ class ColumnMapper:
             mapping: Dicionário de mapeamento {novo_nome: nome_original}
 
         Returns:
-            DataFrame com colunas renomeadas
+            DataFrame com colunas renomeadas (novo objeto que compartilha
+            os dados de df, sem cópia; colunas adicionadas ou substituídas
+            nele não afetam df)
         """
-        # Criar cópia do DataFrame
-        df_mapped = df.copy()
-
         # Renomear colunas conforme mapeamento
         reverse_mapping = {v: k for k, v in mapping.items()}
-        df_mapped = df_mapped.rename(columns=reverse_mapping)
+        df_mapped = df.copy(deep=False)
+        df_mapped.columns = [reverse_mapping.get(col, col) for col in df.columns]
 
         return df_mapped
 
     @classmethod
-    def get_mapping_report(cls, mapping: Dict[str, str], missing: List[str]) -> str:
+    def fill_missing_columns(cls, df: pd.DataFrame, missing: List[str]) -> pd.DataFrame:
+        """
+        Adicionar colunas ausentes com valores padrão (validação parcial)
+
+        Args:
+            df: DataFrame já mapeado
+            missing: Colunas não encontradas no mapeamento
+
+        Returns:
+            O próprio DataFrame, com as colunas ausentes adicionadas
+        """
+        for col in missing:
+            if col not in df.columns:
+                # Valores padrão conforme o tipo de coluna
+                if 'valor' in col or 'aliquota' in col:
+                    df[col] = 0.0
+                elif 'cst' in col:
+                    df[col] = ''
+                elif 'numero_item' in col:
+                    df[col] = 1
+                else:
+                    df[col] = ''
+        return df
+
+    @classmethod
+    def get_mapping_report(cls, mapping: Dict[str, str], missing: List[str],
+                           confidence: Optional[Dict[str, float]] = None,
+                           ambiguous: Optional[Dict[str, List[str]]] = None) -> str:
         """
         Gerar relatório de mapeamento
 
         Args:
             mapping: Dicionário de mapeamento
             missing: Lista de colunas faltantes
+            confidence: Confiança por coluna (ColumnMappingResult.confidence)
+            ambiguous: Alternativas por coluna (ColumnMappingResult.ambiguous)
 
         Returns:
             String com relatório formatado
         """
+        confidence = confidence or {}
+        ambiguous = ambiguous or {}
         report = "📋 **Relatório de Mapeamento de Colunas**\n\n"
 
         if mapping:
             report += f"✅ **{len(mapping)} colunas mapeadas:**\n\n"
             for target, original in sorted(mapping.items()):
-                report += f"- `{original}` → `{target}`\n"
+                report += f"- `{original}` → `{target}`"
+                score = confidence.get(target)
+                if score is not None and (score < cls.LOW_CONFIDENCE or target in ambiguous):
+                    report += f" ⚠️ confiança {score:.0%}"
+                    if target in ambiguous:
+                        others = ', '.join(f"`{col}`" for col in ambiguous[target])
+                        report += f" (também casam: {others})"
+                report += "\n"
 
         if missing:
             report += f"\n⚠️ **{len(missing)} colunas não encontradas:**\n\n"
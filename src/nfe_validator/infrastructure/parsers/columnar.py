@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+Caminho colunar (vetorizado) do parser de NF-e
+
+Substitui o processamento linha a linha (.apply / iterrows) por operações
+sobre colunas inteiras:
+- ColumnarNormalizer: normalização de códigos (NCM, CFOP, CNPJ, CST) e
+  decimais com operações de string do pandas sobre os valores únicos
+- NFeBulkBuilder: criação em lote de NFeItem/ImpostoItem/NFeEntity a partir
+  de arrays de colunas já tipados, sem iterrows
+
+A saída é idêntica à do caminho linha a linha de NFeCSVParser.
+"""
+
+import re
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ...domain.entities.nfe_entity import (
+    NFeEntity, NFeItem, Empresa, ImpostoItem, ValidationStatus
+)
+from ...domain.entities.compact_items import CompactItemBatch
+
+
+# Strings que já estão na forma canônica de str(Decimal(valor)).
+# Qualquer valor fora deste padrão (expoente, zeros à esquerda, "+", NaN, ...)
+# é resolvido pelo caminho escalar, garantindo resultado idêntico.
+_CANONICAL_DECIMAL = re.compile(
+    r'-?(?:[1-9][0-9]*(?:\.[0-9]+)?|0(?:\.[0-9]{1,6})?|0\.0{0,5}[1-9][0-9]*)'
+)
+
+
+def _map_unique(series: pd.Series, transform: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """
+    Aplicar transformação vetorizada apenas aos valores únicos da coluna
+
+    Códigos fiscais têm baixa cardinalidade: normalizar os únicos e
+    redistribuir via take() evita repetir o trabalho em milhões de linhas.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    transformed = transform(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    return pd.Series(transformed.take(codes), index=series.index, dtype=object)
+
+
+def _scalar_decimal_str(value: str) -> str:
+    """Fallback escalar para decimais fora da forma canônica"""
+    try:
+        return str(Decimal(value))
+    except Exception:
+        return '0.00'
+
+
+class ColumnarNormalizer:
+    """
+    Normalização vetorizada de colunas do DataFrame de NF-e
+
+    Cada método recebe uma Series já convertida para str e retorna a Series
+    normalizada, com a mesma semântica dos métodos _normalize_* do parser.
+    """
+
+    @staticmethod
+    def strip(series: pd.Series) -> pd.Series:
+        """Converter para str e remover espaços nas extremidades"""
+        return _map_unique(series.astype(str), lambda s: s.str.strip())
+
+    @staticmethod
+    def normalize_ncm(series: pd.Series) -> pd.Series:
+        """NCM com 8 dígitos (remove '.' e '-', completa com zeros à direita)"""
+        def transform(s: pd.Series) -> pd.Series:
+            clean = s.str.replace(r'[.\-]', '', regex=True)
+            return clean.str.ljust(8, '0').str.slice(0, 8).where(s != '', '')
+        return _map_unique(series, transform)
+
+    @staticmethod
+    def normalize_cfop(series: pd.Series) -> pd.Series:
+        """CFOP com 4 dígitos (remove '.', completa com zeros à esquerda)"""
+        def transform(s: pd.Series) -> pd.Series:
+            clean = s.str.replace('.', '', regex=False)
+            return clean.str.zfill(4).str.slice(0, 4).where(s != '', '')
+        return _map_unique(series, transform)
+
+    @staticmethod
+    def normalize_cnpj(series: pd.Series) -> pd.Series:
+        """CNPJ com 14 dígitos (remove formatação, completa com zeros à esquerda)"""
+        def transform(s: pd.Series) -> pd.Series:
+            clean = s.str.replace(r'[.\-/]', '', regex=True)
+            return clean.str.zfill(14).where(s != '', '')
+        return _map_unique(series, transform)
+
+    @staticmethod
+    def normalize_cst(series: pd.Series) -> pd.Series:
+        """CST com 2 dígitos (zero à esquerda para 1 dígito, trunca acima de 2)"""
+        def transform(s: pd.Series) -> pd.Series:
+            clean = s.str.strip()
+            single_digit = (clean.str.len() == 1) & clean.str.isdigit()
+            result = clean.str.slice(0, 2).where(~single_digit, '0' + clean)
+            return result.where(s != '', '')
+        return _map_unique(series, transform)
+
+    @staticmethod
+    def normalize_decimal(series: pd.Series) -> pd.Series:
+        """Decimal como str(Decimal(valor)), '0.00' para vazio ou inválido"""
+        def transform(s: pd.Series) -> pd.Series:
+            clean = s.str.strip().str.replace(',', '.', regex=False)
+            canonical = clean.str.fullmatch(_CANONICAL_DECIMAL).fillna(False).astype(bool)
+            result = clean.where(canonical, clean[~canonical].map(_scalar_decimal_str))
+            return result.where(s != '', '0.00')
+        return _map_unique(series, transform)
+
+
+# =====================================================
+# Conversores escalares (mesma semântica de _parse_item)
+# =====================================================
+
+def _safe_str(val, default=''):
+    if pd.isna(val):
+        return default
+    return str(val).strip()
+
+
+def _safe_decimal(val, default='0'):
+    if pd.isna(val):
+        return Decimal(default)
+    try:
+        return Decimal(str(val).replace(',', '.'))
+    except Exception:
+        return Decimal(default)
+
+
+def _safe_int(val, default=1):
+    if pd.isna(val):
+        return default
+    try:
+        return int(float(val))
+    except Exception:
+        return default
+
+
+def _optional_str(val):
+    # Equivalente a: safe_str(row.get(col, None)) if row.get(col) else None
+    return _safe_str(val) if val else None
+
+
+_MIXED_TYPES = {'mixed', 'mixed-integer', 'mixed-integer-float'}
+
+
+class NFeBulkBuilder:
+    """
+    Construtor em lote de entidades NF-e a partir do DataFrame normalizado
+
+    Converte cada coluna uma única vez (por valor único) para os tipos finais
+    (str, Decimal, int) e monta os objetos com zip sobre as colunas, sem
+    criar uma Series por linha.
+    """
+
+    def __init__(self, parser):
+        """
+        Args:
+            parser: NFeCSVParser (fornece parsing de data, totais e erros)
+        """
+        self.parser = parser
+
+    # -------------------------------------------------
+    # Conversão de colunas
+    # -------------------------------------------------
+
+    @staticmethod
+    def convert_column(series: pd.Series, converter: Callable[[Any], Any]) -> List[Any]:
+        """
+        Converter coluna inteira aplicando o conversor uma vez por valor único
+
+        Colunas object com tipos mistos (ex.: 1 e 1.0) são convertidas valor a
+        valor, pois a fatoração os consideraria iguais.
+        """
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=False) in _MIXED_TYPES:
+            return [converter(v) for v in series.tolist()]
+
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        if isinstance(uniques, pd.Index):
+            uniques = uniques.to_numpy()
+        converted = np.empty(len(uniques) + 1, dtype=object)
+        converted[:-1] = [converter(u) for u in uniques.tolist()]
+        converted[-1] = converter(np.nan)  # código -1 (NA)
+        return converted.take(codes).tolist()
+
+    def _column(self, df: pd.DataFrame, name: str, converter, default) -> List[Any]:
+        if name in df.columns:
+            return self.convert_column(df[name], converter)
+        return [converter(default)] * len(df)
+
+    def item_columns(self, df: pd.DataFrame) -> Dict[str, List[Any]]:
+        """
+        Converter as colunas de item do DataFrame para os tipos de NFeItem
+
+        Args:
+            df: DataFrame normalizado
+
+        Returns:
+            Campo de NFeItem/ImpostoItem -> lista de valores (um por linha)
+        """
+        def s(name):
+            return self._column(df, name, _safe_str, '')
+
+        def d(name):
+            return self._column(df, name, _safe_decimal, '0')
+
+        # Base PIS/COFINS: coluna própria ou valor_total do item
+        base_fallback = 'valor_total' if 'valor_total' in df.columns else None
+
+        def base(name):
+            if name in df.columns or base_fallback is None:
+                return d(name)
+            return d(base_fallback)
+
+        columns = {'numero_item': self._column(df, 'numero_item', _safe_int, 1)}
+        for name in ('codigo_produto', 'descricao', 'ncm', 'cfop', 'unidade',
+                     'icms_cst', 'ipi_cst', 'pis_cst', 'cofins_cst'):
+            columns[name] = s(name)
+        for name in ('quantidade', 'valor_unitario', 'valor_total', 'valor_desconto',
+                     'valor_frete', 'icms_base', 'icms_aliquota', 'icms_valor',
+                     'ipi_base', 'ipi_aliquota', 'ipi_valor', 'pis_aliquota',
+                     'pis_valor', 'cofins_aliquota', 'cofins_valor'):
+            columns[name] = d(name)
+        columns['pis_base'] = base('pis_base')
+        columns['cofins_base'] = base('cofins_base')
+        columns['tipo_acucar'] = self._column(df, 'tipo_acucar', _optional_str, None)
+        columns['icumsa'] = self._column(df, 'icumsa', _optional_str, None)
+        return columns
+
+    def build_items(self, df: pd.DataFrame) -> List[NFeItem]:
+        """
+        Criar todos os NFeItem do DataFrame (na ordem das linhas)
+
+        Args:
+            df: DataFrame normalizado
+
+        Returns:
+            Lista de NFeItem, um por linha
+        """
+        c = self.item_columns(df)
+
+        impostos = map(
+            ImpostoItem,
+            c['icms_cst'], c['icms_base'], c['icms_aliquota'], c['icms_valor'],
+            c['ipi_cst'], c['ipi_base'], c['ipi_aliquota'], c['ipi_valor'],
+            c['pis_cst'], c['pis_base'], c['pis_aliquota'], c['pis_valor'],
+            c['cofins_cst'], c['cofins_base'], c['cofins_aliquota'], c['cofins_valor'],
+        )
+
+        columns = zip(
+            c['numero_item'],
+            c['codigo_produto'], c['descricao'], c['ncm'], c['cfop'], c['unidade'],
+            c['quantidade'], c['valor_unitario'], c['valor_total'],
+            c['valor_desconto'], c['valor_frete'],
+            impostos,
+            c['tipo_acucar'],
+            c['icumsa'],
+        )
+
+        return [
+            NFeItem(
+                numero_item=numero_item,
+                codigo_produto=codigo_produto,
+                descricao=descricao,
+                ncm=ncm,
+                cfop=cfop,
+                unidade=unidade,
+                quantidade=quantidade,
+                valor_unitario=valor_unitario,
+                valor_total=valor_total,
+                valor_desconto=valor_desconto,
+                valor_frete=valor_frete,
+                impostos=imposto,
+                tipo_acucar=tipo_acucar,
+                icumsa=icumsa,
+            )
+            for (numero_item, codigo_produto, descricao, ncm, cfop, unidade,
+                 quantidade, valor_unitario, valor_total, valor_desconto,
+                 valor_frete, imposto, tipo_acucar, icumsa) in columns
+        ]
+
+    def build_compact_items(self, df: pd.DataFrame) -> CompactItemBatch:
+        """
+        Criar os itens do DataFrame em armazenamento colunar compacto
+
+        Args:
+            df: DataFrame normalizado
+
+        Returns:
+            CompactItemBatch (batch[i] tem a mesma API de NFeItem)
+        """
+        return CompactItemBatch.from_columns(self.item_columns(df))
+
+    # -------------------------------------------------
+    # Agrupamento e montagem das NF-es
+    # -------------------------------------------------
+
+    @staticmethod
+    def group_positions(keys: pd.Series, sort: bool = True) -> List[tuple]:
+        """
+        Agrupar posições de linha por chave
+
+        Args:
+            keys: Coluna de chaves (chave_acesso)
+            sort: True ordena como groupby(sort=True); False mantém a ordem
+                de primeira aparição
+
+        Returns:
+            Lista de (chave, array de posições em ordem original)
+        """
+        codes, uniques = pd.factorize(keys, sort=sort, use_na_sentinel=True)
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        # Linhas com chave NA ficam no início da ordenação e são descartadas
+        start = int((codes < 0).sum())
+        groups = []
+        for key, count in zip(uniques.tolist(), counts.tolist()):
+            groups.append((key, order[start:start + count]))
+            start += count
+        return groups
+
+    def build_nfes(self, df: pd.DataFrame,
+                   on_error: Optional[Callable[[Any, Exception], None]] = None,
+                   sort: bool = True, compact: bool = False) -> List[NFeEntity]:
+        """
+        Montar NF-es agrupando itens por chave_acesso
+
+        Args:
+            df: DataFrame normalizado (com colunas mínimas validadas)
+            on_error: Callback (chave, exceção) para NF-es que falharem
+            sort: Ordenar por chave (como groupby) ou manter ordem de aparição
+            compact: Itens como visões de um CompactItemBatch (memória
+                reduzida) em vez de NFeItem individuais
+
+        Returns:
+            Lista de NFeEntity
+        """
+        df = df.reset_index(drop=True)
+        items = list(self.build_compact_items(df)) if compact else self.build_items(df)
+
+        # Colunas de cabeçalho como listas (acesso por posição)
+        header = {col: df[col].tolist() for col in df.columns}
+        date_cache: Dict[Any, Any] = {}
+
+        nfes = []
+        for chave, positions in self.group_positions(df['chave_acesso'], sort=sort):
+            try:
+                nfes.append(self._build_nfe(header, positions, items, date_cache))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(chave, e)
+        return nfes
+
+    def _build_nfe(self, header: Dict[str, list], positions: np.ndarray,
+                   items: List[NFeItem], date_cache: Dict[Any, Any]) -> NFeEntity:
+        first = int(positions[0])
+
+        def get(col, default=None):
+            values = header.get(col)
+            return values[first] if values is not None else default
+
+        # Mesma ordem de acesso de _parse_nfe_group (mensagens de KeyError iguais)
+        emitente = Empresa(
+            cnpj=header['cnpj_emitente'][first],
+            razao_social=header['razao_social_emitente'][first],
+            uf=header['uf_emitente'][first],
+            nome_fantasia=get('nome_fantasia_emitente'),
+            ie=get('ie_emitente')
+        )
+
+        destinatario = Empresa(
+            cnpj=header['cnpj_destinatario'][first],
+            razao_social=header['razao_social_destinatario'][first],
+            uf=header['uf_destinatario'][first],
+            nome_fantasia=get('nome_fantasia_destinatario'),
+            ie=get('ie_destinatario')
+        )
+
+        nfe_items = [items[p] for p in positions.tolist()]
+        totais = self.parser._calculate_totals(nfe_items)
+        cfop_nota = nfe_items[0].cfop if nfe_items else ''
+
+        data_emissao = self._parse_date_cached(header['data_emissao'][first], date_cache)
+
+        natureza = get('natureza_operacao', '')
+        if pd.isna(natureza) or not natureza or natureza == 'nan':
+            natureza = 'Venda de mercadoria'
+
+        return NFeEntity(
+            chave_acesso=str(header['chave_acesso'][first]),
+            numero=str(header['numero_nfe'][first]),
+            serie=str(header['serie'][first]),
+            data_emissao=data_emissao,
+            emitente=emitente,
+            destinatario=destinatario,
+            items=nfe_items,
+            totais=totais,
+            cfop_nota=cfop_nota,
+            natureza_operacao=natureza,
+            uf_origem=emitente.uf,
+            uf_destino=destinatario.uf,
+            validation_status=ValidationStatus.PENDING,
+            csv_source={
+                'file': 'uploaded_csv',
+                'rows': len(positions)
+            }
+        )
+
+    def _parse_date_cached(self, value, cache: Dict[Any, Any]):
+        """Parsear data reaproveitando resultados válidos por valor"""
+        try:
+            cached = cache.get((type(value), value))
+        except TypeError:
+            cached = None
+        if cached is not None:
+            return cached
+
+        parsed = self.parser._try_parse_date(value)
+        if parsed is None:
+            # Caminho com registro de erro e fallback para a data atual
+            return self.parser._parse_date(value)
+
+        try:
+            cache[(type(value), value)] = parsed
+        except TypeError:
+            pass
+        return parsed
@@ -9,16 +9,21 @@ Especificação:
 - Validação de formato
 """
 
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Iterator
 from decimal import Decimal
 from datetime import datetime
+import codecs
 import re
 
 from ...domain.entities.nfe_entity import (
     NFeEntity, NFeItem, Empresa, ImpostoItem, TotaisNFe,
     TipoOperacao, ValidationStatus, ValidationError, Severity
 )
+from .columnar import ColumnarNormalizer, NFeBulkBuilder
+from .arrow_io import arrow_to_frame, is_normalized, require_pyarrow
+from ...profiling import timed
 
 
 class CSVParserException(Exception):
@@ -95,15 +100,91 @@ class NFeCSVParser:
         'icumsa',  # Índice de cor do açúcar
     ]
 
-    def __init__(self):
+    # Colunas lidas sempre como string (preservar zeros à esquerda)
+    CSV_DTYPE_SPEC = {
+        'chave_acesso': str,
+        'item_pis_cst': str,
+        'item_cofins_cst': str,
+        'pis_cst': str,
+        'cofins_cst': str,
+        'item_ncm': str,
+        'ncm': str,
+        'item_cfop': str,
+        'cfop': str
+    }
+
+    # Nomes alternativos de colunas -> layout padrão
+    COLUMN_ALIASES = {
+        'numero_nf': 'numero_nfe',
+        'emitente_cnpj': 'cnpj_emitente',
+        'emitente_razao_social': 'razao_social_emitente',
+        'emitente_uf': 'uf_emitente',
+        'destinatario_cnpj': 'cnpj_destinatario',
+        'destinatario_razao_social': 'razao_social_destinatario',
+        'destinatario_uf': 'uf_destinatario',
+        'item_numero': 'numero_item',
+        'item_codigo': 'codigo_produto',
+        'item_descricao': 'descricao',
+        'item_ncm': 'ncm',
+        'item_cfop': 'cfop',
+        'item_unidade': 'unidade',
+        'item_quantidade': 'quantidade',
+        'item_valor_unitario': 'valor_unitario',
+        'item_valor_total': 'valor_total',
+        'item_icms_base': 'icms_base',
+        'item_icms_aliquota': 'icms_aliquota',
+        'item_icms_valor': 'icms_valor',
+        'item_ipi_base': 'ipi_base',
+        'item_ipi_aliquota': 'ipi_aliquota',
+        'item_ipi_valor': 'ipi_valor',
+        'item_pis_base': 'pis_base',
+        'item_pis_aliquota': 'pis_aliquota',
+        'item_pis_valor': 'pis_valor',
+        'item_pis_cst': 'pis_cst',
+        'item_cofins_base': 'cofins_base',
+        'item_cofins_aliquota': 'cofins_aliquota',
+        'item_cofins_valor': 'cofins_valor',
+        'item_cofins_cst': 'cofins_cst',
+    }
+
+    # Colunas decimais normalizadas como str(Decimal(valor))
+    DECIMAL_COLUMNS = [
+        'quantidade', 'valor_unitario', 'valor_total',
+        'pis_aliquota', 'pis_valor', 'cofins_aliquota', 'cofins_valor',
+        'icms_aliquota', 'icms_valor', 'ipi_aliquota', 'ipi_valor',
+        'valor_desconto', 'valor_frete'
+    ]
+
+    # Tamanho padrão de bloco para leitura em streaming (linhas)
+    DEFAULT_CHUNKSIZE = 50_000
+
+    def __init__(self, vectorized: bool = True, compact_items: bool = False, cache=None):
+        """
+        Args:
+            vectorized: Usar caminho colunar (normalização vetorizada e
+                construção em lote). False mantém o caminho linha a linha.
+            compact_items: Guardar itens em CompactItemBatch (valores em
+                inteiros escalados, visões com a API de NFeItem). Requer
+                o caminho colunar.
+            cache: NormalizedUploadCache opcional. parse_csv (e
+                parse_dataframe com cache_key) gravam o DataFrame
+                normalizado e, para o mesmo conteúdo, leem o Parquet
+                em vez de reler e normalizar o CSV.
+        """
         self.parse_errors: List[str] = []
+        self.vectorized = vectorized
+        self.compact_items = compact_items
+        self.cache = cache
 
-    def parse_csv(self, csv_path: str) -> List[NFeEntity]:
+    @timed("parser.parse_csv")
+    def parse_csv(self, csv_path: str, sort: bool = True) -> List[NFeEntity]:
         """
         Parsear arquivo CSV e retornar lista de NF-es
 
         Args:
             csv_path: Caminho para arquivo CSV
+            sort: Ordenar por chave_acesso; False mantém a ordem de aparição
+                no arquivo (a mesma de iter_nfes)
 
         Returns:
             Lista de NFeEntity parseadas
@@ -113,56 +194,146 @@ class NFeCSVParser:
         """
         self.parse_errors = []
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.file_key(csv_path)
+            cached = self.cache.load(cache_key)
+            if cached is not None:
+                return self.parse_arrow(cached, sort=sort)
+
         try:
             # Ler CSV completo forçando tipos importantes como string
-            dtype_spec = {
-                'chave_acesso': str,
-                'item_pis_cst': str,
-                'item_cofins_cst': str,
-                'pis_cst': str,
-                'cofins_cst': str,
-                'item_ncm': str,
-                'ncm': str,
-                'item_cfop': str,
-                'cfop': str
-            }
-            df = pd.read_csv(csv_path, dtype=dtype_spec, encoding='utf-8', keep_default_na=False, na_values=[''])
+            df = pd.read_csv(csv_path, dtype=self.CSV_DTYPE_SPEC, encoding='utf-8', keep_default_na=False, na_values=[''])
         except UnicodeDecodeError:
             # Tentar encoding alternativo
             try:
-                dtype_spec = {
-                    'chave_acesso': str,
-                    'item_pis_cst': str,
-                    'item_cofins_cst': str,
-                    'pis_cst': str,
-                    'cofins_cst': str,
-                    'item_ncm': str,
-                    'ncm': str,
-                    'item_cfop': str,
-                    'cfop': str
-                }
-                df = pd.read_csv(csv_path, dtype=dtype_spec, encoding='latin-1', keep_default_na=False, na_values=[''])
+                df = pd.read_csv(csv_path, dtype=self.CSV_DTYPE_SPEC, encoding='latin-1', keep_default_na=False, na_values=[''])
             except Exception as e:
                 raise CSVParserException(f"Erro ao ler CSV: {e}")
         except Exception as e:
             raise CSVParserException(f"Erro ao ler CSV: {e}")
 
+        return self._parse_frame(df, cache_key=cache_key, sort=sort)
+
+    @timed("parser.parse_dataframe")
+    def parse_dataframe(self, df: pd.DataFrame, cache_key: Optional[str] = None,
+                        sort: bool = True) -> List[NFeEntity]:
+        """
+        Parsear DataFrame já carregado (ex.: saída de ColumnMapper.apply_mapping)
+
+        Equivale a gravar o DataFrame em CSV e chamar parse_csv, sem a
+        serialização: os valores são convertidos apenas onde o CSV mudaria
+        o tipo (códigos como texto, vazios como ausentes, textos numéricos
+        com o tipo que read_csv inferiria) e seguem pela mesma normalização
+        de parse_csv: '7.60' em uma coluna numérica vira Decimal('7.6'),
+        como no CSV. O DataFrame recebido não é alterado.
+
+        Args:
+            df: DataFrame com colunas no layout padrão
+            cache_key: Chave do conteúdo no cache (ex.: bytes_key do upload
+                + mapeamento). Ignorada sem cache configurado.
+            sort: Ordenar por chave_acesso; False mantém a ordem das linhas
+
+        Returns:
+            Lista de NFeEntity parseadas (ordenadas por chave_acesso)
+
+        Raises:
+            CSVParserException: Se houver erro crítico no parsing
+        """
+        self.parse_errors = []
+        if self.cache is None:
+            cache_key = None
+        if cache_key is not None:
+            cached = self.cache.load(cache_key)
+            if cached is not None:
+                return self.parse_arrow(cached, sort=sort)
+        return self._parse_frame(self.as_read_csv(df, self.CSV_DTYPE_SPEC), cache_key=cache_key, sort=sort)
+
+    def parse_parquet(self, parquet_path: str, missing: Iterable[str] = ()) -> List[NFeEntity]:
+        """
+        Parsear arquivo Parquet (exportação do ERP ou entrada do cache)
+
+        Args:
+            parquet_path: Caminho do arquivo Parquet
+            missing: Colunas ausentes, preenchidas como em
+                ColumnMapper.fill_missing_columns
+
+        Returns:
+            Lista de NFeEntity parseadas (ordenadas por chave_acesso)
+
+        Raises:
+            CSVParserException: Se o arquivo não puder ser lido
+        """
+        try:
+            require_pyarrow()
+            import pyarrow.parquet as pq
+            table = pq.read_table(parquet_path)
+        except Exception as e:
+            raise CSVParserException(f"Erro ao ler Parquet: {e}")
+        return self.parse_arrow(table, missing=missing)
+
+    @timed("parser.parse_arrow")
+    def parse_arrow(self, table, missing: Iterable[str] = (), sort: bool = True) -> List[NFeEntity]:
+        """
+        Parsear tabela Arrow com colunas tipadas
+
+        Colunas decimais em decimal128 viram Decimal diretamente (sem
+        normalização de strings; nulo = zero); códigos numéricos são lidos
+        como texto e normalizados como no CSV. Tabelas gravadas pelo cache
+        de uploads já estão normalizadas e vão direto para a montagem.
+
+        Args:
+            table: pyarrow.Table no layout padrão (ou nomes de COLUMN_ALIASES)
+            missing: Colunas ausentes, preenchidas como em
+                ColumnMapper.fill_missing_columns
+            sort: Ordenar por chave_acesso; False mantém a ordem das linhas
+
+        Returns:
+            Lista de NFeEntity parseadas
+
+        Raises:
+            CSVParserException: Se houver erro crítico no parsing
+        """
+        self.parse_errors = []
+        df, typed = arrow_to_frame(table, self.CSV_DTYPE_SPEC, self.DECIMAL_COLUMNS, self.COLUMN_ALIASES)
+
+        if is_normalized(table):
+            self._validate_columns(df)
+            return self._parse_normalized(df, sort=sort)
+
+        if missing:
+            from .column_mapper import ColumnMapper
+            df = ColumnMapper.fill_missing_columns(df, list(missing))
+        typed_names = [name for name in df.columns if self.COLUMN_ALIASES.get(name, name) in typed]
+        df = self.as_read_csv(df, self.CSV_DTYPE_SPEC, keep=typed_names)
+        return self._parse_frame(df, typed=typed, sort=sort)
+
+    def _parse_frame(self, df: pd.DataFrame, typed: Iterable[str] = (),
+                     cache_key: Optional[str] = None, sort: bool = True) -> List[NFeEntity]:
+        """
+        Normalizar, validar colunas e montar NF-es (comum a CSV, DataFrame e Arrow)
+
+        Args:
+            df: DataFrame como lido do CSV
+            typed: Colunas já no tipo final (não normalizadas)
+            cache_key: Chave para gravar o DataFrame normalizado no cache
+            sort: Ordenar NF-es por chave_acesso
+        """
         # Normalizar dados PRIMEIRO (inclui mapeamento de colunas)
-        df = self._normalize_dataframe(df)
+        df = self._normalize_dataframe(df, typed=typed)
 
         # DEPOIS validar colunas obrigatórias
         self._validate_columns(df)
 
+        if cache_key is not None:
+            self.cache.store(cache_key, df, self.DECIMAL_COLUMNS)
+
+        return self._parse_normalized(df, sort=sort)
+
+    def _parse_normalized(self, df: pd.DataFrame, sort: bool = True) -> List[NFeEntity]:
+        """Montar NF-es do DataFrame normalizado (erro se nenhuma for parseada)"""
         # Agrupar por NF-e (chave_acesso)
-        nfes = []
-        for chave, group in df.groupby('chave_acesso'):
-            try:
-                nfe = self._parse_nfe_group(group)
-                nfes.append(nfe)
-            except Exception as e:
-                error_msg = f"Erro ao parsear NF-e {chave}: {e}"
-                self.parse_errors.append(error_msg)
-                print(f"⚠️ {error_msg}")
+        nfes = self._build_nfes(df, sort=sort)
 
         if not nfes and self.parse_errors:
             raise CSVParserException(
@@ -171,6 +342,245 @@ class NFeCSVParser:
 
         return nfes
 
+    def iter_nfes(self, csv_path: str, chunksize: Optional[int] = None) -> Iterator[NFeEntity]:
+        """
+        Parsear CSV em blocos, entregando cada NF-e assim que ela é concluída
+
+        A memória fica limitada ao tamanho do bloco (mais as linhas da NF-e
+        em aberto), permitindo processar arquivos de vários GB.
+
+        Requisito: as linhas de cada NF-e devem estar contíguas no arquivo
+        (formato padrão das exportações). A última NF-e de cada bloco é
+        mantida em aberto e concatenada ao bloco seguinte. Uma chave que
+        reaparece depois de concluída gera CSVParserException.
+
+        O tipo de cada coluna é o que parse_csv inferiria para o arquivo
+        inteiro: uma primeira leitura em blocos (sem montar NF-es) combina
+        os tipos de todos os blocos, e a leitura principal usa esses tipos.
+        Assim o resultado não depende do tamanho do bloco e as NF-es são
+        idênticas às de parse_csv(csv_path, sort=False), inclusive na
+        representação dos decimais ('9.00' em coluna numérica vira
+        Decimal('9.0')).
+
+        Args:
+            csv_path: Caminho para arquivo CSV
+            chunksize: Linhas por bloco (padrão: DEFAULT_CHUNKSIZE)
+
+        Yields:
+            NFeEntity na ordem de aparição no arquivo
+
+        Raises:
+            CSVParserException: Se houver erro crítico no parsing
+        """
+        self.parse_errors = []
+        chunksize = chunksize or self.DEFAULT_CHUNKSIZE
+
+        try:
+            encoding = self._detect_encoding(csv_path)
+            dtype = self._csv_column_dtypes(csv_path, encoding, chunksize)
+            reader = pd.read_csv(
+                csv_path, dtype=dtype, encoding=encoding,
+                keep_default_na=False, na_values=[''], chunksize=chunksize
+            )
+        except Exception as e:
+            raise CSVParserException(f"Erro ao ler CSV: {e}")
+
+        pending = None          # Linhas da NF-e em aberto (última do bloco anterior)
+        closed_keys = set()     # Chaves já entregues (detecção de arquivo não agrupado)
+        yielded = 0
+        columns_checked = False
+
+        with reader:
+            for chunk in reader:
+                df = self._normalize_dataframe(chunk)
+
+                if not columns_checked:
+                    self._validate_columns(df)
+                    columns_checked = True
+
+                if pending is not None:
+                    df = pd.concat([pending, df], ignore_index=True)
+
+                keys = df['chave_acesso']
+                reopened = closed_keys.intersection(keys.unique())
+                if reopened:
+                    raise CSVParserException(
+                        f"CSV não agrupado por chave_acesso: NF-e {sorted(reopened)[0]} "
+                        f"reaparece após ser concluída. Ordene o arquivo ou use parse_csv."
+                    )
+
+                # Última NF-e do bloco pode continuar no próximo
+                last_key = keys.iloc[-1]
+                is_open = (keys == last_key).to_numpy()
+                pending = df[is_open]
+                complete = df[~is_open]
+
+                if len(complete):
+                    for nfe in self._build_nfes(complete, sort=False):
+                        yielded += 1
+                        yield nfe
+                    closed_keys.update(complete['chave_acesso'].unique())
+
+        if pending is not None and len(pending):
+            for nfe in self._build_nfes(pending, sort=False):
+                yielded += 1
+                yield nfe
+
+        if not yielded and self.parse_errors:
+            raise CSVParserException(
+                f"Nenhuma NF-e foi parseada com sucesso. Erros: {'; '.join(self.parse_errors)}"
+            )
+
+    @timed("parser.build_nfes")
+    def _build_nfes(self, df: pd.DataFrame, sort: bool = True) -> List[NFeEntity]:
+        """
+        Montar NF-es a partir do DataFrame normalizado
+
+        Args:
+            df: DataFrame normalizado
+            sort: Ordenar por chave_acesso (como groupby) ou manter ordem de aparição
+
+        Returns:
+            Lista de NFeEntity (erros por NF-e ficam em parse_errors)
+        """
+        if self.vectorized:
+            return NFeBulkBuilder(self).build_nfes(
+                df, on_error=self._record_group_error, sort=sort, compact=self.compact_items
+            )
+
+        nfes = []
+        for chave, group in df.groupby('chave_acesso', sort=sort):
+            try:
+                nfe = self._parse_nfe_group(group)
+                nfes.append(nfe)
+            except Exception as e:
+                self._record_group_error(chave, e)
+        return nfes
+
+    def _csv_column_dtypes(self, csv_path: str, encoding: str, chunksize: int) -> Dict[str, object]:
+        """
+        Tipos que pd.read_csv inferiria para cada coluna do arquivo inteiro
+
+        Lê o arquivo em blocos com a mesma configuração de parse_csv e
+        combina os tipos dos blocos: inteiros e floats viram float (como
+        uma coluna inteira com vazios); qualquer outra divergência vira
+        texto.
+
+        Returns:
+            dtype por coluna para pd.read_csv (str para colunas de texto)
+        """
+        dtypes: Dict[str, object] = {}
+        with pd.read_csv(
+            csv_path, dtype=self.CSV_DTYPE_SPEC, encoding=encoding,
+            keep_default_na=False, na_values=[''], chunksize=chunksize
+        ) as reader:
+            for chunk in reader:
+                for name, dtype in chunk.dtypes.items():
+                    seen = dtypes.setdefault(name, dtype)
+                    if seen == dtype:
+                        continue
+                    numeric = all(d.kind in 'iuf' for d in (seen, dtype))
+                    dtypes[name] = np.result_type(seen, dtype) if numeric else np.dtype(object)
+        return {name: str if dtype == object else dtype for name, dtype in dtypes.items()}
+
+    @staticmethod
+    def _detect_encoding(csv_path: str, block_size: int = 1 << 20) -> str:
+        """
+        Detectar encoding (utf-8 ou latin-1) lendo o arquivo em blocos
+
+        Equivale ao fallback de parse_csv, sem carregar o arquivo em memória.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            with open(csv_path, 'rb') as f:
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        decoder.decode(b'', final=True)
+                        return 'utf-8'
+                    decoder.decode(block)
+        except UnicodeDecodeError:
+            return 'latin-1'
+
+    @staticmethod
+    def as_read_csv(df: pd.DataFrame, text_columns: Iterable[str], keep: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        Valores que pd.read_csv devolveria para o DataFrame gravado com to_csv
+
+        - Colunas de text_columns (e datas) viram texto, como com dtype=str
+        - Strings vazias e None viram NaN (na_values=[''])
+        - Colunas sem nenhum valor viram float NaN (fora de text_columns)
+        - Demais colunas com todos os valores numéricos viram int64/float64,
+          como na inferência de tipos de read_csv ('7.60' -> 7.6)
+
+        Apenas as colunas alteradas são copiadas; as demais são
+        compartilhadas com o DataFrame original.
+
+        Args:
+            df: DataFrame em memória
+            text_columns: Colunas lidas como texto
+            keep: Colunas já no tipo final (ex.: decimal128 do Arrow), mantidas
+
+        Returns:
+            DataFrame equivalente ao lido do CSV
+        """
+        text_columns = set(text_columns)
+        keep = set(keep)
+        result = df.copy(deep=False)
+        for position, name in enumerate(df.columns):
+            if name in keep:
+                continue
+            series = df.iloc[:, position]
+            converted = None
+            if name in text_columns or pd.api.types.is_datetime64_any_dtype(series):
+                if series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+                    converted = NFeCSVParser._csv_text(series)
+            elif series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+                # Decimal, números e textos misturados: valor gravado por to_csv
+                converted = NFeCSVParser._csv_text(series)
+            if series.dtype == object or converted is not None:
+                source = series if converted is None else converted
+                missing = (source.isna() | (source == '')).to_numpy()
+                if missing.all() and name not in text_columns:
+                    # Coluna inteiramente vazia: read_csv devolve float NaN
+                    converted = pd.Series(np.nan, index=df.index, dtype='float64')
+                    source = None
+                elif missing.any():
+                    source = converted = source.mask(missing)
+                if source is not None and name not in text_columns:
+                    numeric = NFeCSVParser._csv_numeric(source)
+                    if numeric is not None:
+                        converted = numeric
+            if converted is not None:
+                result.isetitem(position, converted)
+        return result
+
+    @staticmethod
+    def _csv_text(series: pd.Series) -> pd.Series:
+        """Texto gravado por to_csv (ausentes continuam NaN)"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.dropna()
+            date_only = (values == values.dt.normalize()).all()
+            text = series.dt.strftime('%Y-%m-%d') if date_only else series.astype(str)
+        else:
+            text = series.astype(str)
+        return text.astype(object).where(series.notna(), np.nan)
+
+    @staticmethod
+    def _csv_numeric(series: pd.Series) -> Optional[pd.Series]:
+        """Coluna de texto com o tipo numérico inferido por read_csv (None se houver texto)"""
+        try:
+            numeric = pd.to_numeric(series)
+        except (ValueError, TypeError):
+            return None
+        return numeric if numeric.dtype.kind in 'if' else None
+
+    def _record_group_error(self, chave, error: Exception):
+        """Registrar erro de parsing de uma NF-e (grupo de linhas)"""
+        error_msg = f"Erro ao parsear NF-e {chave}: {error}"
+        self.parse_errors.append(error_msg)
+        print(f"⚠️ {error_msg}")
+
     def _validate_columns(self, df: pd.DataFrame):
         """
         Validar colunas - permite parsing parcial
@@ -200,44 +610,25 @@ class NFeCSVParser:
             import logging
             logging.warning("⚠️ Nenhuma coluna fiscal encontrada - validações limitadas")
 
-    def _normalize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Normalizar dados do DataFrame"""
+    @timed("parser.normalize")
+    def _normalize_dataframe(self, df: pd.DataFrame, typed: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        Normalizar dados do DataFrame
+
+        Mudanças no resultado (aqui ou em ColumnarNormalizer) exigem
+        incrementar NORMALIZED_FORMAT_VERSION (arrow_io), que invalida o
+        cache de uploads normalizados.
+
+        Args:
+            df: DataFrame como lido do CSV
+            typed: Colunas (nomes do layout padrão) já no tipo final, ex.:
+                decimal128 de Parquet; mantidas como estão
+        """
         df = df.copy()
+        typed = set(typed)
 
         # Mapear nomes de colunas alternativos
-        column_mapping = {
-            'numero_nf': 'numero_nfe',
-            'emitente_cnpj': 'cnpj_emitente',
-            'emitente_razao_social': 'razao_social_emitente',
-            'emitente_uf': 'uf_emitente',
-            'destinatario_cnpj': 'cnpj_destinatario',
-            'destinatario_razao_social': 'razao_social_destinatario',
-            'destinatario_uf': 'uf_destinatario',
-            'item_numero': 'numero_item',
-            'item_codigo': 'codigo_produto',
-            'item_descricao': 'descricao',
-            'item_ncm': 'ncm',
-            'item_cfop': 'cfop',
-            'item_unidade': 'unidade',
-            'item_quantidade': 'quantidade',
-            'item_valor_unitario': 'valor_unitario',
-            'item_valor_total': 'valor_total',
-            'item_icms_base': 'icms_base',
-            'item_icms_aliquota': 'icms_aliquota',
-            'item_icms_valor': 'icms_valor',
-            'item_ipi_base': 'ipi_base',
-            'item_ipi_aliquota': 'ipi_aliquota',
-            'item_ipi_valor': 'ipi_valor',
-            'item_pis_base': 'pis_base',
-            'item_pis_aliquota': 'pis_aliquota',
-            'item_pis_valor': 'pis_valor',
-            'item_pis_cst': 'pis_cst',
-            'item_cofins_base': 'cofins_base',
-            'item_cofins_aliquota': 'cofins_aliquota',
-            'item_cofins_valor': 'cofins_valor',
-            'item_cofins_cst': 'cofins_cst',
-        }
-        df.rename(columns=column_mapping, inplace=True)
+        df.rename(columns=self.COLUMN_ALIASES, inplace=True)
 
         # Remover colunas duplicadas (manter a primeira)
         df = df.loc[:, ~df.columns.duplicated()]
@@ -248,46 +639,58 @@ class NFeCSVParser:
 
         # Remover espaços em branco
         for col in df.columns:
+            if col in typed:
+                continue
             try:
                 if pd.api.types.is_string_dtype(df[col]) or df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.strip()
+                    if self.vectorized:
+                        df[col] = ColumnarNormalizer.strip(df[col])
+                    else:
+                        df[col] = df[col].astype(str).str.strip()
             except:
                 pass
 
         # Normalizar NCM (8 dígitos)
-        if 'ncm' in df.columns:
-            df['ncm'] = df['ncm'].astype(str).apply(self._normalize_ncm)
+        self._normalize_column(df, 'ncm', self._normalize_ncm, ColumnarNormalizer.normalize_ncm)
 
         # Normalizar CFOP (4 dígitos)
-        if 'cfop' in df.columns:
-            df['cfop'] = df['cfop'].astype(str).apply(self._normalize_cfop)
+        self._normalize_column(df, 'cfop', self._normalize_cfop, ColumnarNormalizer.normalize_cfop)
 
         # Normalizar CNPJ (14 dígitos, apenas números)
-        if 'cnpj_emitente' in df.columns:
-            df['cnpj_emitente'] = df['cnpj_emitente'].astype(str).apply(self._normalize_cnpj)
-        if 'cnpj_destinatario' in df.columns:
-            df['cnpj_destinatario'] = df['cnpj_destinatario'].astype(str).apply(self._normalize_cnpj)
+        for col in ('cnpj_emitente', 'cnpj_destinatario'):
+            self._normalize_column(df, col, self._normalize_cnpj, ColumnarNormalizer.normalize_cnpj)
 
         # Normalizar CST PIS/COFINS (2 dígitos)
-        if 'pis_cst' in df.columns:
-            df['pis_cst'] = df['pis_cst'].astype(str).apply(self._normalize_cst)
-        if 'cofins_cst' in df.columns:
-            df['cofins_cst'] = df['cofins_cst'].astype(str).apply(self._normalize_cst)
+        for col in ('pis_cst', 'cofins_cst'):
+            self._normalize_column(df, col, self._normalize_cst, ColumnarNormalizer.normalize_cst)
 
         # Normalizar valores decimais
-        decimal_columns = [
-            'quantidade', 'valor_unitario', 'valor_total',
-            'pis_aliquota', 'pis_valor', 'cofins_aliquota', 'cofins_valor',
-            'icms_aliquota', 'icms_valor', 'ipi_aliquota', 'ipi_valor',
-            'valor_desconto', 'valor_frete'
-        ]
-
-        for col in decimal_columns:
-            if col in df.columns:
-                df[col] = df[col].astype(str).apply(self._normalize_decimal)
+        for col in self.DECIMAL_COLUMNS:
+            if col in typed:
+                continue
+            self._normalize_column(df, col, self._normalize_decimal, ColumnarNormalizer.normalize_decimal)
 
         return df
 
+    def _normalize_column(self, df: pd.DataFrame, col: str, scalar_func, vector_func):
+        """
+        Normalizar coluna in-place (vetorizado ou linha a linha)
+
+        Args:
+            df: DataFrame a normalizar
+            col: Nome da coluna (ignorada se ausente)
+            scalar_func: Normalizador escalar (caminho linha a linha)
+            vector_func: Normalizador colunar equivalente
+        """
+        if col not in df.columns:
+            return
+
+        values = df[col].astype(str)
+        if self.vectorized:
+            df[col] = vector_func(values)
+        else:
+            df[col] = values.apply(scalar_func)
+
     def _normalize_ncm(self, ncm: str) -> str:
         """Normalizar NCM para 8 dígitos"""
         if pd.isna(ncm) or not ncm:
@@ -535,26 +938,37 @@ class NFeCSVParser:
 
         return totais
 
-    def _parse_date(self, date_str: str) -> datetime:
-        """Parsear data em diferentes formatos"""
-        if pd.isna(date_str) or not date_str:
-            return datetime.now()
+    # Formatos comuns de data
+    DATE_FORMATS = [
+        '%Y-%m-%d',
+        '%d/%m/%Y',
+        '%d-%m-%Y',
+        '%Y/%m/%d',
+        '%Y%m%d',
+    ]
 
-        # Formatos comuns
-        date_formats = [
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%d-%m-%Y',
-            '%Y/%m/%d',
-            '%Y%m%d',
-        ]
+    def _try_parse_date(self, date_str: str) -> Optional[datetime]:
+        """Tentar parsear data nos formatos conhecidos (None se vazia ou inválida)"""
+        if pd.isna(date_str) or not date_str:
+            return None
 
-        for fmt in date_formats:
+        for fmt in self.DATE_FORMATS:
             try:
                 return datetime.strptime(str(date_str), fmt)
             except ValueError:
                 continue
 
+        return None
+
+    def _parse_date(self, date_str: str) -> datetime:
+        """Parsear data em diferentes formatos"""
+        if pd.isna(date_str) or not date_str:
+            return datetime.now()
+
+        parsed = self._try_parse_date(date_str)
+        if parsed is not None:
+            return parsed
+
         # Se nenhum formato funcionou, retornar data atual
         self.parse_errors.append(f"Data inválida: {date_str}, usando data atual")
         return datetime.now()
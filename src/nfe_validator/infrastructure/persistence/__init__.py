@@ -0,0 +1 @@
+"""Persistência de resultados de validação"""
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+NCM Classification Cache - Classificações de NCM do agente IA em disco
+
+Cada consulta ao agente NCM (ReAct + LLM) custa várias chamadas ao
+provedor. O resultado é guardado em SQLite local, com chave
+(hash da descrição normalizada, NCM atual, modelo): a mesma descrição,
+com o mesmo NCM na nota, não é reclassificada pelo mesmo modelo em outro
+lote nem após reiniciar o Streamlit.
+
+Resultados com erro não são gravados (a próxima consulta tenta de novo).
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Union
+
+# Import keyword_index - absolute import
+import sys
+if True:  # Always add to path
+    project_root = Path(__file__).parent.parent.parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from repositories.keyword_index import normalize_text
+
+
+class ClassificationKey(NamedTuple):
+    """Chave de uma classificação no cache"""
+    description_hash: str
+    current_ncm: str
+    model: str
+
+
+def normalize_description(description: Any) -> str:
+    """
+    Descrição normalizada para deduplicação (minúsculas, sem acentos,
+    espaços colapsados)
+
+    Args:
+        description: Descrição do produto
+
+    Returns:
+        Descrição normalizada ('  Açúcar   Cristal ' -> 'acucar cristal')
+    """
+    return ' '.join(normalize_text(description).split())
+
+
+def classification_key(description: Any, current_ncm: Optional[str], model: str) -> ClassificationKey:
+    """
+    Chave de cache de uma classificação
+
+    Args:
+        description: Descrição do produto
+        current_ncm: NCM informado na NF-e (None/'' se ausente)
+        model: Modelo do LLM
+
+    Returns:
+        ClassificationKey
+    """
+    digest = hashlib.sha256(normalize_description(description).encode('utf-8')).hexdigest()
+    return ClassificationKey(digest, current_ncm or '', model)
+
+
+class NCMClassificationCache:
+    """
+    Cache persistente de classificações de NCM (SQLite)
+
+    Uso:
+        cache = NCMClassificationCache()
+        key = classification_key(descricao, ncm, "gemini-2.5-pro")
+        result = cache.get(key)
+        if result is None:
+            result = agent.classify_ncm(descricao, ncm)
+            cache.put(key, result)
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ncm_classifications (
+            description_hash TEXT NOT NULL,
+            current_ncm TEXT NOT NULL,
+            model TEXT NOT NULL,
+            result_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (description_hash, current_ncm, model)
+        )
+    """
+
+    def __init__(self, db_path: Union[str, Path] = None):
+        """
+        Inicializar cache
+
+        Args:
+            db_path: Arquivo SQLite (default: cache/ncm_classifications.db
+                na raiz do projeto)
+        """
+        if db_path is None:
+            project_root = Path(__file__).parent.parent.parent.parent.parent
+            db_path = project_root / "cache" / "ncm_classifications.db"
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(self._SCHEMA)
+
+    def get(self, key: ClassificationKey) -> Optional[Dict[str, Any]]:
+        """
+        Classificação em cache
+
+        Args:
+            key: Chave (classification_key)
+
+        Returns:
+            Resultado do agente ou None se ausente
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result_json FROM ncm_classifications "
+                "WHERE description_hash = ? AND current_ncm = ? AND model = ?",
+                tuple(key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: Iterable[ClassificationKey]) -> Dict[ClassificationKey, Dict[str, Any]]:
+        """
+        Classificações em cache de várias chaves
+
+        Args:
+            keys: Chaves
+
+        Returns:
+            Dict chave -> resultado (somente as presentes)
+        """
+        found = {}
+        for key in dict.fromkeys(keys):
+            result = self.get(key)
+            if result is not None:
+                found[key] = result
+        return found
+
+    def put(self, key: ClassificationKey, result: Dict[str, Any]) -> bool:
+        """
+        Gravar classificação (resultados com erro são ignorados)
+
+        Args:
+            key: Chave (classification_key)
+            result: Resultado de classify_ncm
+
+        Returns:
+            True se gravado
+        """
+        if result.get('error'):
+            return False
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ncm_classifications "
+                "(description_hash, current_ncm, model, result_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(result, ensure_ascii=False, default=str),
+                 datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+        return True
+
+    def clear(self, model: Optional[str] = None):
+        """Remover classificações (todas ou só as do modelo)"""
+        with self._lock, self.conn:
+            if model is None:
+                self.conn.execute("DELETE FROM ncm_classifications")
+            else:
+                self.conn.execute("DELETE FROM ncm_classifications WHERE model = ?", (model,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM ncm_classifications").fetchone()[0]
+
+    def close(self):
+        """Fechar conexão"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        """Context manager enter"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Column Mapping Cache - Mapeamentos de colunas por assinatura do cabeçalho
+
+Os ERPs parceiros enviam sempre os mesmos poucos layouts de CSV. O
+resultado do ColumnMapper (mapeamento, colunas ausentes, confiança e
+ambiguidades) é guardado em SQLite local, com chave na assinatura do
+cabeçalho (hash da lista ordenada de colunas, ver
+ColumnMapper.header_signature): um layout já visto é mapeado sem avaliar
+nenhum padrão, inclusive após reiniciar o Streamlit ou entre execuções
+da linha de comando.
+
+A assinatura inclui a versão dos padrões (COLUMN_PATTERNS): alterar os
+padrões invalida os mapeamentos gravados.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+class ColumnMappingCache:
+    """
+    Cache persistente de mapeamentos de colunas (SQLite)
+
+    Uso:
+        cache = ColumnMappingCache()
+        result = ColumnMapper.map_columns_detailed(df.columns, cache=cache)
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS column_mappings (
+            signature TEXT PRIMARY KEY,
+            result_json TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """
+
+    def __init__(self, db_path: Union[str, Path] = None):
+        """
+        Inicializar cache
+
+        Args:
+            db_path: Arquivo SQLite (default: cache/column_mappings.db na
+                raiz do projeto)
+        """
+        if db_path is None:
+            project_root = Path(__file__).parent.parent.parent.parent.parent
+            db_path = project_root / "cache" / "column_mappings.db"
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(self._SCHEMA)
+
+    def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        """
+        Mapeamento em cache
+
+        Args:
+            signature: Assinatura do cabeçalho
+
+        Returns:
+            Dict do resultado (ColumnMappingResult.to_dict) ou None se ausente
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result_json FROM column_mappings WHERE signature = ?", (signature,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, signature: str, result: Dict[str, Any]):
+        """
+        Gravar mapeamento
+
+        Args:
+            signature: Assinatura do cabeçalho
+            result: Dict do resultado (ColumnMappingResult.to_dict)
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO column_mappings (signature, result_json, created_at) "
+                "VALUES (?, ?, ?)",
+                (signature, json.dumps(result, ensure_ascii=False),
+                 datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+
+    def clear(self):
+        """Remover todos os mapeamentos"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM column_mappings")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM column_mappings").fetchone()[0]
+
+    def close(self):
+        """Fechar conexão"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        """Context manager enter"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
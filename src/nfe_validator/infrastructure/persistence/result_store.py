@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Validation Result Store - Persistência dos resultados de validação
+
+Grava o resultado de cada NF-e validada na tabela validation_log
+(schema.sql) e permite consultá-los depois por chave, período, status e
+código de erro, sem manter as NFeEntity em memória nem revalidar o lote
+após reiniciar o Streamlit.
+
+Os resultados ficam em um database próprio (cache/validation_results.db,
+fora do controle de versão), criado a partir do DDL de validation_log em
+schema.sql: o histórico de execuções não se mistura às regras do rules.db
+versionado.
+
+Gravação em lote: linhas acumuladas em buffer e inseridas com executemany
+em transações grandes, com o database em modo WAL (leitores não bloqueiam
+a escrita).
+"""
+
+import json
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ... import __version__
+from ...domain.entities.nfe_entity import NFeEntity, ValidationError, Severity
+
+
+DateLike = Union[str, date, datetime]
+
+
+class ValidationResultStore:
+    """
+    Armazenamento persistente de resultados de validação (validation_log)
+
+    Uso:
+        with ValidationResultStore() as store:
+            store.save(validated_nfes)
+            invalid = store.query(status='INVALID', error_code='PIS_002')
+    """
+
+    # Linhas por transação
+    DEFAULT_BATCH_SIZE = 5_000
+
+    VALIDATOR_VERSION = __version__
+
+    _INSERT = """
+        INSERT INTO validation_log (
+            nfe_chave, validation_timestamp, validator_version, status,
+            total_errors, critical_count, error_count, warning_count,
+            financial_impact, errors_json, fingerprint
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    # Limite de parâmetros por consulta IN (SQLITE_MAX_VARIABLE_NUMBER)
+    _IN_CHUNK = 900
+
+    def __init__(self, db_path: str = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 validator_version: str = VALIDATOR_VERSION):
+        """
+        Inicializar store
+
+        Args:
+            db_path: Caminho do database (default: cache/validation_results.db
+                na raiz do projeto; criado com validation_log de schema.sql)
+            batch_size: Linhas acumuladas antes de cada transação
+            validator_version: Versão gravada em validator_version
+        """
+        if db_path is None:
+            project_root = Path(__file__).parent.parent.parent.parent.parent
+            db_path = project_root / "cache" / "validation_results.db"
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db_path = str(db_path)
+        self.batch_size = batch_size
+        self.validator_version = validator_version
+        self._pending: List[Tuple] = []
+        self.conn = None
+
+        self._connect()
+        self._ensure_schema()
+
+    def _connect(self):
+        """Conectar ao database em modo WAL"""
+        try:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            raise ConnectionError(f"Erro ao conectar ao database: {e}")
+
+    def _ensure_schema(self):
+        """Criar validation_log e índices a partir de schema.sql, se ausentes"""
+        schema_path = Path(__file__).parent.parent.parent.parent / "database" / "schema.sql"
+        statements = schema_path.read_text(encoding='utf-8').split(';')
+        with self.conn:
+            for statement in statements:
+                if 'validation_log' in statement:
+                    self.conn.execute(statement)
+
+            # Databases criados antes da coluna fingerprint
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(validation_log)")}
+            if 'fingerprint' not in columns:
+                self.conn.execute("ALTER TABLE validation_log ADD COLUMN fingerprint VARCHAR(64)")
+
+    def close(self):
+        """Gravar pendências e fechar conexão"""
+        if self.conn:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        """Context manager enter"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+
+    # =====================================================
+    # Gravação
+    # =====================================================
+
+    def add(self, nfe: NFeEntity, fingerprint: Optional[str] = None):
+        """
+        Registrar resultado de uma NF-e validada (gravado em lote)
+
+        Args:
+            nfe: NFeEntity já validada
+            fingerprint: Impressão digital do conteúdo (revalidação incremental)
+        """
+        self._pending.append(self._to_row(nfe, fingerprint))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def save(self, nfes: Iterable[NFeEntity]) -> int:
+        """
+        Gravar resultados de várias NF-es
+
+        Aceita iteradores (ex.: ParallelValidationEngine.iter_validate): as
+        linhas são gravadas a cada batch_size NF-es.
+
+        Args:
+            nfes: NF-es validadas
+
+        Returns:
+            Quantidade de NF-es gravadas
+        """
+        count = 0
+        for nfe in nfes:
+            self.add(nfe)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        """Inserir linhas pendentes em uma única transação"""
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(self._INSERT, self._pending)
+        self._pending = []
+
+    def _to_row(self, nfe: NFeEntity, fingerprint: Optional[str] = None) -> Tuple:
+        counts = {severity: 0 for severity in Severity}
+        for error in nfe.validation_errors:
+            counts[error.severity] += 1
+
+        timestamp = nfe.validation_timestamp or datetime.now()
+        return (
+            nfe.chave_acesso,
+            timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            self.validator_version,
+            nfe.validation_status.value,
+            len(nfe.validation_errors),
+            counts[Severity.CRITICAL],
+            counts[Severity.ERROR],
+            counts[Severity.WARNING],
+            float(nfe.get_total_financial_impact()),
+            json.dumps([self.error_to_dict(e) for e in nfe.validation_errors], ensure_ascii=False),
+            fingerprint
+        )
+
+    @staticmethod
+    def error_to_dict(error: ValidationError) -> Dict[str, Any]:
+        """Serializar ValidationError para errors_json"""
+        return {
+            'code': error.code,
+            'field': error.field,
+            'message': error.message,
+            'severity': error.severity.value,
+            'expected_value': error.expected_value,
+            'actual_value': error.actual_value,
+            'suggestion': error.suggestion,
+            'legal_reference': error.legal_reference,
+            'legal_article': error.legal_article,
+            'legal_reference_code': error.legal_reference_code,
+            'financial_impact': (
+                str(error.financial_impact) if error.financial_impact is not None else None
+            ),
+            'item_numero': error.item_numero,
+            'can_auto_correct': error.can_auto_correct,
+            'corrected_value': error.corrected_value,
+        }
+
+    @staticmethod
+    def error_from_dict(data: Dict[str, Any]) -> ValidationError:
+        """Reconstruir ValidationError a partir de errors_json"""
+        values = dict(data)
+        values['severity'] = Severity(values['severity'])
+        if values.get('financial_impact') is not None:
+            values['financial_impact'] = Decimal(values['financial_impact'])
+        return ValidationError(**values)
+
+    # =====================================================
+    # Consulta
+    # =====================================================
+
+    @staticmethod
+    def _format_date(value: DateLike, end: bool = False) -> str:
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, date):
+            value = value.isoformat()
+        # Data sem hora: fim do período inclui o dia inteiro
+        if end and len(value) == 10:
+            return f"{value} 23:59:59"
+        return value
+
+    def _where(self, chave: Optional[str] = None, start: Optional[DateLike] = None,
+               end: Optional[DateLike] = None, status: Optional[str] = None,
+               error_code: Optional[str] = None) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if chave is not None:
+            clauses.append("nfe_chave = ?")
+            params.append(chave)
+        if start is not None:
+            clauses.append("validation_timestamp >= ?")
+            params.append(self._format_date(start))
+        if end is not None:
+            clauses.append("validation_timestamp <= ?")
+            params.append(self._format_date(end, end=True))
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if error_code is not None:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM json_each(validation_log.errors_json) "
+                "WHERE json_extract(json_each.value, '$.code') = ?)"
+            )
+            params.append(error_code)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, chave: Optional[str] = None, start: Optional[DateLike] = None,
+              end: Optional[DateLike] = None, status: Optional[str] = None,
+              error_code: Optional[str] = None, limit: Optional[int] = None,
+              include_errors: bool = True) -> List[Dict[str, Any]]:
+        """
+        Consultar resultados gravados
+
+        Args:
+            chave: Chave de acesso da NF-e
+            start: Início do período (validation_timestamp)
+            end: Fim do período (data sem hora inclui o dia inteiro)
+            status: VALID, INVALID, ERROR, ...
+            error_code: Apenas NF-es com este código de erro (ex.: PIS_002)
+            limit: Máximo de registros
+            include_errors: Decodificar errors_json em 'errors' (ValidationError)
+
+        Returns:
+            Lista de dicts (um por registro, mais recentes primeiro)
+        """
+        self.flush()
+        where, params = self._where(chave, start, end, status, error_code)
+        columns = "*" if include_errors else (
+            "id, nfe_chave, validation_timestamp, validator_version, status, "
+            "total_errors, critical_count, error_count, warning_count, financial_impact, fingerprint"
+        )
+        sql = f"SELECT {columns} FROM validation_log {where} ORDER BY validation_timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [self._decode(row) for row in self.conn.execute(sql, params)]
+
+    def _decode(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Registro como dict, com errors_json convertido em 'errors'"""
+        record = dict(row)
+        if 'errors_json' in record:
+            record['errors'] = [
+                self.error_from_dict(e) for e in json.loads(record.pop('errors_json') or '[]')
+            ]
+        return record
+
+    def get_latest(self, chave: str) -> Optional[Dict[str, Any]]:
+        """
+        Resultado mais recente de uma NF-e
+
+        Args:
+            chave: Chave de acesso
+
+        Returns:
+            Dict do registro (com 'errors') ou None
+        """
+        records = self.query(chave=chave, limit=1)
+        return records[0] if records else None
+
+    def latest_results(self, chaves: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Último resultado gravado de cada chave (em consultas agrupadas)
+
+        Args:
+            chaves: Chaves de acesso
+
+        Returns:
+            Dict chave -> registro (com 'errors'); chaves sem resultado ficam de fora
+        """
+        self.flush()
+        chaves = list(dict.fromkeys(chaves))
+        latest: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(chaves), self._IN_CHUNK):
+            chunk = chaves[start:start + self._IN_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self.conn.execute(f"""
+                SELECT * FROM validation_log WHERE id IN (
+                    SELECT MAX(id) FROM validation_log
+                    WHERE nfe_chave IN ({placeholders}) GROUP BY nfe_chave
+                )
+            """, chunk)
+            for row in rows:
+                record = self._decode(row)
+                latest[record['nfe_chave']] = record
+        return latest
+
+    def summary(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                status: Optional[str] = None, error_code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Agregados calculados no SQLite (sem carregar os registros)
+
+        Returns:
+            Dict com total_nfes, por status, contagens por severidade,
+            impacto financeiro total e ocorrências por código de erro
+        """
+        self.flush()
+        where, params = self._where(None, start, end, status, error_code)
+
+        row = self.conn.execute(f"""
+            SELECT COUNT(*) AS total_nfes,
+                   COALESCE(SUM(total_errors), 0) AS total_errors,
+                   COALESCE(SUM(critical_count), 0) AS critical_count,
+                   COALESCE(SUM(error_count), 0) AS error_count,
+                   COALESCE(SUM(warning_count), 0) AS warning_count,
+                   COALESCE(SUM(financial_impact), 0) AS financial_impact
+            FROM validation_log {where}
+        """, params).fetchone()
+        result = dict(row)
+
+        result['by_status'] = {
+            r['status']: r['n'] for r in self.conn.execute(
+                f"SELECT status, COUNT(*) AS n FROM validation_log {where} GROUP BY status", params
+            )
+        }
+        result['by_error_code'] = {
+            r['code']: r['n'] for r in self.conn.execute(f"""
+                SELECT json_extract(json_each.value, '$.code') AS code, COUNT(*) AS n
+                FROM validation_log, json_each(validation_log.errors_json)
+                {where}
+                GROUP BY code ORDER BY n DESC, code
+            """, params)
+        }
+        return result
+
+    def clear(self):
+        """Remover todos os registros de validation_log"""
+        self._pending = []
+        with self.conn:
+            self.conn.execute("DELETE FROM validation_log")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Normalized Upload Cache - DataFrames normalizados em Parquet
+
+Cada upload (CSV) é normalizado uma única vez: o DataFrame resultante é
+gravado em Parquet, identificado pelo SHA-256 do conteúdo do arquivo (mais
+o mapeamento de colunas, quando houver) ou dos valores do DataFrame já
+carregado (frame_key). Reprocessar o mesmo arquivo lê a
+tabela colunar e monta as NF-es direto, sem leitura do CSV nem
+normalização de strings.
+
+Uso:
+    cache = NormalizedUploadCache()
+    parser = NFeCSVParser(cache=cache)
+    nfes = parser.parse_csv("notas.csv")   # 2ª execução: lida do cache
+
+Entradas de outra versão do formato normalizado (NORMALIZED_FORMAT_VERSION)
+ou do validador são ignoradas (e substituídas). O
+número de arquivos é limitado (max_entries), removendo os menos usados.
+Requer pyarrow.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+from ... import __version__
+from ...profiling import count
+from ..parsers.arrow_io import (
+    NORMALIZED_FORMAT_VERSION, NORMALIZED_KEY, normalized_to_arrow, require_pyarrow
+)
+
+
+class NormalizedUploadCache:
+    """Cache em disco (Parquet) de DataFrames normalizados por hash do arquivo"""
+
+    DEFAULT_MAX_ENTRIES = 50
+
+    # Bloco de leitura para o hash
+    _HASH_BLOCK = 1 << 20
+
+    def __init__(self, cache_dir: Union[str, Path] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, version: str = None):
+        """
+        Inicializar cache
+
+        Args:
+            cache_dir: Diretório dos arquivos Parquet (default: cache/uploads
+                na raiz do projeto)
+            max_entries: Máximo de arquivos mantidos (None = sem limite)
+            version: Versão gravada nas entradas (default: versão do
+                formato normalizado + versão do validador); entradas de
+                outra versão são descartadas
+
+        Raises:
+            ImportError: Se pyarrow não estiver instalado
+        """
+        require_pyarrow()
+        if cache_dir is None:
+            project_root = Path(__file__).parent.parent.parent.parent.parent
+            cache_dir = project_root / "cache" / "uploads"
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.version = version or f"normalized-{NORMALIZED_FORMAT_VERSION}/{__version__}"
+
+    # -------------------------------------------------
+    # Chaves
+    # -------------------------------------------------
+
+    @classmethod
+    def file_key(cls, path: Union[str, Path], *extra: str) -> str:
+        """
+        Chave do arquivo: SHA-256 do conteúdo (lido em blocos)
+
+        Args:
+            path: Arquivo de entrada
+            extra: Partes adicionais da chave (ex.: mapeamento em JSON)
+
+        Returns:
+            Hash hexadecimal
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(cls._HASH_BLOCK), b''):
+                digest.update(block)
+        return cls._finish(digest, extra)
+
+    @classmethod
+    def bytes_key(cls, data: bytes, *extra: str) -> str:
+        """Chave de conteúdo já em memória (ex.: upload do Streamlit)"""
+        return cls._finish(hashlib.sha256(data), extra)
+
+    @classmethod
+    def frame_key(cls, df: pd.DataFrame, *extra: str) -> str:
+        """
+        Chave de DataFrame já carregado (ex.: upload lido pelo EDA)
+
+        Hash vetorizado dos valores (pd.util.hash_pandas_object), mais nomes
+        e tipos das colunas.
+
+        Args:
+            df: DataFrame (antes da normalização)
+            extra: Partes adicionais da chave
+
+        Returns:
+            Hash hexadecimal
+        """
+        digest = hashlib.sha256()
+        digest.update(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return cls._finish(digest, extra)
+
+    @staticmethod
+    def _finish(digest, extra) -> str:
+        for part in extra:
+            digest.update(b'\0' + part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    # -------------------------------------------------
+    # Leitura e gravação
+    # -------------------------------------------------
+
+    def load(self, key: str):
+        """
+        Ler tabela normalizada do cache
+
+        Args:
+            key: Chave (file_key / bytes_key)
+
+        Returns:
+            pyarrow.Table marcada como normalizada, ou None (ausente,
+            corrompida ou de outra versão)
+        """
+        import pyarrow.parquet as pq
+
+        path = self._path(key)
+        if not path.exists():
+            count('upload_cache.miss')
+            return None
+        try:
+            table = pq.read_table(path)
+        except Exception:
+            count('upload_cache.miss')
+            return None
+
+        metadata = table.schema.metadata or {}
+        if metadata.get(NORMALIZED_KEY) != self.version.encode('utf-8'):
+            count('upload_cache.miss')
+            return None
+
+        os.utime(path)  # Uso recente (ordem de remoção)
+        count('upload_cache.hit')
+        return table
+
+    def store(self, key: str, normalized: pd.DataFrame, decimal_columns=()):
+        """
+        Gravar DataFrame normalizado
+
+        A gravação é feita em arquivo temporário e renomeada, para que uma
+        execução concorrente nunca leia um Parquet incompleto.
+
+        Args:
+            key: Chave (file_key / bytes_key)
+            normalized: DataFrame normalizado
+            decimal_columns: Colunas gravadas como decimal128 quando exatas
+        """
+        import pyarrow.parquet as pq
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        table = normalized_to_arrow(normalized, decimal_columns, self.version)
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        """Remover entradas menos usadas acima de max_entries"""
+        if self.max_entries is None:
+            return
+        entries = sorted(self.cache_dir.glob('*.parquet'), key=lambda p: p.stat().st_mtime)
+        for path in entries[:max(0, len(entries) - self.max_entries)]:
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        """Remover todas as entradas"""
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*.parquet'):
+                path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        if not self.cache_dir.exists():
+            return 0
+        return sum(1 for _ in self.cache_dir.glob('*.parquet'))
@@ -0,0 +1,788 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Colunar de Regras - validação sobre o DataFrame normalizado
+
+Aplica as verificações de NCMValidator, PISCOFINSValidator, CFOPValidator
+e TotalsValidator a colunas inteiras do DataFrame produzido por
+NFeCSVParser._normalize_dataframe, sem criar NFeItem por linha:
+
+- Consultas de regras (NCM, CST, CFOP) uma vez por valor distinto
+- Pertinência e comparações por combinação distinta de valores
+- Aritmética (PIS_003, COFINS_003, totais) com pré-filtro float vetorizado
+  e confirmação exata em Decimal apenas nas linhas candidatas
+
+O resultado é um DataFrame compacto de erros (row, code, severity,
+expected, actual, impact), na mesma ordem da validação por item.
+ValidationError só é criado sob demanda (materialize / errors_by_nfe).
+"""
+
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ...domain.entities.nfe_entity import NFeEntity, ValidationError, Severity
+from ...domain.services.federal_validators import (
+    NCMValidator, PISCOFINSValidator, CFOPValidator, TotalsValidator
+)
+from ..parsers.columnar import NFeBulkBuilder, _safe_str, _safe_decimal
+from ..parsers.csv_parser import NFeCSVParser
+
+# Import FiscalRepository - absolute import
+import sys
+from pathlib import Path
+if True:  # Always add to path
+    project_root = Path(__file__).parent.parent.parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from repositories.fiscal_repository import FiscalRepository
+
+
+# Colunas do DataFrame de erros
+ERROR_COLUMNS = ['row', 'code', 'severity', 'expected', 'actual', 'impact']
+
+# Totais declarados aceitos em validate(totals=...)
+TOTALS_COLUMNS = (
+    'valor_produtos', 'valor_frete', 'valor_seguro', 'valor_outras_despesas',
+    'valor_desconto', 'valor_total_nota', 'valor_pis', 'valor_cofins'
+)
+
+# Ordem de emissão da validação por item: validador -> códigos
+_VALIDATOR_CODES = (
+    ('NCM', ('NCM_001', 'NCM_004', 'NCM_002', 'NCM_003')),
+    ('PISCOFINS', (
+        'PIS_001', 'PIS_999', 'PIS_002', 'PIS_003', 'PIS_004',
+        'COFINS_001', 'COFINS_999', 'COFINS_002', 'COFINS_003', 'COFINS_004',
+        'PISCOFINS_001'
+    )),
+    ('CFOP', ('CFOP_001', 'CFOP_002', 'CFOP_003', 'CFOP_004')),
+    ('TOTAL', ('TOTAL_001', 'TOTAL_002', 'TOTAL_003', 'TOTAL_004')),
+)
+
+_CODE_VALIDATOR = {code: name for name, codes in _VALIDATOR_CODES for code in codes}
+_VALIDATOR_RANK = {name: rank for rank, (name, _) in enumerate(_VALIDATOR_CODES)}
+_CODE_RANK = {code: rank for _, codes in _VALIDATOR_CODES for rank, code in enumerate(codes)}
+
+_SEVERITY = {
+    'NCM_001': Severity.CRITICAL, 'NCM_002': Severity.ERROR,
+    'NCM_003': Severity.WARNING, 'NCM_004': Severity.INFO,
+    'PIS_001': Severity.ERROR, 'PIS_999': Severity.WARNING, 'PIS_002': Severity.CRITICAL,
+    'PIS_003': Severity.ERROR, 'PIS_004': Severity.CRITICAL,
+    'COFINS_001': Severity.ERROR, 'COFINS_999': Severity.WARNING, 'COFINS_002': Severity.CRITICAL,
+    'COFINS_003': Severity.ERROR, 'COFINS_004': Severity.CRITICAL,
+    'PISCOFINS_001': Severity.WARNING,
+    'CFOP_001': Severity.CRITICAL, 'CFOP_002': Severity.WARNING,
+    'CFOP_003': Severity.CRITICAL, 'CFOP_004': Severity.CRITICAL,
+    'TOTAL_001': Severity.CRITICAL, 'TOTAL_002': Severity.CRITICAL,
+    'TOTAL_003': Severity.ERROR, 'TOTAL_004': Severity.ERROR,
+}
+
+_SEVERITY_VALUE = {code: severity.value for code, severity in _SEVERITY.items()}
+
+_TOLERANCE = Decimal('0.02')
+_CENT = Decimal('0.01')
+
+# Pré-filtro float: diferenças abaixo disso nunca passam de 0.02 em Decimal
+# (quantize desloca no máximo 0.005; margem para erro de ponto flutuante)
+_FLOAT_CANDIDATE = 0.0149
+
+
+
+# Colunas de itens somadas por NF-e (totais derivados, como em _calculate_totals)
+_DERIVED_TOTALS = {
+    'valor_produtos': 'valor_total',
+    'valor_desconto': 'valor_desconto',
+    'valor_frete': 'valor_frete',
+    'valor_pis': 'pis_valor',
+    'valor_cofins': 'cofins_valor',
+}
+
+
+# =====================================================
+# Helpers de colunas
+# =====================================================
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    """Array object 1-D (sem que numpy tente expandir os elementos)"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = list(values)
+    return array
+
+
+def _constant(value: Any, size: int) -> np.ndarray:
+    return _object_array([value] * size)
+
+
+def _distinct(*arrays: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combinações distintas de valores entre colunas
+
+    Returns:
+        (código da combinação por linha, posição representativa de cada código)
+    """
+    key = np.zeros(len(arrays[0]), dtype=np.int64)
+    for values in arrays:
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+        key, _ = pd.factorize(key * len(uniques) + codes)
+    _, representatives = np.unique(key, return_index=True)
+    return key, representatives
+
+
+def _period_keys(period: np.ndarray) -> np.ndarray:
+    """Identificador do período de vigência por linha (sem a data de referência)"""
+    return _object_array([p[0] if p is not None else None for p in period])
+
+
+def _per_distinct(representatives: np.ndarray, evaluate: Callable[[int], Any]) -> np.ndarray:
+    """Avaliar uma vez por combinação distinta (resultado indexado pelo código)"""
+    return _object_array([evaluate(int(rep)) for rep in representatives])
+
+
+def _is_set(outcomes: np.ndarray) -> np.ndarray:
+    """Máscara dos resultados diferentes de None"""
+    return np.array([o is not None for o in outcomes], dtype=bool)
+
+
+def _str_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Coluna str com a semântica de _parse_item ('' se ausente)"""
+    if name not in df.columns:
+        return _constant('', len(df))
+    return _object_array(NFeBulkBuilder.convert_column(df[name], _safe_str))
+
+
+def _float(value: Any) -> float:
+    """float do Decimal do parser (NaN se não representável, ex.: sNaN)"""
+    try:
+        return float(_safe_decimal(value))
+    except ValueError:
+        return float('nan')
+
+
+class _DecimalColumn:
+    """
+    Coluna decimal com a semântica de _parse_item
+
+    floats (vetorizado) serve apenas de pré-filtro: valores não convertidos
+    ficam NaN e viram candidatos. Decimal exato é calculado sob demanda.
+    """
+
+    __slots__ = ('series', 'floats', '_exact', '_codes')
+
+    def __init__(self, df: pd.DataFrame, name: str, fallback: Optional[str] = None):
+        if name not in df.columns and fallback in df.columns:
+            name = fallback
+        self.series = df[name] if name in df.columns else None
+        self._exact = None
+        self._codes = None
+
+        if self.series is None:
+            self.floats = np.zeros(len(df))
+        elif pd.api.types.is_numeric_dtype(self.series):
+            self.floats = self.series.to_numpy(dtype=float, na_value=0.0)
+        else:
+            self.floats = pd.to_numeric(self.series, errors='coerce').to_numpy(dtype=float)
+            # Valores não numéricos para o pandas (ex.: vírgula decimal): conversão do parser
+            failed = np.flatnonzero(np.isnan(self.floats))
+            if len(failed):
+                self.floats[failed] = [_float(v) for v in self.series.to_numpy(dtype=object)[failed]]
+
+    def at(self, positions: Sequence[int]) -> List[Decimal]:
+        """Decimal exato das posições informadas"""
+        if self.series is None:
+            return [Decimal('0')] * len(positions)
+        if self._exact is not None:
+            return list(self._exact[positions])
+        return [_safe_decimal(v) for v in self.series.to_numpy(dtype=object)[positions]]
+
+    @property
+    def exact(self) -> np.ndarray:
+        """Decimal exato por linha (conversão por valor único; para colunas de baixa cardinalidade)"""
+        if self._exact is None:
+            if self.series is None:
+                self._exact = _constant(Decimal('0'), len(self.floats))
+            else:
+                self._exact = _object_array(NFeBulkBuilder.convert_column(self.series, _safe_decimal))
+        return self._exact
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Código do valor por linha (str(Decimal) distingue '1.65' de '1.650')"""
+        if self._codes is None:
+            if self.series is None:
+                self._codes = np.zeros(len(self.floats), dtype=np.int64)
+            else:
+                tokens = NFeBulkBuilder.convert_column(self.series, lambda v: str(_safe_decimal(v)))
+                self._codes, _ = pd.factorize(pd.Series(tokens, dtype=object))
+        return self._codes
+
+
+class _Part:
+    """Bloco de erros de um código (arrays alinhados às posições)"""
+
+    __slots__ = ('positions', 'code', 'expected', 'actual', 'impact')
+
+    def __init__(self, positions: np.ndarray, code: str, expected: np.ndarray,
+                 actual: np.ndarray, impact: np.ndarray):
+        self.positions = positions
+        self.code = code
+        self.expected = expected
+        self.actual = actual
+        self.impact = impact
+
+
+def _outcome_parts(valid: np.ndarray, codes: np.ndarray, outcomes: np.ndarray,
+                   impacts: Optional[Dict[str, Any]] = None) -> List[_Part]:
+    """
+    Converter resultados por combinação distinta em blocos por código
+
+    Args:
+        valid: Máscara de linhas válidas (com chave_acesso)
+        codes: Código da combinação por linha
+        outcomes: Resultado (code, expected, actual) ou None por combinação
+        impacts: Impacto fixo por código (default: None)
+    """
+    present = _is_set(outcomes)
+    positions = np.flatnonzero(present[codes] & valid) if len(codes) else np.zeros(0, dtype=np.int64)
+    if not len(positions):
+        return []
+
+    filled = [o if o is not None else (None, None, None) for o in outcomes]
+    error_code = _object_array([o[0] for o in filled])[codes[positions]]
+    expected = _object_array([o[1] for o in filled])[codes[positions]]
+    actual = _object_array([o[2] for o in filled])[codes[positions]]
+
+    parts = []
+    for code in pd.unique(error_code):
+        index = error_code == code
+        parts.append(_Part(
+            positions[index], code, expected[index], actual[index],
+            _constant((impacts or {}).get(code), int(index.sum()))
+        ))
+    return parts
+
+
+class ColumnarRuleEngine:
+    """
+    Motor de regras vetorizado (mesmos resultados dos validadores federais)
+
+    Uso:
+        df = parser._normalize_dataframe(raw_df)
+        engine = ColumnarRuleEngine(repo)
+        errors = engine.validate(df)
+        errors.groupby('code')['impact'].count()
+        criticos = engine.materialize(df, errors[errors['severity'] == 'CRITICAL'])
+    """
+
+    def __init__(self, repository: FiscalRepository):
+        """
+        Inicializar motor
+
+        Args:
+            repository: FiscalRepository para consultas
+        """
+        self.repo = repository
+        self.ncm_validator = NCMValidator(repository)
+        self.piscofins_validator = PISCOFINSValidator(repository)
+        self.cfop_validator = CFOPValidator(repository)
+        self.totals_validator = TotalsValidator(repository)
+        self._parser: Optional[NFeCSVParser] = None
+
+    # =====================================================
+    # Validação
+    # =====================================================
+
+    def validate(self, df: pd.DataFrame, totals: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Validar DataFrame normalizado
+
+        Sem totals, os totais da NF-e são derivados dos itens (como no
+        parser) e as verificações TOTAL_* não têm divergência possível.
+
+        Args:
+            df: DataFrame de NFeCSVParser._normalize_dataframe (índice único)
+            totals: Totais declarados indexados por chave_acesso (colunas de
+                TOTALS_COLUMNS; colunas ou valores ausentes são derivados dos itens)
+
+        Returns:
+            DataFrame de erros (ERROR_COLUMNS), na ordem da validação por item
+        """
+        if not df.index.is_unique:
+            raise ValueError("DataFrame com índice duplicado: use reset_index() antes de validar")
+
+        columns = self._prepare(df)
+        parts: List[_Part] = []
+        parts.extend(self._check_ncm(columns))
+        for tax in ('pis', 'cofins'):
+            parts.extend(self._check_tax(columns, tax))
+        parts.extend(self._check_pis_cofins_relation(columns))
+        parts.extend(self._check_cfop(columns))
+        if totals is not None:
+            parts.extend(self._check_totals(df, columns, totals))
+
+        return self._build_frame(df, columns, parts)
+
+    def _prepare(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Colunas tipadas e contexto da NF-e (cabeçalho da primeira linha) por linha"""
+        group, keys = pd.factorize(df['chave_acesso'], sort=True, use_na_sentinel=True)
+        valid = group >= 0
+        valid_positions = np.flatnonzero(valid)
+        _, first_index = np.unique(group[valid], return_index=True)
+        group_first = valid_positions[first_index]
+
+        cfop = _str_column(df, 'cfop')
+
+        # Contexto por NF-e, redistribuído às linhas
+        uf_origem = df['uf_emitente'].to_numpy(dtype=object)[group_first]
+        uf_destino = df['uf_destinatario'].to_numpy(dtype=object)[group_first]
+        interstate = np.zeros(len(df), dtype=bool)
+        interstate[valid] = np.not_equal(uf_origem, uf_destino).astype(bool)[group[valid]]
+        export = np.zeros(len(df), dtype=bool)
+        export[valid] = pd.Series(cfop[group_first], dtype=object).str.startswith('7') \
+            .to_numpy(dtype=bool)[group[valid]]
+
+        # Período de vigência das regras na data de emissão, por NF-e
+        period = _constant(None, len(df))
+        if 'data_emissao' in df.columns and len(group_first):
+            dates = df['data_emissao'].to_numpy(dtype=object)[group_first]
+            codes, uniques = pd.factorize(pd.Series(dates, dtype=object), use_na_sentinel=False)
+            periods = _object_array([self._rule_period(value) for value in uniques])
+            period[valid] = periods[codes][group[valid]]
+
+        columns = {
+            'valid': valid,
+            'group': group,
+            'group_keys': keys,
+            'group_first': group_first,
+            'interstate': interstate,
+            'export': export,
+            'period': period,
+            'cfop': cfop,
+            'ncm': _str_column(df, 'ncm'),
+            'descricao': _str_column(df, 'descricao'),
+            'pis_cst': _str_column(df, 'pis_cst'),
+            'cofins_cst': _str_column(df, 'cofins_cst'),
+            'valor_total': _DecimalColumn(df, 'valor_total'),
+        }
+        for tax in ('pis', 'cofins'):
+            columns[f'{tax}_base'] = _DecimalColumn(df, f'{tax}_base', fallback='valor_total')
+            columns[f'{tax}_aliquota'] = _DecimalColumn(df, f'{tax}_aliquota')
+            columns[f'{tax}_valor'] = _DecimalColumn(df, f'{tax}_valor')
+        return columns
+
+    # -------------------------------------------------
+    # NCM
+    # -------------------------------------------------
+
+    def _rule_period(self, data_emissao: Any) -> Tuple[Any, Any]:
+        """(período de vigência, data de referência) da data de emissão em texto"""
+        if self._parser is None:
+            self._parser = NFeCSVParser()
+        as_of = self._parser._try_parse_date(data_emissao)
+        return (self.repo.rule_period(as_of), as_of)
+
+    def _check_ncm(self, columns: Dict[str, Any]) -> List[_Part]:
+        ncm, descricao, period = columns['ncm'], columns['descricao'], columns['period']
+        rules: Dict[Tuple, Tuple[Optional[Dict], Optional[Callable[[str], bool]]]] = {}
+
+        def evaluate(rep: int):
+            item_ncm = ncm[rep]
+            if not self.ncm_validator._is_valid_format(item_ncm):
+                return ('NCM_001', '8 dígitos numéricos', item_ncm)
+
+            rule_period, as_of = period[rep] or (None, None)
+            key = (item_ncm, rule_period)
+            if key not in rules:
+                ncm_rule = self.repo.get_ncm_rule(item_ncm, as_of=as_of)
+                rules[key] = (ncm_rule, self.ncm_validator._keyword_matcher(ncm_rule))
+            ncm_rule, matcher = rules[key]
+
+            if not ncm_rule:
+                if item_ncm.startswith('1701'):
+                    return ('NCM_004', None, item_ncm)
+                return ('NCM_002', '1701xxxx (açúcar)', item_ncm)
+
+            if matcher is not None and not matcher(descricao[rep]):
+                return ('NCM_003', ncm_rule['description'], descricao[rep])
+            return None
+
+        codes, representatives = _distinct(ncm, descricao, _period_keys(period))
+        outcomes = _per_distinct(representatives, evaluate)
+        return _outcome_parts(columns['valid'], codes, outcomes, impacts={'NCM_001': Decimal('0')})
+
+    # -------------------------------------------------
+    # PIS / COFINS
+    # -------------------------------------------------
+
+    def _check_tax(self, columns: Dict[str, Any], tax: str) -> List[_Part]:
+        prefix = tax.upper()
+        cst = columns[f'{tax}_cst']
+        aliquota: _DecimalColumn = columns[f'{tax}_aliquota']
+        base: _DecimalColumn = columns[f'{tax}_base']
+        valor: _DecimalColumn = columns[f'{tax}_valor']
+        valor_total: _DecimalColumn = columns['valor_total']
+        valid = columns['valid']
+        parts = []
+
+        # Regras por CST distinto
+        cst_codes, cst_reps = _distinct(cst)
+        resolved = [self.piscofins_validator._resolve_cst(cst[rep], tax) for rep in cst_reps]
+        status = _object_array([
+            'invalid' if not r['valid'] else ('norule' if not r['rule'] else 'ok')
+            for r in resolved
+        ])[cst_codes]
+
+        # 1. CST inválido / sem regra (validação do imposto encerra aqui)
+        for code, state, expected in (
+            (f'{prefix}_001', 'invalid', 'CST válido conforme base de dados'),
+            (f'{prefix}_999', 'norule', 'Regra cadastrada na base de dados'),
+        ):
+            positions = np.flatnonzero((status == state) & valid)
+            if len(positions):
+                parts.append(_Part(positions, code, _constant(expected, len(positions)),
+                                   cst[positions], _constant(None, len(positions))))
+
+        ok = (status == 'ok') & valid
+
+        # 2. Alíquota divergente em CST tributado: por (CST, alíquota) distintos
+        def divergent(rep: int):
+            rule_info = resolved[cst_codes[rep]]
+            rule = rule_info['rule']
+            if rule and rule['situation_type'] == 'TRIBUTADA' and \
+                    aliquota.exact[rep] != rule_info['expected_aliquota']:
+                return rule_info['expected_aliquota']
+            return None
+
+        pair_codes, pair_reps = _distinct(cst_codes, aliquota.codes)
+        expected_by_pair = _per_distinct(pair_reps, divergent)
+        positions = np.flatnonzero(ok & _is_set(expected_by_pair)[pair_codes])
+        if len(positions):
+            expected_values = expected_by_pair[pair_codes[positions]]
+            impacts = [
+                abs(item_valor - (item_total * expected / Decimal('100')).quantize(_CENT))
+                for item_valor, item_total, expected in zip(
+                    valor.at(positions), valor_total.at(positions), expected_values
+                )
+            ]
+            parts.append(_Part(
+                positions, f'{prefix}_002',
+                _object_array([str(e) for e in expected_values]),
+                _object_array([str(a) for a in aliquota.exact[positions]]),
+                _object_array(impacts)
+            ))
+
+        # 3. Cálculo (alíquota > 0): pré-filtro float, confirmação exata em Decimal
+        aliquota_values, aliquota_reps = np.unique(aliquota.codes, return_index=True)
+        positive = np.zeros(len(aliquota_values), dtype=bool)
+        positive[aliquota_values] = [aliquota.exact[rep] > 0 for rep in aliquota_reps]
+        with np.errstate(invalid='ignore', over='ignore'):
+            diff = np.abs(base.floats * aliquota.floats / 100 - valor.floats)
+        candidates = np.flatnonzero(ok & positive[aliquota.codes] & ~(diff <= _FLOAT_CANDIDATE))
+
+        confirmed, expected_values, actual_values, impacts = [], [], [], []
+        for pos, item_base, item_valor in zip(candidates.tolist(), base.at(candidates), valor.at(candidates)):
+            calculated = (item_base * aliquota.exact[pos] / Decimal('100')).quantize(_CENT)
+            if abs(calculated - item_valor) > _TOLERANCE:
+                confirmed.append(pos)
+                expected_values.append(str(calculated))
+                actual_values.append(str(item_valor))
+                impacts.append(abs(calculated - item_valor))
+        if confirmed:
+            parts.append(_Part(
+                np.array(confirmed, dtype=np.int64), f'{prefix}_003', _object_array(expected_values),
+                _object_array(actual_values), _object_array(impacts)
+            ))
+
+        # 4. Exportação com CST que não é alíquota zero / não incidência
+        not_exempt = np.array([
+            bool(r['rule']) and r['rule']['situation_type'] not in ['ALIQUOTA_ZERO', 'NAO_INCIDENCIA']
+            for r in resolved
+        ], dtype=bool)[cst_codes]
+        positions = np.flatnonzero(ok & columns['export'] & not_exempt)
+        if len(positions):
+            parts.append(_Part(positions, f'{prefix}_004', _constant('06 ou 08', len(positions)),
+                               cst[positions], _object_array(valor.at(positions))))
+
+        return parts
+
+    def _check_pis_cofins_relation(self, columns: Dict[str, Any]) -> List[_Part]:
+        pis_cst, cofins_cst = columns['pis_cst'], columns['cofins_cst']
+        positions = np.flatnonzero((pis_cst != cofins_cst) & columns['valid'])
+        if not len(positions):
+            return []
+        actual = _object_array([
+            f'PIS:{p}, COFINS:{c}' for p, c in zip(pis_cst[positions], cofins_cst[positions])
+        ])
+        return [_Part(positions, 'PISCOFINS_001', _constant(None, len(positions)),
+                      actual, _constant(None, len(positions)))]
+
+    # -------------------------------------------------
+    # CFOP
+    # -------------------------------------------------
+
+    def _check_cfop(self, columns: Dict[str, Any]) -> List[_Part]:
+        cfop, interstate = columns['cfop'], columns['interstate']
+        rules: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        def evaluate(rep: int):
+            item_cfop, is_interstate = cfop[rep], bool(interstate[rep])
+            if not self.cfop_validator._is_valid_format(item_cfop):
+                return (('CFOP_001', '4 dígitos numéricos', item_cfop),)
+
+            if item_cfop not in rules:
+                rules[item_cfop] = self.repo.get_cfop_rule(item_cfop)
+            cfop_rule = rules[item_cfop]
+
+            outcome = []
+            if cfop_rule:
+                scope = cfop_rule['operation_scope']
+                if is_interstate and scope not in ['INTERESTADUAL', 'EXTERIOR']:
+                    outcome.append(('CFOP_003', f'6{item_cfop[1:]} (interestadual)', item_cfop))
+                elif not is_interstate and scope != 'INTERNO':
+                    outcome.append(('CFOP_004', f'5{item_cfop[1:]} (interno)', item_cfop))
+            else:
+                outcome.append(('CFOP_002', None, item_cfop))
+                first_digit = item_cfop[0]
+                if is_interstate and first_digit not in ['6', '7']:
+                    outcome.append(('CFOP_003', '6xxx ou 7xxx', item_cfop))
+                elif not is_interstate and first_digit != '5':
+                    outcome.append(('CFOP_004', '5xxx', item_cfop))
+            return tuple(outcome) or None
+
+        codes, representatives = _distinct(cfop, interstate)
+        outcomes = _per_distinct(representatives, evaluate)
+
+        # Até dois erros por item (CFOP_002 seguido de CFOP_003/004)
+        parts = []
+        for slot in range(2):
+            slot_outcomes = _object_array([
+                o[slot] if o is not None and len(o) > slot else None for o in outcomes
+            ])
+            parts.extend(_outcome_parts(columns['valid'], codes, slot_outcomes))
+        return parts
+
+    # -------------------------------------------------
+    # Totais
+    # -------------------------------------------------
+
+    def _check_totals(self, df: pd.DataFrame, columns: Dict[str, Any], totals: pd.DataFrame) -> List[_Part]:
+        group, valid, group_first = columns['group'], columns['valid'], columns['group_first']
+        n_groups = len(group_first)
+        if not n_groups:
+            return []
+
+        items = {
+            'valor_total': columns['valor_total'],
+            'pis_valor': columns['pis_valor'],
+            'cofins_valor': columns['cofins_valor'],
+            'valor_desconto': _DecimalColumn(df, 'valor_desconto'),
+            'valor_frete': _DecimalColumn(df, 'valor_frete'),
+        }
+        declared = totals.reindex(columns['group_keys'])
+        group_positions: List[np.ndarray] = []
+
+        def float_sum(name: str) -> np.ndarray:
+            return np.bincount(group[valid], weights=items[name].floats[valid], minlength=n_groups)
+
+        def exact_sum(name: str, g: int) -> Decimal:
+            # Posições por NF-e montadas apenas se houver candidata
+            if not group_positions:
+                group_positions.extend(
+                    positions for _, positions in NFeBulkBuilder.group_positions(df['chave_acesso'])
+                )
+            return sum(items[name].at(group_positions[g]))
+
+        # Valores derivados dos itens (como _calculate_totals)
+        derived_float = {name: float_sum(column) for name, column in _DERIVED_TOTALS.items()}
+        derived_float['valor_seguro'] = np.zeros(n_groups)
+        derived_float['valor_outras_despesas'] = np.zeros(n_groups)
+        derived_float['valor_total_nota'] = (
+            derived_float['valor_produtos'] + derived_float['valor_frete'] - derived_float['valor_desconto']
+        )
+
+        def derived_exact(name: str, g: int) -> Decimal:
+            if name in _DERIVED_TOTALS:
+                return exact_sum(_DERIVED_TOTALS[name], g)
+            if name == 'valor_total_nota':
+                return (
+                    exact_sum('valor_total', g) + exact_sum('valor_frete', g) +
+                    Decimal('0') + Decimal('0') - exact_sum('valor_desconto', g)
+                )
+            return Decimal('0')
+
+        # Valores declarados (quando informados) prevalecem sobre os derivados
+        is_declared = {}
+        values_float = {}
+        for name in TOTALS_COLUMNS:
+            if name in declared.columns:
+                is_declared[name] = declared[name].notna().to_numpy()
+                declared_float = np.array([
+                    _float(v) if d else np.nan
+                    for v, d in zip(declared[name].tolist(), is_declared[name])
+                ], dtype=float)
+            else:
+                is_declared[name] = np.zeros(n_groups, dtype=bool)
+                declared_float = np.full(n_groups, np.nan)
+            values_float[name] = np.where(is_declared[name], declared_float, derived_float[name])
+
+        def value_exact(name: str, g: int) -> Decimal:
+            if is_declared[name][g]:
+                return _safe_decimal(declared[name].iloc[g])
+            return derived_exact(name, g)
+
+        checks = (
+            ('TOTAL_001', 'valor_produtos', derived_float['valor_produtos'],
+             lambda g: exact_sum('valor_total', g)),
+            ('TOTAL_002', 'valor_total_nota',
+             values_float['valor_produtos'] + values_float['valor_frete'] + values_float['valor_seguro'] +
+             values_float['valor_outras_despesas'] - values_float['valor_desconto'],
+             lambda g: (value_exact('valor_produtos', g) + value_exact('valor_frete', g) +
+                        value_exact('valor_seguro', g) + value_exact('valor_outras_despesas', g) -
+                        value_exact('valor_desconto', g))),
+            ('TOTAL_003', 'valor_pis', derived_float['valor_pis'],
+             lambda g: exact_sum('pis_valor', g)),
+            ('TOTAL_004', 'valor_cofins', derived_float['valor_cofins'],
+             lambda g: exact_sum('cofins_valor', g)),
+        )
+
+        parts = []
+        for code, field, expected_float, expected_exact in checks:
+            with np.errstate(invalid='ignore', over='ignore'):
+                diff = np.abs(expected_float - values_float[field])
+            confirmed, expected_values, actual_values, impacts = [], [], [], []
+            for g in np.flatnonzero(~(diff <= _FLOAT_CANDIDATE)).tolist():
+                expected = expected_exact(g)
+                actual = value_exact(field, g)
+                if abs(expected - actual) > _TOLERANCE:
+                    confirmed.append(g)
+                    expected_values.append(str(expected))
+                    actual_values.append(str(actual))
+                    impacts.append(abs(expected - actual))
+            if confirmed:
+                parts.append(_Part(group_first[confirmed], code, _object_array(expected_values),
+                                   _object_array(actual_values), _object_array(impacts)))
+        return parts
+
+    # -------------------------------------------------
+    # DataFrame de erros
+    # -------------------------------------------------
+
+    @staticmethod
+    def _build_frame(df: pd.DataFrame, columns: Dict[str, Any], parts: List[_Part]) -> pd.DataFrame:
+        if not parts:
+            return pd.DataFrame({name: pd.Series(dtype=object) for name in ERROR_COLUMNS})
+
+        positions = np.concatenate([part.positions for part in parts])
+        codes = np.concatenate([_constant(part.code, len(part.positions)) for part in parts])
+        frame = pd.DataFrame({
+            'row': df.index.to_numpy()[positions],
+            'code': codes,
+            'severity': pd.Series(codes, dtype=object).map(_SEVERITY_VALUE).to_numpy(dtype=object),
+            'expected': np.concatenate([part.expected for part in parts]),
+            'actual': np.concatenate([part.actual for part in parts]),
+            'impact': np.concatenate([part.impact for part in parts]),
+        })
+
+        # Ordem da validação por item: NF-e, validador, item, código
+        code_series = pd.Series(codes, dtype=object)
+        order = np.lexsort((
+            code_series.map(_CODE_RANK).to_numpy(),
+            positions,
+            code_series.map(_CODE_VALIDATOR).map(_VALIDATOR_RANK).to_numpy(),
+            columns['group'][positions],
+        ))
+        return frame.iloc[order].reset_index(drop=True)
+
+    # =====================================================
+    # Materialização sob demanda
+    # =====================================================
+
+    def materialize(self, df: pd.DataFrame, errors: pd.DataFrame,
+                    totals: Optional[pd.DataFrame] = None) -> List[ValidationError]:
+        """
+        Criar ValidationError para as linhas do DataFrame de erros
+
+        Apenas as NF-es referenciadas em errors são montadas; mensagens e
+        demais campos vêm do validador correspondente.
+
+        Args:
+            df: DataFrame normalizado usado em validate()
+            errors: DataFrame de erros (ou subconjunto dele)
+            totals: Mesmos totais declarados passados a validate()
+
+        Returns:
+            Lista de ValidationError, na ordem de errors
+        """
+        if errors.empty:
+            return []
+
+        positions = df.index.get_indexer(errors['row'])
+        contexts = self._item_contexts(df, positions, totals)
+
+        generated: Dict[Tuple[int, str], List[ValidationError]] = {}
+        result = []
+        for pos, code in zip(positions.tolist(), errors['code'].tolist()):
+            nfe, item = contexts[pos]
+            validator = _CODE_VALIDATOR[code]
+            key = (pos, validator)
+            if key not in generated:
+                generated[key] = self._run_validator(validator, item, nfe)
+            result.append(next(e for e in generated[key] if e.code == code))
+        return result
+
+    def errors_by_nfe(self, df: pd.DataFrame, errors: pd.DataFrame,
+                      totals: Optional[pd.DataFrame] = None) -> Dict[str, List[ValidationError]]:
+        """
+        Materializar erros agrupados por chave_acesso
+
+        Returns:
+            Dict chave_acesso -> ValidationErrors (ordem da validação por item)
+        """
+        positions = df.index.get_indexer(errors['row'])
+        keys = df['chave_acesso'].to_numpy(dtype=object)[positions]
+        grouped: Dict[str, List[ValidationError]] = {}
+        for key, error in zip(keys.tolist(), self.materialize(df, errors, totals)):
+            grouped.setdefault(str(key), []).append(error)
+        return grouped
+
+    def _item_contexts(self, df: pd.DataFrame, positions: np.ndarray,
+                       totals: Optional[pd.DataFrame]) -> Dict[int, Tuple[NFeEntity, Any]]:
+        """Montar (NF-e, item) para as posições informadas (apenas NF-es envolvidas)"""
+        if self._parser is None:
+            self._parser = NFeCSVParser()
+        builder = NFeBulkBuilder(self._parser)
+
+        keys = df['chave_acesso']
+        needed = pd.unique(keys.to_numpy(dtype=object)[positions])
+        sub_positions = np.flatnonzero(keys.isin(needed).to_numpy())
+        sub = df.iloc[sub_positions].reset_index(drop=True)
+
+        nfes = builder.build_nfes(sub, sort=False)
+        groups = builder.group_positions(sub['chave_acesso'], sort=False)
+
+        contexts = {}
+        for nfe, (key, relative) in zip(nfes, groups):
+            self._apply_totals(nfe, key, totals)
+            for item, rel in zip(nfe.items, relative.tolist()):
+                contexts[int(sub_positions[rel])] = (nfe, item)
+        return contexts
+
+    @staticmethod
+    def _apply_totals(nfe: NFeEntity, key: Any, totals: Optional[pd.DataFrame]):
+        """Aplicar totais declarados à NF-e montada (mesma regra de validate)"""
+        if totals is None or key not in totals.index:
+            return
+        row = totals.loc[key]
+        for name in TOTALS_COLUMNS:
+            if name in totals.columns and pd.notna(row[name]):
+                setattr(nfe.totais, name, _safe_decimal(row[name]))
+
+    def _run_validator(self, validator: str, item, nfe: NFeEntity) -> List[ValidationError]:
+        if validator == 'NCM':
+            return self.ncm_validator.validate(item, nfe)
+        if validator == 'PISCOFINS':
+            return self.piscofins_validator.validate(item, nfe)
+        if validator == 'CFOP':
+            return self.cfop_validator.validate(item, nfe)
+        return self.totals_validator.validate(nfe)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Revalidação Incremental de NF-es
+
+Ao reenviar um arquivo corrigido, a maior parte das NF-es não muda. Cada
+grupo chave_acesso recebe uma impressão digital (fingerprint):
+
+    sha256(versão das regras + hash das linhas normalizadas da NF-e)
+
+onde a versão das regras combina as linhas de db_metadata, o mtime do
+base_validacao.csv e a versão do validador. NF-es cuja impressão digital
+coincide com o último resultado gravado em validation_log não são
+revalidadas: os erros gravados são restaurados. Apenas NF-es novas ou
+alteradas passam pelos validadores.
+
+Resultados gravados por execuções não incrementais não têm impressão
+digital: essas NF-es são validadas novamente e contadas à parte
+(unknown), sem serem tomadas por alteradas.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ... import __version__
+from ...domain.entities.nfe_entity import NFeEntity, ValidationStatus
+from ...domain.services.validation_pipeline import ValidationPipeline
+from ..parsers.columnar import NFeBulkBuilder
+from ..parsers.csv_parser import NFeCSVParser, CSVParserException
+from ..persistence.result_store import ValidationResultStore
+
+# Import FiscalRepository - absolute import
+import sys
+from pathlib import Path
+if True:  # Always add to path
+    project_root = Path(__file__).parent.parent.parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from repositories.fiscal_repository import FiscalRepository
+from repositories.rule_snapshot import RuleSnapshot
+
+
+# Validação de um fluxo de NF-es (ex.: ParallelValidationEngine.iter_validate)
+ValidateStream = Callable[[Iterable[NFeEntity]], Iterator[NFeEntity]]
+
+
+@dataclass
+class IncrementalStats:
+    """Contagens de uma execução incremental"""
+    skipped: int = 0        # Impressão digital igual: resultado restaurado
+    revalidated: int = 0    # Já validada antes, conteúdo ou regras mudaram
+    new: int = 0            # Sem resultado gravado
+    unknown: int = 0        # Resultado gravado sem impressão digital (execução não incremental)
+
+    @property
+    def validated(self) -> int:
+        return self.revalidated + self.new + self.unknown
+
+    def to_dict(self) -> Dict[str, int]:
+        return {'skipped': self.skipped, 'revalidated': self.revalidated,
+                'new': self.new, 'unknown': self.unknown}
+
+
+@dataclass
+class IncrementalResult:
+    """NF-es (na ordem do arquivo) e contagens"""
+    nfes: List[NFeEntity] = field(default_factory=list)
+    stats: IncrementalStats = field(default_factory=IncrementalStats)
+
+
+class IncrementalValidator:
+    """
+    Valida apenas NF-es novas ou alteradas desde a última execução
+
+    Uso:
+        with ValidationResultStore() as store:
+            result = IncrementalValidator(repo, store).validate_csv(path)
+            print(result.stats.to_dict())
+    """
+
+    def __init__(self, repository: FiscalRepository, store: ValidationResultStore,
+                 parser: Optional[NFeCSVParser] = None,
+                 validate_stream: Optional[ValidateStream] = None,
+                 restore_skipped: bool = True):
+        """
+        Inicializar validador incremental
+
+        Args:
+            repository: FiscalRepository (versão das regras)
+            store: Resultados gravados (validation_log)
+            parser: NFeCSVParser (default: caminho colunar)
+            validate_stream: Validação das NF-es alteradas (default:
+                ValidationPipeline.validate_stream)
+            restore_skipped: Montar também as NF-es não alteradas, com os
+                erros gravados (False retorna apenas as revalidadas)
+        """
+        self.repo = repository
+        self.store = store
+        self.parser = parser or NFeCSVParser()
+        self.restore_skipped = restore_skipped
+        self._validate_stream = validate_stream or ValidationPipeline(repository).validate_stream
+
+    # =====================================================
+    # Impressões digitais
+    # =====================================================
+
+    def rules_version(self) -> str:
+        """
+        Versão das regras vigentes (muda ao repopular o database ou editar o CSV local)
+
+        Returns:
+            Hash hexadecimal
+        """
+        local_mtime = None
+        local_repo = getattr(self.repo, 'local_repo', None)
+        if local_repo is not None and local_repo.csv_path.exists():
+            local_mtime = local_repo.csv_path.stat().st_mtime_ns
+
+        version = (RuleSnapshot.read_version(self.repo.conn), local_mtime, __version__)
+        return hashlib.sha256(repr(version).encode('utf-8')).hexdigest()
+
+    def fingerprints(self, df: pd.DataFrame) -> Dict[str, str]:
+        """
+        Impressão digital de cada NF-e do DataFrame normalizado
+
+        Args:
+            df: DataFrame normalizado
+
+        Returns:
+            Dict chave_acesso -> fingerprint (ordem de aparição)
+        """
+        df = df.reset_index(drop=True)
+        groups = NFeBulkBuilder.group_positions(df['chave_acesso'], sort=False)
+        return dict(zip((chave for chave, _ in groups), self._group_fingerprints(df, groups)))
+
+    def _group_fingerprints(self, df: pd.DataFrame, groups: List[tuple]) -> List[str]:
+        columns = sorted(df.columns)
+        row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+        prefix = (self.rules_version() + '|' + '|'.join(columns)).encode('utf-8')
+
+        fingerprints = []
+        for _, positions in groups:
+            digest = hashlib.sha256(prefix)
+            digest.update(np.ascontiguousarray(row_hashes[positions]).tobytes())
+            fingerprints.append(digest.hexdigest())
+        return fingerprints
+
+    # =====================================================
+    # Validação
+    # =====================================================
+
+    def validate_csv(self, csv_path: str) -> IncrementalResult:
+        """
+        Validar arquivo CSV de forma incremental
+
+        Todas as colunas são lidas como texto (como em iter_nfes), para que
+        a impressão digital não dependa da inferência de tipos.
+
+        Args:
+            csv_path: Caminho para arquivo CSV
+
+        Returns:
+            IncrementalResult
+
+        Raises:
+            CSVParserException: Se houver erro crítico no parsing
+        """
+        self.parser.parse_errors = []
+        try:
+            df = pd.read_csv(
+                csv_path, dtype=str, encoding=self.parser._detect_encoding(csv_path),
+                keep_default_na=False, na_values=['']
+            )
+        except Exception as e:
+            raise CSVParserException(f"Erro ao ler CSV: {e}")
+
+        df = self.parser._normalize_dataframe(df)
+        self.parser._validate_columns(df)
+        return self.validate_dataframe(df)
+
+    def validate_frame(self, df: pd.DataFrame) -> IncrementalResult:
+        """
+        Validar DataFrame em memória (ex.: saída de ColumnMapper) de forma incremental
+
+        Os valores são convertidos para texto como em validate_csv: a
+        impressão digital coincide com a do DataFrame gravado com to_csv
+        (resultados gravados a partir do CSV temporário continuam válidos).
+
+        Args:
+            df: DataFrame com colunas no layout padrão (não normalizado)
+
+        Returns:
+            IncrementalResult
+
+        Raises:
+            CSVParserException: Se faltarem colunas mínimas
+        """
+        self.parser.parse_errors = []
+        df = self.parser._normalize_dataframe(NFeCSVParser.as_read_csv(df, df.columns))
+        self.parser._validate_columns(df)
+        return self.validate_dataframe(df)
+
+    def validate_dataframe(self, df: pd.DataFrame) -> IncrementalResult:
+        """
+        Validar DataFrame normalizado de forma incremental
+
+        Args:
+            df: DataFrame normalizado (colunas mínimas validadas)
+
+        Returns:
+            IncrementalResult (NF-es na ordem de aparição)
+        """
+        df = df.reset_index(drop=True)
+        groups = NFeBulkBuilder.group_positions(df['chave_acesso'], sort=False)
+        fingerprints = self._group_fingerprints(df, groups)
+        stored = self.store.latest_results(chave for chave, _ in groups)
+
+        result = IncrementalResult()
+        changed: Dict[str, str] = {}
+        build = []
+        for (chave, positions), fingerprint in zip(groups, fingerprints):
+            record = stored.get(chave)
+            if record is not None and record.get('fingerprint') == fingerprint:
+                result.stats.skipped += 1
+                if self.restore_skipped:
+                    build.append(positions)
+                continue
+
+            if record is None:
+                result.stats.new += 1
+            elif not record.get('fingerprint'):
+                result.stats.unknown += 1
+            else:
+                result.stats.revalidated += 1
+            changed[chave] = fingerprint
+            build.append(positions)
+
+        nfes = self.parser._build_nfes(df.take(np.concatenate(build)), sort=False) if build else []
+
+        to_validate = [nfe for nfe in nfes if nfe.chave_acesso in changed]
+        for nfe in self._validate_stream(to_validate):
+            self.store.add(nfe, fingerprint=changed[nfe.chave_acesso])
+        self.store.flush()
+
+        for nfe in nfes:
+            if nfe.chave_acesso not in changed:
+                self.restore(nfe, stored[nfe.chave_acesso])
+        result.nfes = nfes
+        return result
+
+    @staticmethod
+    def restore(nfe: NFeEntity, record: Dict[str, Any]) -> NFeEntity:
+        """
+        Aplicar resultado gravado a uma NF-e (sem revalidar)
+
+        Args:
+            nfe: NFeEntity recém-montada
+            record: Registro de ValidationResultStore (com 'errors')
+
+        Returns:
+            nfe com erros e status restaurados
+        """
+        nfe.validation_errors = list(record['errors'])
+        nfe.validation_status = ValidationStatus(record['status'])
+        if record.get('validation_timestamp'):
+            nfe.validation_timestamp = datetime.strptime(
+                record['validation_timestamp'], '%Y-%m-%d %H:%M:%S'
+            )
+        return nfe
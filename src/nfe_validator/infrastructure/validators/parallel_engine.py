@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de Validação Paralela - ProcessPoolExecutor
+
+Cada NF-e é independente: o lote é dividido em blocos (shards) validados
+em processos separados. Cada worker abre seu próprio FiscalRepository
+(SQLite somente leitura) e mantém seus validadores e caches entre blocos.
+
+Garantias:
+- Resultados entregues na ordem de entrada (determinístico)
+- Erros de cada NF-e na mesma ordem da validação sequencial
+- Callback de progresso (compatível com st.progress)
+- Número limitado de blocos em andamento (memória controlada em streams)
+- Estatísticas de deduplicação por assinatura somadas entre os workers
+- Medições de desempenho dos workers somadas ao RunProfiler ativo
+"""
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+import os
+
+from ...domain.entities.nfe_entity import NFeEntity, ValidationError
+from ...domain.services.validation_pipeline import ValidationPipeline
+from ...profiling import RunProfiler, current_profiler
+
+# Import FiscalRepository - absolute import
+import sys
+from pathlib import Path
+if True:  # Always add to path
+    project_root = Path(__file__).parent.parent.parent.parent
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+from repositories.fiscal_repository import FiscalRepository
+
+logger = logging.getLogger(__name__)
+
+
+# Callback de progresso: (NF-es concluídas, total ou None se desconhecido)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+# Callback de erro de sistema: (nfe, mensagem do erro)
+ErrorCallback = Callable[[NFeEntity, str], None]
+
+# Resultado de um bloco: por NF-e (erros, mensagem), e (itens, assinaturas resolvidas)
+ShardResult = Tuple[List[Tuple[List[ValidationError], Optional[str]]], Tuple[int, int]]
+
+
+# =====================================================
+# Estado do Worker (um por processo)
+# =====================================================
+
+_worker_pipeline: Optional[ValidationPipeline] = None
+
+
+def _init_worker(db_path: str, use_local_csv: bool):
+    """Inicializar worker: repositório somente leitura + pipeline reutilizável"""
+    global _worker_pipeline
+    repo = FiscalRepository(db_path, use_local_csv=use_local_csv, read_only=True)
+    _worker_pipeline = ValidationPipeline(repo)
+
+
+def _validate_shard(
+    pipeline: ValidationPipeline,
+    nfes: Sequence[NFeEntity]
+) -> List[Tuple[List[ValidationError], Optional[str]]]:
+    """
+    Validar bloco de NF-es
+
+    Returns:
+        Por NF-e: (erros gerados, mensagem de erro de sistema ou None)
+    """
+    results = []
+    for nfe in nfes:
+        already = len(nfe.validation_errors)
+        message = None
+        try:
+            pipeline.validate(nfe)
+        except Exception as e:
+            message = str(e)
+            nfe.add_validation_error(ValidationPipeline.system_error(e))
+            nfe.finish_validation()
+        results.append((nfe.validation_errors[already:], message))
+    return results
+
+
+def _validate_shard_with_stats(pipeline: ValidationPipeline, nfes: Sequence[NFeEntity]) -> ShardResult:
+    """Validar bloco e medir itens/assinaturas resolvidas durante o bloco"""
+    before = pipeline.dedup_stats()
+    results = _validate_shard(pipeline, nfes)
+    after = pipeline.dedup_stats()
+    return results, (after['items'] - before['items'], after['signatures'] - before['signatures'])
+
+
+def _run_shard(nfes: List[NFeEntity]) -> ShardResult:
+    """Ponto de entrada no worker (apenas os erros voltam ao processo pai)"""
+    return _validate_shard_with_stats(_worker_pipeline, nfes)
+
+
+def _run_shard_profiled(nfes: List[NFeEntity]) -> Tuple[ShardResult, Dict[str, Any]]:
+    """Como _run_shard, devolvendo também as medições do bloco (RunProfiler)"""
+    with RunProfiler("worker_shard") as profiler:
+        result = _validate_shard_with_stats(_worker_pipeline, nfes)
+    return result, profiler.export_state()
+
+
+class ParallelValidationEngine:
+    """
+    Motor de validação em lote com ProcessPoolExecutor
+
+    Uso:
+        with ParallelValidationEngine.from_repository(repo) as engine:
+            for nfe in engine.iter_validate(parser.iter_nfes(path)):
+                ...
+    """
+
+    # Lotes menores que isso são validados no próprio processo
+    DEFAULT_INLINE_THRESHOLD = 200
+
+    # NF-es por bloco enviado a um worker
+    DEFAULT_SHARD_SIZE = 128
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        inline_threshold: int = DEFAULT_INLINE_THRESHOLD,
+        use_local_csv: bool = True,
+        repository: Optional[FiscalRepository] = None
+    ):
+        """
+        Inicializar motor
+
+        Args:
+            db_path: Caminho para rules.db (default: do repository ou padrão)
+            max_workers: Número de processos (default: os.cpu_count())
+            shard_size: NF-es por bloco
+            inline_threshold: Lotes menores são validados sem processos
+            use_local_csv: Habilitar camada CSV local nos workers
+            repository: Repositório para validação no próprio processo (opcional)
+        """
+        if db_path is None:
+            if repository is not None:
+                db_path = repository.db_path
+            else:
+                with FiscalRepository(use_local_csv=False) as default_repo:
+                    db_path = default_repo.db_path
+
+        self.db_path = str(db_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.shard_size = max(1, shard_size)
+        self.inline_threshold = inline_threshold
+        self.use_local_csv = use_local_csv
+
+        self._repository = repository
+        self._inline_pipeline: Optional[ValidationPipeline] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # NF-es que falharam com erro inesperado
+        self.system_error_count = 0
+
+        # Deduplicação por assinatura (somada entre blocos/workers)
+        self.dedup_items = 0
+        self.dedup_signatures = 0
+
+    @classmethod
+    def from_repository(cls, repository: FiscalRepository, **kwargs) -> 'ParallelValidationEngine':
+        """
+        Criar motor usando o mesmo database de um repositório existente
+
+        Args:
+            repository: FiscalRepository da aplicação
+            **kwargs: Demais parâmetros do construtor
+
+        Returns:
+            ParallelValidationEngine
+        """
+        kwargs.setdefault('use_local_csv', repository.local_repo is not None)
+        return cls(db_path=repository.db_path, repository=repository, **kwargs)
+
+    # =====================================================
+    # Ciclo de vida
+    # =====================================================
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.db_path, self.use_local_csv)
+            )
+        return self._executor
+
+    def _get_inline_pipeline(self) -> ValidationPipeline:
+        if self._inline_pipeline is None:
+            repo = self._repository or FiscalRepository(
+                self.db_path, use_local_csv=self.use_local_csv, read_only=True
+            )
+            self._inline_pipeline = ValidationPipeline(repo)
+        return self._inline_pipeline
+
+    def close(self):
+        """Encerrar processos do pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        """Context manager enter"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+
+    # =====================================================
+    # Validação
+    # =====================================================
+
+    def validate_batch(
+        self,
+        nfes: Sequence[NFeEntity],
+        progress_callback: Optional[ProgressCallback] = None,
+        on_error: Optional[ErrorCallback] = None
+    ) -> List[NFeEntity]:
+        """
+        Validar lote de NF-es
+
+        Args:
+            nfes: NF-es a validar
+            progress_callback: Callback (concluídas, total)
+            on_error: Callback (nfe, mensagem) para erros de sistema
+
+        Returns:
+            Lista de NF-es validadas, na mesma ordem de entrada
+        """
+        return list(self.iter_validate(nfes, progress_callback, on_error, total=len(nfes)))
+
+    def iter_validate(
+        self,
+        nfes: Iterable[NFeEntity],
+        progress_callback: Optional[ProgressCallback] = None,
+        on_error: Optional[ErrorCallback] = None,
+        total: Optional[int] = None
+    ) -> Iterator[NFeEntity]:
+        """
+        Validar NF-es de um iterável (lista ou stream), entregando em ordem
+
+        Args:
+            nfes: Iterável de NFeEntity (ex.: NFeCSVParser.iter_nfes)
+            progress_callback: Callback (concluídas, total)
+            on_error: Callback (nfe, mensagem) para erros de sistema
+            total: Total esperado (para progresso), se conhecido
+
+        Yields:
+            NFeEntity validada, na ordem de entrada
+        """
+        if total is None and hasattr(nfes, '__len__'):
+            total = len(nfes)
+
+        inline = self.max_workers <= 1 or (total is not None and total < self.inline_threshold)
+        if inline:
+            yield from self._iter_inline(nfes, progress_callback, on_error, total)
+        else:
+            yield from self._iter_parallel(nfes, progress_callback, on_error, total)
+
+        stats = self.dedup_stats()
+        logger.info(
+            f"Deduplicação por assinatura: {stats['items']} itens, "
+            f"{stats['signatures']} resoluções de regras ({stats['dedup_ratio']:.1%} reaproveitado)"
+        )
+
+    def _iter_inline(self, nfes, progress_callback, on_error, total) -> Iterator[NFeEntity]:
+        pipeline = self._get_inline_pipeline()
+        done = 0
+        for shard in self._shards(nfes):
+            results, stats = _validate_shard_with_stats(pipeline, shard)
+            self._add_dedup_stats(stats)
+            for nfe, (_, message) in zip(shard, results):
+                self._handle_system_error(nfe, message, on_error)
+                done += 1
+                yield nfe
+            if progress_callback:
+                progress_callback(done, total)
+
+    def _iter_parallel(self, nfes, progress_callback, on_error, total) -> Iterator[NFeEntity]:
+        executor = self._get_executor()
+        profiler = current_profiler()
+        run_shard = _run_shard if profiler is None else _run_shard_profiled
+        shards_iter = self._shards(nfes)
+        max_in_flight = self.max_workers * 2
+
+        pending: Dict = {}                   # future -> índice do bloco
+        shards: Dict[int, List[NFeEntity]] = {}
+        completed: Dict[int, list] = {}
+        next_submit = 0
+        next_yield = 0
+        done = 0
+        exhausted = False
+
+        try:
+            while True:
+                # Manter número limitado de blocos em andamento
+                while not exhausted and len(pending) < max_in_flight:
+                    shard = next(shards_iter, None)
+                    if shard is None:
+                        exhausted = True
+                        break
+                    shards[next_submit] = shard
+                    pending[executor.submit(run_shard, shard)] = next_submit
+                    next_submit += 1
+
+                if not pending and next_yield == next_submit:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = pending.pop(future)
+                    result = future.result()
+                    if profiler is not None:
+                        result, state = result
+                        profiler.merge(state)
+                    completed[index], stats = result
+                    self._add_dedup_stats(stats)
+                    done += len(shards[index])
+                if progress_callback:
+                    progress_callback(done, total)
+
+                # Entregar blocos concluídos em ordem
+                while next_yield in completed:
+                    results = completed.pop(next_yield)
+                    for nfe, (errors, message) in zip(shards.pop(next_yield), results):
+                        nfe.extend_errors(errors)
+                        nfe.finish_validation()  # Status do worker não volta ao processo pai
+                        self._handle_system_error(nfe, message, on_error)
+                        yield nfe
+                    next_yield += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _shards(self, nfes: Iterable[NFeEntity]) -> Iterator[List[NFeEntity]]:
+        iterator = iter(nfes)
+        while True:
+            shard = list(islice(iterator, self.shard_size))
+            if not shard:
+                return
+            yield shard
+
+    def _add_dedup_stats(self, stats: Tuple[int, int]):
+        items, signatures = stats
+        self.dedup_items += items
+        self.dedup_signatures += signatures
+
+    def dedup_stats(self) -> Dict[str, Any]:
+        """
+        Estatísticas de deduplicação por assinatura
+
+        Cada worker mantém seu próprio cache: signatures é o total de
+        resoluções de regras efetivamente executadas.
+
+        Returns:
+            Dict com items, signatures e dedup_ratio
+        """
+        ratio = 1 - self.dedup_signatures / self.dedup_items if self.dedup_items else 0.0
+        return {
+            'items': self.dedup_items,
+            'signatures': self.dedup_signatures,
+            'dedup_ratio': ratio
+        }
+
+    def _handle_system_error(self, nfe: NFeEntity, message: Optional[str], on_error):
+        if message is None:
+            return
+        self.system_error_count += 1
+        if on_error is not None:
+            on_error(nfe, message)
@@ -15,13 +15,14 @@ Incluir:
 
 import json
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 from decimal import Decimal
 
 from ...domain.entities.nfe_entity import (
     NFeEntity, AuditReport, ValidationError, Severity
 )
+from ...profiling import timed
 
 
 class NumpyEncoder(json.JSONEncoder):
@@ -41,9 +42,23 @@ class NumpyEncoder(json.JSONEncoder):
 class ReportGenerator:
     """Gerador de relatórios de auditoria fiscal"""
 
-    def __init__(self, version: str = "1.0.0-mvp"):
+    def __init__(self, version: str = "1.0.0-mvp",
+                 citation_resolver: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            version: Versão do relatório
+            citation_resolver: Função código -> citação legal, usada para
+                erros que trazem apenas legal_reference_code
+                (ex.: FiscalRepository.format_legal_citation)
+        """
         self.version = version
+        self.citation_resolver = citation_resolver
+
+    def _legal_reference(self, error: ValidationError) -> str:
+        """Citação legal do erro, resolvida no momento da renderização"""
+        return error.resolve_legal_reference(self.citation_resolver)
 
+    @timed
     def generate_json_report(self, nfe: NFeEntity) -> Dict:
         """
         Gerar relatório JSON estruturado
@@ -118,6 +133,7 @@ class ReportGenerator:
 
         return report
 
+    @timed
     def generate_markdown_report(self, nfe: NFeEntity) -> str:
         """
         Gerar relatório Markdown para leitura humana
@@ -238,7 +254,7 @@ class ReportGenerator:
                             md.append(f"**💵 Impacto:** R$ {error.financial_impact:,.2f}  ")
 
                         # Base Legal
-                        md.append(f"\n📚 **Base Legal:** {error.legal_reference}")
+                        md.append(f"\n📚 **Base Legal:** {self._legal_reference(error)}")
                         if error.legal_article:
                             md.append(f" - {error.legal_article}")
 
@@ -328,7 +344,8 @@ class ReportGenerator:
                 'actual_value': str(e.actual_value) if e.actual_value else None,
                 'expected_value': str(e.expected_value) if e.expected_value else None,
                 'suggestion': str(e.suggestion) if e.suggestion else None,
-                'legal_reference': str(e.legal_reference) if e.legal_reference else None,
+                'legal_reference': self._legal_reference(e) or None,
+                'legal_reference_code': str(e.legal_reference_code) if e.legal_reference_code else None,
                 'legal_article': str(e.legal_article) if e.legal_article else None,
                 'financial_impact': float(e.financial_impact) if e.financial_impact else 0.0,
                 'can_auto_correct': bool(e.can_auto_correct),
@@ -364,14 +381,15 @@ class ReportGenerator:
         """Extrair referências legais únicas"""
         refs = {}
         for error in errors:
-            if error.legal_reference and error.legal_reference not in refs:
-                refs[error.legal_reference] = {
-                    'reference': error.legal_reference,
+            reference = self._legal_reference(error)
+            if reference and reference not in refs:
+                refs[reference] = {
+                    'reference': reference,
                     'article': error.legal_article,
                     'occurrences': 1
                 }
-            elif error.legal_reference:
-                refs[error.legal_reference]['occurrences'] += 1
+            elif reference:
+                refs[reference]['occurrences'] += 1
 
         return list(refs.values())
 
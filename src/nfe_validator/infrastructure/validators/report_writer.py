@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Report Writers - Relatórios gravados em streaming, uma NF-e por vez
+
+Para lotes grandes (200k NF-es), montar o relatório inteiro em memória
+(lista de dicts + json.dump, ou uma única string Markdown) antes de gravar
+ocupa mais memória que as próprias NF-es. Os writers gravam cada NF-e assim
+que ela é validada; em memória ficam só os totais do lote.
+
+Formatos:
+- jsonl:    JSON Lines / NDJSON, um relatório (generate_json_report) por linha
+- json:     Array JSON (mesmo conteúdo do jsonl, gravado incrementalmente)
+- markdown: Relatório das NF-es com erros, com resumo do lote no final
+- csv:      Tabela de erros (uma linha por erro, colunas ERROR_COLUMNS)
+
+Compressão opcional: gzip (biblioteca padrão) ou zstd (pacote zstandard).
+
+Uso:
+    with open_report_writer('jsonl', 'resultado.jsonl', generator, compression='gzip') as writer:
+        for nfe in writer.tee(engine.iter_validate(nfes)):
+            ...
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+from ...domain.entities.nfe_entity import NFeEntity, Severity
+from ...domain.services.aggregation import ValidationAggregate
+from .report_generator import ReportGenerator, NumpyEncoder
+
+
+# Compressões aceitas e extensão acrescentada ao arquivo
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Colunas da tabela de erros (CSV e Parquet da linha de comando)
+ERROR_COLUMNS = [
+    'arquivo', 'chave_acesso', 'numero_nfe', 'data_emissao', 'uf_emitente', 'uf_destinatario',
+    'item_numero', 'code', 'severity', 'field', 'message', 'expected_value', 'actual_value',
+    'legal_reference', 'financial_impact',
+]
+
+
+def require_zstd():
+    """
+    Módulo zstandard (import sob demanda)
+
+    Raises:
+        ImportError: zstandard não instalado
+    """
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Compressão zstd requer o pacote zstandard (pip install zstandard)"
+        ) from e
+    return zstandard
+
+
+def compressed_path(path: Union[str, Path], compression: Optional[str]) -> Path:
+    """Caminho com a extensão da compressão (resultado.jsonl -> resultado.jsonl.gz)"""
+    path = Path(path)
+    suffix = COMPRESSION_SUFFIXES.get(compression, '') if compression else ''
+    if suffix and path.suffix != suffix:
+        path = path.with_name(path.name + suffix)
+    return path
+
+
+def open_text_output(path: Union[str, Path], compression: Optional[str] = None) -> TextIO:
+    """
+    Abrir arquivo de texto UTF-8 para escrita, com compressão opcional
+
+    Args:
+        path: Arquivo de saída
+        compression: None, 'gzip' ou 'zstd'
+
+    Returns:
+        Stream de texto (fechar com close)
+    """
+    if compression is None:
+        return open(path, 'w', encoding='utf-8', newline='')
+    if compression == 'gzip':
+        # Nível 6: bem mais rápido que o padrão (9), tamanho próximo
+        return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    if compression == 'zstd':
+        zstandard = require_zstd()
+        raw = open(path, 'wb')
+        try:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        except BaseException:
+            raw.close()
+            raise
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    raise ValueError(f"Compressão não suportada: {compression} (use {', '.join(COMPRESSION_SUFFIXES)})")
+
+
+def error_rows(nfe: NFeEntity, source: Optional[str] = '',
+               citation_resolver: Optional[Callable[[str], str]] = None) -> Iterator[Tuple]:
+    """
+    Linhas da tabela de erros de uma NF-e (na ordem de ERROR_COLUMNS)
+
+    Args:
+        nfe: NF-e validada
+        source: Nome do arquivo de origem (None = csv_source['file'] da
+            NF-e, ex.: CSV de origem dentro de um ZIP)
+        citation_resolver: Função código -> citação legal
+
+    Returns:
+        Iterador de tuplas, uma por erro
+    """
+    if source is None:
+        source = (nfe.csv_source or {}).get('file', '')
+    data_emissao = nfe.data_emissao.date().isoformat() if nfe.data_emissao else None
+    for error in nfe.validation_errors:
+        yield (
+            source, nfe.chave_acesso, nfe.numero, data_emissao,
+            nfe.emitente.uf, nfe.destinatario.uf,
+            error.item_numero, error.code, error.severity.value, error.field, error.message,
+            error.expected_value, error.actual_value,
+            error.resolve_legal_reference(citation_resolver),
+            float(error.financial_impact) if error.financial_impact is not None else None,
+        )
+
+
+class ReportStreamWriter:
+    """
+    Base dos writers em streaming: abre o arquivo, grava NF-e a NF-e e
+    acumula os totais do lote (sem guardar as NF-es)
+    """
+
+    format = ''
+
+    def __init__(self, path: Union[str, Path], generator: Optional[ReportGenerator] = None,
+                 compression: Optional[str] = None):
+        """
+        Args:
+            path: Arquivo de saída (a extensão da compressão é acrescentada)
+            generator: ReportGenerator (citações legais, versão)
+            compression: None, 'gzip' ou 'zstd'
+        """
+        self.path = compressed_path(path, compression)
+        self.generator = generator or ReportGenerator()
+        self.compression = compression
+
+        # Totais do lote (sem guardar as NF-es)
+        self.aggregate = ValidationAggregate(keep_nfes=False)
+
+        self._file = open_text_output(self.path, compression)
+        self._start()
+
+    def write(self, nfe: NFeEntity):
+        """Gravar uma NF-e validada"""
+        self.aggregate.add(nfe)
+        self._write(nfe)
+
+    @property
+    def nfes(self) -> int:
+        """NF-es gravadas"""
+        return self.aggregate.nfes
+
+    def write_all(self, nfes: Iterable[NFeEntity]) -> int:
+        """Gravar NF-es (aceita iteradores); retorna a quantidade gravada"""
+        before = self.nfes
+        for nfe in nfes:
+            self.write(nfe)
+        return self.nfes - before
+
+    def tee(self, nfes: Iterable[NFeEntity]) -> Iterator[NFeEntity]:
+        """Gravar cada NF-e e repassá-la adiante (ex.: sobre iter_validate)"""
+        for nfe in nfes:
+            self.write(nfe)
+            yield nfe
+
+    def summary(self) -> Dict[str, Any]:
+        """Totais do lote gravado"""
+        return self.aggregate.to_dict()
+
+    def close(self):
+        """Finalizar e fechar o arquivo"""
+        if self._file is None:
+            return
+        try:
+            self._finish()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        """Context manager enter"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+
+    # Ganchos dos formatos
+    def _start(self):
+        pass
+
+    def _write(self, nfe: NFeEntity):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+
+class JSONLinesReportWriter(ReportStreamWriter):
+    """JSON Lines (NDJSON): um relatório JSON por linha"""
+
+    format = 'jsonl'
+
+    def _write(self, nfe: NFeEntity):
+        self._file.write(json.dumps(
+            self.generator.generate_json_report(nfe),
+            ensure_ascii=False, cls=NumpyEncoder, separators=(',', ':')
+        ))
+        self._file.write('\n')
+
+
+class JSONArrayReportWriter(ReportStreamWriter):
+    """Array JSON de relatórios, gravado elemento a elemento"""
+
+    format = 'json'
+
+    def _start(self):
+        self._file.write('[\n')
+
+    def _write(self, nfe: NFeEntity):
+        if self.nfes > 1:
+            self._file.write(',\n')
+        json.dump(self.generator.generate_json_report(nfe), self._file,
+                  ensure_ascii=False, cls=NumpyEncoder)
+
+    def _finish(self):
+        self._file.write('\n]\n' if self.nfes else ']\n')
+
+
+class MarkdownReportWriter(ReportStreamWriter):
+    """Relatório Markdown das NF-es com erros; resumo do lote ao final"""
+
+    format = 'markdown'
+
+    def __init__(self, path: Union[str, Path], generator: Optional[ReportGenerator] = None,
+                 compression: Optional[str] = None, title: str = "Validação de NF-es"):
+        """
+        Args:
+            path: Arquivo de saída
+            generator: ReportGenerator
+            compression: None, 'gzip' ou 'zstd'
+            title: Título do relatório
+        """
+        self.title = title
+        super().__init__(path, generator, compression)
+
+    def _start(self):
+        self._file.write(f"# {self.title}\n\n")
+        self._file.write(f"**Data:** {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n---\n\n")
+
+    def _write(self, nfe: NFeEntity):
+        if not nfe.validation_errors:
+            return
+        self._file.write(self.generator.generate_markdown_report(nfe))
+        self._file.write("\n\n---\n\n")
+
+    def _finish(self):
+        # Totais só são conhecidos após a última NF-e
+        aggregate = self.aggregate
+        self._file.write("## Resumo do Lote\n\n")
+        self._file.write(f"**NF-es:** {aggregate.nfes}  \n")
+        self._file.write(f"**NF-es com problemas:** {aggregate.nfes_with_errors}  \n")
+        for severity in (Severity.CRITICAL, Severity.ERROR, Severity.WARNING, Severity.INFO):
+            self._file.write(f"**{severity.value}:** {aggregate.severity_count(severity)}  \n")
+        self._file.write(f"**Impacto financeiro:** R$ {aggregate.financial_impact:,.2f}\n")
+
+
+class CSVErrorReportWriter(ReportStreamWriter):
+    """Tabela de erros em CSV (uma linha por erro, colunas ERROR_COLUMNS)"""
+
+    format = 'csv'
+
+    def __init__(self, path: Union[str, Path], generator: Optional[ReportGenerator] = None,
+                 compression: Optional[str] = None, source: Optional[str] = ''):
+        """
+        Args:
+            path: Arquivo de saída
+            generator: ReportGenerator (citation_resolver das citações legais)
+            compression: None, 'gzip' ou 'zstd'
+            source: Nome do arquivo de origem (coluna 'arquivo'; None = origem
+                de cada NF-e, ver error_rows)
+        """
+        self.source = source
+        super().__init__(path, generator, compression)
+
+    def _start(self):
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(ERROR_COLUMNS)
+
+    def _write(self, nfe: NFeEntity):
+        self._csv.writerows(error_rows(nfe, self.source, self.generator.citation_resolver))
+
+
+# Writer por formato
+REPORT_WRITERS = {
+    writer.format: writer
+    for writer in (JSONLinesReportWriter, JSONArrayReportWriter, MarkdownReportWriter, CSVErrorReportWriter)
+}
+
+
+def open_report_writer(format: str, path: Union[str, Path], generator: Optional[ReportGenerator] = None,
+                       compression: Optional[str] = None, **kwargs) -> ReportStreamWriter:
+    """
+    Abrir writer do formato
+
+    Args:
+        format: 'jsonl', 'json', 'markdown' ou 'csv'
+        path: Arquivo de saída
+        generator: ReportGenerator
+        compression: None, 'gzip' ou 'zstd'
+        **kwargs: title (markdown), source (csv)
+
+    Returns:
+        ReportStreamWriter (usar como context manager)
+    """
+    try:
+        writer_class = REPORT_WRITERS[format]
+    except KeyError:
+        raise ValueError(f"Formato não suportado: {format} (use {', '.join(REPORT_WRITERS)})")
+    return writer_class(path, generator, compression, **kwargs)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentação por etapa da validação de NF-e
+
+Timers (decorator / context manager) e contadores agregados por execução:
+
+    with RunProfiler("lote_janeiro", logger=app_logger) as profiler:
+        nfes = parser.parse_csv(path)
+        ...
+    profiler.summary()          # dict: chamadas, total, média, p95, contadores
+    profiler.write_json(path)   # resumo da execução em JSON
+
+O profiler ativo é guardado em um ContextVar: sem profiler ativo, os
+pontos instrumentados custam apenas uma leitura do ContextVar. Ao sair do
+bloco, o resumo é enviado ao StructuredLogger (log_performance), se
+informado.
+
+Etapas instrumentadas: ColumnMapper.map_columns, NFeCSVParser (parse_csv,
+normalização, montagem), validate de cada validador, métodos de consulta
+do FiscalRepository, geração de relatórios e ValidationPipeline.validate.
+Com ParallelValidationEngine, as medições dos workers são somadas ao
+profiler do processo principal.
+"""
+
+import functools
+import json
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+
+# Profiler ativo (None: pontos instrumentados não medem nada)
+_current: ContextVar[Optional['RunProfiler']] = ContextVar('nfe_run_profiler', default=None)
+
+
+class StageStats:
+    """Tempos de uma etapa (amostra limitada para o percentil)"""
+
+    # Durações guardadas por etapa (amostragem reservatório acima disso)
+    MAX_SAMPLES = 4096
+
+    __slots__ = ('calls', 'total', 'samples', '_rng')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+        self._rng = random.Random(0)
+
+    def add(self, duration: float):
+        self.calls += 1
+        self.total += duration
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append(duration)
+        else:
+            slot = self._rng.randrange(self.calls)
+            if slot < self.MAX_SAMPLES:
+                self.samples[slot] = duration
+
+    def merge(self, calls: int, total: float, samples: List[float]):
+        """Somar medições de outro processo"""
+        self.calls += calls
+        self.total += total
+        room = self.MAX_SAMPLES - len(self.samples)
+        self.samples.extend(samples[:room])
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'total_s': round(self.total, 6),
+            'mean_ms': round(self.total / self.calls * 1000, 4) if self.calls else 0.0,
+            'p95_ms': round(self.percentile(0.95) * 1000, 4),
+        }
+
+
+class RunProfiler:
+    """Medições agregadas de uma execução (parse + validação + relatórios)"""
+
+    def __init__(self, name: str = "nfe_validation", logger=None):
+        """
+        Args:
+            name: Nome da execução (resumo e log)
+            logger: StructuredLogger (ou objeto com log_performance) que
+                recebe o resumo ao final
+        """
+        self.name = name
+        self.logger = logger
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.started_at: Optional[datetime] = None
+        self.wall_time = 0.0
+        self._start: Optional[float] = None
+        self._token = None
+
+    # -------------------------------------------------
+    # Ativação
+    # -------------------------------------------------
+
+    def __enter__(self) -> 'RunProfiler':
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.wall_time += time.perf_counter() - self._start
+        _current.reset(self._token)
+        self._token = None
+        self.log_summary()
+
+    # -------------------------------------------------
+    # Registro
+    # -------------------------------------------------
+
+    def record(self, stage: str, duration: float):
+        """Registrar uma chamada da etapa"""
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.add(duration)
+
+    def count(self, counter: str, n: int = 1):
+        """Incrementar contador (ex.: acertos de cache)"""
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def export_state(self) -> Dict[str, Any]:
+        """Estado serializável (enviado pelos workers ao processo principal)"""
+        return {
+            'stages': {
+                name: (stats.calls, stats.total, stats.samples)
+                for name, stats in self.stages.items()
+            },
+            'counters': dict(self.counters),
+        }
+
+    def merge(self, state: Dict[str, Any]):
+        """Somar estado exportado por outro profiler"""
+        for name, (calls, total, samples) in state['stages'].items():
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.merge(calls, total, samples)
+        for name, n in state['counters'].items():
+            self.count(name, n)
+
+    # -------------------------------------------------
+    # Resumo
+    # -------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resumo da execução
+
+        Returns:
+            Dict com run, started_at, wall_time_s, stages (por etapa: calls,
+            total_s, mean_ms, p95_ms; ordenado por tempo total) e counters
+        """
+        wall_time = self.wall_time
+        if self._token is not None:  # Ainda ativo: tempo decorrido até agora
+            wall_time += time.perf_counter() - self._start
+        ordered = sorted(self.stages.items(), key=lambda kv: kv[1].total, reverse=True)
+        return {
+            'run': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds') if self.started_at else None,
+            'wall_time_s': round(wall_time, 6),
+            'stages': {name: stats.to_dict() for name, stats in ordered},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2, ensure_ascii=False)
+
+    def write_json(self, path: Union[str, Path]):
+        """Gravar resumo da execução em JSON"""
+        Path(path).write_text(self.to_json(), encoding='utf-8')
+
+    def log_summary(self):
+        """Enviar resumo ao StructuredLogger (se configurado)"""
+        if self.logger is None:
+            return
+        summary = self.summary()
+        self.logger.log_performance(
+            self.name,
+            summary['wall_time_s'],
+            stages=summary['stages'],
+            counters=summary['counters']
+        )
+
+
+# =====================================================
+# Pontos de instrumentação
+# =====================================================
+
+def current_profiler() -> Optional[RunProfiler]:
+    """Profiler ativo no contexto atual (ou None)"""
+    return _current.get()
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Medir bloco como uma chamada da etapa (sem custo sem profiler ativo)"""
+    profiler = _current.get()
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(stage, time.perf_counter() - start)
+
+
+def timed(stage: Union[str, Callable, None] = None):
+    """
+    Decorator que mede cada chamada da função
+
+    Uso:
+        @timed                       # etapa = Classe.metodo
+        @timed("parser.parse_csv")   # nome explícito
+    """
+    def decorate(func: Callable) -> Callable:
+        name = stage if isinstance(stage, str) else func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _current.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, time.perf_counter() - start)
+        return wrapper
+
+    if callable(stage):
+        return decorate(stage)
+    return decorate
+
+
+def count(counter: str, n: int = 1):
+    """Incrementar contador no profiler ativo (ignorado sem profiler)"""
+    profiler = _current.get()
+    if profiler is not None:
+        profiler.count(counter, n)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite Connection Pool - Conexões somente leitura para o rules.db
+
+Validações concorrentes (sessões do Streamlit, threads da linha de comando)
+compartilhavam uma única conexão do FiscalRepository, aberta com
+check_same_thread=False e sem nenhum lock. O pool mantém até `size`
+conexões somente leitura, cada uma usada por uma thread por vez:
+
+- URI mode=ro (e immutable=1, opcional, quando nenhum processo grava o
+  arquivo enquanto o pool existe)
+- PRAGMA query_only, mmap_size e cache_size em cada conexão
+- Cache de statements preparados do sqlite3 (cached_statements): a mesma
+  consulta reaproveita o statement compilado enquanto a conexão vive no pool
+
+Uso:
+    pool = SQLiteConnectionPool("rules.db")
+    with pool.connection() as conn:
+        row = conn.execute("SELECT ...", params).fetchone()
+    pool.close()
+
+Chamadas aninhadas na mesma thread reutilizam a conexão já emprestada.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+
+class SQLiteConnectionPool:
+    """Pool limitado de conexões SQLite somente leitura (thread-safe)"""
+
+    DEFAULT_SIZE = 8
+
+    # Leitura do arquivo via mmap (bytes) e cache de páginas (KiB, valor negativo)
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KB = 16 * 1024
+
+    # Statements preparados mantidos por conexão
+    CACHED_STATEMENTS = 256
+
+    def __init__(self, db_path: Union[str, Path], size: int = DEFAULT_SIZE,
+                 immutable: bool = False, timeout: Optional[float] = 30.0):
+        """
+        Inicializar pool (conexões abertas sob demanda)
+
+        Args:
+            db_path: Caminho do database
+            size: Máximo de conexões abertas
+            immutable: Abrir com immutable=1 (sem locks nem verificação de
+                alterações; só é seguro se o arquivo não muda enquanto o
+                pool existe)
+            timeout: Segundos aguardando uma conexão livre (None = sem limite)
+        """
+        if size < 1:
+            raise ValueError("size deve ser >= 1")
+        self.db_path = str(db_path)
+        self.size = size
+        self.immutable = immutable
+        self.timeout = timeout
+
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        self._available = threading.Condition(threading.Lock())
+        self._held = threading.local()
+        self._closed = False
+
+    @property
+    def uri(self) -> str:
+        """URI somente leitura do database"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+
+    def _open(self) -> sqlite3.Connection:
+        """Abrir conexão somente leitura com os PRAGMAs de leitura"""
+        # check_same_thread=False: a conexão muda de thread entre empréstimos
+        # (nunca é usada por duas threads ao mesmo tempo)
+        conn = sqlite3.connect(
+            self.uri, uri=True, check_same_thread=False,
+            cached_statements=self.CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.MMAP_SIZE)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.CACHE_SIZE_KB)}")
+        return conn
+
+    # =====================================================
+    # Empréstimo
+    # =====================================================
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Obter conexão livre (abre uma nova se houver vaga; senão aguarda)
+
+        Returns:
+            Conexão SQLite (devolver com release)
+
+        Raises:
+            sqlite3.OperationalError: Pool fechado ou tempo de espera esgotado
+        """
+        with self._available:
+            while True:
+                if self._closed:
+                    raise sqlite3.OperationalError("Pool de conexões fechado")
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._all) < self.size:
+                    # Reserva a vaga antes de abrir (fora do lock)
+                    self._all.append(None)
+                    break
+                if not self._available.wait(self.timeout):
+                    raise sqlite3.OperationalError(
+                        f"Nenhuma conexão livre em {self.timeout}s (size={self.size})"
+                    )
+
+        try:
+            conn = self._open()
+        except BaseException:
+            with self._available:
+                self._all.remove(None)
+                self._available.notify()
+            raise
+
+        with self._available:
+            self._all[self._all.index(None)] = conn
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Devolver conexão ao pool (fechada se o pool já foi fechado)"""
+        with self._available:
+            if self._closed:
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._available.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Emprestar conexão durante o bloco
+
+        Na mesma thread, blocos aninhados recebem a mesma conexão (sem
+        consumir outra vaga do pool).
+        """
+        conn = getattr(self._held, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self.acquire()
+        self._held.conn = conn
+        try:
+            yield conn
+        finally:
+            self._held.conn = None
+            self.release(conn)
+
+    # =====================================================
+    # Estado
+    # =====================================================
+
+    @property
+    def open_connections(self) -> int:
+        """Conexões abertas (livres + emprestadas)"""
+        with self._available:
+            return sum(1 for conn in self._all if conn is not None)
+
+    def close(self):
+        """Fechar conexões livres; as emprestadas são fechadas ao serem devolvidas"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self) -> 'SQLiteConnectionPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Effective Index - Regras por período de vigência (valid_from / valid_until)
+
+As regras com vigência (ncm_rules, state_overrides) são organizadas por
+chave em segmentos de datas: cada segmento guarda as regras vigentes do
+seu início até o início do próximo. "Regras da chave X na data D" é uma
+busca binária (bisect) nos inícios dos segmentos, sem consulta SQL.
+
+Intervalos são inclusivos nas duas pontas; datas ausentes significam
+vigência aberta (desde sempre / sem fim).
+
+Uso:
+    index = EffectiveIndex()
+    index.add('17019900', regra, '2023-01-01', None)
+    index.build()
+    index.at('17019900', date(2024, 5, 1))   # -> (regra,)
+"""
+
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def to_date(value: Any) -> Optional[date]:
+    """
+    Converter valor de data (date, datetime ou texto ISO) para date
+
+    Args:
+        value: Data (ex.: NFeEntity.data_emissao, '2023-01-01' do SQLite)
+
+    Returns:
+        date, ou None se vazio ou inválido
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+class EffectiveIndex:
+    """
+    Regras por chave e período de vigência
+
+    Após build(), cada chave tem inícios de segmento ordenados (bisect) e a
+    tupla de regras vigentes em cada segmento, na ordem em que foram
+    adicionadas.
+    """
+
+    def __init__(self):
+        self._intervals: Dict[Hashable, List[Tuple[date, Optional[date], Any]]] = {}
+        self._starts: Dict[Hashable, List[date]] = {}
+        self._segments: Dict[Hashable, List[Tuple[Any, ...]]] = {}
+
+    def add(self, key: Hashable, row: Any, valid_from: Any = None, valid_until: Any = None):
+        """
+        Adicionar regra com vigência
+
+        Args:
+            key: Chave de consulta (ex.: NCM, UF)
+            row: Regra
+            valid_from: Início da vigência (None = desde sempre)
+            valid_until: Fim da vigência, inclusive (None = sem fim)
+        """
+        start = to_date(valid_from) or date.min
+        end = to_date(valid_until)
+        if end is not None and end < start:
+            return  # Intervalo vazio
+        self._intervals.setdefault(key, []).append((start, end, row))
+
+    def build(self) -> 'EffectiveIndex':
+        """Compilar segmentos de cada chave (chamado após todos os add)"""
+        self._starts.clear()
+        self._segments.clear()
+        for key, intervals in self._intervals.items():
+            starts, segments = [], []
+            for boundary in self._boundaries(intervals):
+                rules = tuple(
+                    row for start, end, row in intervals
+                    if start <= boundary and (end is None or end >= boundary)
+                )
+                if segments and segments[-1] == rules:
+                    continue  # Mesmas regras do segmento anterior
+                starts.append(boundary)
+                segments.append(rules)
+            self._starts[key] = starts
+            self._segments[key] = segments
+        return self
+
+    @staticmethod
+    def _boundaries(intervals) -> List[date]:
+        """Datas em que o conjunto de regras vigentes pode mudar"""
+        boundaries = {date.min}
+        for start, end, _ in intervals:
+            boundaries.add(start)
+            if end is not None and end < date.max:
+                boundaries.add(end + timedelta(days=1))
+        return sorted(boundaries)
+
+    def boundaries(self) -> Tuple[date, ...]:
+        """Inícios de segmento de todas as chaves, ordenados"""
+        return tuple(sorted({start for starts in self._starts.values() for start in starts}))
+
+    def at(self, key: Hashable, on: date) -> Tuple[Any, ...]:
+        """
+        Regras da chave vigentes na data
+
+        Args:
+            key: Chave de consulta
+            on: Data de referência
+
+        Returns:
+            Tupla de regras (vazia se nenhuma vigente)
+        """
+        starts = self._starts.get(key)
+        if not starts:
+            return ()
+        return self._segments[key][bisect_right(starts, on) - 1]
+
+    def keys(self):
+        return self._starts.keys()
+
+    def __len__(self) -> int:
+        return len(self._starts)
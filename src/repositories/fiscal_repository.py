@@ -11,10 +11,24 @@ Métodos para consulta das regras de validação:
 """
 
 import sqlite3
-from typing import Optional, Dict, List, Any
+import threading
+from typing import Optional, Dict, List, Any, Tuple
 from pathlib import Path
 from datetime import date
 
+from .connection_pool import SQLiteConnectionPool
+from .effective_index import to_date
+from .rule_snapshot import RuleSnapshot
+from .keyword_index import KeywordIndex
+
+import sys
+if True:  # Path setup for imports
+    src_root = Path(__file__).parent.parent
+    if str(src_root) not in sys.path:
+        sys.path.insert(0, str(src_root))
+
+from nfe_validator.profiling import timed, count
+
 
 class FiscalRepository:
     """
@@ -22,9 +36,15 @@ class FiscalRepository:
 
     Provê interface para queries no rules.db
     Suporta consulta em camadas: CSV Local → SQLite → LLM (opcional)
+
+    Consultas usam o pool de conexões somente leitura (thread-safe); `conn`
+    é a conexão principal (gravável, exceto com read_only) para manutenção
+    do database.
     """
 
-    def __init__(self, db_path: str = None, use_local_csv: bool = True, use_ai_fallback: bool = False):
+    def __init__(self, db_path: str = None, use_local_csv: bool = True, use_ai_fallback: bool = False,
+                 read_only: bool = False, use_snapshot: bool = True,
+                 pool_size: int = SQLiteConnectionPool.DEFAULT_SIZE):
         """
         Inicializar repositório
 
@@ -32,6 +52,10 @@ class FiscalRepository:
             db_path: Caminho para rules.db (default: src/database/rules.db)
             use_local_csv: Habilitar consulta ao CSV local como primeira camada
             use_ai_fallback: Habilitar consulta LLM como última camada (fallback)
+            read_only: Abrir SQLite somente leitura (ex.: workers de validação paralela)
+            use_snapshot: Responder consultas de regras a partir do RuleSnapshot
+                em memória (False consulta o SQLite a cada chamada)
+            pool_size: Máximo de conexões de leitura simultâneas
         """
         if db_path is None:
             # Path padrão relativo ao projeto
@@ -40,8 +64,17 @@ class FiscalRepository:
 
         self.db_path = str(db_path)
         self.conn = None
+        self.pool: Optional[SQLiteConnectionPool] = None
+        self.pool_size = pool_size
         self.use_local_csv = use_local_csv
         self.use_ai_fallback = use_ai_fallback
+        self.read_only = read_only
+        self.use_snapshot = use_snapshot
+        self._snapshot: Optional[RuleSnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        # (snapshot, regras do CSV local, NCM -> (regra, do CSV local?))
+        self._merged_ncm: Optional[Tuple[RuleSnapshot, Optional[Dict], Dict[str, Tuple[Dict, bool]]]] = None
+        self._citation_cache: Optional[Dict[str, str]] = None
 
         # Inicializar repositório CSV local
         self.local_repo = None
@@ -60,13 +93,119 @@ class FiscalRepository:
         """Conectar ao database"""
         try:
             # check_same_thread=False permite uso em múltiplas threads (Streamlit)
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            if self.read_only:
+                uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+                self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row  # Retornar dicts
+            if self.read_only:
+                self.conn.execute("PRAGMA query_only = ON")
         except sqlite3.Error as e:
             raise ConnectionError(f"Erro ao conectar ao database: {e}")
 
+        # Leituras: conexões somente leitura abertas sob demanda (o arquivo
+        # já existe, criado acima se necessário)
+        self.pool = SQLiteConnectionPool(self.db_path, size=self.pool_size)
+
+    # =====================================================
+    # Rule Snapshot
+    # =====================================================
+
+    @property
+    def snapshot(self) -> RuleSnapshot:
+        """Snapshot das regras vigentes (carregado no primeiro acesso)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Threads concorrentes no primeiro acesso carregam uma única vez
+            with self._snapshot_lock:
+                if self._snapshot is None:
+                    with self.pool.connection() as conn:
+                        self._snapshot = RuleSnapshot.load(conn)
+                    count('rule_snapshot.load')
+                snapshot = self._snapshot
+        return snapshot
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Recarregar snapshot se o database mudou (e o CSV local, se alterado)
+
+        Compara a versão do snapshot (linhas de db_metadata) com o database
+        e também recarrega se a data de vigência mudou.
+
+        Returns:
+            True se o snapshot ou as regras do CSV local foram recarregados
+        """
+        local_changed = bool(self.local_repo and self.local_repo.refresh_if_changed())
+        if self._snapshot is not None:
+            with self.pool.connection() as conn:
+                if self._snapshot.is_current(conn):
+                    return local_changed
+        self.reload_rules()
+        return True
+
+    @property
+    def local_rules(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Regras vigentes do CSV local (None se desabilitado; o dict é trocado ao recarregar)"""
+        return self.local_repo.current_rules() if self.local_repo else None
+
+    def _ncm_table(self, snapshot: RuleSnapshot) -> Dict[str, Tuple[Dict[str, Any], bool]]:
+        """
+        Regras de NCM do período corrente com a precedência já resolvida
+
+        CSV local sobre o snapshot, em um único dict; remontado quando o
+        snapshot ou as regras do CSV local são substituídos.
+
+        Returns:
+            NCM -> (regra, True se veio do CSV local)
+        """
+        local_rules = self.local_rules
+        merged = self._merged_ncm
+        if merged is None or merged[0] is not snapshot or merged[1] is not local_rules:
+            table = {ncm: (rule, False) for ncm, rule in snapshot.ncm_rules.items()}
+            table.update((ncm, (rule, True)) for ncm, rule in (local_rules or {}).items())
+            merged = self._merged_ncm = (snapshot, local_rules, table)
+        return merged[2]
+
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """Keywords de NCM compiladas do snapshot vigente"""
+        return self.snapshot.keyword_index
+
+    def rule_period(self, as_of: Any = None) -> Any:
+        """
+        Identificador do período de vigência da data
+
+        Datas com o mesmo identificador resolvem as mesmas regras (usado
+        para agrupar NF-es de datas diferentes em caches de regras).
+
+        Args:
+            as_of: Data de referência (ex.: data de emissão; default: hoje)
+
+        Returns:
+            Número do período (snapshot) ou a própria data (consulta SQL)
+        """
+        if self.use_snapshot:
+            return self.snapshot.period(as_of)
+        return self._as_of(as_of)
+
+    @staticmethod
+    def _as_of(as_of: Any) -> str:
+        """Data de vigência ISO para parâmetro SQL (default: hoje)"""
+        return (to_date(as_of) or date.today()).isoformat()
+
+    def reload_rules(self):
+        """Forçar recarga do snapshot de regras (e do cache de citações)"""
+        with self._snapshot_lock:
+            with self.pool.connection() as conn:
+                self._snapshot = RuleSnapshot.load(conn)
+            self._citation_cache = None
+        count('rule_snapshot.load')
+
     def close(self):
-        """Fechar conexão"""
+        """Fechar conexões (principal e pool)"""
+        if self.pool:
+            self.pool.close()
         if self.conn:
             self.conn.close()
 
@@ -82,7 +221,8 @@ class FiscalRepository:
     # NCM Rules
     # =====================================================
 
-    def get_ncm_rule(self, ncm: str) -> Optional[Dict[str, Any]]:
+    @timed
+    def get_ncm_rule(self, ncm: str, as_of: Any = None) -> Optional[Dict[str, Any]]:
         """
         Obter regra de NCM com consulta em camadas
 
@@ -93,36 +233,59 @@ class FiscalRepository:
 
         Args:
             ncm: Código NCM (8 dígitos)
+            as_of: Data de vigência (ex.: data de emissão da NF-e; default: hoje)
 
         Returns:
             Dict com dados do NCM ou None se não encontrado
         """
+        # Camadas 1 e 2 já resolvidas em um único dict (período corrente)
+        if self.use_snapshot:
+            snapshot = self.snapshot
+            if snapshot.in_current_period(as_of):
+                entry = self._ncm_table(snapshot).get(ncm)
+                if entry is None:
+                    return None
+                rule, local = entry
+                if local:
+                    count('local_csv.ncm_hit')
+                    return rule
+                return dict(rule)
+
         # Camada 1: Consultar CSV local primeiro
         if self.local_repo and self.local_repo.is_available():
             rule = self.local_repo.get_ncm_rule(ncm)
             if rule:
+                count('local_csv.ncm_hit')
                 return rule
 
-        # Camada 2: Consultar SQLite
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                ncm,
-                description,
-                category,
-                ipi_rate,
-                is_ipi_exempt,
-                pis_cofins_regime,
-                keywords,
-                product_type,
-                sector,
-                notes
-            FROM ncm_rules
-            WHERE ncm = ?
-              AND (valid_until IS NULL OR valid_until >= DATE('now'))
-        """, (ncm,))
-
-        row = cursor.fetchone()
+        # Camada 2: Consultar snapshot em memória (ou SQLite)
+        if self.use_snapshot:
+            rule = self.snapshot.ncm_rule(ncm, as_of)
+            return dict(rule) if rule else None
+
+        as_of = self._as_of(as_of)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    ncm,
+                    description,
+                    category,
+                    ipi_rate,
+                    is_ipi_exempt,
+                    pis_cofins_regime,
+                    keywords,
+                    product_type,
+                    sector,
+                    notes
+                FROM ncm_rules
+                WHERE ncm = ?
+                  AND (valid_from IS NULL OR valid_from <= ?)
+                  AND (valid_until IS NULL OR valid_until >= ?)
+            """, (ncm, as_of, as_of))
+
+            row = cursor.fetchone()
         if row:
             return dict(row)
 
@@ -133,6 +296,7 @@ class FiscalRepository:
 
         return None
 
+    @timed
     def get_all_sugar_ncms(self) -> List[Dict[str, Any]]:
         """
         Obter todos os NCMs de açúcar válidos
@@ -140,19 +304,21 @@ class FiscalRepository:
         Returns:
             Lista de dicts com NCMs de açúcar
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                ncm,
-                description,
-                product_type,
-                keywords
-            FROM v_sugar_ncms
-            ORDER BY ncm
-        """)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    ncm,
+                    description,
+                    product_type,
+                    keywords
+                FROM v_sugar_ncms
+                ORDER BY ncm
+            """)
 
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
 
+    @timed
     def validate_ncm_exists(self, ncm: str) -> bool:
         """
         Verificar se NCM existe e está válido
@@ -166,6 +332,7 @@ class FiscalRepository:
         rule = self.get_ncm_rule(ncm)
         return rule is not None
 
+    @timed
     def get_ncm_keywords(self, ncm: str) -> List[str]:
         """
         Obter palavras-chave de um NCM
@@ -182,10 +349,26 @@ class FiscalRepository:
             return json.loads(rule['keywords'])
         return []
 
+    @timed
+    def suggest_ncm(self, description: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Sugerir NCMs a partir da descrição do produto (keywords das regras)
+
+        Args:
+            description: Descrição do produto
+            limit: Máximo de sugestões
+
+        Returns:
+            Lista de dicts com ncm, description, matched (keywords
+            encontradas) e score, do mais provável para o menos provável
+        """
+        return self.keyword_index.suggest(description, limit=limit)
+
     # =====================================================
     # PIS/COFINS Rules
     # =====================================================
 
+    @timed
     def get_pis_cofins_rule(self, cst: str, ncm: str = None) -> Optional[Dict[str, Any]]:
         """
         Obter regra PIS/COFINS por CST (com suporte a camadas)
@@ -203,31 +386,37 @@ class FiscalRepository:
             if rule and rule.get('pis_cst') == cst:
                 return rule
 
-        # Camada 2: Consultar SQLite
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                cst,
-                description,
-                situation_type,
-                pis_rate_standard,
-                cofins_rate_standard,
-                pis_rate_cumulative,
-                cofins_rate_cumulative,
-                requires_base_calculation,
-                allows_credit,
-                legal_reference,
-                legal_article,
-                notes
-            FROM pis_cofins_rules
-            WHERE cst = ?
-        """, (cst,))
-
-        row = cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
+        # Camada 2: Consultar snapshot em memória (ou SQLite)
+        if self.use_snapshot:
+            rule = self.snapshot.pis_cofins_rules.get(cst)
+            return dict(rule) if rule else None
 
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    cst,
+                    description,
+                    situation_type,
+                    pis_rate_standard,
+                    cofins_rate_standard,
+                    pis_rate_cumulative,
+                    cofins_rate_cumulative,
+                    requires_base_calculation,
+                    allows_credit,
+                    legal_reference,
+                    legal_article,
+                    notes
+                FROM pis_cofins_rules
+                WHERE cst = ?
+            """, (cst,))
+
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
+
+    @timed
     def get_valid_csts(self) -> List[str]:
         """
         Obter lista de CSTs válidos
@@ -235,15 +424,20 @@ class FiscalRepository:
         Returns:
             Lista de CSTs válidos
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT cst
-            FROM pis_cofins_rules
-            ORDER BY cst
-        """)
+        if self.use_snapshot:
+            return list(self.snapshot.valid_csts)
 
-        return [row['cst'] for row in cursor.fetchall()]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT cst
+                FROM pis_cofins_rules
+                ORDER BY cst
+            """)
 
+            return [row['cst'] for row in cursor.fetchall()]
+
+    @timed
     def get_pis_cofins_rates(self, cst: str, regime: str = 'STANDARD') -> Dict[str, float]:
         """
         Obter alíquotas PIS/COFINS
@@ -270,6 +464,7 @@ class FiscalRepository:
                 'cofins': float(rule.get('cofins_rate_standard', 0) or 0)
             }
 
+    @timed
     def is_cst_valid(self, cst: str) -> bool:
         """
         Verificar se CST é válido
@@ -280,12 +475,15 @@ class FiscalRepository:
         Returns:
             True se válido
         """
+        if self.use_snapshot:
+            return cst in self.snapshot.valid_cst_set
         return cst in self.get_valid_csts()
 
     # =====================================================
     # CFOP Rules
     # =====================================================
 
+    @timed
     def get_cfop_rule(self, cfop: str) -> Optional[Dict[str, Any]]:
         """
         Obter regra de CFOP
@@ -296,29 +494,35 @@ class FiscalRepository:
         Returns:
             Dict com regra ou None
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                cfop,
-                description,
-                operation_type,
-                operation_scope,
-                nature,
-                requires_icms,
-                requires_ipi,
-                exempt_pis_cofins,
-                common_for_sector,
-                legal_reference,
-                notes
-            FROM cfop_rules
-            WHERE cfop = ?
-        """, (cfop,))
-
-        row = cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
+        if self.use_snapshot:
+            rule = self.snapshot.cfop_rules.get(cfop)
+            return dict(rule) if rule else None
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    cfop,
+                    description,
+                    operation_type,
+                    operation_scope,
+                    nature,
+                    requires_icms,
+                    requires_ipi,
+                    exempt_pis_cofins,
+                    common_for_sector,
+                    legal_reference,
+                    notes
+                FROM cfop_rules
+                WHERE cfop = ?
+            """, (cfop,))
 
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
+
+    @timed
     def get_cfops_by_scope(self, scope: str) -> List[Dict[str, Any]]:
         """
         Obter CFOPs por escopo
@@ -329,16 +533,18 @@ class FiscalRepository:
         Returns:
             Lista de CFOPs
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT cfop, description, operation_type, nature
-            FROM cfop_rules
-            WHERE operation_scope = ?
-            ORDER BY cfop
-        """, (scope,))
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT cfop, description, operation_type, nature
+                FROM cfop_rules
+                WHERE operation_scope = ?
+                ORDER BY cfop
+            """, (scope,))
 
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
 
+    @timed
     def get_sugar_cfops(self) -> List[Dict[str, Any]]:
         """
         Obter CFOPs comuns para açúcar
@@ -346,19 +552,21 @@ class FiscalRepository:
         Returns:
             Lista de CFOPs
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                cfop,
-                description,
-                operation_scope,
-                nature
-            FROM v_sugar_cfops
-            ORDER BY cfop
-        """)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    cfop,
+                    description,
+                    operation_scope,
+                    nature
+                FROM v_sugar_cfops
+                ORDER BY cfop
+            """)
 
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
 
+    @timed
     def validate_cfop_scope(self, cfop: str, is_interstate: bool) -> bool:
         """
         Validar se CFOP está correto para operação (interna/interestadual)
@@ -385,81 +593,93 @@ class FiscalRepository:
     # State Overrides (SP + PE)
     # =====================================================
 
-    def get_state_rules(self, uf: str, ncm: str = None) -> List[Dict[str, Any]]:
+    @timed
+    def get_state_rules(self, uf: str, ncm: str = None, as_of: Any = None) -> List[Dict[str, Any]]:
         """
         Obter regras estaduais (overlay)
 
         Args:
             uf: UF (SP, PE)
             ncm: NCM específico (opcional)
+            as_of: Data de vigência (ex.: data de emissão da NF-e; default: hoje)
 
         Returns:
             Lista de regras estaduais
         """
-        cursor = self.conn.cursor()
-
-        if ncm:
-            cursor.execute("""
-                SELECT
-                    state,
-                    override_type,
-                    ncm,
-                    cfop,
-                    rule_name,
-                    rule_description,
-                    icms_rate,
-                    icms_reduction_rate,
-                    is_st,
-                    st_mva,
-                    legal_reference,
-                    legal_article,
-                    decree_number,
-                    severity,
-                    notes
-                FROM state_overrides
-                WHERE state = ?
-                  AND (ncm = ? OR ncm IS NULL)
-                  AND (valid_until IS NULL OR valid_until >= DATE('now'))
-                ORDER BY override_type
-            """, (uf, ncm))
-        else:
-            cursor.execute("""
-                SELECT
-                    state,
-                    override_type,
-                    ncm,
-                    cfop,
-                    rule_name,
-                    rule_description,
-                    icms_rate,
-                    icms_reduction_rate,
-                    is_st,
-                    st_mva,
-                    legal_reference,
-                    legal_article,
-                    decree_number,
-                    severity,
-                    notes
-                FROM state_overrides
-                WHERE state = ?
-                  AND (valid_until IS NULL OR valid_until >= DATE('now'))
-                ORDER BY override_type
-            """, (uf,))
-
-        return [dict(row) for row in cursor.fetchall()]
-
-    def get_state_icms_rate(self, uf: str, ncm: str = None) -> Optional[float]:
+        if self.use_snapshot:
+            return [dict(rule) for rule in self.snapshot.get_state_rules(uf, ncm, as_of)]
+
+        as_of = self._as_of(as_of)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            if ncm:
+                cursor.execute("""
+                    SELECT
+                        state,
+                        override_type,
+                        ncm,
+                        cfop,
+                        rule_name,
+                        rule_description,
+                        icms_rate,
+                        icms_reduction_rate,
+                        is_st,
+                        st_mva,
+                        legal_reference,
+                        legal_article,
+                        decree_number,
+                        severity,
+                        notes
+                    FROM state_overrides
+                    WHERE state = ?
+                      AND (ncm = ? OR ncm IS NULL)
+                      AND (valid_from IS NULL OR valid_from <= ?)
+                      AND (valid_until IS NULL OR valid_until >= ?)
+                    ORDER BY override_type
+                """, (uf, ncm, as_of, as_of))
+            else:
+                cursor.execute("""
+                    SELECT
+                        state,
+                        override_type,
+                        ncm,
+                        cfop,
+                        rule_name,
+                        rule_description,
+                        icms_rate,
+                        icms_reduction_rate,
+                        is_st,
+                        st_mva,
+                        legal_reference,
+                        legal_article,
+                        decree_number,
+                        severity,
+                        notes
+                    FROM state_overrides
+                    WHERE state = ?
+                      AND (valid_from IS NULL OR valid_from <= ?)
+                      AND (valid_until IS NULL OR valid_until >= ?)
+                    ORDER BY override_type
+                """, (uf, as_of, as_of))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    @timed
+    def get_state_icms_rate(self, uf: str, ncm: str = None, as_of: Any = None) -> Optional[float]:
         """
         Obter alíquota ICMS estadual
 
         Args:
             uf: UF
             ncm: NCM (opcional)
+            as_of: Data de vigência (default: hoje)
 
         Returns:
             Alíquota ICMS ou None
         """
-        rules = self.get_state_rules(uf, ncm)
+        rules = self.get_state_rules(uf, ncm, as_of)
 
         for rule in rules:
             if rule['override_type'] == 'ICMS' and rule.get('icms_rate'):
@@ -467,23 +687,26 @@ class FiscalRepository:
 
         return None
 
-    def has_state_rules(self, uf: str) -> bool:
+    @timed
+    def has_state_rules(self, uf: str, as_of: Any = None) -> bool:
         """
         Verificar se UF tem regras específicas
 
         Args:
             uf: UF
+            as_of: Data de vigência (default: hoje)
 
         Returns:
             True se tem regras
         """
-        rules = self.get_state_rules(uf)
+        rules = self.get_state_rules(uf, as_of=as_of)
         return len(rules) > 0
 
     # =====================================================
     # Legal References
     # =====================================================
 
+    @timed
     def get_legal_reference(self, code: str) -> Optional[Dict[str, Any]]:
         """
         Obter referência legal completa
@@ -494,30 +717,36 @@ class FiscalRepository:
         Returns:
             Dict com referência ou None
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                code,
-                ref_type,
-                number,
-                year,
-                title,
-                summary,
-                issuing_body,
-                scope,
-                url,
-                relevant_articles,
-                published_date,
-                effective_date
-            FROM legal_refs
-            WHERE code = ?
-        """, (code,))
-
-        row = cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
+        if self.use_snapshot:
+            ref = self.snapshot.legal_refs.get(code)
+            return dict(ref) if ref else None
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    code,
+                    ref_type,
+                    number,
+                    year,
+                    title,
+                    summary,
+                    issuing_body,
+                    scope,
+                    url,
+                    relevant_articles,
+                    published_date,
+                    effective_date
+                FROM legal_refs
+                WHERE code = ?
+            """, (code,))
+
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
 
+    @timed
     def get_legal_references_by_tax(self, tax: str) -> List[Dict[str, Any]]:
         """
         Obter referências legais que afetam determinado tributo
@@ -528,36 +757,61 @@ class FiscalRepository:
         Returns:
             Lista de referências
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                code,
-                title,
-                ref_type,
-                number,
-                year,
-                url
-            FROM legal_refs
-            WHERE affects_taxes LIKE ?
-            ORDER BY year DESC, number
-        """, (f'%{tax}%',))
-
-        return [dict(row) for row in cursor.fetchall()]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    code,
+                    title,
+                    ref_type,
+                    number,
+                    year,
+                    url
+                FROM legal_refs
+                WHERE affects_taxes LIKE ?
+                ORDER BY year DESC, number
+            """, (f'%{tax}%',))
+
+            return [dict(row) for row in cursor.fetchall()]
 
+    @timed
     def format_legal_citation(self, code: str) -> str:
         """
         Formatar citação legal completa
 
+        Usa cache pré-carregado com todas as referências de legal_refs
+        (invalidado em reload_rules). Códigos desconhecidos retornam o
+        próprio código.
+
         Args:
             code: Código da referência
 
         Returns:
             String formatada (ex: "Lei 10.637/2002 - Lei do PIS não-cumulativo")
         """
-        ref = self.get_legal_reference(code)
-        if not ref:
-            return code
+        if self._citation_cache is None:
+            self._citation_cache = self._load_citations()
+
+        citation = self._citation_cache.get(code)
+        if citation is None:
+            count('citation_cache.miss')
+            ref = self.get_legal_reference(code)
+            citation = self._format_citation(ref) if ref else code
+            self._citation_cache[code] = citation
+        else:
+            count('citation_cache.hit')
+        return citation
 
+    def _load_citations(self) -> Dict[str, str]:
+        """Pré-formatar citações de todas as referências legais"""
+        if self.use_snapshot:
+            refs = self.snapshot.legal_refs.values()
+        else:
+            refs = self.get_all_legal_references()
+        return {ref['code']: self._format_citation(ref) for ref in refs}
+
+    @staticmethod
+    def _format_citation(ref: Dict[str, Any]) -> str:
         ref_type = ref['ref_type'].replace('_', ' ').title()
         number = ref['number']
         year = ref['year']
@@ -591,9 +845,8 @@ class FiscalRepository:
 
         # Status SQLite
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT COUNT(*) as count FROM ncm_rules")
-            ncm_count = cursor.fetchone()['count']
+            with self.pool.connection() as conn:
+                ncm_count = conn.execute("SELECT COUNT(*) as count FROM ncm_rules").fetchone()['count']
             status['camadas_ativas'].append('SQLite')
             status['sqlite'] = {
                 'disponivel': True,
@@ -629,24 +882,25 @@ class FiscalRepository:
         Returns:
             Lista de dicionários com referências legais
         """
-        cursor = self.conn.cursor()
-
-        if category:
-            cursor.execute("""
-                SELECT *
-                FROM legal_refs
-                WHERE scope = ?
-                ORDER BY ref_type, title
-            """, (category,))
-        else:
-            cursor.execute("""
-                SELECT *
-                FROM legal_refs
-                ORDER BY scope, ref_type, title
-            """)
-
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            if category:
+                cursor.execute("""
+                    SELECT *
+                    FROM legal_refs
+                    WHERE scope = ?
+                    ORDER BY ref_type, title
+                """, (category,))
+            else:
+                cursor.execute("""
+                    SELECT *
+                    FROM legal_refs
+                    ORDER BY scope, ref_type, title
+                """)
+
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
 
     def get_legal_reference_by_code(self, reference_code: str) -> Optional[Dict[str, Any]]:
         """
@@ -658,16 +912,17 @@ class FiscalRepository:
         Returns:
             Dicionário com dados da referência ou None
         """
-        cursor = self.conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT *
-            FROM legal_refs
-            WHERE code = ?
-        """, (reference_code,))
+            cursor.execute("""
+                SELECT *
+                FROM legal_refs
+                WHERE code = ?
+            """, (reference_code,))
 
-        row = cursor.fetchone()
-        return dict(row) if row else None
+            row = cursor.fetchone()
+            return dict(row) if row else None
 
     def search_legal_references(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -679,20 +934,21 @@ class FiscalRepository:
         Returns:
             Lista de referências encontradas
         """
-        cursor = self.conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        search_term = f'%{query}%'
-        cursor.execute("""
-            SELECT *
-            FROM legal_refs
-            WHERE title LIKE ?
-               OR summary LIKE ?
-               OR notes LIKE ?
-            ORDER BY scope, title
-        """, (search_term, search_term, search_term))
+            search_term = f'%{query}%'
+            cursor.execute("""
+                SELECT *
+                FROM legal_refs
+                WHERE title LIKE ?
+                   OR summary LIKE ?
+                   OR notes LIKE ?
+                ORDER BY scope, title
+            """, (search_term, search_term, search_term))
 
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
 
     def get_legal_references_by_scope(self, scope: str) -> List[Dict[str, Any]]:
         """
@@ -704,17 +960,18 @@ class FiscalRepository:
         Returns:
             Lista de referências
         """
-        cursor = self.conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT *
-            FROM legal_refs
-            WHERE scope = ?
-            ORDER BY ref_type, title
-        """, (scope,))
+            cursor.execute("""
+                SELECT *
+                FROM legal_refs
+                WHERE scope = ?
+                ORDER BY ref_type, title
+            """, (scope,))
 
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
 
     # =====================================================
     # Queries Auxiliares
@@ -727,15 +984,16 @@ class FiscalRepository:
         Returns:
             Versão do schema
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT value
-            FROM db_metadata
-            WHERE key = 'schema_version'
-        """)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT value
+                FROM db_metadata
+                WHERE key = 'schema_version'
+            """)
 
-        row = cursor.fetchone()
-        return row['value'] if row else 'unknown'
+            row = cursor.fetchone()
+            return row['value'] if row else 'unknown'
 
     def get_last_population_date(self) -> Optional[str]:
         """
@@ -744,15 +1002,16 @@ class FiscalRepository:
         Returns:
             Data ISO ou None
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT value
-            FROM db_metadata
-            WHERE key = 'last_population'
-        """)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT value
+                FROM db_metadata
+                WHERE key = 'last_population'
+            """)
 
-        row = cursor.fetchone()
-        return row['value'] if row else None
+            row = cursor.fetchone()
+            return row['value'] if row else None
 
     def get_statistics(self) -> Dict[str, int]:
         """
@@ -761,16 +1020,17 @@ class FiscalRepository:
         Returns:
             Dict com contagens
         """
-        cursor = self.conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        stats = {}
-        tables = ['ncm_rules', 'pis_cofins_rules', 'cfop_rules', 'state_overrides', 'legal_refs']
+            stats = {}
+            tables = ['ncm_rules', 'pis_cofins_rules', 'cfop_rules', 'state_overrides', 'legal_refs']
 
-        for table in tables:
-            cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
-            stats[table] = cursor.fetchone()['count']
+            for table in tables:
+                cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
+                stats[table] = cursor.fetchone()['count']
 
-        return stats
+            return stats
 
     # =====================================================
     # Validação Integrada
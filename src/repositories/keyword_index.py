@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Keyword Index - Palavras-chave de NCM compiladas em um autômato
+
+As keywords de todas as regras de NCM (JSON em ncm_rules.keywords) são
+normalizadas uma única vez (minúsculas, sem acentos) e compiladas em um
+autômato Aho-Corasick: uma única passada pela descrição encontra todas as
+keywords presentes, de todos os NCMs, inclusive sobrepostas.
+
+Usos:
+- NCMValidator: descrição compatível com as keywords do NCM (NCM_003)
+- Agente NCM: busca de NCMs por termo (search_ncm_by_keywords)
+- FiscalRepository.suggest_ncm: NCMs prováveis a partir da descrição
+
+O índice é montado por RuleSnapshot (uma vez por versão das regras).
+"""
+
+import json
+import unicodedata
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+def normalize_text(text: Any) -> str:
+    """
+    Texto para comparação de keywords: minúsculas e sem acentos
+
+    Args:
+        text: Texto (None vira '')
+
+    Returns:
+        Texto normalizado ('Açúcar' -> 'acucar')
+    """
+    if not text:
+        return ''
+    text = str(text).lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def parse_keywords(keywords_json: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Extrair keywords (JSON) normalizadas; None se ausentes ou inválidas
+
+    Args:
+        keywords_json: Array JSON de palavras-chave
+
+    Returns:
+        Tupla de keywords normalizadas (sem vazias) ou None
+    """
+    if not keywords_json:
+        return None
+    try:
+        keywords = json.loads(keywords_json)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(keywords, list):
+        return None
+    return tuple(kw for kw in (normalize_text(k) for k in keywords) if kw)
+
+
+class KeywordIndex:
+    """
+    Autômato Aho-Corasick com as keywords de todos os NCMs
+
+    Estados: transições (dict por estado), link de falha e saída (ids das
+    keywords que terminam no estado, incluindo as dos links de falha).
+    """
+
+    # Descrições memorizadas (produtos se repetem entre NF-es); esvaziado ao atingir
+    MAX_MEMO = 50_000
+
+    def __init__(self, keywords_by_ncm: Dict[str, Sequence[str]],
+                 descriptions: Optional[Dict[str, str]] = None):
+        """
+        Compilar índice
+
+        Args:
+            keywords_by_ncm: NCM -> keywords originais
+            descriptions: NCM -> descrição (busca do agente e sugestões)
+        """
+        self.descriptions = dict(descriptions or {})
+        self._original: Dict[str, Tuple[str, ...]] = {}
+        self._keyword_ids: Dict[str, int] = {}
+        self._keywords: List[str] = []
+        self._ncm_keywords: Dict[str, FrozenSet[int]] = {}
+        self._keyword_ncms: List[List[str]] = []
+
+        for ncm, keywords in keywords_by_ncm.items():
+            self._original[ncm] = tuple(keywords)
+            ids = set()
+            for keyword in keywords:
+                normalized = normalize_text(keyword)
+                if normalized:
+                    ids.add(self._add_keyword(normalized))
+            self._ncm_keywords[ncm] = frozenset(ids)
+            for keyword_id in ids:
+                self._keyword_ncms[keyword_id].append(ncm)
+
+        self._build_automaton()
+        self._normalized_descriptions = {
+            ncm: normalize_text(desc) for ncm, desc in self.descriptions.items()
+        }
+        self._memo: Dict[str, FrozenSet[int]] = {}
+        self._matchers: Dict[Tuple[str, ...], Callable[[str], bool]] = {}
+
+    @classmethod
+    def from_rules(cls, ncm_rules: Dict[str, Dict[str, Any]]) -> 'KeywordIndex':
+        """
+        Montar índice a partir das regras de NCM (RuleSnapshot.ncm_rules)
+
+        Args:
+            ncm_rules: NCM -> regra (keywords em JSON)
+
+        Returns:
+            KeywordIndex
+        """
+        keywords_by_ncm = {}
+        for ncm, rule in ncm_rules.items():
+            try:
+                keywords = json.loads(rule.get('keywords') or '[]')
+            except (TypeError, ValueError):
+                keywords = []
+            keywords_by_ncm[ncm] = [kw for kw in keywords if isinstance(kw, str)]
+        descriptions = {ncm: rule.get('description') or '' for ncm, rule in ncm_rules.items()}
+        return cls(keywords_by_ncm, descriptions)
+
+    # =====================================================
+    # Compilação
+    # =====================================================
+
+    def _add_keyword(self, keyword: str) -> int:
+        keyword_id = self._keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = self._keyword_ids[keyword] = len(self._keywords)
+            self._keywords.append(keyword)
+            self._keyword_ncms.append([])
+        return keyword_id
+
+    def _build_automaton(self):
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Tuple[int, ...]] = [()]
+        for keyword_id, keyword in enumerate(self._keywords):
+            state = 0
+            for ch in keyword:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = goto[state][ch] = len(goto)
+                    goto.append({})
+                    output.append(())
+                state = next_state
+            output[state] += (keyword_id,)
+
+        # Links de falha em largura (estados de profundidade 1 falham para a raiz)
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[next_state] = goto[f].get(ch, 0)
+                output[next_state] += output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    # =====================================================
+    # Busca
+    # =====================================================
+
+    def find(self, text: str) -> FrozenSet[int]:
+        """
+        Keywords presentes no texto (uma passada pelo autômato)
+
+        Args:
+            text: Texto original (normalizado internamente)
+
+        Returns:
+            Ids das keywords encontradas
+        """
+        found = self._memo.get(text)
+        if found is not None:
+            return found
+
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        ids = set()
+        for ch in normalize_text(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                ids.update(output[state])
+
+        found = frozenset(ids)
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[text] = found
+        return found
+
+    def find_keywords(self, text: str) -> List[str]:
+        """Keywords (normalizadas) presentes no texto, em ordem alfabética"""
+        return sorted(self._keywords[i] for i in self.find(text))
+
+    def keywords(self, ncm: str) -> List[str]:
+        """Keywords originais do NCM ([] se ausente)"""
+        return list(self._original.get(ncm, ()))
+
+    def has_keyword(self, ncm: str, text: str) -> Optional[bool]:
+        """
+        Alguma keyword do NCM aparece no texto?
+
+        Returns:
+            True/False, ou None se o NCM não tem keywords no índice
+        """
+        ids = self._ncm_keywords.get(ncm)
+        if not ids:
+            return None
+        return not ids.isdisjoint(self.find(text))
+
+    def matcher(self, keywords: Sequence[str]) -> Callable[[str], bool]:
+        """
+        Verificador "alguma destas keywords aparece no texto?"
+
+        Keywords já compiladas usam o autômato (e a memória de descrições);
+        keywords de outra origem (ex.: CSV local) são verificadas por
+        substring sobre o texto normalizado.
+
+        Args:
+            keywords: Keywords normalizadas (parse_keywords)
+
+        Returns:
+            Função texto -> bool
+        """
+        keywords = tuple(keywords)
+        matcher = self._matchers.get(keywords)
+        if matcher is None:
+            ids = [self._keyword_ids.get(kw) for kw in keywords]
+            if None in ids:
+                def matcher(text, keywords=keywords):
+                    normalized = normalize_text(text)
+                    return any(kw in normalized for kw in keywords)
+            else:
+                id_set = frozenset(ids)
+
+                def matcher(text, id_set=id_set):
+                    return not id_set.isdisjoint(self.find(text))
+            self._matchers[keywords] = matcher
+        return matcher
+
+    def match_ncms(self, text: str) -> Dict[str, List[str]]:
+        """
+        NCMs com keywords presentes no texto
+
+        Returns:
+            NCM -> keywords encontradas (normalizadas)
+        """
+        matches: Dict[str, List[str]] = {}
+        for keyword_id in sorted(self.find(text)):
+            for ncm in self._keyword_ncms[keyword_id]:
+                matches.setdefault(ncm, []).append(self._keywords[keyword_id])
+        return matches
+
+    def suggest(self, description: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Sugerir NCMs a partir da descrição do produto
+
+        Pontuação: keywords do NCM encontradas (exclusivas do NCM valem mais
+        que as compartilhadas, ex.: 'refinado' > 'açúcar'); empate pelo
+        total de caracteres encontrados e pelo código.
+
+        Args:
+            description: Descrição do produto
+            limit: Máximo de sugestões
+
+        Returns:
+            Lista de dicts com ncm, description, matched e score (desc.)
+        """
+        ranked = []
+        for ncm, matched in self.match_ncms(description).items():
+            score = sum(1.0 / len(self._keyword_ncms[self._keyword_ids[kw]]) for kw in matched)
+            ranked.append((-score, -sum(map(len, matched)), ncm, matched))
+        ranked.sort()
+        return [
+            {
+                'ncm': ncm,
+                'description': self.descriptions.get(ncm, ''),
+                'matched': matched,
+                'score': round(-score, 4),
+            }
+            for score, _, ncm, matched in ranked[:limit]
+        ]
+
+    def search(self, query: str, ncms: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Buscar NCMs por termo (busca do agente)
+
+        Um NCM corresponde se o termo aparece na descrição ou em alguma
+        keyword, ou se alguma keyword do NCM aparece no termo.
+
+        Args:
+            query: Termo de busca
+            ncms: Restringir a estes NCMs (default: todos, em ordem)
+
+        Returns:
+            NCMs encontrados, na ordem de ncms
+        """
+        term = normalize_text(query).strip()
+        if not term:
+            return []
+        in_query = self.match_ncms(query)
+        results = []
+        for ncm in (ncms if ncms is not None else sorted(self._original)):
+            if ncm in in_query or term in self._normalized_descriptions.get(ncm, ''):
+                results.append(ncm)
+            elif any(term in self._keywords[i] for i in self._ncm_keywords.get(ncm, ())):
+                results.append(ncm)
+        return results
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def __getstate__(self):
+        # Memória de descrições e verificadores (closures) não são serializados
+        state = self.__dict__.copy()
+        state['_memo'] = {}
+        state['_matchers'] = {}
+        return state
@@ -4,16 +4,44 @@ Local CSV Repository - Repositório de Base de Validação Local
 
 Lê regras fiscais de um arquivo CSV local editável pelo usuário.
 Funciona como primeira camada de consulta antes do SQLite e LLM.
+
+As regras compiladas são compartilhadas no processo (um dict por arquivo):
+novos repositórios não relêem o CSV se ele não mudou. Alterações no
+arquivo (inode, mtime e tamanho) são detectadas no máximo a cada
+check_interval segundos e o dict novo substitui o anterior de uma vez
+(consultas em andamento continuam com a versão que já tinham).
 """
 
 import csv
-from typing import Optional, Dict, List
+import threading
+import time
+from typing import Any, NamedTuple, Optional, Dict, List, Tuple
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class _Overlay(NamedTuple):
+    """Regras compiladas de um arquivo e a assinatura do arquivo lido"""
+    signature: Optional[Tuple[int, int, int]]
+    rules: Dict[str, Dict[str, Any]]
+
+
+# Regras compiladas por arquivo (caminho absoluto), compartilhadas no processo
+_overlays: Dict[str, _Overlay] = {}
+_overlays_lock = threading.Lock()
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime em ns, tamanho) do arquivo, ou None se ausente"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
 class LocalCSVRepository:
     """
     Repositório para leitura de regras fiscais de CSV local
@@ -22,12 +50,17 @@ class LocalCSVRepository:
     tendo prioridade sobre as regras do banco de dados SQLite.
     """
 
-    def __init__(self, csv_path: str = None):
+    # Intervalo mínimo (segundos) entre verificações de alteração do arquivo
+    CHECK_INTERVAL = 2.0
+
+    def __init__(self, csv_path: str = None, check_interval: float = CHECK_INTERVAL):
         """
         Inicializar repositório
 
         Args:
             csv_path: Caminho para base_validacao.csv (default: raiz do projeto)
+            check_interval: Segundos entre verificações de alteração do
+                arquivo (0 = verificar a cada consulta)
         """
         if csv_path is None:
             # Path padrão relativo ao projeto
@@ -35,20 +68,58 @@ class LocalCSVRepository:
             csv_path = project_root / "base_validacao.csv"
 
         self.csv_path = Path(csv_path)
+        self.check_interval = check_interval
         self.rules_cache = None
+        self.signature: Optional[Tuple[int, int, int]] = None
+        self._next_check = 0.0
         self._load_rules()
 
-    def _load_rules(self):
-        """Carregar regras do CSV para memória (cache)"""
-        if not self.csv_path.exists():
-            logger.warning(f"Arquivo {self.csv_path} não encontrado. LocalCSVRepository desabilitado.")
-            self.rules_cache = {}
-            return
+    def _load_rules(self, force: bool = False):
+        """Obter regras compiladas do CSV (relido apenas se o arquivo mudou)"""
+        overlay = self._shared_overlay(self.csv_path, force=force)
+        self.signature, self.rules_cache = overlay
+        self._next_check = time.monotonic() + self.check_interval
+
+    @classmethod
+    def _shared_overlay(cls, csv_path: Path, force: bool = False) -> _Overlay:
+        """
+        Regras compiladas do arquivo, compartilhadas entre repositórios
 
-        self.rules_cache = {}
+        Args:
+            csv_path: Caminho do CSV
+            force: Reler mesmo sem alteração detectada
+
+        Returns:
+            _Overlay (assinatura, regras)
+        """
+        key = str(csv_path.resolve())
+        signature = _file_signature(csv_path)
+        with _overlays_lock:
+            cached = _overlays.get(key)
+        if cached is not None and cached.signature == signature and not force:
+            return cached
+
+        if signature is None:
+            logger.warning(f"Arquivo {csv_path} não encontrado. LocalCSVRepository desabilitado.")
+            rules = {}
+        else:
+            rules = cls._read_rules(csv_path)
+            if _file_signature(csv_path) != signature:
+                # Arquivo alterado durante a leitura: reler na próxima verificação
+                signature = None
+
+        overlay = _Overlay(signature, rules)
+        with _overlays_lock:
+            _overlays[key] = overlay
+        return overlay
+
+    @classmethod
+    def _read_rules(cls, csv_path: Path) -> Dict[str, Dict[str, Any]]:
+        """Ler e compilar as regras do CSV (dict novo; {} em caso de erro)"""
+        rules = {}
 
         try:
-            with open(self.csv_path, 'r', encoding='utf-8') as f:
+            with open(csv_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
 
                 for row in reader:
@@ -59,17 +130,17 @@ class LocalCSVRepository:
                     ncm = row['ncm'].strip()
 
                     # Armazenar regra completa por NCM
-                    self.rules_cache[ncm] = {
+                    rules[ncm] = {
                         'ncm': ncm,
                         'descricao': row.get('descricao', '').strip(),
                         'pis_cst_saida': row.get('pis_cst_saida', '').strip(),
-                        'pis_aliquota_saida': self._parse_float(row.get('pis_aliquota_saida')),
+                        'pis_aliquota_saida': cls._parse_float(row.get('pis_aliquota_saida')),
                         'cofins_cst_saida': row.get('cofins_cst_saida', '').strip(),
-                        'cofins_aliquota_saida': self._parse_float(row.get('cofins_aliquota_saida')),
+                        'cofins_aliquota_saida': cls._parse_float(row.get('cofins_aliquota_saida')),
                         'pis_cst_entrada': row.get('pis_cst_entrada', '').strip(),
-                        'pis_aliquota_entrada': self._parse_float(row.get('pis_aliquota_entrada')),
+                        'pis_aliquota_entrada': cls._parse_float(row.get('pis_aliquota_entrada')),
                         'cofins_cst_entrada': row.get('cofins_cst_entrada', '').strip(),
-                        'cofins_aliquota_entrada': self._parse_float(row.get('cofins_aliquota_entrada')),
+                        'cofins_aliquota_entrada': cls._parse_float(row.get('cofins_aliquota_entrada')),
                         'cfop_saida_permitidos': row.get('cfop_saida_permitidos', '').strip(),
                         'cfop_entrada_permitidos': row.get('cfop_entrada_permitidos', '').strip(),
                         'icms_sp_reducao_bc': row.get('icms_sp_reducao_bc', '').strip(),
@@ -78,13 +149,16 @@ class LocalCSVRepository:
                         'observacoes': row.get('observacoes', '').strip()
                     }
 
-            logger.info(f"✅ LocalCSVRepository carregado: {len(self.rules_cache)} regras de {self.csv_path}")
+            logger.info(f"✅ LocalCSVRepository carregado: {len(rules)} regras de {csv_path}")
 
         except Exception as e:
-            logger.error(f"Erro ao carregar {self.csv_path}: {e}")
-            self.rules_cache = {}
+            logger.error(f"Erro ao carregar {csv_path}: {e}")
+            rules = {}
+
+        return rules
 
-    def _parse_float(self, value: str) -> Optional[float]:
+    @staticmethod
+    def _parse_float(value: str) -> Optional[float]:
         """Converter string para float, retornando None se inválido"""
         if not value or value.strip() == '':
             return None
@@ -95,11 +169,33 @@ class LocalCSVRepository:
 
     def reload(self):
         """Recarregar regras do CSV (útil se o arquivo foi editado)"""
+        self._load_rules(force=True)
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Verificar alteração do arquivo agora (sem esperar check_interval)
+
+        Returns:
+            True se as regras foram substituídas
+        """
+        previous = self.rules_cache
         self._load_rules()
+        return self.rules_cache is not previous
+
+    def current_rules(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Regras vigentes, verificando alteração do arquivo a cada check_interval
+
+        Returns:
+            Dict NCM -> regra (substituído, nunca alterado, ao recarregar)
+        """
+        if time.monotonic() >= self._next_check:
+            self._load_rules()
+        return self.rules_cache
 
     def is_available(self) -> bool:
         """Verificar se repositório está disponível"""
-        return self.rules_cache is not None and len(self.rules_cache) > 0
+        return bool(self.current_rules())
 
     def get_ncm_rule(self, ncm: str) -> Optional[Dict]:
         """
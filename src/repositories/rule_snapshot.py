@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Rule Snapshot - Regras Fiscais Compiladas em Memória
+
+Carrega uma única vez as regras vigentes do rules.db (ncm_rules,
+pis_cofins_rules, cfop_rules, state_overrides, legal_refs) em índices
+dict/tuple, eliminando uma consulta SQL por item e por validador.
+
+O snapshot é identificado pela versão do database (linhas de db_metadata)
+e pela data de carga. Regras com vigência (ncm_rules, state_overrides) são
+carregadas com todos os períodos em um EffectiveIndex: os índices do dia
+(ncm_rules, state_rules) atendem NF-es do período corrente e as demais
+datas de emissão são resolvidas por bisect, sem consulta SQL.
+"""
+
+import sqlite3
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from .effective_index import EffectiveIndex, to_date
+from .keyword_index import KeywordIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Colunas retornadas por cada consulta (mesmas do FiscalRepository)
+NCM_COLUMNS = (
+    'ncm', 'description', 'category', 'ipi_rate', 'is_ipi_exempt',
+    'pis_cofins_regime', 'keywords', 'product_type', 'sector', 'notes'
+)
+
+PIS_COFINS_COLUMNS = (
+    'cst', 'description', 'situation_type', 'pis_rate_standard',
+    'cofins_rate_standard', 'pis_rate_cumulative', 'cofins_rate_cumulative',
+    'requires_base_calculation', 'allows_credit', 'legal_reference',
+    'legal_article', 'notes'
+)
+
+CFOP_COLUMNS = (
+    'cfop', 'description', 'operation_type', 'operation_scope', 'nature',
+    'requires_icms', 'requires_ipi', 'exempt_pis_cofins', 'common_for_sector',
+    'legal_reference', 'notes'
+)
+
+STATE_COLUMNS = (
+    'state', 'override_type', 'ncm', 'cfop', 'rule_name', 'rule_description',
+    'icms_rate', 'icms_reduction_rate', 'is_st', 'st_mva', 'legal_reference',
+    'legal_article', 'decree_number', 'severity', 'notes'
+)
+
+LEGAL_REF_COLUMNS = (
+    'code', 'ref_type', 'number', 'year', 'title', 'summary', 'issuing_body',
+    'scope', 'url', 'relevant_articles', 'published_date', 'effective_date'
+)
+
+
+class RuleSnapshot:
+    """
+    Snapshot imutável das regras fiscais vigentes
+
+    Índices:
+    - ncm_rules: ncm -> regra vigente na data de carga
+    - pis_cofins_rules: cst -> regra (valid_csts: tupla ordenada)
+    - cfop_rules: cfop -> regra
+    - state_rules: state -> tupla de regras vigentes na data de carga
+      (ordem de override_type)
+    - ncm_index / state_index: regras de todos os períodos de vigência
+    - legal_refs: code -> referência
+    - keyword_index: keywords de NCM compiladas (montado no primeiro uso)
+    """
+
+    def __init__(self, version: Tuple, loaded_on: date):
+        self.version = version
+        self.loaded_on = loaded_on
+
+        self.ncm_rules: Dict[str, Dict[str, Any]] = {}
+        self.pis_cofins_rules: Dict[str, Dict[str, Any]] = {}
+        self.valid_csts: Tuple[str, ...] = ()
+        self.valid_cst_set: frozenset = frozenset()
+        self.cfop_rules: Dict[str, Dict[str, Any]] = {}
+        self.state_rules: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        self.legal_refs: Dict[str, Dict[str, Any]] = {}
+
+        self.ncm_index = EffectiveIndex()
+        self.state_index = EffectiveIndex()
+        # Inícios dos períodos em que alguma regra muda (de todas as tabelas)
+        self.periods: Tuple[date, ...] = (date.min,)
+        self._current_period = 0
+
+        # Cache de (state, ncm, período) -> regras aplicáveis (montado sob demanda)
+        self._state_ncm_index: Dict[Tuple[str, Optional[str], int], Tuple[Dict[str, Any], ...]] = {}
+        self._keyword_index: Optional[KeywordIndex] = None
+
+    # =====================================================
+    # Carga
+    # =====================================================
+
+    @staticmethod
+    def read_version(conn: sqlite3.Connection) -> Tuple:
+        """
+        Ler versão do database (todas as linhas de db_metadata)
+
+        Qualquer alteração em db_metadata (ex.: last_population após
+        populate_db.py) gera uma nova versão.
+
+        Args:
+            conn: Conexão SQLite
+
+        Returns:
+            Tupla ordenada de (key, value, updated_at)
+        """
+        try:
+            rows = conn.execute(
+                "SELECT key, value, updated_at FROM db_metadata ORDER BY key"
+            ).fetchall()
+        except sqlite3.Error:
+            return ()
+        return tuple(tuple(row) for row in rows)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> 'RuleSnapshot':
+        """
+        Carregar snapshot das regras vigentes
+
+        Args:
+            conn: Conexão SQLite para rules.db
+
+        Returns:
+            RuleSnapshot
+        """
+        snapshot = cls(cls.read_version(conn), date.today())
+
+        for row, valid_from, valid_until in cls._select_dated(conn, 'ncm_rules', NCM_COLUMNS):
+            snapshot.ncm_index.add(row['ncm'], row, valid_from, valid_until)
+
+        for row in cls._select(conn, 'pis_cofins_rules', PIS_COFINS_COLUMNS):
+            snapshot.pis_cofins_rules.setdefault(row['cst'], row)
+        snapshot.valid_csts = tuple(sorted(
+            row['cst'] for row in cls._select(conn, 'pis_cofins_rules', ('cst',))
+        ))
+        snapshot.valid_cst_set = frozenset(snapshot.valid_csts)
+
+        for row in cls._select(conn, 'cfop_rules', CFOP_COLUMNS):
+            snapshot.cfop_rules.setdefault(row['cfop'], row)
+
+        for row, valid_from, valid_until in cls._select_dated(
+                conn, 'state_overrides', STATE_COLUMNS, order_by='override_type, rowid'):
+            snapshot.state_index.add(row['state'], row, valid_from, valid_until)
+
+        for row in cls._select(conn, 'legal_refs', LEGAL_REF_COLUMNS):
+            snapshot.legal_refs.setdefault(row['code'], row)
+
+        snapshot._build_periods()
+
+        logger.debug(
+            f"RuleSnapshot carregado: {len(snapshot.ncm_rules)} NCMs, "
+            f"{len(snapshot.pis_cofins_rules)} CSTs, {len(snapshot.cfop_rules)} CFOPs"
+        )
+        return snapshot
+
+    @staticmethod
+    def _select(conn: sqlite3.Connection, table: str, columns: Tuple[str, ...],
+                order_by: str = 'rowid') -> List[Dict[str, Any]]:
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {order_by}")
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _select_dated(conn: sqlite3.Connection, table: str, columns: Tuple[str, ...],
+                      order_by: str = 'rowid') -> List[Tuple[Dict[str, Any], Any, Any]]:
+        """Todas as linhas (qualquer vigência) como (regra, valid_from, valid_until)"""
+        cursor = conn.execute(
+            f"SELECT {', '.join(columns)}, valid_from, valid_until FROM {table} ORDER BY {order_by}"
+        )
+        n = len(columns)
+        return [(dict(zip(columns, row[:n])), row[n], row[n + 1]) for row in cursor.fetchall()]
+
+    def _build_periods(self):
+        """Compilar índices de vigência e os índices do dia (data de carga)"""
+        self.ncm_index.build()
+        self.state_index.build()
+        self.periods = tuple(sorted(
+            set(self.ncm_index.boundaries()) | set(self.state_index.boundaries()) | {date.min}
+        ))
+        self._current_period = self.period(self.loaded_on)
+
+        for ncm in self.ncm_index.keys():
+            rules = self.ncm_index.at(ncm, self.loaded_on)
+            if rules:
+                self.ncm_rules[ncm] = rules[0]
+        for uf in self.state_index.keys():
+            rules = self.state_index.at(uf, self.loaded_on)
+            if rules:
+                self.state_rules[uf] = rules
+
+    def is_current(self, conn: sqlite3.Connection) -> bool:
+        """
+        Verificar se o snapshot ainda corresponde ao database
+
+        Args:
+            conn: Conexão SQLite
+
+        Returns:
+            False se db_metadata mudou ou se a data de vigência virou
+        """
+        return self.loaded_on == date.today() and self.version == self.read_version(conn)
+
+    # =====================================================
+    # Consultas
+    # =====================================================
+
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """Keywords das regras de NCM compiladas em autômato (uma vez por snapshot)"""
+        if self._keyword_index is None:
+            self._keyword_index = KeywordIndex.from_rules(self.ncm_rules)
+        return self._keyword_index
+
+    def period(self, on: Any = None) -> int:
+        """
+        Período de vigência da data (mesmo período = mesmas regras)
+
+        Args:
+            on: Data de referência (date, datetime ou ISO; None = data de carga)
+
+        Returns:
+            Número do período (posição em periods)
+        """
+        on = to_date(on)
+        if on is None:
+            return self._current_period
+        return bisect_right(self.periods, on) - 1
+
+    def in_current_period(self, on: Any = None) -> bool:
+        """Data atendida pelos índices do dia (ncm_rules, state_rules)?"""
+        return on is None or self.period(on) == self._current_period
+
+    def ncm_rule(self, ncm: str, on: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Regra do NCM vigente na data
+
+        Args:
+            ncm: Código NCM
+            on: Data de referência (ex.: data de emissão; None = data de carga)
+
+        Returns:
+            Regra (primeira vigente, em ordem de cadastro) ou None
+        """
+        if self.in_current_period(on):
+            return self.ncm_rules.get(ncm)
+        rules = self.ncm_index.at(ncm, to_date(on))
+        return rules[0] if rules else None
+
+    def get_state_rules(self, uf: str, ncm: Optional[str] = None,
+                        on: Any = None) -> Tuple[Dict[str, Any], ...]:
+        """
+        Obter regras estaduais aplicáveis (genéricas + específicas do NCM)
+
+        Args:
+            uf: UF
+            ncm: NCM (opcional; None retorna todas as regras da UF)
+            on: Data de referência (ex.: data de emissão; None = data de carga)
+
+        Returns:
+            Tupla de regras na ordem de override_type
+        """
+        on = to_date(on)
+        period = self._current_period if on is None else self.period(on)
+        key = (uf, ncm or None, period)
+        rules = self._state_ncm_index.get(key)
+        if rules is None:
+            if period == self._current_period:
+                all_rules = self.state_rules.get(uf, ())
+            else:
+                all_rules = self.state_index.at(uf, on)
+            if ncm:
+                rules = tuple(r for r in all_rules if r['ncm'] == ncm or r['ncm'] is None)
+            else:
+                rules = all_rules
+            self._state_ncm_index[key] = rules
+        return rules
@@ -15,6 +15,15 @@ import tempfile
 import os
 
 
+@pytest.fixture
+def fiscal_repo():
+    """Repositório fiscal (rules.db padrão)"""
+    from src.repositories.fiscal_repository import FiscalRepository
+    repo = FiscalRepository()
+    yield repo
+    repo.close()
+
+
 @pytest.fixture
 def sample_numeric_data():
     """Dataset com dados numéricos para testes"""
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+CSVs de NF-e no layout padrão para os testes (parser, pipeline, CLI)
+
+Cada teste parte de NFE_ROW_DEFAULTS e informa apenas as colunas que
+variam; o cabeçalho e a montagem das linhas ficam aqui.
+"""
+
+from pathlib import Path
+from typing import Iterable
+
+
+NFE_CSV_COLUMNS = [
+    "chave_acesso", "numero_nfe", "serie", "data_emissao",
+    "cnpj_emitente", "razao_social_emitente", "uf_emitente",
+    "cnpj_destinatario", "razao_social_destinatario", "uf_destinatario",
+    "numero_item", "codigo_produto", "descricao", "ncm", "cfop", "unidade",
+    "quantidade", "valor_unitario", "valor_total",
+    "pis_cst", "pis_aliquota", "pis_valor", "cofins_cst", "cofins_aliquota", "cofins_valor",
+]
+
+NFE_CSV_HEADER = ",".join(NFE_CSV_COLUMNS)
+
+# Item de açúcar SP -> PE sem erros fiscais; cada teste sobrescreve o que varia
+NFE_ROW_DEFAULTS = {
+    "serie": "1", "data_emissao": "2023-01-15",
+    "cnpj_emitente": "12345678000190", "razao_social_emitente": "Usina", "uf_emitente": "SP",
+    "cnpj_destinatario": "98765432000110", "razao_social_destinatario": "Cliente", "uf_destinatario": "PE",
+    "descricao": "Açúcar cristal", "ncm": "17019900", "cfop": "6101", "unidade": "KG",
+    "quantidade": "10", "valor_unitario": "100", "valor_total": "1000.00",
+    "pis_cst": "01", "pis_aliquota": "1.65", "pis_valor": "16.50",
+    "cofins_cst": "01", "cofins_aliquota": "7.60", "cofins_valor": "76.00",
+}
+
+
+def nfe_chave(nfe: int) -> str:
+    """Chave de acesso (44 dígitos) da NF-e de número nfe"""
+    return f"352301000000010000005500100000{nfe:014d}"
+
+
+def nfe_csv_row(nfe: int, item: int = 1, sep: str = ",", **values) -> str:
+    """
+    Linha de item no layout padrão
+
+    Args:
+        nfe: Número da NF-e (define chave_acesso e numero_nfe)
+        item: Número do item (define numero_item e codigo_produto)
+        sep: Separador
+        **values: Colunas com valor diferente de NFE_ROW_DEFAULTS
+    """
+    row = {
+        **NFE_ROW_DEFAULTS,
+        "chave_acesso": nfe_chave(nfe), "numero_nfe": nfe,
+        "numero_item": item, "codigo_produto": f"P{item}",
+        **values,
+    }
+    return sep.join(str(row[column]) for column in NFE_CSV_COLUMNS)
+
+
+def nfe_csv_text(rows: Iterable[str], sep: str = ",", header: str = NFE_CSV_HEADER) -> str:
+    """Conteúdo do CSV: cabeçalho e linhas"""
+    return "\n".join([header.replace(",", sep), *rows]) + "\n"
+
+
+def write_nfe_csv(path: Path, rows: Iterable[str], encoding: str = "utf-8", **kwargs) -> Path:
+    """Gravar CSV de NF-es (kwargs: sep, header)"""
+    path.write_bytes(nfe_csv_text(rows, **kwargs).encode(encoding))
+    return path
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da agregação de resultados de validação em uma passada
+"""
+import pytest
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import (
+    NFeEntity, NFeItem, Empresa, ImpostoItem, ValidationError, Severity
+)
+from src.nfe_validator.domain.services.aggregation import ValidationAggregate
+
+
+def make_nfe(numero: int, uf: str, *errors) -> NFeEntity:
+    """errors: (severidade, código, item, impacto)"""
+    items = [
+        NFeItem(numero_item=n, codigo_produto=f"P{n}", descricao="Açúcar", ncm=ncm, cfop="5101",
+                unidade="KG", quantidade=Decimal("1"), valor_unitario=Decimal("1"),
+                valor_total=Decimal("1"), impostos=ImpostoItem())
+        for n, ncm in ((1, "17019900"), (2, "17011400"))
+    ]
+    nfe = NFeEntity(
+        chave_acesso=f"352301000000010000005500100000{numero:014d}", numero=str(numero), serie="1",
+        data_emissao=datetime(2023, 1, 15),
+        emitente=Empresa(cnpj="12345678000190", razao_social="USINA", uf=uf),
+        destinatario=Empresa(cnpj="98765432000199", razao_social="CLIENTE", uf="SP"),
+        items=items,
+    )
+    nfe.validation_errors = [
+        ValidationError(code=code, field="x", message="m", severity=severity, item_numero=item,
+                        financial_impact=Decimal(impact) if impact else None)
+        for severity, code, item, impact in errors
+    ]
+    return nfe
+
+
+@pytest.fixture
+def nfes():
+    return [
+        make_nfe(1, "SP"),
+        make_nfe(2, "SP", (Severity.WARNING, "NCM_003", 1, None),
+                 (Severity.CRITICAL, "PIS_002", 1, "10.50")),
+        make_nfe(3, "PE", (Severity.ERROR, "COFINS_002", 2, "5"),
+                 (Severity.WARNING, "NCM_003", 2, None)),
+        make_nfe(4, "PE", (Severity.WARNING, "NCM_003", None, None)),
+        make_nfe(5, "SP", (Severity.INFO, "CFOP_INFO", 1, None)),
+    ]
+
+
+def test_faixas_pela_severidade_mais_grave(nfes):
+    """Crítica > erro > aviso; NF-es só com INFO ficam com os avisos"""
+    aggregate = ValidationAggregate.from_nfes(nfes)
+
+    assert [s.nfe.numero for s in aggregate.critical] == ["2"]
+    assert [s.nfe.numero for s in aggregate.error] == ["3"]
+    assert [s.nfe.numero for s in aggregate.warning] == ["4", "5"]
+    assert [e.code for e in aggregate.critical[0].errors_of(Severity.CRITICAL)] == ["PIS_002"]
+    assert aggregate.critical[0].errors_of(Severity.ERROR) == []
+    assert aggregate.critical[0].financial_impact == Decimal("10.50")
+
+
+def test_totais_iguais_ao_calculo_direto(nfes):
+    aggregate = ValidationAggregate.from_nfes(nfes)
+
+    for severity in Severity:
+        assert aggregate.severity_count(severity) == sum(
+            len(nfe.get_errors_by_severity(severity)) for nfe in nfes
+        )
+    assert aggregate.financial_impact == sum(nfe.get_total_financial_impact() for nfe in nfes)
+    assert aggregate.nfes == 5
+    assert aggregate.items == 10
+    assert aggregate.nfes_with_errors == 4
+    assert aggregate.nfes_failed == 2
+
+
+def test_contagens_por_codigo_uf_e_ncm(nfes):
+    """Erros sem item não entram na contagem por NCM"""
+    totals = ValidationAggregate.from_nfes(nfes).to_dict()
+
+    assert totals["by_code"] == {"NCM_003": 3, "PIS_002": 1, "COFINS_002": 1, "CFOP_INFO": 1}
+    assert totals["by_uf"] == {"SP": 3, "PE": 3}
+    assert totals["by_ncm"] == {"17019900": 3, "17011400": 2}
+    assert totals["by_severity"]["WARNING"] == 3
+
+
+def test_somente_contadores(nfes):
+    """keep_nfes=False: mesmos totais, sem faixas; fail_on configurável"""
+    aggregate = ValidationAggregate.from_nfes(
+        iter(nfes), keep_nfes=False, fail_on={Severity.CRITICAL, Severity.ERROR, Severity.WARNING}
+    )
+
+    assert aggregate.with_errors == []
+    assert aggregate.nfes_with_errors == 4
+    assert aggregate.nfes_failed == 3
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da ingestão em lote (ZIPs, diretórios e uploads de CSVs de NF-e)
+"""
+import io
+import zipfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.batch_ingestion import (
+    BatchIngestor, decode_csv, detect_separator, is_csv_member
+)
+from src.nfe_validator.profiling import RunProfiler
+from tests.nfe_csv import nfe_csv_row, nfe_csv_text
+
+
+def csv_text(*numbers, sep=","):
+    return nfe_csv_text([nfe_csv_row(n, sep=sep) for n in numbers], sep=sep)
+
+
+@pytest.fixture
+def zip_bytes():
+    """ZIP com dois CSVs (vírgula/utf-8 e ponto-e-vírgula/latin-1) e lixo do macOS"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("2023-01/filial_a.csv", csv_text(1, 2))
+        archive.writestr("2023-01/filial_b.csv", csv_text(3, sep=";").encode("latin-1"))
+        archive.writestr("__MACOSX/2023-01/._filial_a.csv", "x")
+        archive.writestr("leiame.txt", "ignorado")
+    return buffer.getvalue()
+
+
+# =====================================================
+# Decodificação
+# =====================================================
+
+def test_filtro_separador_e_encoding():
+    assert is_csv_member("dados/jan.csv", 10)
+    assert not is_csv_member("__MACOSX/dados/._jan.csv", 10)
+    assert not is_csv_member(".ocultos/jan.csv", 10)
+    assert not is_csv_member("vazio.csv", 0)
+
+    assert detect_separator(b"\n" + csv_text(1, sep=";").encode()) == ";"
+    assert detect_separator(b"coluna_unica\n1\n") == ","
+
+    frame = decode_csv(("﻿" + csv_text(1, 2)).encode("utf-8"))
+    assert list(frame.columns[:2]) == ["chave_acesso", "numero_nfe"]
+    assert frame.loc[0, "pis_cst"] == "01"
+    assert decode_csv(csv_text(1, sep=";").encode("latin-1")).loc[0, "descricao"] == "Açúcar cristal"
+
+
+# =====================================================
+# Lote
+# =====================================================
+
+def test_nfes_do_zip_em_ordem_com_origem(tmp_path, zip_bytes):
+    """Membros lidos direto do ZIP em disco; origem em csv_source['file']"""
+    path = tmp_path / "lote.zip"
+    path.write_bytes(zip_bytes)
+    progress = []
+
+    ingestor = BatchIngestor(max_workers=2)
+    nfes = list(ingestor.iter_nfes([path], progress_callback=lambda done, total: progress.append((done, total))))
+
+    assert [nfe.numero for nfe in nfes] == ["1", "2", "3"]
+    assert [nfe.csv_source["file"] for nfe in nfes] == [
+        "lote.zip/2023-01/filial_a.csv", "lote.zip/2023-01/filial_a.csv", "lote.zip/2023-01/filial_b.csv"
+    ]
+    assert nfes[2].items[0].descricao == "Açúcar cristal"
+    assert [f["nfes"] for f in ingestor.files] == [2, 1]
+    assert progress[-1] == (2, 2)
+    assert not list(tmp_path.glob("**/*.csv"))
+
+
+def test_upload_e_diretorio_com_coluna_de_origem(tmp_path, zip_bytes):
+    """Upload em memória + diretório com CSV avulso; coluna _source_file por linha"""
+    upload = io.BytesIO(zip_bytes)
+    upload.name = "upload.zip"
+    folder = tmp_path / "dados"
+    folder.mkdir()
+    (folder / "extra.csv").write_text(csv_text(4), encoding="utf-8")
+    (folder / "notas.txt").write_text("ignorado", encoding="utf-8")
+
+    members = list(BatchIngestor().iter_frames([upload, folder], mapped=False))
+
+    assert [m.name for m in members] == [
+        "upload.zip/2023-01/filial_a.csv", "upload.zip/2023-01/filial_b.csv", "dados/extra.csv"
+    ]
+    assert list(members[0].frame["_source_file"]) == ["upload.zip/2023-01/filial_a.csv"] * 2
+    assert members[2].rows == 1
+
+
+def test_arquivo_invalido_nao_interrompe_lote(tmp_path):
+    """Erro de um CSV fica no resumo; os demais seguem"""
+    (tmp_path / "ok.csv").write_text(csv_text(1), encoding="utf-8")
+    (tmp_path / "ruim.csv").write_bytes(b'"aspas sem fechar\n')
+
+    with RunProfiler() as profiler:
+        ingestor = BatchIngestor()
+        nfes = list(ingestor.iter_nfes([tmp_path / "ok.csv", tmp_path / "ruim.csv"]))
+
+    assert [nfe.numero for nfe in nfes] == ["1"]
+    assert ingestor.files[1]["error"]
+    counters = profiler.summary()["counters"]
+    assert counters["batch.files"] == 2
+    assert counters["batch.files_failed"] == 1
+
+
+def test_zip_corrompido():
+    bad = io.BytesIO(b"nao e zip")
+    bad.name = "quebrado.zip"
+
+    with pytest.raises(zipfile.BadZipFile):
+        list(BatchIngestor().iter_nfes([bad]))
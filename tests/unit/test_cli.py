@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da validação em lote pela linha de comando
+"""
+import json
+import pytest
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.cli import (
+    main, expand_inputs, CLIError, EXIT_OK, EXIT_FISCAL_ERRORS, EXIT_USAGE
+)
+from tests.nfe_csv import nfe_chave, nfe_csv_row, write_nfe_csv
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    """Dois arquivos: um com alíquota PIS errada, um com colunas renomeadas"""
+    data = tmp_path / "dados"
+    data.mkdir()
+    write_nfe_csv(data / "jan.csv", [nfe_csv_row(n, pis_aliquota="2.5" if n == 2 else "1.65") for n in (1, 2, 3)])
+    renamed = pd.read_csv(data / "jan.csv", dtype=str).rename(
+        columns={"chave_acesso": "Chave de Acesso", "ncm": "NCM Produto"}
+    )
+    renamed.to_csv(data / "fev.csv", index=False)
+    return data
+
+
+def run_cli(tmp_path, *args):
+    out = tmp_path / "saida"
+    code = main(["validate", *map(str, args), "-o", str(out), "-w", "1", "--no-store", "-q"])
+    return code, out
+
+
+# =====================================================
+# Entradas
+# =====================================================
+
+def test_expand_inputs_diretorio_e_glob(inputs):
+    """Diretórios, globs e arquivos repetidos"""
+    files = expand_inputs([str(inputs), str(inputs / "*.csv")])
+    assert [f.name for f in files] == ["fev.csv", "jan.csv"]
+
+    with pytest.raises(CLIError):
+        expand_inputs([str(inputs / "nada*.csv")])
+
+
+def test_entrada_inexistente_retorna_erro_de_uso(tmp_path):
+    code, _ = run_cli(tmp_path, tmp_path / "nao_existe.csv")
+    assert code == EXIT_USAGE
+
+
+# =====================================================
+# Execução
+# =====================================================
+
+def test_resultados_e_codigo_de_saida(tmp_path, inputs):
+    """Arquivos mapeados e validados; erro de alíquota reprova o lote"""
+    code, out = run_cli(tmp_path, inputs / "*.csv", "-f", "json", "markdown")
+    assert code == EXIT_FISCAL_ERRORS
+
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["exit_code"] == EXIT_FISCAL_ERRORS
+    assert summary["totals"]["files"] == 2
+    assert summary["totals"]["nfes"] == 6
+    by_file = {Path(f["input"]).name: f for f in summary["files"]}
+    # Colunas renomeadas produzem o mesmo resultado
+    assert by_file["fev.csv"]["by_severity"] == by_file["jan.csv"]["by_severity"]
+    assert by_file["jan.csv"]["nfes_failed"] >= 1
+
+    reports = json.loads((out / "jan.json").read_text(encoding="utf-8"))
+    assert len(reports) == 3
+    assert (out / "jan.md").read_text(encoding="utf-8").startswith("# Validação de NF-es - jan.csv")
+
+
+def test_tabela_de_erros_parquet(tmp_path, inputs):
+    """Uma linha por erro, com chave da NF-e e código"""
+    pytest.importorskip("pyarrow")
+    code, out = run_cli(tmp_path, inputs / "jan.csv", "-f", "parquet")
+    assert code == EXIT_FISCAL_ERRORS
+
+    errors = pd.read_parquet(out / "jan.parquet")
+    assert set(errors["chave_acesso"]) <= {nfe_chave(n) for n in (1, 2, 3)}
+    assert (errors["code"].str.startswith("PIS")).any()
+
+
+def test_fail_on_never(tmp_path, inputs):
+    """--fail-on never: sempre código 0 quando os arquivos são processados"""
+    code, out = run_cli(tmp_path, inputs / "jan.csv", "--fail-on", "never", "-f", "json", "--profile")
+    assert code == EXIT_OK
+    assert (out / "profile.json").exists()
+
+
+def test_saidas_em_streaming_comprimidas(tmp_path, inputs):
+    """jsonl e csv gravados com gzip; totais iguais aos do relatório"""
+    import gzip
+    code, out = run_cli(tmp_path, inputs / "jan.csv", "-f", "jsonl", "csv", "--compress", "gzip")
+    assert code == EXIT_FISCAL_ERRORS
+
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["files"][0]["outputs"] == ["jan.jsonl.gz", "jan.csv.gz"]
+    with gzip.open(out / "jan.jsonl.gz", "rt", encoding="utf-8") as f:
+        reports = [json.loads(line) for line in f]
+    assert len(reports) == summary["totals"]["nfes"] == 3
+
+    errors = pd.read_csv(out / "jan.csv.gz", dtype=str)
+    assert len(errors) == sum(summary["totals"]["by_severity"].values())
+
+
+def test_cache_dir_grava_mapeamentos(tmp_path, inputs):
+    """--cache-dir: um mapeamento por layout de cabeçalho, reaproveitado na reexecução"""
+    pytest.importorskip("pyarrow")
+    from src.nfe_validator.infrastructure.parsers.column_mapper import ColumnMapper
+    from src.nfe_validator.infrastructure.persistence.column_mapping_cache import ColumnMappingCache
+
+    cache_dir = tmp_path / "cache"
+    first, _ = run_cli(tmp_path, inputs / "*.csv", "-f", "json", "--cache-dir", cache_dir)
+    ColumnMapper.clear_memory_cache()
+    second, _ = run_cli(tmp_path, inputs / "*.csv", "-f", "json", "--cache-dir", cache_dir)
+
+    assert first == second == EXIT_FISCAL_ERRORS
+    with ColumnMappingCache(cache_dir / "column_mappings.db") as cache:
+        assert len(cache) == 2
+
+
+def test_entrada_zip(tmp_path, inputs):
+    """ZIP validado membro a membro, sem extrair; origem em cada linha de erro"""
+    import zipfile
+    zip_path = tmp_path / "lote.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.write(inputs / "jan.csv", "jan.csv")
+        archive.write(inputs / "fev.csv", "fev.csv")
+
+    code, out = run_cli(tmp_path, zip_path, "-f", "csv", "json")
+    assert code == EXIT_FISCAL_ERRORS
+
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["totals"]["nfes"] == 6
+    assert [m["file"] for m in summary["files"][0]["members"]] == ["lote.zip/jan.csv", "lote.zip/fev.csv"]
+
+    errors = pd.read_csv(out / "lote.csv", dtype=str)
+    assert set(errors["arquivo"]) == {"lote.zip/jan.csv", "lote.zip/fev.csv"}
+    assert len(json.loads((out / "lote.json").read_text(encoding="utf-8"))) == 6
+
+
+def test_compact_items_mesmos_relatorios(tmp_path, inputs):
+    """--compact-items: mesmos relatórios para CSV e ZIP"""
+    import zipfile
+    zip_path = tmp_path / "lote.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.write(inputs / "jan.csv", "jan.csv")
+
+    regular = tmp_path / "regular"
+    regular.mkdir()
+    compact = tmp_path / "compact"
+    compact.mkdir()
+    assert run_cli(regular, inputs / "jan.csv", zip_path, "-f", "json")[0] == EXIT_FISCAL_ERRORS
+    assert run_cli(compact, inputs / "jan.csv", zip_path, "-f", "json", "--compact-items")[0] == EXIT_FISCAL_ERRORS
+
+    for name in ("jan.json", "lote.json"):
+        expected = json.loads((regular / "saida" / name).read_text(encoding="utf-8"))
+        found = json.loads((compact / "saida" / name).read_text(encoding="utf-8"))
+        for report in expected + found:
+            report.pop("metadata")  # generated_at
+        assert found == expected
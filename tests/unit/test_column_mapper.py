@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do ColumnMapper (padrões compilados, cache por cabeçalho e confiança)
+"""
+import pytest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.column_mapper import ColumnMapper
+from src.nfe_validator.infrastructure.persistence.column_mapping_cache import ColumnMappingCache
+from src.nfe_validator.profiling import RunProfiler
+
+
+ERP_HEADER = [
+    "CHAVE DE ACESSO", "NÚMERO", "SÉRIE", "DATA EMISSÃO", "CPF/CNPJ Emitente", "RAZÃO SOCIAL EMITENTE",
+    "UF EMITENTE", "CNPJ DESTINATÁRIO", "NOME DESTINATÁRIO", "UF DESTINATÁRIO", "CÓDIGO NCM/SH",
+    "CFOP", "QUANTIDADE", "VALOR UNITÁRIO", "CST PIS", "Alíq PIS", "V PIS",
+]
+
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+    """Cada teste começa sem cabeçalhos em memória"""
+    ColumnMapper.clear_memory_cache()
+    yield
+    ColumnMapper.clear_memory_cache()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ColumnMappingCache(tmp_path / "mappings.db") as cache:
+        yield cache
+
+
+def test_normalizacao_e_mapeamento():
+    """Acentos, maiúsculas e separadores; colunas ausentes listadas"""
+    assert ColumnMapper.normalize_column_name("  Descrição do Produto/Serviço ") == "descricao_do_produto_servico"
+    assert ColumnMapper.normalize_column_name("__Alíq.  PIS__") == "aliq_pis"
+
+    mapping, missing = ColumnMapper.map_columns(pd.DataFrame(columns=ERP_HEADER))
+
+    assert mapping['chave_acesso'] == "CHAVE DE ACESSO"
+    assert mapping['cnpj_emitente'] == "CPF/CNPJ Emitente"
+    assert mapping['ncm'] == "CÓDIGO NCM/SH"
+    assert mapping['pis_aliquota'] == "Alíq PIS"
+    assert 'cofins_cst' in missing and 'cofins_cst' not in mapping
+
+
+def test_confianca_e_ambiguidade():
+    """Nome exato: confiança 1; mais de uma coluna casando: alternativas e confiança menor"""
+    result = ColumnMapper.map_columns_detailed(
+        ["ncm", "Chave NF-e", "Chave NF-e Referenciada", "Valor Total Item", "Vlr Total Item Desc"]
+    )
+
+    assert result.confidence['ncm'] == 1.0
+    assert result.mapping['chave_acesso'] == "Chave NF-e"
+    assert result.ambiguous['chave_acesso'] == ["Chave NF-e Referenciada"]
+    assert result.mapping['valor_total'] == "Valor Total Item"
+    assert result.confidence['valor_total'] < result.confidence['ncm']
+    assert 'ncm' not in result.ambiguous
+    assert set(result.low_confidence(0.9)) == {'chave_acesso', 'valor_total'}
+
+    report = ColumnMapper.get_mapping_report(result.mapping, result.missing,
+                                             result.confidence, result.ambiguous)
+    assert "também casam: `Chave NF-e Referenciada`" in report
+
+
+def test_cabecalho_repetido_em_memoria():
+    """Mesmo cabeçalho: resultado da memória, sem compartilhar o dict"""
+    first = ColumnMapper.map_columns_detailed(ERP_HEADER)
+    first.mapping['ncm'] = "alterado"
+
+    with RunProfiler() as profiler:
+        second = ColumnMapper.map_columns_detailed(pd.DataFrame(columns=ERP_HEADER))
+
+    assert (first.cached, second.cached) == (False, True)
+    assert second.mapping['ncm'] == "CÓDIGO NCM/SH"
+    assert profiler.summary()["counters"]["column_mapper.cache_hit"] == 1
+
+    # Ordem das colunas faz parte da assinatura
+    assert ColumnMapper.header_signature(ERP_HEADER) != ColumnMapper.header_signature(ERP_HEADER[::-1])
+
+
+def test_memoria_compartilhada_entre_threads(monkeypatch):
+    """Inserção e descarte concorrentes não derrubam o lote"""
+    monkeypatch.setattr(ColumnMapper, "MEMORY_CACHE_SIZE", 4)
+    headers = [ERP_HEADER + [f"extra_{n}"] for n in range(32)]
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(ColumnMapper.map_columns_detailed, headers * 8))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert all(result.mapping['ncm'] == "CÓDIGO NCM/SH" for result in results)
+    assert len(ColumnMapper._memory_cache) <= 4
+
+
+def test_cache_em_disco(cache, monkeypatch):
+    """Layout gravado em disco é mapeado sem avaliar padrões"""
+    expected = ColumnMapper.map_columns_detailed(ERP_HEADER, cache=cache)
+    assert len(cache) == 1
+
+    ColumnMapper.clear_memory_cache()
+    monkeypatch.setattr(ColumnMapper, "_match_columns",
+                        classmethod(lambda cls, columns: pytest.fail("padrões avaliados")))
+    result = ColumnMapper.map_columns_detailed(ERP_HEADER, cache=cache)
+
+    assert result.cached is True
+    assert (result.mapping, result.missing, result.confidence) == (
+        expected.mapping, expected.missing, expected.confidence
+    )
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Testes de paridade do motor colunar de regras com os validadores federais
+"""
+import pytest
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.validators.columnar_engine import (
+    ColumnarRuleEngine, ERROR_COLUMNS
+)
+from src.nfe_validator.domain.services.federal_validators import (
+    NCMValidator, PISCOFINSValidator, CFOPValidator, TotalsValidator
+)
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+# (descricao, ncm, cfop, pis_cst, pis_aliquota, cofins_cst, cofins_aliquota)
+ITEM_VARIANTS = [
+    ("Açúcar cristal", "17019900", "5101", "01", "1.65", "01", "7.6"),
+    ("Açúcar refinado", "17019900", "6101", "01", "1.65", "01", "7.6"),
+    ("Parafuso", "17019900", "5101", "01", "2.5", "01", "9.0"),
+    ("Açúcar VHP", "17011400", "7101", "01", "1.65", "06", "0"),
+    ("Açúcar demerara", "17019990", "5102", "99", "0", "99", "0"),
+    ("Etanol", "22071000", "5999", "06", "0", "06", "0"),
+    ("Açúcar", "ABC", "AB", "XX", "1.650", "01", "7.60"),
+    ("Açúcar orgânico", "17011300", "6102", "04", "0", "04", "0"),
+]
+
+
+@pytest.fixture
+def lote_csv(tmp_path):
+    """Lote variado: erros de NCM, CST, alíquota, cálculo, exportação e CFOP"""
+    rows = []
+    for nfe in range(1, 31):
+        uf_emit = ["SP", "PE", "MG"][nfe % 3]
+        uf_dest = ["SP", "PE", "RJ", "SP"][nfe % 4]
+        for item in range(1, 1 + nfe % 4 + 1):
+            desc, ncm, cfop, pis_cst, pis_aliq, cofins_cst, cofins_aliq = \
+                ITEM_VARIANTS[(nfe * 3 + item) % len(ITEM_VARIANTS)]
+            valor = 100 * item + nfe
+            pis_valor = ["5.78", "0", f"{valor * 0.0165:.2f}", f"{valor * 0.0165 + 0.02:.2f}"][item % 4]
+            rows.append(nfe_csv_row(
+                nfe, item, uf_emitente=uf_emit, uf_destinatario=uf_dest,
+                descricao=desc, ncm=ncm, cfop=cfop,
+                quantidade="1", valor_unitario=valor, valor_total=f"{valor}.{nfe % 10}",
+                pis_cst=pis_cst, pis_aliquota=pis_aliq, pis_valor=pis_valor,
+                cofins_cst=cofins_cst, cofins_aliquota=cofins_aliq,
+                cofins_valor=f"{valor * 0.076:.2f}",
+            ))
+    return write_nfe_csv(tmp_path / "lote.csv", rows)
+
+
+@pytest.fixture
+def normalized(lote_csv):
+    """DataFrame normalizado e NF-es montadas pelo parser a partir dele"""
+    parser = NFeCSVParser()
+    df = pd.read_csv(lote_csv, dtype=parser.CSV_DTYPE_SPEC, keep_default_na=False, na_values=[''])
+    df = parser._normalize_dataframe(df)
+    return df, parser._build_nfes(df)
+
+
+def item_errors(validator, nfe):
+    return [e for item in nfe.items for e in validator.validate(item, nfe)]
+
+
+def as_repr(errors):
+    return [repr(e) for e in errors]
+
+
+# =====================================================
+# Paridade por validador
+# =====================================================
+
+@pytest.mark.parametrize("validator_class,prefixes", [
+    (NCMValidator, ("NCM_",)),
+    (PISCOFINSValidator, ("PIS_", "COFINS_", "PISCOFINS_")),
+    (CFOPValidator, ("CFOP_",)),
+])
+def test_paridade_validadores_de_item(normalized, fiscal_repo, validator_class, prefixes):
+    """Mesmos erros (todos os campos, mesma ordem) que o validador item a item"""
+    df, nfes = normalized
+    engine = ColumnarRuleEngine(fiscal_repo)
+    errors = engine.validate(df)
+    subset = errors[errors["code"].str.startswith(prefixes)]
+    by_nfe = engine.errors_by_nfe(df, subset)
+
+    validator = validator_class(fiscal_repo)
+    for nfe in nfes:
+        assert as_repr(by_nfe.get(nfe.chave_acesso, [])) == as_repr(item_errors(validator, nfe))
+
+
+def test_paridade_pipeline_federal(normalized, fiscal_repo):
+    """Ordem combinada: NCM, PIS/COFINS, CFOP (por item), totais"""
+    df, nfes = normalized
+    engine = ColumnarRuleEngine(fiscal_repo)
+    by_nfe = engine.errors_by_nfe(df, engine.validate(df))
+
+    validators = [NCMValidator(fiscal_repo), PISCOFINSValidator(fiscal_repo), CFOPValidator(fiscal_repo)]
+    codes = set()
+    for nfe in nfes:
+        expected = [e for v in validators for e in item_errors(v, nfe)]
+        expected += TotalsValidator(fiscal_repo).validate(nfe)
+        assert as_repr(by_nfe.get(nfe.chave_acesso, [])) == as_repr(expected)
+        codes.update(e.code for e in expected)
+
+    # Lote cobre os principais caminhos das regras
+    assert {"NCM_001", "NCM_003", "PIS_001", "PIS_002", "PIS_003",
+            "PIS_004", "PISCOFINS_001", "CFOP_001", "CFOP_003"} <= codes
+
+
+def test_paridade_totais_declarados(normalized, fiscal_repo):
+    """Totais declarados divergentes geram os mesmos erros de TotalsValidator"""
+    df, nfes = normalized
+    declared = {}
+    for i, nfe in enumerate(nfes[:6]):
+        values = {
+            "valor_produtos": nfe.totais.valor_produtos + Decimal(["0.01", "5", "0.03"][i % 3]),
+            "valor_total_nota": nfe.totais.valor_total_nota - Decimal("0.02") * i,
+            "valor_pis": nfe.totais.valor_pis + Decimal("0.021") * (i % 2),
+        }
+        if i % 2:
+            values["valor_seguro"] = Decimal("10.00")
+        declared[nfe.chave_acesso] = values
+        for name, value in values.items():
+            setattr(nfe.totais, name, value)
+    totals = pd.DataFrame.from_dict(declared, orient="index")
+
+    engine = ColumnarRuleEngine(fiscal_repo)
+    errors = engine.validate(df, totals=totals)
+    by_nfe = engine.errors_by_nfe(df, errors[errors["code"].str.startswith("TOTAL_")], totals=totals)
+
+    validator = TotalsValidator(fiscal_repo)
+    found = 0
+    for nfe in nfes:
+        expected = validator.validate(nfe)
+        found += len(expected)
+        assert as_repr(by_nfe.get(nfe.chave_acesso, [])) == as_repr(expected)
+    assert found > 0
+
+
+# =====================================================
+# DataFrame de erros
+# =====================================================
+
+def test_frame_compacto_consistente(normalized, fiscal_repo):
+    """Colunas do frame coincidem com os ValidationError materializados"""
+    df, _ = normalized
+    engine = ColumnarRuleEngine(fiscal_repo)
+    errors = engine.validate(df)
+
+    assert list(errors.columns) == ERROR_COLUMNS
+    materialized = engine.materialize(df, errors)
+    assert len(materialized) == len(errors)
+    for row, error in zip(errors.itertuples(index=False), materialized):
+        assert row.code == error.code
+        assert row.severity == error.severity.value
+        assert row.expected == error.expected_value
+        assert row.actual == error.actual_value
+        assert row.impact == error.financial_impact
+
+
+def test_materializa_subconjunto(normalized, fiscal_repo):
+    """Materialização sob demanda de apenas parte dos erros"""
+    df, _ = normalized
+    engine = ColumnarRuleEngine(fiscal_repo)
+    errors = engine.validate(df)
+    critical = errors[errors["severity"] == "CRITICAL"]
+
+    materialized = engine.materialize(df, critical)
+    assert [e.code for e in materialized] == critical["code"].tolist()
+    assert engine.materialize(df, errors.iloc[0:0]) == []
+
+
+def test_indice_duplicado(normalized, fiscal_repo):
+    """Índice duplicado é rejeitado (linhas do frame seriam ambíguas)"""
+    df, _ = normalized
+    with pytest.raises(ValueError):
+        ColumnarRuleEngine(fiscal_repo).validate(pd.concat([df, df]))
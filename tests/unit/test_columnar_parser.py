@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Testes de paridade: caminho colunar (vetorizado) x caminho linha a linha
+"""
+import pytest
+import sys
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.parsers.columnar import ColumnarNormalizer
+from tests.nfe_csv import NFE_CSV_HEADER, write_nfe_csv
+
+
+HEADER = NFE_CSV_HEADER + ",natureza_operacao,tipo_acucar,icumsa"
+
+ROWS = [
+    # Valores canônicos
+    "35230100000001000000550010000000011000000011,1,1,2023-01-15,"
+    "12.345.678/0001-90,Usina A,SP,98765432000110,Cliente B,PE,"
+    "1,P1,Açúcar cristal,1701.14.00,5.101,KG,"
+    "1000,3.50,3500.00,1,1.65,57.75,01,7.60,266.00,Venda,cristal,150",
+    # Vírgula decimal, zeros à esquerda, notação científica, espaços
+    "35230100000001000000550010000000011000000011,1,1,2023-01-15,"
+    "12.345.678/0001-90,Usina A,SP,98765432000110,Cliente B,PE,"
+    "2,P2, Álcool ,2207,102,L,"
+    "\"1,5\",007.10,1e3, 50 ,\"0,65\",-0.00,5,0.0000001,abc,,,",
+    # NF-e com data inválida em formato alternativo e campos vazios
+    "35230100000001000000550010000000022000000022,2,1,15/02/2023,"
+    "1234567000190,Usina C,PE,98765432000110,Cliente D,SP,"
+    ",,,,,,"
+    ",,,,,,,,,,,",
+    # Item repetindo chave da primeira NF-e (agrupamento não contíguo)
+    "35230100000001000000550010000000011000000011,1,1,2023-01-15,"
+    "12.345.678/0001-90,Usina A,SP,98765432000110,Cliente B,PE,"
+    "3,P3,Melaço,170310,6101,KG,"
+    "10.000,2,20,49,0,0,49,0,0,Venda,,",
+]
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """CSV com casos de borda de normalização"""
+    return write_nfe_csv(tmp_path / "nfe_paridade.csv", ROWS, header=HEADER)
+
+
+# =====================================================
+# Normalização colunar
+# =====================================================
+
+@pytest.mark.parametrize("values, method, scalar", [
+    (["1701", "1701.14.00", "17011100123", "", "nan", "17-01"], "normalize_ncm", "_normalize_ncm"),
+    (["5101", "5.101", "102", "51011", "", "-12"], "normalize_cfop", "_normalize_cfop"),
+    (["12.345.678/0001-90", "1234567000190", "", "123456789012345"], "normalize_cnpj", "_normalize_cnpj"),
+    (["1", "01", " 5 ", "049", "", "A", "nan", "1.0"], "normalize_cst", "_normalize_cst"),
+    (["1.50", "1,5", "007.10", "1e3", "", "abc", "-0.00", "0.0000001",
+      "0.0000010", " 50 ", "NaN", "+1", "١٢"], "normalize_decimal", "_normalize_decimal"),
+])
+def test_normalizer_igual_ao_escalar(values, method, scalar):
+    """Normalização vetorizada produz o mesmo resultado do método escalar"""
+    parser = NFeCSVParser()
+    series = pd.Series(values * 3, dtype=object)
+
+    result = getattr(ColumnarNormalizer, method)(series).tolist()
+    expected = [getattr(parser, scalar)(v) for v in series]
+
+    assert result == expected
+
+
+# =====================================================
+# Paridade do parsing completo
+# =====================================================
+
+def test_parse_csv_paridade(csv_file):
+    """Caminho colunar gera as mesmas entidades do caminho linha a linha"""
+    vectorized = NFeCSVParser().parse_csv(str(csv_file))
+    rowwise = NFeCSVParser(vectorized=False).parse_csv(str(csv_file))
+
+    assert [nfe.chave_acesso for nfe in vectorized] == [nfe.chave_acesso for nfe in rowwise]
+    # repr compara também a representação dos Decimais (ex.: '1.50' x '1.5')
+    # e trata Decimal('NaN') de forma determinística
+    assert [repr(nfe) for nfe in vectorized] == [repr(nfe) for nfe in rowwise]
+
+
+def test_parse_csv_paridade_erros(tmp_path):
+    """Erros por NF-e (ex.: coluna ausente) são registrados da mesma forma"""
+    path = tmp_path / "sem_razao_social.csv"
+    path.write_text(
+        "chave_acesso,numero_nfe,cnpj_emitente,cnpj_destinatario\n"
+        "35230100000001000000550010000000011000000011,1,123,456\n",
+        encoding="utf-8"
+    )
+
+    parser_v = NFeCSVParser()
+    parser_r = NFeCSVParser(vectorized=False)
+    with pytest.raises(Exception) as exc_v:
+        parser_v.parse_csv(str(path))
+    with pytest.raises(Exception) as exc_r:
+        parser_r.parse_csv(str(path))
+
+    assert str(exc_v.value) == str(exc_r.value)
+    assert parser_v.parse_errors == parser_r.parse_errors
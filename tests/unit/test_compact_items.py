@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do armazenamento compacto de itens (CompactItemBatch)
+"""
+import pickle
+import pytest
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import NFeItem, ImpostoItem
+from src.nfe_validator.domain.entities.compact_items import CompactItemBatch, DecimalColumn
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from src.repositories.fiscal_repository import FiscalRepository
+
+
+@pytest.fixture
+def items():
+    """Itens com valores em escalas e expoentes variados"""
+    return [
+        NFeItem(
+            numero_item=1, codigo_produto="P1", descricao="Açúcar cristal",
+            ncm="17019900", cfop="5101", unidade="KG",
+            quantidade=Decimal("1000"), valor_unitario=Decimal("3.50"),
+            valor_total=Decimal("3500.00"),
+            impostos=ImpostoItem(
+                pis_cst="01", pis_base=Decimal("3500.00"), pis_aliquota=Decimal("1.65"),
+                pis_valor=Decimal("57.75"), cofins_cst="01",
+                cofins_aliquota=Decimal("7.6"), cofins_valor=Decimal("266")
+            ),
+            tipo_acucar="cristal"
+        ),
+        NFeItem(
+            numero_item=2, codigo_produto="P2", descricao="Açúcar refinado",
+            ncm="17019900", cfop="5101",
+            quantidade=Decimal("0.12345"), valor_total=Decimal("-0.00"),
+            valor_desconto=Decimal("1E+3"),
+            impostos=ImpostoItem(pis_valor=Decimal("5.775"), cofins_valor=Decimal("1e30"))
+        ),
+    ]
+
+
+# =====================================================
+# Valores exatos
+# =====================================================
+
+@pytest.mark.parametrize("value", [
+    "0", "0.00", "7.6", "7.60", "-12.34", "1E+3", "5.775", "-0.00", "1e30", "NaN"
+])
+def test_decimal_column_exata(value):
+    """Visão Decimal preserva valor e expoente (repr idêntico)"""
+    column = DecimalColumn.from_values([Decimal(value)], scale=2)
+    assert repr(column.get(0)) == repr(Decimal(value))
+
+
+def test_centavos(items):
+    """Campos monetários como int64 em centavos"""
+    batch = CompactItemBatch.from_items(items)
+    cents = batch.cents("valor_total")
+    assert cents.dtype == np.int64
+    assert cents.tolist() == [350000, 0]
+    assert batch.cents("pis_valor").tolist() == [5775, 578]  # 5.775 arredondado
+    assert batch.decimal("pis_valor", 1) == Decimal("5.775")
+
+
+def test_mesma_api_de_atributos(items):
+    """Visões equivalem aos NFeItem originais"""
+    batch = CompactItemBatch.from_items(items)
+    assert len(batch) == 2
+    for view, item in zip(batch, items):
+        assert view == item
+        assert repr(view) == repr(item)
+        assert view.impostos.pis_aliquota == item.impostos.pis_aliquota
+        assert view.validation_errors == []
+
+
+def test_atribuicao(items):
+    """Atributos podem ser alterados pela visão"""
+    batch = CompactItemBatch.from_items(items)
+    view = batch[0]
+    view.impostos.pis_cst = "99"
+    view.valor_total = Decimal("10.005")
+    view.numero_item = 7
+
+    assert batch[0].impostos.pis_cst == "99"
+    assert repr(batch[0].valor_total) == repr(Decimal("10.005"))
+    assert batch[-2].numero_item == 7
+
+
+def test_pickle_materializa_nfeitem(items):
+    """Serialização envia NFeItem comum, sem o lote inteiro"""
+    view = CompactItemBatch.from_items(items)[0]
+    restored = pickle.loads(pickle.dumps(view))
+    assert type(restored) is NFeItem
+    assert restored == items[0]
+
+
+# =====================================================
+# Integração com parser e validação
+# =====================================================
+
+def test_parser_compacto_paridade(tmp_path):
+    """Parser com compact_items=True gera as mesmas NF-es e os mesmos erros"""
+    path = tmp_path / "lote.csv"
+    path.write_text(
+        "chave_acesso,numero_nfe,serie,data_emissao,cnpj_emitente,razao_social_emitente,"
+        "uf_emitente,cnpj_destinatario,razao_social_destinatario,uf_destinatario,"
+        "numero_item,codigo_produto,descricao,ncm,cfop,unidade,quantidade,valor_unitario,"
+        "valor_total,pis_cst,pis_aliquota,pis_valor,cofins_cst,cofins_aliquota,cofins_valor\n"
+        "35230100000001000000550010000000000000000001,1,1,2023-01-15,12345678000190,Usina,SP,"
+        "98765432000110,Cliente,PE,1,P1,Açúcar cristal,17019900,6101,KG,1000,3.50,3500.00,"
+        "01,1.65,57.75,01,7.60,266.00\n"
+        "35230100000001000000550010000000000000000001,1,1,2023-01-15,12345678000190,Usina,SP,"
+        "98765432000110,Cliente,PE,2,P2,Parafuso,17019900,6101,KG,10,1.005,10.05,"
+        "01,2.5,0.30,06,7.6,0\n",
+        encoding="utf-8"
+    )
+    regular = NFeCSVParser().parse_csv(str(path))
+    compact = NFeCSVParser(compact_items=True).parse_csv(str(path))
+    assert repr(compact) == repr(regular)
+
+    repo = FiscalRepository()
+    expected = [repr(ValidationPipeline(repo).validate(nfe).validation_errors) for nfe in regular]
+    found = [repr(ValidationPipeline(repo).validate(nfe).validation_errors) for nfe in compact]
+    assert found == expected
+    assert expected != ["[]"]
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do pool de conexões somente leitura do FiscalRepository
+"""
+import sqlite3
+import threading
+import pytest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.repositories.connection_pool import SQLiteConnectionPool
+from src.repositories.fiscal_repository import FiscalRepository
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "regras.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nome TEXT)")
+        conn.executemany("INSERT INTO t (nome) VALUES (?)", [(f"n{i}",) for i in range(100)])
+    return path
+
+
+# =====================================================
+# Pool
+# =====================================================
+
+def test_conexao_somente_leitura(db_path):
+    """Conexões do pool rejeitam escrita e aplicam os PRAGMAs de leitura"""
+    with SQLiteConnectionPool(db_path) as pool, pool.connection() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -SQLiteConnectionPool.CACHE_SIZE_KB
+        assert conn.execute("SELECT nome FROM t WHERE id = ?", (1,)).fetchone()['nome'] == "n0"
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM t")
+
+
+def test_reutiliza_conexoes(db_path):
+    """Conexão devolvida é reaproveitada; blocos aninhados usam a mesma"""
+    pool = SQLiteConnectionPool(db_path, size=2)
+    with pool.connection() as conn:
+        with pool.connection() as nested:
+            assert nested is conn
+    with pool.connection() as again:
+        assert again is conn
+    assert pool.open_connections == 1
+    pool.close()
+
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+
+
+def test_limite_de_conexoes(db_path):
+    """Acima de size, a thread aguarda uma conexão livre (ou esgota o tempo)"""
+    pool = SQLiteConnectionPool(db_path, size=1, timeout=0.05)
+    held = pool.acquire()
+    errors = []
+
+    def borrow():
+        try:
+            pool.acquire()
+        except sqlite3.OperationalError as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+
+    pool.release(held)
+    assert pool.acquire() is held
+    pool.close()
+
+
+def test_consultas_concorrentes(db_path):
+    """Várias threads consultando ao mesmo tempo, sem ultrapassar size"""
+    pool = SQLiteConnectionPool(db_path, size=3)
+
+    def query(i):
+        with pool.connection() as conn:
+            return conn.execute("SELECT nome FROM t WHERE id = ?", (i % 100 + 1,)).fetchone()['nome']
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(query, range(400)))
+
+    assert results == [f"n{i % 100}" for i in range(400)]
+    assert pool.open_connections <= 3
+    pool.close()
+
+
+# =====================================================
+# FiscalRepository
+# =====================================================
+
+def test_repositorio_concorrente():
+    """Consultas SQL e carga do snapshot em várias threads"""
+    repo = FiscalRepository(use_local_csv=False, use_snapshot=False, pool_size=4)
+    expected = (repo.get_cfop_rule("5101"), repo.get_statistics())
+
+    def query(_):
+        return repo.get_cfop_rule("5101"), repo.get_statistics()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(query, range(64)))
+
+    assert all(result == expected for result in results)
+    assert repo.pool.open_connections <= 4
+    repo.close()
+
+
+def test_snapshot_carregado_uma_vez():
+    """Primeiro acesso concorrente ao snapshot monta um único RuleSnapshot"""
+    repo = FiscalRepository(use_local_csv=False)
+    barrier = threading.Barrier(4)
+
+    def load(_):
+        barrier.wait()
+        return repo.snapshot
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        snapshots = list(executor.map(load, range(4)))
+
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    repo.close()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do parsing direto de DataFrame (parse_dataframe), sem CSV temporário
+"""
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser, CSVParserException
+from src.nfe_validator.infrastructure.parsers.column_mapper import ColumnMapper
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+ITEM = {
+    "razao_social_emitente": "Usina Teste", "ncm": "1701.99.00",
+    "quantidade": "100", "valor_unitario": "3.5", "valor_total": "350.5",
+    "pis_cst": "1", "pis_valor": "5.78",
+    "cofins_aliquota": "7.6", "cofins_valor": "26.64",
+}
+
+
+def make_row(nfe: int, item: int) -> str:
+    return nfe_csv_row(nfe, item, **ITEM)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """CSV com 4 NF-es fora de ordem (1 a 3 itens cada)"""
+    rows = [make_row(nfe, item) for nfe in (3, 1, 4, 2) for item in range(1, nfe % 3 + 2)]
+    return write_nfe_csv(tmp_path / "nfes.csv", rows)
+
+
+def via_temp_csv(df, tmp_path):
+    """Caminho anterior do app: to_csv + parse_csv"""
+    path = tmp_path / "temp.csv"
+    df.to_csv(path, index=False)
+    return NFeCSVParser().parse_csv(str(path))
+
+
+# =====================================================
+# Equivalência com o CSV temporário
+# =====================================================
+
+def test_igual_ao_csv_temporario(csv_path, tmp_path):
+    """DataFrame com tipos inferidos produz as mesmas NF-es"""
+    df = pd.read_csv(csv_path)
+    assert [repr(n) for n in NFeCSVParser().parse_dataframe(df)] == \
+        [repr(n) for n in via_temp_csv(df, tmp_path)]
+
+
+def test_vazios_datas_e_codigos_numericos(csv_path, tmp_path):
+    """Vazios, None, datas e CST numérico tratados como no CSV"""
+    df = pd.read_csv(csv_path)
+    df['data_emissao'] = pd.to_datetime(df['data_emissao'])
+    df['descricao'] = df['descricao'].astype(object)
+    df.loc[::2, 'descricao'] = ''
+    df.loc[1, 'unidade'] = None
+    df['pis_cst'] = 1
+    df['pis_valor'] = df['pis_valor'].astype(float)
+    df.loc[::3, 'pis_valor'] = np.nan
+    df['icms_cst'] = ''
+
+    nfes = NFeCSVParser().parse_dataframe(df)
+    assert [repr(n) for n in nfes] == [repr(n) for n in via_temp_csv(df, tmp_path)]
+    assert {item.impostos.pis_cst for nfe in nfes for item in nfe.items} == {'01'}
+
+
+def test_dataframe_mapeado_nao_e_alterado(csv_path):
+    """ColumnMapper + parse_dataframe não modificam os dados originais"""
+    original = pd.read_csv(csv_path).rename(columns={'chave_acesso': 'Chave de Acesso'})
+    snapshot = original.copy()
+
+    mapping, missing = ColumnMapper.map_columns(original)
+    mapped = ColumnMapper.fill_missing_columns(ColumnMapper.apply_mapping(original, mapping), missing)
+    nfes = NFeCSVParser().parse_dataframe(mapped)
+
+    assert len(nfes) == 4
+    assert [n.chave_acesso for n in nfes] == sorted(n.chave_acesso for n in nfes)
+    assert nfes[0].items[0].ncm == '17019900'
+    pd.testing.assert_frame_equal(original, snapshot)
+    assert 'chave_acesso' not in original.columns
+
+
+def test_colunas_minimas_ausentes():
+    """Mesma validação de colunas do parse_csv"""
+    with pytest.raises(CSVParserException):
+        NFeCSVParser().parse_dataframe(pd.DataFrame({'chave_acesso': ['1'], 'ncm': ['17019900']}))
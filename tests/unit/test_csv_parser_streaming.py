@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do parsing em streaming (iter_nfes) e do ValidationPipeline
+"""
+import pytest
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser, CSVParserException
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+# Valores estáveis (mesmo texto em qualquer tipo inferido)
+ITEM = dict(
+    razao_social_emitente="Usina Teste", uf_destinatario="SP", cfop="5101",
+    quantidade="100", valor_unitario="3.5", valor_total="350.5",
+    pis_valor="5.78", cofins_aliquota="7.6", cofins_valor="26.64",
+)
+
+
+def make_row(nfe: int, item: int, **values) -> str:
+    """Linha de item (ITEM mais as colunas informadas)"""
+    return nfe_csv_row(nfe, item, **{**ITEM, **values})
+
+
+@pytest.fixture
+def csv_agrupado(tmp_path):
+    """CSV com 5 NF-es (1 a 4 itens cada), linhas agrupadas por NF-e"""
+    rows = [make_row(nfe, item) for nfe in range(1, 6) for item in range(1, nfe % 4 + 2)]
+    return write_nfe_csv(tmp_path / "agrupado.csv", rows)
+
+
+# =====================================================
+# Testes de iter_nfes
+# =====================================================
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 7, 1000])
+def test_iter_nfes_independente_do_bloco(csv_agrupado, chunksize):
+    """Resultado não depende do tamanho do bloco (NF-es cruzando blocos)"""
+    reference = [repr(nfe) for nfe in NFeCSVParser().iter_nfes(str(csv_agrupado), chunksize=1000)]
+    result = [repr(nfe) for nfe in NFeCSVParser().iter_nfes(str(csv_agrupado), chunksize=chunksize)]
+
+    assert result == reference
+
+
+def test_iter_nfes_igual_parse_csv(csv_agrupado):
+    """Streaming gera as mesmas NF-es do parse completo"""
+    streamed = list(NFeCSVParser().iter_nfes(str(csv_agrupado), chunksize=2))
+    full = NFeCSVParser().parse_csv(str(csv_agrupado))
+
+    assert len(streamed) == 5
+    assert [repr(nfe) for nfe in streamed] == [repr(nfe) for nfe in full]
+    assert [nfe.csv_source['rows'] for nfe in streamed] == [2, 3, 4, 1, 2]
+
+
+# Decimais do parser original (parse_csv antes do caminho colunar) para
+# zeros_csv: colunas numéricas passam por float ('9.00' -> '9.0'); com um
+# valor não numérico ("2,90") a coluna inteira fica como texto ('3.90')
+BASELINE_DECIMALS = {
+    # numero: (quantidade, valor_unitario, valor_total, pis_aliquota, pis_valor, cofins_aliquota, cofins_valor)
+    "3": ("10.0", "10.98", "109.8", "9.0", "3.9", "7.6", "8.3"),
+    "1": ("10.0", "10.98", "109.8", "9.0", "1.9", "7.6", "8.3"),
+    "2": ("10.0", "10.98", "109.8", "9.0", "2.9", "7.6", "8.3"),
+}
+BASELINE_PIS_VALOR_TEXTO = {"3": "3.90", "1": "1.90", "2": "2.90"}
+
+ENTRY_POINTS = {
+    "iter_nfes": lambda path: list(NFeCSVParser().iter_nfes(str(path), chunksize=2)),
+    "parse_csv": lambda path: NFeCSVParser().parse_csv(str(path), sort=False),
+    "linha_a_linha": lambda path: NFeCSVParser(vectorized=False).parse_csv(str(path), sort=False),
+    "parse_dataframe": lambda path: NFeCSVParser().parse_dataframe(pd.read_csv(path), sort=False),
+    "parse_dataframe_texto": lambda path: NFeCSVParser().parse_dataframe(pd.read_csv(path, dtype=str), sort=False),
+}
+
+
+@pytest.fixture
+def zeros_csv(tmp_path):
+    """3 NF-es fora de ordem com zeros à direita nos decimais"""
+    rows = [
+        make_row(nfe, item, quantidade="10.00", valor_unitario="10.980", valor_total="109.80",
+                 pis_aliquota="9.00", pis_valor=f"{nfe}.90", cofins_aliquota="7.60", cofins_valor="8.30")
+        for nfe in (3, 1, 2) for item in (1, 2)
+    ]
+    return write_nfe_csv(tmp_path / "zeros.csv", rows)
+
+
+def decimals(nfe):
+    item = nfe.items[0]
+    impostos = item.impostos
+    return tuple(str(v) for v in (
+        item.quantidade, item.valor_unitario, item.valor_total, impostos.pis_aliquota,
+        impostos.pis_valor, impostos.cofins_aliquota, impostos.cofins_valor,
+    ))
+
+
+@pytest.mark.parametrize("entry", ENTRY_POINTS)
+def test_decimais_iguais_ao_parser_original(zeros_csv, entry):
+    """Todas as entradas reproduzem a representação dos decimais do parser original"""
+    nfes = ENTRY_POINTS[entry](zeros_csv)
+
+    assert {nfe.numero: decimals(nfe) for nfe in nfes} == BASELINE_DECIMALS
+    assert [nfe.numero for nfe in nfes] == ["3", "1", "2"]
+
+
+@pytest.mark.parametrize("entry", ENTRY_POINTS)
+def test_coluna_texto_no_ultimo_bloco(zeros_csv, entry):
+    """Valor não numérico no fim do arquivo torna a coluna inteira texto (também em streaming)"""
+    lines = zeros_csv.read_text(encoding="utf-8").splitlines()
+    lines[-1] = lines[-1].replace(",2.90,", ',"2,90",')
+    zeros_csv.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    nfes = ENTRY_POINTS[entry](zeros_csv)
+
+    assert {nfe.numero: str(nfe.items[0].impostos.pis_valor) for nfe in nfes} == BASELINE_PIS_VALOR_TEXTO
+    assert str(nfes[0].items[0].quantidade) == "10.0"
+
+
+def test_mensagens_iguais_entre_entradas(zeros_csv, fiscal_repo):
+    """Mensagens de erro com o texto do parser original em todas as entradas"""
+    pipeline = ValidationPipeline(fiscal_repo)
+    messages = {
+        entry: [
+            [(e.code, e.message, e.actual_value, e.financial_impact) for e in pipeline.validate(nfe).validation_errors]
+            for nfe in parse(zeros_csv)
+        ]
+        for entry, parse in ENTRY_POINTS.items()
+    }
+
+    reference = messages["parse_csv"]
+    assert all(result == reference for result in messages.values())
+    assert any("9.0%" in message for _, message, _, _ in reference[0])
+
+
+def test_iter_nfes_entrega_incremental(csv_agrupado):
+    """Primeira NF-e é entregue antes do fim do arquivo"""
+    stream = NFeCSVParser().iter_nfes(str(csv_agrupado), chunksize=3)
+    first = next(stream)
+
+    assert first.numero == "1"
+    assert len(first.items) == 2
+
+
+def test_iter_nfes_chave_reaberta(tmp_path):
+    """Chave que reaparece após concluída gera erro"""
+    rows = [make_row(1, 1), make_row(2, 1), make_row(3, 1), make_row(1, 2)]
+    path = write_nfe_csv(tmp_path / "desordenado.csv", rows)
+
+    with pytest.raises(CSVParserException, match="não agrupado"):
+        list(NFeCSVParser().iter_nfes(str(path), chunksize=2))
+
+
+def test_iter_nfes_latin1(tmp_path):
+    """Arquivo latin-1 é detectado sem carregar o arquivo inteiro"""
+    path = write_nfe_csv(tmp_path / "latin1.csv", [make_row(1, 1)], encoding="latin-1")
+
+    nfes = list(NFeCSVParser().iter_nfes(str(path)))
+
+    assert nfes[0].items[0].descricao == "Açúcar cristal"
+
+
+# =====================================================
+# Testes do ValidationPipeline
+# =====================================================
+
+def test_pipeline_validate_stream(csv_agrupado, fiscal_repo):
+    """Pipeline consome o stream e valida cada NF-e"""
+    pipeline = ValidationPipeline(fiscal_repo)
+    stream = NFeCSVParser().iter_nfes(str(csv_agrupado), chunksize=2)
+
+    validated = list(pipeline.validate_stream(stream))
+
+    expected = [
+        pipeline.validate(nfe)
+        for nfe in NFeCSVParser().parse_csv(str(csv_agrupado))
+    ]
+    assert [[e.code for e in nfe.validation_errors] for nfe in validated] == \
+        [[e.code for e in nfe.validation_errors] for nfe in expected]
+    assert pipeline.system_error_count == 0
+
+
+def test_pipeline_system_error(csv_agrupado, fiscal_repo):
+    """Erro inesperado vira SYSTEM_ERROR sem interromper o stream"""
+    pipeline = ValidationPipeline(fiscal_repo)
+
+    def failing_validate(item, nfe):
+        raise RuntimeError("falha simulada")
+
+    pipeline.item_validators[0].validate = failing_validate
+    captured = []
+
+    validated = list(pipeline.validate_stream(
+        NFeCSVParser().iter_nfes(str(csv_agrupado)),
+        on_error=lambda nfe, e: captured.append(nfe.numero)
+    ))
+
+    assert len(validated) == 5
+    assert pipeline.system_error_count == 5
+    assert captured == ["1", "2", "3", "4", "5"]
+    assert all(nfe.validation_errors[-1].code == "SYSTEM_ERROR" for nfe in validated)
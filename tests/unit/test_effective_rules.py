@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da resolução de regras por data de vigência (data de emissão da NF-e)
+"""
+import pytest
+import shutil
+import sqlite3
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import NFeEntity, NFeItem, Empresa, ImpostoItem
+from src.nfe_validator.domain.services.federal_validators import NCMValidator
+from src.nfe_validator.domain.services.signature_cache import SignatureRuleCache
+from src.nfe_validator.domain.services.state_validators import SPValidator
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.validators.columnar_engine import ColumnarRuleEngine
+from src.repositories.effective_index import EffectiveIndex, to_date
+from src.repositories.fiscal_repository import FiscalRepository
+
+
+DB_PATH = Path(__file__).parent.parent.parent / "src" / "database" / "rules.db"
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """rules.db com ICMS-SP alterado em 2024 e NCM 17021100 encerrado em 2023"""
+    path = tmp_path / "rules.db"
+    shutil.copy(DB_PATH, path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            UPDATE state_overrides SET valid_until = '2023-12-31'
+            WHERE state = 'SP' AND override_type = 'ICMS'
+        """)
+        conn.execute("""
+            INSERT INTO state_overrides
+                (state, override_type, ncm, rule_name, rule_description, icms_rate, valid_from)
+            VALUES ('SP', 'ICMS', '17019900', 'ICMS Açúcar SP 2024', 'Nova alíquota', 19.5, '2024-01-01')
+        """)
+        conn.execute("UPDATE ncm_rules SET valid_until = '2023-12-31' WHERE ncm = '17021100'")
+    return path
+
+
+def make_nfe(data_emissao: datetime, icms_aliquota: str = "18") -> NFeEntity:
+    item = NFeItem(
+        numero_item=1, codigo_produto="P1", descricao="Açúcar cristal", ncm="17019900", cfop="5101",
+        unidade="KG", quantidade=Decimal("1"), valor_unitario=Decimal("100"), valor_total=Decimal("100"),
+        impostos=ImpostoItem(icms_base=Decimal("100"), icms_aliquota=Decimal(icms_aliquota),
+                             icms_valor=Decimal(icms_aliquota)),
+    )
+    return NFeEntity(
+        chave_acesso="35230100000001000000550010000000011000000011", numero="1", serie="1",
+        data_emissao=data_emissao,
+        emitente=Empresa(cnpj="12345678000190", razao_social="USINA", uf="SP"),
+        destinatario=Empresa(cnpj="98765432000199", razao_social="CLIENTE", uf="SP"),
+        items=[item],
+    )
+
+
+# =====================================================
+# Índice de vigência
+# =====================================================
+
+def test_indice_por_intervalo():
+    """Fim inclusivo, vigência aberta e intervalos sobrepostos"""
+    index = EffectiveIndex()
+    index.add("X", "antiga", "2020-01-01", "2022-12-31")
+    index.add("X", "nova", "2023-01-01", None)
+    index.add("X", "temporaria", "2023-06-01", "2023-06-30")
+    index.add("Y", "sempre")
+    index.build()
+
+    assert index.at("X", date(2019, 12, 31)) == ()
+    assert index.at("X", date(2022, 12, 31)) == ("antiga",)
+    assert index.at("X", date(2023, 1, 1)) == ("nova",)
+    assert index.at("X", date(2023, 6, 15)) == ("nova", "temporaria")
+    assert index.at("X", date(2030, 1, 1)) == ("nova",)
+    assert index.at("Y", date(1900, 1, 1)) == ("sempre",)
+    assert index.at("Z", date(2023, 1, 1)) == ()
+    assert date(2023, 7, 1) in index.boundaries()
+
+
+def test_to_date():
+    assert to_date(datetime(2024, 3, 5, 10, 30)) == date(2024, 3, 5)
+    assert to_date("2024-03-05 00:00:00") == date(2024, 3, 5)
+    assert to_date("") is None
+    assert to_date("05/03/2024") is None
+
+
+# =====================================================
+# FiscalRepository
+# =====================================================
+
+def test_regras_na_data_de_emissao(db_copy):
+    """Snapshot e SQL retornam as regras vigentes na data informada"""
+    snapshot_repo = FiscalRepository(str(db_copy), use_local_csv=False)
+    sql_repo = FiscalRepository(str(db_copy), use_local_csv=False, use_snapshot=False)
+
+    for repo in (snapshot_repo, sql_repo):
+        assert repo.get_ncm_rule("17021100", as_of=date(2023, 12, 31)) is not None
+        assert repo.get_ncm_rule("17021100", as_of=date(2024, 1, 1)) is None
+        assert repo.get_ncm_rule("17019900", as_of=date(2022, 12, 31)) is None
+        assert repo.get_state_icms_rate("SP", "17019900", as_of=date(2023, 6, 1)) == 18.0
+        assert repo.get_state_icms_rate("SP", "17019900", as_of=datetime(2024, 6, 1)) == 19.5
+        assert repo.get_state_icms_rate("SP", "17019900") == 19.5
+
+    for day in (date(2022, 5, 1), date(2023, 12, 31), date(2024, 1, 1)):
+        for ncm in ("17019900", "17021100", "00000000"):
+            assert snapshot_repo.get_ncm_rule(ncm, as_of=day) == sql_repo.get_ncm_rule(ncm, as_of=day)
+        assert snapshot_repo.get_state_rules("SP", "17019900", as_of=day) == \
+            sql_repo.get_state_rules("SP", "17019900", as_of=day)
+
+
+def test_periodos_de_vigencia(db_copy):
+    """Datas no mesmo período compartilham o identificador"""
+    repo = FiscalRepository(str(db_copy), use_local_csv=False)
+
+    assert repo.rule_period(date(2023, 2, 1)) == repo.rule_period(date(2023, 11, 30))
+    assert repo.rule_period(date(2023, 2, 1)) != repo.rule_period(date(2024, 2, 1))
+    assert repo.rule_period(None) == repo.rule_period(date.today())
+
+
+# =====================================================
+# Validadores
+# =====================================================
+
+def test_validadores_usam_data_de_emissao(db_copy):
+    """Mesma assinatura, datas em períodos diferentes: regras de cada período"""
+    repo = FiscalRepository(str(db_copy), use_local_csv=False)
+    validator = SPValidator(repo)
+    cache = SignatureRuleCache(repo, [validator])
+
+    nfe_2023 = make_nfe(datetime(2023, 8, 1))
+    nfe_2024 = make_nfe(datetime(2024, 8, 1))
+    for nfe in (nfe_2023, nfe_2024, make_nfe(datetime(2024, 9, 1))):
+        rules = cache.resolve_items(nfe)[0][0]
+        codes = [e.code for e in validator.validate(nfe.items[0], nfe, rules=rules)]
+        assert codes == ([] if nfe is nfe_2023 else ["SP_ICMS_001"])
+
+    assert cache.get_stats()["signatures"] == 2
+
+    nfe_2022 = make_nfe(datetime(2022, 8, 1))
+    assert [e.code for e in NCMValidator(repo).validate(nfe_2022.items[0], nfe_2022)] == ["NCM_004"]
+
+
+def test_motor_colunar_por_data_de_emissao(db_copy):
+    """Motor colunar resolve o NCM no período de cada NF-e"""
+    repo = FiscalRepository(str(db_copy), use_local_csv=False)
+    parser = NFeCSVParser()
+    raw = pd.DataFrame({
+        'chave_acesso': [f"3523010000000100000055001000000{n:013d}" for n in (1, 2, 3)],
+        'numero_nfe': ['1', '2', '3'], 'serie': ['1'] * 3,
+        'data_emissao': ['2023-12-31', '2024-01-01', 'data inválida'],
+        'cnpj_emitente': ['12345678000190'] * 3, 'uf_emitente': ['SP'] * 3,
+        'cnpj_destinatario': ['98765432000199'] * 3, 'uf_destinatario': ['SP'] * 3,
+        'numero_item': ['1'] * 3, 'codigo_produto': ['P1'] * 3, 'descricao': ['Lactose'] * 3,
+        'ncm': ['17021100'] * 3, 'cfop': ['5101'] * 3, 'unidade': ['KG'] * 3,
+        'quantidade': ['1'] * 3, 'valor_unitario': ['10'] * 3, 'valor_total': ['10'] * 3,
+        'pis_cst': ['01'] * 3, 'pis_aliquota': ['1.65'] * 3, 'pis_valor': ['0.17'] * 3,
+        'cofins_cst': ['01'] * 3, 'cofins_aliquota': ['7.6'] * 3, 'cofins_valor': ['0.76'] * 3,
+    })
+    df = parser._normalize_dataframe(raw)
+
+    errors = ColumnarRuleEngine(repo).validate(df)
+    ncm_rows = errors[errors['code'].str.startswith('NCM_')]
+    # Sem data válida, vale a data corrente (como no parser)
+    assert ncm_rows[['row', 'code']].values.tolist() == [[1, 'NCM_002'], [2, 'NCM_002']]
@@ -153,6 +153,11 @@ def test_pis_cst_invalido(fiscal_repo, item_acucar_valido, sample_nfe_interna):
     assert len(errors) > 0
     assert any(e.code == "PIS_001" for e in errors)
 
+    # Citação legal resolvida apenas na renderização do relatório
+    pis_error = [e for e in errors if e.code == "PIS_001"][0]
+    assert pis_error.legal_reference_code == "LEI_10637"
+    assert pis_error.resolve_legal_reference(fiscal_repo.format_legal_citation)
+
 
 def test_cofins_cst_invalido(fiscal_repo, item_acucar_valido, sample_nfe_interna):
     """Testar CST COFINS inválido"""
@@ -353,3 +353,20 @@ def test_get_repository_layers_status(fiscal_repo):
     assert "sqlite" in status
     assert status["sqlite"]["disponivel"] == True
     assert status["sqlite"]["total_ncm_rules"] > 0
+
+
+def test_format_legal_citation_cache(fiscal_repo):
+    """Citações vêm do cache pré-carregado, invalidado em reload_rules"""
+    code = fiscal_repo.get_all_legal_references()[0]["code"]
+    citation = fiscal_repo.format_legal_citation(code)
+
+    # Cache pré-carregado com todas as referências de legal_refs
+    assert code in fiscal_repo._citation_cache
+    assert len(fiscal_repo._citation_cache) == fiscal_repo.get_statistics()["legal_refs"]
+
+    # Código desconhecido retorna o próprio código (e também fica em cache)
+    assert fiscal_repo.format_legal_citation("LEI_INEXISTENTE_99999") == "LEI_INEXISTENTE_99999"
+
+    fiscal_repo.reload_rules()
+    assert fiscal_repo._citation_cache is None
+    assert fiscal_repo.format_legal_citation(code) == citation
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da revalidação incremental (impressão digital por NF-e)
+"""
+import pytest
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.persistence.result_store import ValidationResultStore
+from src.nfe_validator.infrastructure.validators.incremental import IncrementalValidator
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from src.repositories.fiscal_repository import FiscalRepository
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+def write_csv(path, rows):
+    return str(write_nfe_csv(path, rows))
+
+
+@pytest.fixture
+def fiscal_repo(tmp_path):
+    """Repositório sobre cópia do rules.db (versão das regras alterável)"""
+    source = FiscalRepository(use_local_csv=False)
+    db_path = tmp_path / "rules.db"
+    shutil.copy(source.db_path, db_path)
+    source.close()
+    repo = FiscalRepository(str(db_path), use_local_csv=False)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Resultados gravados em database temporário"""
+    with ValidationResultStore(str(tmp_path / "results.db")) as s:
+        yield s
+
+
+@pytest.fixture
+def rows():
+    """10 NF-es com 2 itens cada (uma com alíquota PIS errada)"""
+    return [nfe_csv_row(nfe, item, pis_aliquota="2.5" if nfe == 3 else "1.65") for nfe in range(1, 11) for item in (1, 2)]
+
+
+def counting_stream(repo, validated):
+    pipeline = ValidationPipeline(repo)
+
+    def stream(nfes):
+        for nfe in pipeline.validate_stream(nfes):
+            validated.append(nfe.chave_acesso)
+            yield nfe
+    return stream
+
+
+# =====================================================
+# Execuções incrementais
+# =====================================================
+
+def test_segunda_execucao_reutiliza_resultados(tmp_path, fiscal_repo, store, rows):
+    """Arquivo idêntico: nenhuma NF-e revalidada, erros restaurados"""
+    path = write_csv(tmp_path / "mes.csv", rows)
+    first = IncrementalValidator(fiscal_repo, store).validate_csv(path)
+    assert first.stats.to_dict() == {"skipped": 0, "revalidated": 0, "new": 10, "unknown": 0}
+
+    validated = []
+    second = IncrementalValidator(
+        fiscal_repo, store, validate_stream=counting_stream(fiscal_repo, validated)
+    ).validate_csv(path)
+
+    assert second.stats.to_dict() == {"skipped": 10, "revalidated": 0, "new": 0, "unknown": 0}
+    assert validated == []
+    assert [nfe.chave_acesso for nfe in second.nfes] == [nfe.chave_acesso for nfe in first.nfes]
+    assert [repr(nfe.validation_errors) for nfe in second.nfes] == \
+        [repr(nfe.validation_errors) for nfe in first.nfes]
+    assert any(nfe.validation_errors for nfe in second.nfes)
+
+
+def test_apenas_alteradas_e_novas(tmp_path, fiscal_repo, store, rows):
+    """Arquivo corrigido: revalida a NF-e alterada e a nova"""
+    IncrementalValidator(fiscal_repo, store).validate_csv(write_csv(tmp_path / "v1.csv", rows))
+
+    corrected = [nfe_csv_row(3, item) for item in (1, 2)]
+    rows = rows[:4] + corrected + rows[6:] + [nfe_csv_row(11, 1)]
+    validated = []
+    result = IncrementalValidator(
+        fiscal_repo, store, validate_stream=counting_stream(fiscal_repo, validated)
+    ).validate_csv(write_csv(tmp_path / "v2.csv", rows))
+
+    assert result.stats.to_dict() == {"skipped": 9, "revalidated": 1, "new": 1, "unknown": 0}
+    assert [chave[-2:] for chave in validated] == ["03", "11"]
+
+    # Resultado idêntico a uma validação completa
+    pipeline = ValidationPipeline(fiscal_repo)
+    full = [pipeline.validate(nfe) for nfe in NFeCSVParser().parse_csv(str(tmp_path / "v2.csv"))]
+    by_chave = {nfe.chave_acesso: repr(nfe.validation_errors) for nfe in full}
+    assert {nfe.chave_acesso: repr(nfe.validation_errors) for nfe in result.nfes} == by_chave
+
+
+def test_mudanca_de_regras_revalida_tudo(tmp_path, fiscal_repo, store, rows):
+    """Nova versão em db_metadata invalida todas as impressões digitais"""
+    path = write_csv(tmp_path / "mes.csv", rows)
+    validator = IncrementalValidator(fiscal_repo, store)
+    validator.validate_csv(path)
+    version = validator.rules_version()
+
+    with fiscal_repo.conn:
+        fiscal_repo.conn.execute(
+            "INSERT OR REPLACE INTO db_metadata (key, value) VALUES ('last_population', 'nova carga')"
+        )
+    assert validator.rules_version() != version
+
+    result = validator.validate_csv(path)
+    assert result.stats.to_dict() == {"skipped": 0, "revalidated": 10, "new": 0, "unknown": 0}
+
+
+def test_resultados_sem_impressao_digital(tmp_path, fiscal_repo, store, rows):
+    """Execução não incremental grava sem impressão digital: contagem à parte"""
+    path = write_csv(tmp_path / "mes.csv", rows)
+    pipeline = ValidationPipeline(fiscal_repo)
+    store.save([pipeline.validate(nfe) for nfe in NFeCSVParser().parse_csv(path)])
+
+    validator = IncrementalValidator(fiscal_repo, store)
+    result = validator.validate_csv(path)
+    assert result.stats.to_dict() == {"skipped": 0, "revalidated": 0, "new": 0, "unknown": 10}
+
+    # Impressões digitais gravadas: a execução seguinte reutiliza tudo
+    assert validator.validate_csv(path).stats.skipped == 10
+
+
+def test_sem_restaurar_nao_alteradas(tmp_path, fiscal_repo, store, rows):
+    """restore_skipped=False retorna apenas as NF-es revalidadas"""
+    path = write_csv(tmp_path / "mes.csv", rows)
+    IncrementalValidator(fiscal_repo, store).validate_csv(path)
+
+    result = IncrementalValidator(fiscal_repo, store, restore_skipped=False).validate_csv(path)
+    assert result.nfes == []
+    assert result.stats.skipped == 10
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do índice de keywords de NCM (autômato Aho-Corasick)
+"""
+import pickle
+import pytest
+import sys
+from pathlib import Path
+from decimal import Decimal
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import NFeEntity, NFeItem, Empresa, ImpostoItem
+from src.nfe_validator.domain.services.federal_validators import NCMValidator
+from src.repositories.fiscal_repository import FiscalRepository
+from src.repositories.keyword_index import KeywordIndex, normalize_text
+
+
+@pytest.fixture
+def fiscal_repo():
+    repo = FiscalRepository(use_local_csv=False)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def index():
+    return KeywordIndex(
+        {
+            'A': ['Açúcar Cristal', 'he', 'she', 'hers'],
+            'B': ['cristal', 'his'],
+            'C': ['açúcar'],
+        },
+        {'A': 'Produto A', 'B': 'Cristais em geral', 'C': 'Açúcares'},
+    )
+
+
+def make_nfe(descricao: str, ncm: str = "17019900") -> NFeEntity:
+    item = NFeItem(
+        numero_item=1, codigo_produto="P1", descricao=descricao, ncm=ncm, cfop="5101",
+        unidade="KG", quantidade=Decimal("1"), valor_unitario=Decimal("1"),
+        valor_total=Decimal("1"), impostos=ImpostoItem(),
+    )
+    return NFeEntity(
+        chave_acesso="35230100000001000000550010000000011000000011", numero="1", serie="1",
+        data_emissao=datetime(2023, 1, 1),
+        emitente=Empresa(cnpj="12345678000190", razao_social="USINA", uf="SP"),
+        destinatario=Empresa(cnpj="98765432000199", razao_social="CLIENTE", uf="SP"),
+        items=[item],
+    )
+
+
+# =====================================================
+# Autômato
+# =====================================================
+
+def test_normalizacao_sem_acentos():
+    assert normalize_text("AÇÚCAR Demerara") == "acucar demerara"
+    assert normalize_text(None) == ""
+
+
+def test_keywords_sobrepostas_em_uma_passada(index):
+    """Todas as keywords presentes, inclusive prefixos e sobreposições"""
+    assert index.find_keywords("ACUCAR CRISTAL tipo 1") == ["acucar", "acucar cristal", "cristal"]
+    assert set(index.match_ncms("ushers")) == {"A"}
+    assert index.match_ncms("ushers")["A"] == ["he", "she", "hers"]
+
+
+def test_has_keyword_e_matcher(index):
+    assert index.has_keyword("B", "açúcar CRISTAL") is True
+    assert index.has_keyword("C", "mel") is False
+    assert index.has_keyword("X", "açúcar") is None
+
+    # Keywords fora do índice (outra origem) usam comparação por substring
+    matcher = index.matcher(("demerara",))
+    assert matcher("Açúcar DEMERARA") is True
+    assert index.matcher(("cristal",))("cristal") is True
+
+
+def test_sugestao_prioriza_keywords_exclusivas(index):
+    suggestions = index.suggest("Açúcar cristal", limit=2)
+    assert [s["ncm"] for s in suggestions] == ["A", "B"]
+    assert suggestions[0]["matched"] == ["acucar cristal"]
+
+
+def test_busca_do_agente(index):
+    """Termo na descrição, termo contido em keyword ou keyword contida no termo"""
+    assert index.search("cristais") == ["B"]
+    assert index.search("crist") == ["A", "B"]
+    assert index.search("açúcar cristal", ncms=["C", "B"]) == ["C", "B"]
+    assert index.search("  ") == []
+
+
+def test_serializavel(index):
+    index.matcher(("cristal",))("cristal")
+    clone = pickle.loads(pickle.dumps(index))
+    assert clone.find_keywords("she") == ["he", "she"]
+
+
+# =====================================================
+# Integração com regras e validador
+# =====================================================
+
+def test_indice_por_snapshot(fiscal_repo):
+    """Índice montado uma vez por snapshot e refeito na recarga"""
+    index = fiscal_repo.keyword_index
+    assert fiscal_repo.keyword_index is index
+    assert "cristal" in index.find_keywords("Açúcar Cristal")
+
+    fiscal_repo.reload_rules()
+    assert fiscal_repo.keyword_index is not index
+
+
+def test_suggest_ncm(fiscal_repo):
+    suggestions = fiscal_repo.suggest_ncm("ACUCAR REFINADO c/ aromatizante")
+    assert suggestions[0]["ncm"] == "17019100"
+    assert fiscal_repo.suggest_ncm("parafuso") == []
+
+
+def test_validador_ignora_acentos(fiscal_repo):
+    """Descrição sem acentos corresponde às keywords do NCM"""
+    validator = NCMValidator(fiscal_repo)
+    nfe = make_nfe("ACUCAR CRISTAL TIPO 1")
+    assert not [e for e in validator.validate(nfe.items[0], nfe) if e.code == "NCM_003"]
+
+    nfe = make_nfe("Parafuso sextavado")
+    assert [e.code for e in validator.validate(nfe.items[0], nfe)] == ["NCM_003"]
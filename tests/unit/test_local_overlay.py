@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do CSV local (base_validacao.csv) compartilhado e recarregado ao mudar
+"""
+import os
+import pytest
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import NFeEntity, NFeItem, Empresa, ImpostoItem
+from src.nfe_validator.domain.services.federal_validators import NCMValidator
+from src.nfe_validator.domain.services.signature_cache import SignatureRuleCache
+from src.nfe_validator.profiling import RunProfiler
+from src.repositories.fiscal_repository import FiscalRepository
+from src.repositories.local_csv_repository import LocalCSVRepository
+
+
+HEADER = "ncm,descricao,pis_cst_saida,pis_aliquota_saida,cofins_cst_saida,cofins_aliquota_saida,base_legal"
+
+
+def write_rules(path: Path, *ncms: str):
+    rows = [f"{ncm},Regra local {ncm},01,1.65,01,7.6,Lei 10.637/2002" for ncm in ncms]
+    path.write_text(HEADER + "\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    # mtime explícito: edições no mesmo instante ainda são detectadas (tamanho/inode)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "base_validacao.csv"
+    write_rules(path, "17019900")
+    return path
+
+
+def make_nfe(descricao: str) -> NFeEntity:
+    item = NFeItem(
+        numero_item=1, codigo_produto="P1", descricao=descricao, ncm="17019900", cfop="5101",
+        unidade="KG", quantidade=Decimal("1"), valor_unitario=Decimal("1"),
+        valor_total=Decimal("1"), impostos=ImpostoItem(),
+    )
+    return NFeEntity(
+        chave_acesso="35230100000001000000550010000000011000000011", numero="1", serie="1",
+        data_emissao=datetime(2023, 6, 1),
+        emitente=Empresa(cnpj="12345678000190", razao_social="USINA", uf="SP"),
+        destinatario=Empresa(cnpj="98765432000199", razao_social="CLIENTE", uf="SP"),
+        items=[item],
+    )
+
+
+# =====================================================
+# Regras compartilhadas
+# =====================================================
+
+def test_regras_compartilhadas_sem_releitura(csv_path, monkeypatch):
+    """Novos repositórios reaproveitam o dict compilado enquanto o arquivo não muda"""
+    first = LocalCSVRepository(csv_path)
+    reads = []
+    original = LocalCSVRepository._read_rules.__func__
+    monkeypatch.setattr(LocalCSVRepository, "_read_rules",
+                        classmethod(lambda cls, path: reads.append(path) or original(cls, path)))
+
+    second = LocalCSVRepository(csv_path)
+    assert second.rules_cache is first.rules_cache
+    assert reads == []
+
+    second.reload()
+    assert len(reads) == 1
+    assert second.get_ncm_rule("17019900")["descricao"] == "Regra local 17019900"
+
+
+def test_troca_ao_alterar_arquivo(csv_path):
+    """Alteração detectada por assinatura; o dict anterior não é modificado"""
+    repo = LocalCSVRepository(csv_path, check_interval=0)
+    before = repo.current_rules()
+
+    write_rules(csv_path, "17019900", "17011400")
+    after = repo.current_rules()
+
+    assert after is not before
+    assert set(before) == {"17019900"}
+    assert set(after) == {"17019900", "17011400"}
+
+    csv_path.unlink()
+    assert repo.current_rules() == {}
+    assert repo.is_available() is False
+
+
+def test_intervalo_de_verificacao(csv_path):
+    """Dentro de check_interval a alteração só é vista por refresh_if_changed"""
+    repo = LocalCSVRepository(csv_path, check_interval=3600)
+    write_rules(csv_path, "17011400")
+
+    assert set(repo.current_rules()) == {"17019900"}
+    assert repo.refresh_if_changed() is True
+    assert set(repo.current_rules()) == {"17011400"}
+    assert repo.refresh_if_changed() is False
+
+
+# =====================================================
+# FiscalRepository
+# =====================================================
+
+def test_precedencia_em_um_dict(csv_path):
+    """CSV local sobre o snapshot; edição do CSV invalida o cache de assinaturas"""
+    repo = FiscalRepository(use_local_csv=False)
+    repo.local_repo = LocalCSVRepository(csv_path, check_interval=0)
+    validator = NCMValidator(repo)
+    cache = SignatureRuleCache(repo, [validator])
+    nfe = make_nfe("Parafuso")
+
+    with RunProfiler() as profiler:
+        assert repo.get_ncm_rule("17019900")["descricao"] == "Regra local 17019900"
+    assert profiler.summary()["counters"]["local_csv.ncm_hit"] == 1
+    assert repo.get_ncm_rule("17019100")["description"]
+
+    rules = cache.resolve_items(nfe)[0][0]
+    assert validator.validate(nfe.items[0], nfe, rules=rules) == []
+
+    write_rules(csv_path, "17011400")
+    assert repo.get_ncm_rule("17019900")["ncm"] == "17019900"
+    assert "descricao" not in repo.get_ncm_rule("17019900")
+
+    rules = cache.resolve_items(nfe)[0][0]
+    assert [e.code for e in validator.validate(nfe.items[0], nfe, rules=rules)] == ["NCM_003"]
+    assert cache.get_stats()["signatures"] == 2
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do serviço de classificação NCM por IA (agente stub local, sem LLM)
+"""
+import asyncio
+import threading
+import time
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents.ncm_classification_service import NCMClassificationService, RateLimiter
+from src.nfe_validator.infrastructure.persistence.classification_cache import (
+    NCMClassificationCache, classification_key, normalize_description
+)
+from src.nfe_validator.profiling import RunProfiler
+
+
+class StubClassifier:
+    """Classificador síncrono: 'cristal' -> 17019900, senão 17011400"""
+
+    def __init__(self, delay: float = 0.0, fail_on: str = None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def classify_ncm(self, description, current_ncm=None):
+        with self._lock:
+            self.calls.append(description)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail_on and self.fail_on in description:
+                return {'suggested_ncm': None, 'confidence': 0, 'reasoning': 'falha',
+                        'is_correct': None, 'error': 'quota'}
+            ncm = '17019900' if 'cristal' in normalize_description(description) else '17011400'
+            return {'suggested_ncm': ncm, 'confidence': 90, 'reasoning': f"NCM: {ncm}",
+                    'is_correct': current_ncm == ncm if current_ncm else None}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with NCMClassificationCache(tmp_path / "ncm.db") as cache:
+        yield cache
+
+
+# =====================================================
+# Deduplicação e cache
+# =====================================================
+
+def test_descricoes_normalizadas_deduplicadas(cache):
+    """Uma consulta por (descrição normalizada, NCM atual)"""
+    stub = StubClassifier()
+    service = NCMClassificationService(stub, cache=cache, rate_limit=None)
+
+    with RunProfiler() as profiler:
+        results = service.classify_requests([
+            ("Açúcar Cristal 50kg", "17019900"),
+            ("  acucar   CRISTAL 50KG", "17019900"),
+            ("Açúcar Cristal 50kg", "17011400"),
+            ("Açúcar VHP", None),
+        ])
+
+    assert len(stub.calls) == 3
+    assert [r['suggested_ncm'] for r in results] == ['17019900', '17019900', '17019900', '17011400']
+    assert [r['is_correct'] for r in results] == [True, True, False, None]
+    assert results[0] is not results[1]
+    counters = profiler.summary()["counters"]
+    assert counters["ncm_ai.deduplicated"] == 1
+    assert counters["ncm_ai.llm_call"] == 3
+
+
+def test_cache_persistente_entre_servicos(tmp_path):
+    """Resultados gravados em disco; erros não são gravados"""
+    path = tmp_path / "ncm.db"
+    stub = StubClassifier(fail_on="Mascavo")
+    with NCMClassificationCache(path) as cache:
+        service = NCMClassificationService(stub, cache=cache, model="stub-1", rate_limit=None)
+        first = service.classify_requests([("Açúcar cristal", None), ("Mascavo", None)])
+        assert [r['cached'] for r in first] == [False, False]
+        assert first[1]['error'] == 'quota'
+        assert len(cache) == 1
+
+    stub_2 = StubClassifier()
+    with NCMClassificationCache(path) as cache:
+        service = NCMClassificationService(stub_2, cache=cache, model="stub-1", rate_limit=None)
+        second = service.classify_requests([("AÇÚCAR CRISTAL", None), ("Mascavo", None)])
+        assert second[0]['cached'] is True
+        assert second[0]['suggested_ncm'] == '17019900'
+        assert stub_2.calls == ["Mascavo"]
+
+        # Outro modelo: outra chave
+        other = NCMClassificationService(stub_2, cache=cache, model="stub-2", rate_limit=None)
+        assert other.classify_requests([("Açúcar cristal", None)])[0]['cached'] is False
+
+    assert classification_key("Açúcar", None, "m") == classification_key("acucar ", "", "m")
+
+
+def test_agente_criado_uma_vez_e_so_se_necessario(cache):
+    """classifier_factory só é chamada na primeira consulta fora do cache"""
+    created = []
+
+    def factory():
+        created.append(1)
+        return StubClassifier()
+
+    NCMClassificationService(StubClassifier(), cache=cache, rate_limit=None).classify_requests(
+        [("Açúcar cristal", None)]
+    )
+    service = NCMClassificationService(classifier_factory=factory, cache=cache, rate_limit=None)
+    service.classify_requests([("Açúcar cristal", None)])
+    assert created == []
+
+    service.classify_requests([("Açúcar demerara", None)])
+    service.classify_requests([("Açúcar orgânico", None)])
+    assert created == [1]
+
+
+# =====================================================
+# Concorrência e limite de requisições
+# =====================================================
+
+def test_concorrencia_limitada():
+    """No máximo max_concurrency classificações simultâneas"""
+    stub = StubClassifier(delay=0.02)
+    service = NCMClassificationService(stub, max_concurrency=3, rate_limit=None)
+    progress = []
+
+    results = service.classify_requests(
+        [(f"Produto {i}", None) for i in range(12)],
+        progress_callback=lambda done, total: progress.append((done, total))
+    )
+
+    assert len(results) == 12
+    assert 1 < stub.max_active <= 3
+    assert progress[-1] == (12, 12)
+
+
+def test_classificador_assincrono_e_limite_por_segundo():
+    """aclassify_ncm é usado quando existe; inícios espaçados por rate_limit"""
+    starts = []
+
+    class AsyncStub:
+        async def aclassify_ncm(self, description, current_ncm=None):
+            starts.append(time.monotonic())
+            return {'suggested_ncm': '17019900', 'confidence': 80, 'reasoning': '', 'is_correct': None}
+
+    service = NCMClassificationService(AsyncStub(), max_concurrency=5, rate_limit=50)
+    asyncio.run(service.classify_many([(f"Produto {i}", None) for i in range(5)]))
+
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert len(starts) == 5
+    assert min(gaps) >= 0.015
+
+    assert RateLimiter(None).reserve() == 0.0
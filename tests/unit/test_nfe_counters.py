@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Testes dos contadores de erros da NF-e (resumos sem percorrer validation_errors)
+"""
+import pytest
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import (
+    NFeEntity, NFeItem, Empresa, ImpostoItem, ValidationError, Severity, ValidationStatus, AuditReport
+)
+
+
+def make_error(code: str, severity: Severity, impact: str = None, item: int = 1) -> ValidationError:
+    return ValidationError(code=code, field="x", message="m", severity=severity, item_numero=item,
+                           financial_impact=Decimal(impact) if impact else None)
+
+
+@pytest.fixture
+def nfe():
+    item = NFeItem(
+        numero_item=1, codigo_produto="P1", descricao="Açúcar cristal", ncm="17019900", cfop="5101",
+        unidade="KG", quantidade=Decimal("1"), valor_unitario=Decimal("100"),
+        valor_total=Decimal("100"), impostos=ImpostoItem(),
+    )
+    return NFeEntity(
+        chave_acesso="35230100000001000000550010000000000000000001", numero="1", serie="1",
+        data_emissao=datetime(2023, 1, 15),
+        emitente=Empresa(cnpj="12345678000190", razao_social="USINA", uf="SP"),
+        destinatario=Empresa(cnpj="98765432000199", razao_social="CLIENTE", uf="PE"),
+        items=[item],
+    )
+
+
+def naive_summary(nfe: NFeEntity):
+    """Cálculo direto sobre a lista de erros"""
+    return (
+        {s: sum(1 for e in nfe.validation_errors if e.severity == s) for s in Severity},
+        sum((e.financial_impact for e in nfe.validation_errors if e.financial_impact), Decimal('0')),
+    )
+
+
+def test_contadores_incrementais(nfe):
+    """add_validation_error e extend_errors atualizam os contadores"""
+    nfe.add_validation_error(make_error("NCM_003", Severity.WARNING))
+    nfe.extend_errors([])
+    nfe.extend_errors([make_error("PIS_002", Severity.ERROR, "10.50"),
+                       make_error("PIS_002", Severity.ERROR, "0.25", item=2)])
+
+    assert nfe.count_errors() == 3
+    assert nfe.count_errors(Severity.ERROR) == 2
+    assert nfe.count_errors(Severity.CRITICAL) == 0
+    assert nfe.get_error_counts_by_code() == {"NCM_003": 1, "PIS_002": 2}
+    assert nfe.get_total_financial_impact() == Decimal("10.75")
+    assert nfe.get_errors_by_severity(Severity.CRITICAL) == []
+    assert nfe.validation_status == ValidationStatus.PENDING
+
+    summary = nfe.get_validation_summary()
+    assert (summary['errors'], summary['warnings'], summary['financial_impact']) == (2, 1, 10.75)
+
+
+def test_erro_critico_invalida_nfe(nfe):
+    nfe.extend_errors(iter([make_error("COFINS_002", Severity.CRITICAL, "5")]))
+
+    assert nfe.validation_status == ValidationStatus.INVALID
+    assert nfe.count_errors(Severity.CRITICAL) == 1
+
+
+def test_lista_alterada_diretamente(nfe):
+    """Atribuição ou append direto em validation_errors: contadores recalculados"""
+    nfe.add_validation_error(make_error("NCM_003", Severity.WARNING))
+    assert nfe.count_errors(Severity.WARNING) == 1
+
+    nfe.validation_errors = [make_error("PIS_002", Severity.CRITICAL, "1.5")]
+    assert nfe.count_errors(Severity.WARNING) == 0
+    assert nfe.get_total_financial_impact() == Decimal("1.5")
+
+    nfe.validation_errors.append(make_error("PIS_002", Severity.INFO, "2"))
+    assert nfe.get_error_counts_by_code() == {"PIS_002": 2}
+    assert (nfe.count_errors(Severity.INFO), nfe.get_total_financial_impact()) == (1, Decimal("3.5"))
+
+
+def test_iguais_ao_calculo_direto_e_audit_report(nfe):
+    nfe.extend_errors([
+        make_error("NCM_003", Severity.WARNING),
+        make_error("PIS_002", Severity.CRITICAL, "10"),
+        make_error("CFOP_INFO", Severity.INFO, item=None),
+        make_error("COFINS_002", Severity.ERROR, "2.5", item=2),
+    ])
+    by_severity, impact = naive_summary(nfe)
+
+    assert {s: nfe.count_errors(s) for s in Severity} == by_severity
+    assert nfe.get_total_financial_impact() == impact
+
+    report = AuditReport(nfe=nfe)
+    report.generate_summary()
+    assert (report.critical_count, report.error_count, report.warning_count, report.info_count) == (1, 1, 1, 1)
+    assert sorted(report.errors_by_type) == ["CFOP", "COFINS", "NCM", "PIS"]
+    assert sorted(report.errors_by_item) == [1, 2]
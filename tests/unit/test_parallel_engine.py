@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do motor de validação paralela (ProcessPoolExecutor)
+"""
+import pytest
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.validators.parallel_engine import ParallelValidationEngine
+from src.nfe_validator.infrastructure.persistence.result_store import ValidationResultStore
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from src.nfe_validator.domain.entities.nfe_entity import Severity, ValidationStatus
+from src.repositories.fiscal_repository import FiscalRepository
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+@pytest.fixture
+def nfes_csv(tmp_path):
+    """CSV com 30 NF-es variando UF, CST e alíquotas (erros diferentes por NF-e)"""
+    rows = []
+    for nfe in range(1, 31):
+        uf_dest = ["SP", "PE", "RJ"][nfe % 3]
+        cst = ["01", "06", "99"][nfe % 3]
+        aliquota = ["1.65", "0", "2.5"][nfe % 3]
+        for item in range(1, 3):
+            rows.append(nfe_csv_row(
+                nfe, item, uf_destinatario=uf_dest, cfop="5101",
+                quantidade="100", valor_unitario="3.5", valor_total="350",
+                pis_cst=cst, pis_aliquota=aliquota, pis_valor="5.78",
+                cofins_cst=cst, cofins_aliquota="7.6", cofins_valor="26.6",
+            ))
+    return write_nfe_csv(tmp_path / "lote.csv", rows)
+
+
+def error_codes(nfes):
+    return [[(e.code, e.item_numero) for e in nfe.validation_errors] for nfe in nfes]
+
+
+# =====================================================
+# Testes de Paridade
+# =====================================================
+
+def test_paralelo_igual_sequencial(nfes_csv, fiscal_repo):
+    """Processos produzem os mesmos erros, na mesma ordem, que a validação sequencial"""
+    pipeline = ValidationPipeline(fiscal_repo)
+    sequential = [pipeline.validate(nfe) for nfe in NFeCSVParser().parse_csv(str(nfes_csv))]
+
+    with ParallelValidationEngine.from_repository(
+        fiscal_repo, max_workers=2, shard_size=4, inline_threshold=0
+    ) as engine:
+        parallel = engine.validate_batch(NFeCSVParser().parse_csv(str(nfes_csv)))
+
+    assert [nfe.chave_acesso for nfe in parallel] == [nfe.chave_acesso for nfe in sequential]
+    assert error_codes(parallel) == error_codes(sequential)
+    assert [nfe.validation_status for nfe in parallel] == [nfe.validation_status for nfe in sequential]
+    assert engine.system_error_count == 0
+
+
+def test_status_final_gravado(tmp_path, nfes_csv, fiscal_repo):
+    """Status final (VALID/INVALID) definido pelos workers e consultável no store"""
+    with ParallelValidationEngine.from_repository(
+        fiscal_repo, max_workers=2, shard_size=4, inline_threshold=0
+    ) as engine, ValidationResultStore(str(tmp_path / "results.db")) as store:
+        validated = list(engine.iter_validate(NFeCSVParser().iter_nfes(str(nfes_csv))))
+        store.save(validated)
+
+        invalid = {
+            nfe.chave_acesso for nfe in validated
+            if nfe.count_errors(Severity.CRITICAL) or nfe.count_errors(Severity.ERROR)
+        }
+        assert invalid and len(invalid) < len(validated)
+        assert {r["nfe_chave"] for r in store.query(status="INVALID")} == invalid
+        assert {r["nfe_chave"] for r in store.query(status="VALID")} == {
+            nfe.chave_acesso for nfe in validated
+        } - invalid
+        assert set(store.summary()["by_status"]) == {"VALID", "INVALID"}
+
+
+def test_stream_com_progresso(nfes_csv, fiscal_repo):
+    """iter_validate consome stream e reporta progresso até o total"""
+    progress = []
+
+    with ParallelValidationEngine.from_repository(
+        fiscal_repo, max_workers=2, shard_size=7, inline_threshold=0
+    ) as engine:
+        result = list(engine.iter_validate(
+            NFeCSVParser().iter_nfes(str(nfes_csv), chunksize=5),
+            progress_callback=lambda done, total: progress.append((done, total)),
+            total=30
+        ))
+
+    assert [int(nfe.numero) for nfe in result] == list(range(1, 31))
+    assert progress[-1] == (30, 30)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_lote_pequeno_inline(nfes_csv, fiscal_repo):
+    """Lotes abaixo do limite são validados sem criar processos"""
+    engine = ParallelValidationEngine.from_repository(fiscal_repo, max_workers=4)
+    nfes = NFeCSVParser().parse_csv(str(nfes_csv))[:5]
+
+    validated = engine.validate_batch(nfes)
+
+    pipeline = ValidationPipeline(fiscal_repo)
+    expected = [pipeline.validate(nfe) for nfe in NFeCSVParser().parse_csv(str(nfes_csv))[:5]]
+    assert engine._executor is None
+    assert error_codes(validated) == error_codes(expected)
+
+
+def test_erro_de_sistema_inline(nfes_csv, fiscal_repo):
+    """Falha inesperada vira SYSTEM_ERROR e aciona callback"""
+    engine = ParallelValidationEngine.from_repository(fiscal_repo, max_workers=1)
+    engine._get_inline_pipeline().totals_validator.validate = lambda nfe: 1 / 0
+    messages = []
+
+    validated = engine.validate_batch(
+        NFeCSVParser().parse_csv(str(nfes_csv))[:3],
+        on_error=lambda nfe, message: messages.append(message)
+    )
+
+    assert engine.system_error_count == 3
+    assert messages == ["division by zero"] * 3
+    assert all(nfe.validation_errors[-1].code == "SYSTEM_ERROR" for nfe in validated)
+    assert {nfe.validation_status for nfe in validated} == {ValidationStatus.ERROR}
+
+
+# =====================================================
+# Repositório somente leitura
+# =====================================================
+
+def test_repositorio_somente_leitura():
+    """Workers usam conexão que rejeita escrita"""
+    repo = FiscalRepository(use_local_csv=False, read_only=True)
+
+    assert repo.get_valid_csts()
+    with pytest.raises(sqlite3.OperationalError):
+        repo.conn.execute("DELETE FROM legal_refs")
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da entrada Parquet/Arrow e do cache Parquet de uploads normalizados
+"""
+import json
+import pytest
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.cli import main, EXIT_FISCAL_ERRORS
+from src.nfe_validator.infrastructure.parsers.arrow_io import normalized_to_arrow, NORMALIZED_KEY
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.persistence.upload_cache import NormalizedUploadCache
+from src.nfe_validator.profiling import RunProfiler
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+ITEM = {
+    "razao_social_emitente": "Usina Teste",
+    "quantidade": "100.0000", "valor_unitario": "3.5000", "valor_total": "350.00",
+    "pis_valor": "5.78", "cofins_aliquota": "7.60", "cofins_valor": "26.60",
+}
+
+
+def make_row(nfe: int, item: int, pis_aliquota: str = "1.65") -> str:
+    return nfe_csv_row(nfe, item, pis_aliquota=pis_aliquota, **ITEM)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """CSV com 3 NF-es (NF-e 2 com alíquota PIS errada)"""
+    rows = [make_row(nfe, item, "2.50" if nfe == 2 else "1.65") for nfe in (1, 2, 3) for item in (1, 2)]
+    return write_nfe_csv(tmp_path / "nfes.csv", rows)
+
+
+def erp_table(csv_path) -> "pa.Table":
+    """Exportação do ERP: dinheiro em decimal128, códigos numéricos"""
+    df = pd.read_csv(csv_path, dtype=str)
+    money = {
+        'quantidade': pa.decimal128(18, 4), 'valor_unitario': pa.decimal128(18, 4),
+        'valor_total': pa.decimal128(18, 2), 'pis_aliquota': pa.decimal128(9, 2),
+        'pis_valor': pa.decimal128(18, 2), 'cofins_aliquota': pa.decimal128(9, 2),
+        'cofins_valor': pa.decimal128(18, 2),
+    }
+    arrays = []
+    for name in df.columns:
+        if name in money:
+            arrays.append(pa.array([Decimal(v) for v in df[name]], type=money[name]))
+        elif name in ('ncm', 'cfop', 'pis_cst', 'cofins_cst', 'numero_nfe', 'numero_item', 'serie'):
+            arrays.append(pa.array(df[name].astype(int), type=pa.int64()))
+        else:
+            arrays.append(pa.array(df[name], type=pa.string()))
+    return pa.Table.from_arrays(arrays, names=list(df.columns))
+
+
+def summarize(nfe):
+    return (
+        nfe.chave_acesso, nfe.numero, nfe.emitente.cnpj, nfe.destinatario.cnpj,
+        [(i.ncm, i.cfop, i.impostos.pis_cst, i.quantidade, i.valor_unitario, i.valor_total,
+          i.impostos.pis_aliquota, i.impostos.cofins_valor) for i in nfe.items],
+        nfe.totais.valor_total_nota,
+    )
+
+
+# =====================================================
+# Entrada Parquet/Arrow
+# =====================================================
+
+def test_parquet_tipado_igual_ao_csv(csv_path, tmp_path):
+    """Decimais e códigos tipados produzem as mesmas NF-es do CSV"""
+    path = tmp_path / "erp.parquet"
+    pq.write_table(erp_table(csv_path), path)
+
+    from_parquet = NFeCSVParser().parse_parquet(str(path))
+    from_csv = NFeCSVParser().parse_csv(str(csv_path))
+
+    # Mesmos valores (a escala do decimal128 é mantida: 100.0000 == 100.0)
+    assert [summarize(n) for n in from_parquet] == [summarize(n) for n in from_csv]
+    item = from_parquet[0].items[0]
+    assert item.ncm == '17019900'
+    assert item.impostos.pis_cst == '01'
+    assert item.quantidade == Decimal('100.0000')
+
+
+def test_decimal_tipado_sem_normalizacao(csv_path):
+    """Colunas decimal128 não passam pela normalização de strings"""
+    table = erp_table(csv_path)
+    quantidade = pa.array([None] + [Decimal('100')] * (len(table) - 1), type=pa.decimal128(18, 4))
+    table = table.set_column(table.column_names.index('quantidade'), 'quantidade', quantidade)
+
+    with RunProfiler() as profiler:
+        nfes = NFeCSVParser().parse_arrow(table)
+
+    assert nfes[0].items[0].quantidade == Decimal('0')
+    assert str(nfes[0].items[1].quantidade) == '100.0000'
+    assert profiler.summary()['stages']['parser.parse_arrow']['calls'] == 1
+
+
+# =====================================================
+# Cache de uploads normalizados
+# =====================================================
+
+def test_cache_reutiliza_normalizacao(csv_path, tmp_path):
+    """Segunda leitura do mesmo arquivo vem do Parquet, com resultado idêntico"""
+    cache = NormalizedUploadCache(tmp_path / "cache")
+    first = NFeCSVParser(cache=cache).parse_csv(str(csv_path))
+    assert len(cache) == 1
+
+    with RunProfiler() as profiler:
+        second = NFeCSVParser(cache=cache).parse_csv(str(csv_path))
+
+    summary = profiler.summary()
+    assert summary['counters'] == {'upload_cache.hit': 1}
+    assert 'parser.normalize' not in summary['stages']
+    assert [repr(n) for n in second] == [repr(n) for n in first]
+    assert [repr(n) for n in second] == [repr(n) for n in NFeCSVParser().parse_csv(str(csv_path))]
+
+
+def test_cache_invalidado_por_conteudo_e_versao(csv_path, tmp_path):
+    """Arquivo alterado ou outra versão do validador não usam a entrada antiga"""
+    cache = NormalizedUploadCache(tmp_path / "cache")
+    NFeCSVParser(cache=cache).parse_csv(str(csv_path))
+
+    other_version = NormalizedUploadCache(tmp_path / "cache", version="0.0.0")
+    assert other_version.load(other_version.file_key(csv_path)) is None
+
+    csv_path.write_text(csv_path.read_text(encoding="utf-8").replace("Cliente", "Outro"), encoding="utf-8")
+    nfes = NFeCSVParser(cache=cache).parse_csv(str(csv_path))
+    assert nfes[0].destinatario.razao_social == "Outro"
+    assert len(cache) == 2
+
+
+def test_cache_invalidado_por_formato_normalizado(csv_path, tmp_path, monkeypatch):
+    """Entrada gravada com outro NORMALIZED_FORMAT_VERSION (mesma __version__) é renormalizada"""
+    from src.nfe_validator.infrastructure.persistence import upload_cache
+    monkeypatch.setattr(upload_cache, "NORMALIZED_FORMAT_VERSION", upload_cache.NORMALIZED_FORMAT_VERSION - 1)
+    NFeCSVParser(cache=NormalizedUploadCache(tmp_path / "cache")).parse_csv(str(csv_path))
+    monkeypatch.undo()
+
+    cache = NormalizedUploadCache(tmp_path / "cache")
+    with RunProfiler() as profiler:
+        NFeCSVParser(cache=cache).parse_csv(str(csv_path))
+
+    assert profiler.summary()['counters'] == {'upload_cache.miss': 1}
+    assert cache.load(cache.file_key(csv_path)) is not None
+
+
+def test_decimal128_apenas_quando_exato():
+    """Mesma escala vira decimal128; escalas diferentes continuam texto"""
+    df = pd.DataFrame({
+        'valor_total': ['1000.00', '3.50'],
+        'quantidade': ['10', '2.5'],
+        'descricao': ['a', 'b'],
+    })
+    table = normalized_to_arrow(df, NFeCSVParser.DECIMAL_COLUMNS, "1.0")
+
+    assert table.schema.field('valor_total').type == pa.decimal128(38, 2)
+    assert table.schema.field('quantidade').type == pa.string()
+    assert table.schema.metadata[NORMALIZED_KEY] == b"1.0"
+    assert table.column('valor_total').to_pylist() == [Decimal('1000.00'), Decimal('3.50')]
+
+
+# =====================================================
+# Linha de comando
+# =====================================================
+
+def test_cli_parquet_e_cache(csv_path, tmp_path):
+    """Entrada Parquet e --cache-dir no validate"""
+    parquet = tmp_path / "erp.parquet"
+    pq.write_table(erp_table(csv_path), parquet)
+    out = tmp_path / "saida"
+    args = ["validate", str(parquet), str(csv_path), "-o", str(out), "-w", "1", "--no-store", "-q",
+            "-f", "json", "--cache-dir", str(tmp_path / "cache")]
+
+    assert main(args) == EXIT_FISCAL_ERRORS
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    by_file = {Path(f["input"]).name: f for f in summary["files"]}
+    assert by_file["erp.parquet"]["by_severity"] == by_file["nfes.csv"]["by_severity"]
+    assert len(list((tmp_path / "cache").glob("*.parquet"))) == 1
+
+    assert main(args) == EXIT_FISCAL_ERRORS
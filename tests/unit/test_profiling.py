@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da instrumentação por etapa (RunProfiler)
+"""
+import json
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.profiling import RunProfiler, current_profiler, stage_timer, timed, count
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.infrastructure.validators.report_generator import ReportGenerator
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from src.repositories.fiscal_repository import FiscalRepository
+
+
+CSV = (
+    "chave_acesso,numero_nfe,serie,data_emissao,"
+    "cnpj_emitente,razao_social_emitente,uf_emitente,"
+    "cnpj_destinatario,razao_social_destinatario,uf_destinatario,"
+    "numero_item,codigo_produto,descricao,ncm,cfop,unidade,"
+    "quantidade,valor_unitario,valor_total,"
+    "pis_cst,pis_aliquota,pis_valor,cofins_cst,cofins_aliquota,cofins_valor\n"
+    "35230100000001000000550010000000001000000001,1,1,2023-01-15,"
+    "12345678000190,Usina,SP,98765432000110,Cliente,PE,"
+    "1,P1,Açúcar cristal,17019900,6101,KG,10,100,1000.00,01,1.65,16.50,01,7.60,76.00\n"
+    "35230100000001000000550010000000001000000001,1,1,2023-01-15,"
+    "12345678000190,Usina,SP,98765432000110,Cliente,PE,"
+    "2,P2,Açúcar cristal,17019900,6101,KG,10,100,1000.00,01,1.65,16.50,01,7.60,76.00\n"
+)
+
+
+class FakeLogger:
+    """Registra chamadas de log_performance"""
+
+    def __init__(self):
+        self.calls = []
+
+    def log_performance(self, operation, duration, **kwargs):
+        self.calls.append((operation, duration, kwargs))
+
+
+@pytest.fixture
+def fiscal_repo():
+    repo = FiscalRepository(use_local_csv=False)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "nfes.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+# =====================================================
+# Execução instrumentada
+# =====================================================
+
+def test_etapas_registradas(fiscal_repo, csv_path):
+    """Parser, validadores, repositório e relatórios aparecem no resumo"""
+    with RunProfiler("teste") as profiler:
+        nfes = NFeCSVParser().parse_csv(csv_path)
+        pipeline = ValidationPipeline(fiscal_repo)
+        for nfe in nfes:
+            pipeline.validate(nfe)
+        ReportGenerator(citation_resolver=fiscal_repo.format_legal_citation).generate_json_report(nfes[0])
+
+    stages = profiler.summary()['stages']
+    for stage in ("parser.parse_csv", "parser.normalize", "parser.build_nfes",
+                  "pipeline.validate", "NCMValidator.validate", "PISCOFINSValidator.validate",
+                  "TotalsValidator.validate", "ReportGenerator.generate_json_report",
+                  "FiscalRepository.get_ncm_rule"):
+        assert stage in stages, stage
+
+    assert stages["parser.parse_csv"]["calls"] == 1
+    assert stages["NCMValidator.validate"]["calls"] == 2
+    assert stages["pipeline.validate"]["p95_ms"] >= 0
+
+
+def test_contadores_de_cache(fiscal_repo, csv_path):
+    """Itens com mesma assinatura contam como acerto do cache"""
+    nfes = NFeCSVParser().parse_csv(csv_path)
+    with RunProfiler() as profiler:
+        ValidationPipeline(fiscal_repo).validate(nfes[0])
+
+    counters = profiler.summary()['counters']
+    assert counters["signature_cache.miss"] == 1
+    assert counters["signature_cache.hit"] == 1
+
+
+def test_sem_profiler_nada_registrado():
+    """Fora de um RunProfiler, timers e contadores são ignorados"""
+    @timed("etapa")
+    def soma(a, b):
+        return a + b
+
+    assert current_profiler() is None
+    assert soma(1, 2) == 3
+    count("ignorado")
+    with stage_timer("bloco"):
+        pass
+
+    with RunProfiler() as profiler:
+        assert current_profiler() is profiler
+        soma(1, 2)
+        count("chamadas", 3)
+    assert current_profiler() is None
+    assert profiler.summary()['stages']['etapa']['calls'] == 1
+    assert profiler.summary()['counters'] == {"chamadas": 3}
+
+
+# =====================================================
+# Agregação e exportação
+# =====================================================
+
+def test_merge_estado_de_worker():
+    """Estado exportado (workers) é somado ao profiler principal"""
+    worker = RunProfiler("worker")
+    worker.record("etapa", 0.5)
+    worker.count("hits", 2)
+
+    main = RunProfiler("main")
+    main.record("etapa", 1.0)
+    main.merge(worker.export_state())
+
+    summary = main.summary()
+    assert summary['stages']['etapa']['calls'] == 2
+    assert summary['stages']['etapa']['total_s'] == pytest.approx(1.5)
+    assert summary['counters'] == {"hits": 2}
+
+
+def test_resumo_json_e_log(tmp_path):
+    """Resumo gravado em JSON e enviado ao logger ao final"""
+    logger = FakeLogger()
+    with RunProfiler("lote", logger=logger) as profiler:
+        with stage_timer("bloco"):
+            pass
+
+    path = tmp_path / "perfil.json"
+    profiler.write_json(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data['run'] == "lote"
+    assert data['stages']['bloco']['calls'] == 1
+
+    assert len(logger.calls) == 1
+    operation, duration, extra = logger.calls[0]
+    assert operation == "lote"
+    assert duration == data['wall_time_s']
+    assert "bloco" in extra['stages']
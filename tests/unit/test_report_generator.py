@@ -382,3 +382,45 @@ def test_save_markdown_report(sample_nfe_with_errors, tmp_path):
     with open(output_file, "r", encoding="utf-8") as f:
         content = f.read()
         assert "RELATÓRIO DE AUDITORIA FISCAL" in content
+
+
+def test_citacao_resolvida_na_renderizacao(sample_nfe_with_errors):
+    """Erros com apenas o código têm a citação resolvida pelo gerador"""
+    sample_nfe_with_errors.validation_errors.append(ValidationError(
+        code="PIS_001",
+        field="pis_cst",
+        message="CST PIS inválido",
+        severity=Severity.ERROR,
+        legal_reference_code="LEI_10637",
+        item_numero=1
+    ))
+    calls = []
+
+    def resolver(code):
+        calls.append(code)
+        return "Lei 10.637/2002 - PIS não-cumulativo"
+
+    generator = ReportGenerator(citation_resolver=resolver)
+    report = generator.generate_json_report(sample_nfe_with_errors)
+    md = generator.generate_markdown_report(sample_nfe_with_errors)
+
+    error_json = [e for e in report["errors"] if e["code"] == "PIS_001"][0]
+    assert error_json["legal_reference"] == "Lei 10.637/2002 - PIS não-cumulativo"
+    assert error_json["legal_reference_code"] == "LEI_10637"
+    assert "Lei 10.637/2002 - PIS não-cumulativo" in md
+    assert calls and set(calls) == {"LEI_10637"}
+
+
+def test_citacao_sem_resolver_usa_codigo(sample_nfe_with_errors):
+    """Sem resolver, o relatório mostra o código da referência"""
+    sample_nfe_with_errors.validation_errors = [ValidationError(
+        code="CFOP_001",
+        field="cfop",
+        message="CFOP inválido",
+        severity=Severity.CRITICAL,
+        legal_reference_code="SINIEF_0705"
+    )]
+
+    refs = ReportGenerator()._extract_legal_references(sample_nfe_with_errors.validation_errors)
+
+    assert refs == [{"reference": "SINIEF_0705", "article": None, "occurrences": 1}]
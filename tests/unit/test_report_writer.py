@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Testes dos relatórios gravados em streaming (JSON Lines, JSON, Markdown, CSV)
+"""
+import csv
+import gzip
+import json
+import pytest
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import (
+    NFeEntity, NFeItem, Empresa, ImpostoItem, ValidationError, Severity
+)
+from src.nfe_validator.infrastructure.validators.report_generator import ReportGenerator
+from src.nfe_validator.infrastructure.validators.report_writer import (
+    ERROR_COLUMNS, open_report_writer, compressed_path
+)
+
+
+def make_nfe(numero: int, errors: int = 0) -> NFeEntity:
+    item = NFeItem(
+        numero_item=1, codigo_produto="P1", descricao="Açúcar cristal", ncm="17019900", cfop="5101",
+        unidade="KG", quantidade=Decimal("1"), valor_unitario=Decimal("100"),
+        valor_total=Decimal("100"), impostos=ImpostoItem(),
+    )
+    nfe = NFeEntity(
+        chave_acesso=f"352301000000010000005500100000{numero:014d}", numero=str(numero), serie="1",
+        data_emissao=datetime(2023, 1, 15),
+        emitente=Empresa(cnpj="12345678000190", razao_social="USINA", uf="SP"),
+        destinatario=Empresa(cnpj="98765432000199", razao_social="CLIENTE", uf="PE"),
+        items=[item],
+    )
+    nfe.validation_errors = [
+        ValidationError(code="PIS_002", field="pis_aliquota", message="Alíquota PIS incorreta",
+                        severity=Severity.CRITICAL, item_numero=1, financial_impact=Decimal("10.50"))
+        for _ in range(errors)
+    ]
+    return nfe
+
+
+@pytest.fixture
+def nfes():
+    return [make_nfe(1), make_nfe(2, errors=2), make_nfe(3, errors=1)]
+
+
+# =====================================================
+# Formatos
+# =====================================================
+
+def test_jsonl_uma_linha_por_nfe(tmp_path, nfes):
+    """Cada linha é o generate_json_report de uma NF-e; tee repassa as NF-es"""
+    generator = ReportGenerator()
+    with open_report_writer('jsonl', tmp_path / "r.jsonl", generator) as writer:
+        passed = list(writer.tee(iter(nfes)))
+
+    assert passed == nfes
+    lines = (tmp_path / "r.jsonl").read_text(encoding="utf-8").splitlines()
+    reports = [json.loads(line) for line in lines]
+    assert [r['nfe_info']['numero'] for r in reports] == ["1", "2", "3"]
+    assert reports[1]['errors'] == generator.generate_json_report(nfes[1])['errors']
+    assert writer.summary()['nfes_with_errors'] == 2
+    assert writer.summary()['by_severity']['CRITICAL'] == 3
+    assert writer.summary()['financial_impact'] == pytest.approx(31.5)
+
+
+def test_json_array_e_vazio(tmp_path, nfes):
+    """Array JSON válido, inclusive sem NF-es"""
+    with open_report_writer('json', tmp_path / "r.json") as writer:
+        writer.write_all(nfes)
+    assert len(json.loads((tmp_path / "r.json").read_text(encoding="utf-8"))) == 3
+
+    with open_report_writer('json', tmp_path / "vazio.json"):
+        pass
+    assert json.loads((tmp_path / "vazio.json").read_text(encoding="utf-8")) == []
+
+
+def test_markdown_e_csv(tmp_path, nfes):
+    """Markdown só com NF-es com erro e resumo final; CSV com uma linha por erro"""
+    with open_report_writer('markdown', tmp_path / "r.md", title="Lote") as writer:
+        writer.write_all(nfes)
+    text = (tmp_path / "r.md").read_text(encoding="utf-8")
+    assert text.startswith("# Lote")
+    assert "**NF-es com problemas:** 2" in text.split("## Resumo do Lote")[1]
+
+    with open_report_writer('csv', tmp_path / "r.csv", source="jan.csv") as writer:
+        writer.write_all(nfes)
+    with open(tmp_path / "r.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ERROR_COLUMNS
+    assert len(rows) == 3
+    assert {row['arquivo'] for row in rows} == {"jan.csv"}
+
+
+# =====================================================
+# Compressão
+# =====================================================
+
+def test_gzip(tmp_path, nfes):
+    """Extensão .gz acrescentada; conteúdo igual ao não comprimido"""
+    with open_report_writer('jsonl', tmp_path / "r.jsonl", compression='gzip') as writer:
+        writer.write_all(nfes)
+
+    assert writer.path == tmp_path / "r.jsonl.gz"
+    with gzip.open(writer.path, 'rt', encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 3
+    assert compressed_path(tmp_path / "r.jsonl.gz", 'gzip') == tmp_path / "r.jsonl.gz"
+
+
+def test_zstd(tmp_path, nfes):
+    zstandard = pytest.importorskip("zstandard")
+    with open_report_writer('jsonl', tmp_path / "r.jsonl", compression='zstd') as writer:
+        writer.write_all(nfes)
+
+    with zstandard.ZstdDecompressor().stream_reader(open(writer.path, 'rb')) as reader:
+        assert len(reader.read().decode('utf-8').splitlines()) == 3
+
+
+def test_formato_ou_compressao_invalidos(tmp_path):
+    with pytest.raises(ValueError):
+        open_report_writer('xml', tmp_path / "r.xml")
+    with pytest.raises(ValueError):
+        open_report_writer('jsonl', tmp_path / "r.jsonl", compression='bz2')
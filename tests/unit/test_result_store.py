@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do armazenamento persistente de resultados (validation_log)
+"""
+import pytest
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.domain.entities.nfe_entity import (
+    NFeEntity, Empresa, ValidationError, ValidationStatus, Severity
+)
+from src.nfe_validator.infrastructure.persistence.result_store import ValidationResultStore
+
+
+def make_nfe(numero, errors, timestamp):
+    nfe = NFeEntity(
+        chave_acesso=f"3523010000000100000055001{numero:019d}",
+        numero=str(numero),
+        serie="1",
+        data_emissao=datetime(2023, 1, 15),
+        emitente=Empresa(cnpj="12345678000190", razao_social="Usina", uf="SP"),
+        destinatario=Empresa(cnpj="98765432000110", razao_social="Cliente", uf="PE"),
+        validation_status=ValidationStatus.VALID,
+        validation_timestamp=timestamp,
+    )
+    for code, severity, impact in errors:
+        nfe.add_validation_error(ValidationError(
+            code=code, field="impostos", message=f"Erro {code}", severity=severity,
+            expected_value="1.65%", actual_value="2.5%",
+            legal_reference_code="LEI_10637_2002",
+            financial_impact=Decimal(impact) if impact else None,
+            item_numero=1
+        ))
+    if errors and nfe.validation_status != ValidationStatus.INVALID:
+        nfe.validation_status = ValidationStatus.INVALID
+    return nfe
+
+
+@pytest.fixture
+def nfes():
+    """Lote com NF-es válidas e inválidas em datas diferentes"""
+    return [
+        make_nfe(1, [], datetime(2024, 1, 10, 9, 0)),
+        make_nfe(2, [("PIS_002", Severity.CRITICAL, "12.34"),
+                     ("COFINS_002", Severity.CRITICAL, "56.78")], datetime(2024, 1, 10, 18, 30)),
+        make_nfe(3, [("NCM_003", Severity.WARNING, None)], datetime(2024, 2, 1, 8, 0)),
+        make_nfe(4, [("PIS_002", Severity.CRITICAL, "1.005")], datetime(2024, 3, 5, 12, 0)),
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store em database temporário (schema criado a partir de schema.sql)"""
+    with ValidationResultStore(str(tmp_path / "results.db"), batch_size=2) as s:
+        yield s
+
+
+# =====================================================
+# Gravação
+# =====================================================
+
+def test_save_em_lote_wal(store, nfes):
+    """Gravação em lotes de batch_size, database em modo WAL"""
+    assert store.save(iter(nfes)) == 4
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert store.conn.execute("SELECT COUNT(*) FROM validation_log").fetchone()[0] == 4
+
+
+def test_erros_reconstruidos(store, nfes):
+    """errors_json preserva todos os campos dos ValidationError"""
+    store.save(nfes)
+    record = store.get_latest(nfes[1].chave_acesso)
+
+    assert record["status"] == "INVALID"
+    assert record["total_errors"] == 2
+    assert record["critical_count"] == 2
+    assert record["financial_impact"] == pytest.approx(69.12)
+    assert [repr(e) for e in record["errors"]] == [repr(e) for e in nfes[1].validation_errors]
+
+
+def test_add_pendente_visivel_na_consulta(store, nfes):
+    """Consultas gravam o buffer pendente antes de ler"""
+    store.add(nfes[0])
+    assert len(store.query()) == 1
+
+
+# =====================================================
+# Consulta
+# =====================================================
+
+def test_filtros(store, nfes):
+    """Filtros por chave, período, status e código de erro"""
+    store.save(nfes)
+    chaves = lambda records: sorted(r["nfe_chave"][-1] for r in records)
+
+    assert chaves(store.query(status="VALID")) == ["1"]
+    assert chaves(store.query(error_code="PIS_002")) == ["2", "4"]
+    assert chaves(store.query(start="2024-01-10", end="2024-01-10")) == ["1", "2"]
+    assert chaves(store.query(start=datetime(2024, 2, 1), status="INVALID")) == ["3", "4"]
+    assert chaves(store.query(chave=nfes[2].chave_acesso)) == ["3"]
+    assert "errors" not in store.query(include_errors=False)[0]
+    assert len(store.query(limit=1)) == 1
+
+
+def test_get_latest_revalidacao(store, nfes):
+    """Resultado mais recente prevalece para a mesma chave"""
+    store.save(nfes)
+    revalidated = make_nfe(2, [], datetime(2024, 4, 1))
+    revalidated.chave_acesso = nfes[1].chave_acesso
+    store.save([revalidated])
+
+    assert store.get_latest(nfes[1].chave_acesso)["status"] == "VALID"
+    assert store.get_latest("0" * 44) is None
+
+
+def test_summary(store, nfes):
+    """Agregados sem carregar registros"""
+    store.save(nfes)
+    summary = store.summary()
+
+    assert summary["total_nfes"] == 4
+    assert summary["by_status"] == {"VALID": 1, "INVALID": 3}
+    assert summary["by_error_code"] == {"PIS_002": 2, "COFINS_002": 1, "NCM_003": 1}
+    assert summary["critical_count"] == 3
+    assert summary["financial_impact"] == pytest.approx(70.125)
+
+    filtered = store.summary(error_code="PIS_002")
+    assert filtered["total_nfes"] == 2
+    assert filtered["by_error_code"]["PIS_002"] == 2
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do RuleSnapshot (regras fiscais em memória)
+"""
+import pytest
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.repositories.fiscal_repository import FiscalRepository
+
+
+DB_PATH = Path(__file__).parent.parent.parent / "src" / "database" / "rules.db"
+
+
+@pytest.fixture
+def snapshot_repo():
+    """Repositório respondendo pelo snapshot"""
+    return FiscalRepository(use_local_csv=False)
+
+
+@pytest.fixture
+def sql_repo():
+    """Repositório consultando o SQLite a cada chamada"""
+    return FiscalRepository(use_local_csv=False, use_snapshot=False)
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """Cópia do rules.db para testes com escrita"""
+    path = tmp_path / "rules.db"
+    shutil.copy(DB_PATH, path)
+    return path
+
+
+def all_values(repo, table, column):
+    return [row[0] for row in repo.conn.execute(f"SELECT DISTINCT {column} FROM {table}")]
+
+
+# =====================================================
+# Paridade com consultas SQL
+# =====================================================
+
+def test_paridade_ncm_cst_cfop(snapshot_repo, sql_repo):
+    """Snapshot retorna as mesmas regras que o SQLite"""
+    for ncm in all_values(sql_repo, "ncm_rules", "ncm") + ["00000000"]:
+        assert snapshot_repo.get_ncm_rule(ncm) == sql_repo.get_ncm_rule(ncm)
+
+    for cst in all_values(sql_repo, "pis_cofins_rules", "cst") + ["99", ""]:
+        assert snapshot_repo.get_pis_cofins_rule(cst) == sql_repo.get_pis_cofins_rule(cst)
+        assert snapshot_repo.is_cst_valid(cst) == sql_repo.is_cst_valid(cst)
+
+    for cfop in all_values(sql_repo, "cfop_rules", "cfop") + ["9999"]:
+        assert snapshot_repo.get_cfop_rule(cfop) == sql_repo.get_cfop_rule(cfop)
+
+    assert snapshot_repo.get_valid_csts() == sql_repo.get_valid_csts()
+
+
+def test_paridade_regras_estaduais(snapshot_repo, sql_repo):
+    """Regras estaduais por UF e por (UF, NCM)"""
+    ncms = all_values(sql_repo, "ncm_rules", "ncm") + [None, "99999999"]
+    for uf in ["SP", "PE", "RJ"]:
+        for ncm in ncms:
+            expected = sql_repo.get_state_rules(uf, ncm)
+            result = snapshot_repo.get_state_rules(uf, ncm)
+            assert sorted(map(repr, result)) == sorted(map(repr, expected))
+            assert [r["override_type"] for r in result] == [r["override_type"] for r in expected]
+
+
+def test_paridade_referencias_legais(snapshot_repo, sql_repo):
+    """Referências legais e citações formatadas"""
+    for code in all_values(sql_repo, "legal_refs", "code") + ["INEXISTENTE"]:
+        assert snapshot_repo.get_legal_reference(code) == sql_repo.get_legal_reference(code)
+        assert snapshot_repo.format_legal_citation(code) == sql_repo.format_legal_citation(code)
+
+
+def test_retorna_copias(snapshot_repo):
+    """Alterar o dict retornado não altera o snapshot"""
+    cst = snapshot_repo.get_valid_csts()[0]
+    rule = snapshot_repo.get_pis_cofins_rule(cst)
+    rule["description"] = "alterado"
+
+    assert snapshot_repo.get_pis_cofins_rule(cst)["description"] != "alterado"
+
+
+# =====================================================
+# Refresh por versão do database
+# =====================================================
+
+def test_refresh_quando_metadata_muda(db_copy):
+    """Snapshot só é recarregado quando db_metadata muda"""
+    repo = FiscalRepository(str(db_copy), use_local_csv=False)
+    cst = repo.get_valid_csts()[0]
+
+    assert repo.refresh_if_changed() is False
+
+    with sqlite3.connect(db_copy) as conn:
+        conn.execute("UPDATE pis_cofins_rules SET description = 'nova' WHERE cst = ?", (cst,))
+
+    # Sem mudança de versão, snapshot continua com a regra anterior
+    assert repo.refresh_if_changed() is False
+    assert repo.get_pis_cofins_rule(cst)["description"] != "nova"
+
+    with sqlite3.connect(db_copy) as conn:
+        conn.execute("UPDATE db_metadata SET value = '2099-01-01' WHERE key = 'last_population'")
+
+    assert repo.refresh_if_changed() is True
+    assert repo.get_pis_cofins_rule(cst)["description"] == "nova"
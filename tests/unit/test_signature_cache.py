@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da deduplicação de regras por assinatura de item
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.nfe_validator.infrastructure.parsers.csv_parser import NFeCSVParser
+from src.nfe_validator.domain.services.validation_pipeline import ValidationPipeline
+from src.nfe_validator.domain.services.signature_cache import SignatureRuleCache
+from tests.nfe_csv import nfe_csv_row, write_nfe_csv
+
+
+# (descricao, ncm, cfop, pis_cst, pis_aliquota, cofins_cst, cofins_aliquota)
+ITEM_VARIANTS = [
+    ("Açúcar cristal", "17019900", "5101", "01", "1.65", "01", "7.6"),
+    ("Açúcar refinado", "17019900", "6101", "01", "1.65", "01", "7.6"),
+    ("Parafuso", "17019900", "5101", "01", "2.5", "01", "9.0"),
+    ("Açúcar VHP", "17011400", "7101", "01", "1.65", "06", "0"),
+    ("Açúcar demerara", "99999999", "5102", "99", "0", "99", "0"),
+    ("Etanol", "22071000", "5999", "06", "0", "06", "0"),
+    ("Açúcar", "1701", "51", "XX", "1.65", "01", "7.6"),
+]
+
+
+@pytest.fixture
+def lote_csv(tmp_path):
+    """Lote com assinaturas repetidas e valores por item diferentes"""
+    rows = []
+    for nfe in range(1, 25):
+        uf_emit = ["SP", "PE", "MG"][nfe % 3]
+        uf_dest = ["SP", "PE", "RJ", "SP"][nfe % 4]
+        for item in range(1, 5):
+            desc, ncm, cfop, pis_cst, pis_aliq, cofins_cst, cofins_aliq = \
+                ITEM_VARIANTS[(nfe + item) % len(ITEM_VARIANTS)]
+            valor = 100 * item + nfe
+            pis_valor = ["5.78", "0", f"{valor * 0.0165:.2f}"][item % 3]
+            rows.append(nfe_csv_row(
+                nfe, item, uf_emitente=uf_emit, uf_destinatario=uf_dest,
+                descricao=desc, ncm=ncm, cfop=cfop,
+                quantidade="1", valor_unitario=valor, valor_total=valor,
+                pis_cst=pis_cst, pis_aliquota=pis_aliq, pis_valor=pis_valor,
+                cofins_cst=cofins_cst, cofins_aliquota=cofins_aliq,
+                cofins_valor=f"{valor * 0.076:.2f}",
+            ))
+    return write_nfe_csv(tmp_path / "lote.csv", rows)
+
+
+def validate_all(pipeline, path):
+    return [pipeline.validate(nfe) for nfe in NFeCSVParser().parse_csv(str(path))]
+
+
+# =====================================================
+# Paridade com validação item a item
+# =====================================================
+
+def test_paridade_com_validacao_por_item(lote_csv, fiscal_repo):
+    """Erros idênticos (todos os campos, mesma ordem) com e sem deduplicação"""
+    per_item = validate_all(ValidationPipeline(fiscal_repo, dedup=False), lote_csv)
+    deduped = validate_all(ValidationPipeline(fiscal_repo), lote_csv)
+
+    expected = [list(map(repr, nfe.validation_errors)) for nfe in per_item]
+    assert [list(map(repr, nfe.validation_errors)) for nfe in deduped] == expected
+
+    codes = {e.code for nfe in per_item for e in nfe.validation_errors}
+    assert {"PIS_001", "PIS_003", "PIS_002", "CFOP_003"} <= codes
+
+
+def test_validadores_isolados_sem_rules(lote_csv, fiscal_repo):
+    """validate(item, nfe) sem regras resolvidas continua consultando o repositório"""
+    pipeline = ValidationPipeline(fiscal_repo)
+    nfe = NFeCSVParser().parse_csv(str(lote_csv))[0]
+    resolved = pipeline.signature_cache.resolve_items(nfe)
+
+    for index, validator in enumerate(pipeline.item_validators):
+        for item, item_rules in zip(nfe.items, resolved):
+            assert repr(validator.validate(item, nfe)) == \
+                repr(validator.validate(item, nfe, rules=item_rules[index]))
+
+
+# =====================================================
+# Estatísticas e invalidação
+# =====================================================
+
+def test_uma_resolucao_por_assinatura(lote_csv, fiscal_repo):
+    """Repositório é consultado uma vez por assinatura distinta"""
+    calls = []
+    original = fiscal_repo.get_ncm_rule
+    fiscal_repo.get_ncm_rule = lambda ncm, **kwargs: calls.append(ncm) or original(ncm, **kwargs)
+
+    pipeline = ValidationPipeline(fiscal_repo)
+    nfes = validate_all(pipeline, lote_csv)
+
+    signatures = {
+        SignatureRuleCache.signature(item, nfe) for nfe in nfes for item in nfe.items
+    }
+    stats = pipeline.dedup_stats()
+
+    assert stats["items"] == 96
+    assert stats["signatures"] == len(signatures)
+    assert stats["dedup_ratio"] == pytest.approx(1 - len(signatures) / 96)
+    assert len(calls) <= len(signatures)
+
+
+def test_sem_dedup_estatisticas_zeradas(lote_csv, fiscal_repo):
+    """dedup=False não mantém cache"""
+    pipeline = ValidationPipeline(fiscal_repo, dedup=False)
+    validate_all(pipeline, lote_csv)
+
+    assert pipeline.signature_cache is None
+    assert pipeline.dedup_stats()["items"] == 0
+
+
+def test_cache_descartado_ao_recarregar_snapshot(lote_csv, fiscal_repo):
+    """reload_rules gera novo snapshot e força nova resolução"""
+    pipeline = ValidationPipeline(fiscal_repo)
+    nfe = NFeCSVParser().parse_csv(str(lote_csv))[0]
+
+    pipeline.signature_cache.resolve_items(nfe)
+    evaluations = pipeline.signature_cache.evaluations
+    pipeline.signature_cache.resolve_items(nfe)
+    assert pipeline.signature_cache.evaluations == evaluations
+
+    fiscal_repo.reload_rules()
+    pipeline.signature_cache.resolve_items(nfe)
+    assert pipeline.signature_cache.evaluations > evaluations